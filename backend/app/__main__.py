@@ -1,9 +1,43 @@
 """
 作为模块运行时启动服务器
-python -m app
+python -m app          启动API服务器（默认在进程内运行任务worker）
+python -m app worker   只启动爬虫任务worker，领取并执行数据库任务队列中的任务
 """
 
+
+def run_worker():
+    """启动独立的爬虫任务worker进程"""
+    import signal
+    import logging
+
+    from .config import settings
+
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level.upper()),
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    from . import models  # noqa: F401  注册全部模型（关系映射需要）
+    from .services.task_queue_service import get_task_worker
+
+    worker = get_task_worker()
+
+    def handle_signal(signum, frame):
+        logging.getLogger(__name__).info(f"收到信号 {signum}，停止任务worker")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    worker.run_forever()
+
+
 if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "worker":
+        run_worker()
+        sys.exit(0)
+
     from .main import app
     import uvicorn
 
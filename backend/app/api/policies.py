@@ -8,14 +8,15 @@ from sqlalchemy.orm import Session
 import logging
 import os
 
-from ..database import get_db
-from ..middleware.auth import get_current_user
+from ..database import ReadSession, get_db, get_read_db
+from ..middleware.auth import get_current_user, get_current_user_async
 from ..models.user import User
 from ..schemas.policy import (
     PolicyListItem,
     PolicyListResponse,
     PolicySearchRequest,
     PolicyDetailResponse,
+    PolicyFacetsResponse,
     AttachmentResponse,
 )
 from ..services.policy_service import PolicyService
@@ -26,9 +27,12 @@ policy_service = PolicyService()
 search_service = SearchService()
 logger = logging.getLogger(__name__)
 
+# 列表只加载列表项需要的列，正文等大字段不从数据库读出
+POLICY_LIST_COLUMNS = tuple(PolicyListItem.model_fields)
+
 
 @router.get("/", response_model=PolicyListResponse)
-def get_policies(
+async def get_policies(
     skip: int = Query(0, ge=0, description="跳过数量"),
     limit: int = Query(20, ge=1, le=100, description="每页数量"),
     category: Optional[str] = Query(None, description="分类筛选"),
@@ -44,124 +48,202 @@ def get_policies(
     use_fulltext: bool = Query(
         False, description="是否使用全文搜索（当提供keyword时）"
     ),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(
+        None, description="分页游标（上一页返回的next_cursor，优先于skip）"
+    ),
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """获取政策列表（带筛选和分页）"""
     try:
-        # 过滤空字符串参数，并转换日期格式
-        from datetime import date
-
-        parsed_start_date = None
-        parsed_end_date = None
-
-        if start_date and start_date.strip():
-            try:
-                parsed_start_date = date.fromisoformat(start_date.strip())
-            except ValueError:
-                logger.warning(f"无效的开始日期格式: {start_date}")
-
-        if end_date and end_date.strip():
-            try:
-                parsed_end_date = date.fromisoformat(end_date.strip())
-            except ValueError:
-                logger.warning(f"无效的结束日期格式: {end_date}")
-        # 过滤空字符串
-        filtered_category = category.strip() if category and category.strip() else None
-        filtered_level = level.strip() if level and level.strip() else None
-        filtered_keyword = keyword.strip() if keyword and keyword.strip() else None
-        filtered_publisher = (
-            publisher.strip() if publisher and publisher.strip() else None
-        )
-        filtered_source_name = (
-            source_name.strip() if source_name and source_name.strip() else None
+        run = _search_runner(db, keyword if use_fulltext else None)
+        return await run(
+            _list_policies,
+            skip=skip,
+            limit=limit,
+            category=category,
+            level=level,
+            start_date=start_date,
+            end_date=end_date,
+            keyword=keyword,
+            publisher=publisher,
+            source_name=source_name,
+            task_id=task_id,
+            use_fulltext=use_fulltext,
+            cursor=cursor,
         )
-
-        # 统一搜索API：如果提供关键词且启用全文搜索，使用全文搜索；否则使用普通筛选
-        if filtered_keyword and use_fulltext:
-            # 使用全文搜索
-            policies, total = search_service.search(
-                db=db,
-                query=filtered_keyword,
-                skip=skip,
-                limit=limit,
-                category=filtered_category,
-                level=filtered_level,
-                start_date=(
-                    parsed_start_date.strftime("%Y-%m-%d")
-                    if parsed_start_date
-                    else None
-                ),
-                end_date=(
-                    parsed_end_date.strftime("%Y-%m-%d") if parsed_end_date else None
-                ),
-            )
-        else:
-            # 使用普通筛选
-            policies, total = policy_service.get_policies(
-                db=db,
-                skip=skip,
-                limit=limit,
-                category=filtered_category,
-                level=filtered_level,
-                start_date=parsed_start_date,
-                end_date=parsed_end_date,
-                keyword=filtered_keyword,
-                publisher=filtered_publisher,
-                source_name=filtered_source_name,
-                task_id=task_id,
-            )
-
-        # 安全序列化，处理可能的None值
-        items = []
-        for policy in policies:
-            try:
-                item_dict = PolicyListItem.model_validate(policy).model_dump()
-                # 添加 publish_date 字段用于前端兼容（前端期望 publish_date 而不是 pub_date）
-                if item_dict.get("pub_date"):
-                    item_dict["publish_date"] = (
-                        item_dict["pub_date"].isoformat()
-                        if hasattr(item_dict["pub_date"], "isoformat")
-                        else str(item_dict["pub_date"])
-                    )
-                else:
-                    item_dict["publish_date"] = None
-                # 添加 law_type 字段（前端期望 law_type 而不是 level）
-                item_dict["law_type"] = item_dict.get("level")
-                items.append(item_dict)
-            except Exception as e:
-                logger.warning(f"序列化政策失败 (ID: {policy.id}): {e}")
-                continue
-
-        # 注意：items 现在是字典列表，但 PolicyListResponse 期望 PolicyListItem 列表
-        # 由于 Pydantic 会自动转换，我们可以直接使用字典
-        # 但为了类型安全，我们需要手动构造响应
-        from typing import Any, Dict
-
-        response_dict: Dict[str, Any] = {
-            "items": items,
-            "total": total,
-            "skip": skip,
-            "limit": limit,
-        }
-
-        # 使用 model_validate 来确保类型正确
-        return PolicyListResponse.model_validate(response_dict)
+    except ValueError as e:
+        # 分页游标无效
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取政策列表失败: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"获取政策列表失败: {str(e)}")
 
 
+def _search_runner(db: ReadSession, keyword: Optional[str]):
+    """选择执行查询的方式
+
+    二元组引擎的检索（BM25打分、同步最近更新的政策、索引锁）是CPU密集操作，
+    在线程池中执行，不占用事件循环；其他查询以数据库IO为主，使用 run。
+    """
+    if keyword and keyword.strip() and search_service.bigram_enabled:
+        return db.run_blocking
+    return db.run
+
+
+def _list_policies(
+    db: Session,
+    skip: int,
+    limit: int,
+    category: Optional[str],
+    level: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    keyword: Optional[str],
+    publisher: Optional[str],
+    source_name: Optional[str],
+    task_id: Optional[int],
+    use_fulltext: bool,
+    cursor: Optional[str],
+) -> PolicyListResponse:
+    """查询并序列化政策列表（在只读会话中执行）"""
+    # 过滤空字符串参数，并转换日期格式
+    from datetime import date
+
+    parsed_start_date = None
+    parsed_end_date = None
+
+    if start_date and start_date.strip():
+        try:
+            parsed_start_date = date.fromisoformat(start_date.strip())
+        except ValueError:
+            logger.warning(f"无效的开始日期格式: {start_date}")
+
+    if end_date and end_date.strip():
+        try:
+            parsed_end_date = date.fromisoformat(end_date.strip())
+        except ValueError:
+            logger.warning(f"无效的结束日期格式: {end_date}")
+    # 过滤空字符串
+    filtered_category = category.strip() if category and category.strip() else None
+    filtered_level = level.strip() if level and level.strip() else None
+    filtered_keyword = keyword.strip() if keyword and keyword.strip() else None
+    filtered_publisher = publisher.strip() if publisher and publisher.strip() else None
+    filtered_source_name = (
+        source_name.strip() if source_name and source_name.strip() else None
+    )
+
+    # 统一搜索API：如果提供关键词且启用全文搜索，使用全文搜索；否则使用普通筛选
+    if filtered_keyword and use_fulltext:
+        # 使用全文搜索
+        policies, total = search_service.search(
+            db=db,
+            query=filtered_keyword,
+            skip=skip,
+            limit=limit,
+            category=filtered_category,
+            level=filtered_level,
+            start_date=(
+                parsed_start_date.strftime("%Y-%m-%d") if parsed_start_date else None
+            ),
+            end_date=(
+                parsed_end_date.strftime("%Y-%m-%d") if parsed_end_date else None
+            ),
+            cursor=cursor,
+            columns=POLICY_LIST_COLUMNS,
+        )
+    else:
+        # 使用普通筛选
+        policies, total = policy_service.get_policies(
+            db=db,
+            skip=skip,
+            limit=limit,
+            category=filtered_category,
+            level=filtered_level,
+            start_date=parsed_start_date,
+            end_date=parsed_end_date,
+            keyword=filtered_keyword,
+            publisher=filtered_publisher,
+            source_name=filtered_source_name,
+            task_id=task_id,
+            cursor=cursor,
+            columns=POLICY_LIST_COLUMNS,
+        )
+
+    # 安全序列化，处理可能的None值
+    items = []
+    for policy in policies:
+        try:
+            item_dict = PolicyListItem.model_validate(policy).model_dump()
+            # 添加 publish_date 字段用于前端兼容（前端期望 publish_date 而不是 pub_date）
+            if item_dict.get("pub_date"):
+                item_dict["publish_date"] = (
+                    item_dict["pub_date"].isoformat()
+                    if hasattr(item_dict["pub_date"], "isoformat")
+                    else str(item_dict["pub_date"])
+                )
+            else:
+                item_dict["publish_date"] = None
+            # 添加 law_type 字段（前端期望 law_type 而不是 level）
+            item_dict["law_type"] = item_dict.get("level")
+            items.append(item_dict)
+        except Exception as e:
+            logger.warning(f"序列化政策失败 (ID: {policy.id}): {e}")
+            continue
+
+    # 注意：items 现在是字典列表，但 PolicyListResponse 期望 PolicyListItem 列表
+    # 由于 Pydantic 会自动转换，我们可以直接使用字典
+    # 但为了类型安全，我们需要手动构造响应
+    from typing import Any, Dict
+
+    response_dict: Dict[str, Any] = {
+        "items": items,
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "total_is_estimate": getattr(policies, "total_is_estimate", False),
+        "next_cursor": getattr(policies, "next_cursor", None),
+    }
+
+    # 使用 model_validate 来确保类型正确
+    return PolicyListResponse.model_validate(response_dict)
+
+
 @router.post("/search", response_model=PolicyListResponse)
-def search_policies(
+async def search_policies(
     request: PolicySearchRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """搜索政策（全文搜索）"""
+    try:
+        run = _search_runner(db, request.keyword)
+        return await run(_search_response, request)
+    except ValueError as e:
+        # 分页游标无效
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _search_response(db: Session, request: PolicySearchRequest) -> PolicyListResponse:
+    """执行搜索并序列化结果（在只读会话中执行）"""
     # 如果有搜索关键词，使用全文搜索；否则使用普通筛选
+    policies, total = _search_policies(request, db)
+    items = [PolicyListItem.model_validate(policy) for policy in policies]
+
+    return PolicyListResponse(
+        items=items,
+        total=total,
+        skip=request.skip,
+        limit=request.limit,
+        total_is_estimate=getattr(policies, "total_is_estimate", False),
+        next_cursor=getattr(policies, "next_cursor", None),
+    )
+
+
+def _search_policies(request: PolicySearchRequest, db: Session):
+    """按搜索请求查询政策，返回 (政策列表, 总数)"""
     if request.keyword:
-        policies, total = search_service.search(
+        return search_service.search(
             db=db,
             query=request.keyword,
             skip=request.skip,
@@ -174,38 +256,44 @@ def search_policies(
             end_date=(
                 request.end_date.strftime("%Y-%m-%d") if request.end_date else None
             ),
-        )
-    else:
-        # 无关键词时使用普通筛选
-        policies, total = policy_service.get_policies(
-            db=db,
-            skip=request.skip,
-            limit=request.limit,
-            category=request.category,
-            level=request.level,
-            start_date=request.start_date,
-            end_date=request.end_date,
-            keyword=None,
+            cursor=request.cursor,
+            columns=POLICY_LIST_COLUMNS,
         )
 
-    items = [PolicyListItem.model_validate(policy) for policy in policies]
-
-    return PolicyListResponse(
-        items=items, total=total, skip=request.skip, limit=request.limit
+    # 无关键词时使用普通筛选
+    return policy_service.get_policies(
+        db=db,
+        skip=request.skip,
+        limit=request.limit,
+        category=request.category,
+        level=request.level,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        keyword=None,
+        cursor=request.cursor,
+        columns=POLICY_LIST_COLUMNS,
     )
 
 
 @router.get("/{policy_id}", response_model=PolicyDetailResponse)
-def get_policy(
+async def get_policy(
     policy_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """获取政策详情"""
+    detail_dict = await db.run(_policy_detail, policy_id)
+    if detail_dict is None:
+        raise HTTPException(status_code=404, detail="政策不存在")
+    return detail_dict
+
+
+def _policy_detail(db: Session, policy_id: int) -> Optional[Dict[str, Any]]:
+    """查询并序列化政策详情（在只读会话中执行），政策不存在时返回None"""
     policy = policy_service.get_policy_by_id(db, policy_id)
 
     if not policy:
-        raise HTTPException(status_code=404, detail="政策不存在")
+        return None
 
     # 获取附件
     from ..models.attachment import Attachment
@@ -285,31 +373,47 @@ def delete_policy(
 
 
 @router.get("/meta/categories", response_model=List[str])
-def get_categories(
+async def get_categories(
     source_name: Optional[str] = Query(
         None, description="数据源名称，如果提供则只返回该数据源的分类"
     ),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """获取分类列表（可选按数据源筛选）"""
-    return policy_service.get_categories(db, source_name=source_name)
+    return await db.run(policy_service.get_categories, source_name=source_name)
+
+
+@router.get("/meta/facets", response_model=PolicyFacetsResponse)
+async def get_facets(
+    source_name: Optional[str] = Query(
+        None, description="数据源名称，如果提供则分类和效力级别只统计该数据源"
+    ),
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    """获取筛选项及各项的政策数量（筛选面板使用）"""
+    return await db.run(
+        policy_service.facet_service.get_facets, source_name=source_name
+    )
 
 
 @router.get("/meta/levels", response_model=List[str])
-def get_levels(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+async def get_levels(
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """获取所有效力级别列表"""
-    return policy_service.get_levels(db)
+    return await db.run(policy_service.get_levels)
 
 
 @router.get("/meta/source-names", response_model=List[str])
-def get_source_names(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+async def get_source_names(
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """获取所有数据源名称列表"""
-    return policy_service.get_source_names(db)
+    return await db.run(policy_service.get_source_names)
 
 
 @router.post("/search/rebuild-index")
@@ -469,15 +573,10 @@ def download_attachment(
     storage_service = StorageService()
 
     # 获取附件文件路径（使用policy的task_id，确保文件路径正确）
-    file_path = None
-    if attachment.file_path and os.path.exists(attachment.file_path):
-        file_path = attachment.file_path
-    elif attachment.file_s3_key:
-        # 从S3下载
-        file_path = storage_service.get_attachment_file_path(
-            policy_id, attachment.file_name, task_id=policy.task_id
-        )
-    else:
+    file_path = storage_service.get_attachment_record_path(
+        attachment, task_id=policy.task_id
+    )
+    if not file_path:
         # 尝试从原始URL下载（如果文件未保存）
         logger.warning(f"附件 {attachment_id} 的文件路径不存在，尝试从URL下载")
         # 这里可以添加从URL下载的逻辑，但通常附件应该已经保存
@@ -485,11 +584,15 @@ def download_attachment(
     if not file_path or not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="附件文件不存在")
 
-    # 返回文件
+    # 返回文件（发送完成后删除内容块临时文件）
     from fastapi.responses import FileResponse
+    from starlette.background import BackgroundTask
 
     return FileResponse(
-        file_path, media_type="application/octet-stream", filename=attachment.file_name
+        file_path,
+        media_type="application/octet-stream",
+        filename=attachment.file_name,
+        background=BackgroundTask(storage_service.release_attachment_path, file_path),
     )
 
 
@@ -569,16 +672,10 @@ async def download_attachments_batch(
                 files_added = 0
 
                 for attachment in attachments:
-                    file_path = None
-
-                    # 尝试获取文件路径
-                    if attachment.file_path and os.path.exists(attachment.file_path):
-                        file_path = attachment.file_path
-                    elif attachment.file_s3_key:
-                        # 从S3下载
-                        file_path = storage_service.get_attachment_file_path(
-                            policy_id, attachment.file_name, task_id=policy.task_id
-                        )
+                    # 尝试获取文件路径（内容块存储、本地或S3）
+                    file_path = storage_service.get_attachment_record_path(
+                        attachment, task_id=policy.task_id
+                    )
 
                     if file_path and os.path.exists(file_path):
                         # 添加到zip包中
@@ -588,7 +685,10 @@ async def download_attachments_batch(
                             base, ext = os.path.splitext(arcname)
                             arcname = f"{base}_{files_added + 1}{ext}"
 
-                        zip_file.write(file_path, arcname)
+                        try:
+                            zip_file.write(file_path, arcname)
+                        finally:
+                            storage_service.release_attachment_path(file_path)
                         files_added += 1
                         logger.debug(f"添加文件到zip: {arcname}")
                     else:
@@ -91,6 +91,8 @@ def get_scheduler_status(
         return {
             "enabled": is_enabled,
             "running": is_running,
+            # 多进程部署时只有leader进程运行调度器，其他进程待命
+            "leader": scheduler_service.is_leader(),
             "message": (
                 "定时任务功能已启用"
                 if is_enabled
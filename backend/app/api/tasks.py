@@ -2,31 +2,59 @@
 任务API路由
 """
 
-from typing import Optional, Dict, List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from typing import Optional, Dict, Iterator, List, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session, selectinload
 import logging
-import zipfile
 import io
 import os
+import itertools
 import asyncio
 import json
+import hashlib
 from datetime import datetime, timedelta, timezone
 
-from ..database import get_db
-from ..middleware.auth import get_current_user
+from ..database import ReadSession, get_db, get_read_db
+from ..middleware.auth import get_current_user, get_current_user_async
 from ..models.user import User
 from ..models.task import Task, TaskPolicy
 from ..models.policy import Policy
-from ..schemas.task import TaskCreate, TaskResponse, TaskListItem, TaskListResponse
+from ..schemas.task import (
+    TaskCreate,
+    TaskResponse,
+    TaskListItem,
+    TaskListResponse,
+    TaskFilePurgeResponse,
+    TaskQueueEntry,
+    TaskProgressDelta,
+)
 from ..services.task_service import TaskService
+from ..services.task_queue_service import get_task_queue_service
+from ..services.progress_buffer import progress_delta
+from ..services.progress_bus import get_progress_bus, sse_frame
 from ..services.storage_service import StorageService
+from ..services.zip_stream import stream_zip
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 task_service = TaskService()
 logger = logging.getLogger(__name__)
 
+# 列表只加载列表项需要的列，任务配置和进度消息等字段不从数据库读出
+TASK_LIST_COLUMNS = tuple(TaskListItem.model_fields)
+
+
+def _task_response(db: Session, task: Task) -> TaskResponse:
+    """任务详情，已启动的任务附带队列状态、排队位置和预计开始时间"""
+    response = TaskResponse.model_validate(task)
+    if task.status == "running":
+        entry = get_task_queue_service().get_queue_entry(db, task.id)
+        if entry:
+            response.queue_status = entry["status"]
+            response.queue_position = entry["position"]
+            response.estimated_start_time = entry["estimated_start_time"]
+    return response
+
 
 def _generate_markdown_from_policy(policy) -> str:
     """从政策对象生成Markdown内容"""
@@ -184,7 +212,7 @@ def create_task(
         # 在序列化前确保所有字段都已加载（避免延迟加载问题）
         _ = task.id, task.task_name, task.task_type, task.status, task.created_at
 
-        return TaskResponse.model_validate(task)
+        return _task_response(db, task)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -193,68 +221,190 @@ def create_task(
 
 
 @router.get("/", response_model=TaskListResponse)
-def get_tasks(
+async def get_tasks(
     skip: int = Query(0, ge=0, description="跳过数量"),
     limit: int = Query(20, ge=1, le=100, description="每页数量"),
     task_type: Optional[str] = Query(None, description="任务类型筛选"),
     status: Optional[str] = Query(None, description="状态筛选"),
     completed_only: bool = Query(False, description="只返回已完成的任务"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(
+        None, description="分页游标（上一页返回的next_cursor，优先于skip）"
+    ),
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """获取任务列表"""
     try:
-        # 如果请求只返回已完成的任务，设置status参数
-        actual_status = status
-        if completed_only:
-            actual_status = "completed"
-
-        tasks, total = task_service.get_tasks(
-            db=db,
+        return await db.run(
+            _list_tasks,
             skip=skip,
             limit=limit,
             task_type=task_type,
-            status=actual_status,
+            status=status,
             completed_only=completed_only,
+            cursor=cursor,
         )
-
-        # 在序列化前确保所有字段都已加载
-        items = []
-        for task in tasks:
-            try:
-                # 访问所有需要的字段以触发加载
-                _ = (
-                    task.id,
-                    task.task_name,
-                    task.task_type,
-                    task.status,
-                    task.created_at,
-                )
-                item = TaskListItem.model_validate(task)
-                items.append(item)
-            except Exception as e:
-                logger.warning(f"序列化任务失败 (ID: {task.id}): {e}")
-                continue
-
-        return TaskListResponse(items=items, total=total, skip=skip, limit=limit)
+    except ValueError as e:
+        # 分页游标无效
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取任务列表失败: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"获取任务列表失败: {str(e)}")
 
 
+def _list_tasks(
+    db: Session,
+    skip: int,
+    limit: int,
+    task_type: Optional[str],
+    status: Optional[str],
+    completed_only: bool,
+    cursor: Optional[str],
+) -> TaskListResponse:
+    """查询并序列化任务列表（在只读会话中执行）"""
+    # 如果请求只返回已完成的任务，设置status参数
+    actual_status = status
+    if completed_only:
+        actual_status = "completed"
+
+    tasks, total = task_service.get_tasks(
+        db=db,
+        skip=skip,
+        limit=limit,
+        task_type=task_type,
+        status=actual_status,
+        completed_only=completed_only,
+        cursor=cursor,
+        columns=TASK_LIST_COLUMNS,
+    )
+
+    # 在序列化前确保所有字段都已加载
+    items = []
+    for task in tasks:
+        try:
+            # 访问所有需要的字段以触发加载
+            _ = (
+                task.id,
+                task.task_name,
+                task.task_type,
+                task.status,
+                task.created_at,
+            )
+            item = TaskListItem.model_validate(task)
+            items.append(item)
+        except Exception as e:
+            logger.warning(f"序列化任务失败 (ID: {task.id}): {e}")
+            continue
+
+    return TaskListResponse(
+        items=items,
+        total=total,
+        skip=skip,
+        limit=limit,
+        next_cursor=getattr(tasks, "next_cursor", None),
+    )
+
+
+@router.get("/queue", response_model=List[TaskQueueEntry])
+async def get_task_queue(
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    """获取任务队列（执行中和排队中的任务、排队位置和预计开始时间）"""
+    return await db.run(lambda session: get_task_queue_service().get_queue(session))
+
+
+@router.get("/purges/{purge_id}", response_model=TaskFilePurgeResponse)
+async def get_task_file_purge(
+    purge_id: int,
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    """获取删除任务后的文件清理进度"""
+    from ..services.file_purge_service import get_file_purge_service
+
+    def load(session: Session) -> Optional[TaskFilePurgeResponse]:
+        purge = get_file_purge_service().get_purge(session, purge_id)
+        return TaskFilePurgeResponse.model_validate(purge) if purge else None
+
+    purge = await db.run(load)
+    if not purge:
+        raise HTTPException(status_code=404, detail="文件清理作业不存在")
+
+    return purge
+
+
 @router.get("/{task_id}", response_model=TaskResponse)
-def get_task(
+async def get_task(
     task_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """获取任务详情"""
-    task = task_service.get_task(db, task_id)
 
+    def load(session: Session) -> Optional[TaskResponse]:
+        task = task_service.get_task(session, task_id)
+        return _task_response(session, task) if task else None
+
+    task = await db.run(load)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
 
-    return TaskResponse.model_validate(task)
+    return task
+
+
+def _progress_etag(task_id: int, row, since: Optional[int]) -> str:
+    """增量进度的ETag（序号、状态、计数器或 since 变化时改变）"""
+    digest = hashlib.md5(
+        json.dumps([row.status, row.progress_counters, since], sort_keys=True).encode()
+    ).hexdigest()[:16]
+    return f'W/"{task_id}-{row.progress_seq or 0}-{digest}"'
+
+
+@router.get("/{task_id}/progress", response_model=TaskProgressDelta)
+async def get_task_progress(
+    task_id: int,
+    request: Request,
+    response: Response,
+    since: Optional[int] = Query(None, ge=0, description="已收到的最后进度序号"),
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    """获取任务的增量进度（since 之后的新进度行和变化过的计数器）
+
+    响应带ETag，进度没有变化时对 If-None-Match 返回304。
+    """
+
+    def load(session: Session):
+        return (
+            session.query(
+                Task.status,
+                Task.progress_message,
+                Task.progress_seq,
+                Task.progress_counters,
+            )
+            .filter(Task.id == task_id)
+            .first()
+        )
+
+    row = await db.run(load)
+    if not row:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    etag = _progress_etag(task_id, row, since)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return TaskProgressDelta(
+        task_id=task_id,
+        status=row.status,
+        **progress_delta(
+            row.progress_message, row.progress_seq, row.progress_counters, since
+        ),
+    )
 
 
 @router.post("/{task_id}/start", response_model=TaskResponse)
@@ -267,7 +417,7 @@ def start_task(
     """启动任务"""
     try:
         task = task_service.start_task(db, task_id, background=background)
-        return TaskResponse.model_validate(task)
+        return _task_response(db, task)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -348,7 +498,7 @@ def resume_task(
         if not task:
             raise HTTPException(status_code=404, detail="任务不存在")
 
-        return TaskResponse.model_validate(task)
+        return _task_response(db, task)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -362,10 +512,18 @@ def delete_task(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """删除任务"""
+    """删除任务
+
+    数据库记录立即删除，文件在后台清理，可通过 /api/tasks/purges/{purge_id} 查询进度
+    """
     try:
-        task_service.delete_task(db, task_id)
-        return {"message": "任务已删除", "id": task_id}
+        purge = task_service.delete_task(db, task_id)
+        return {
+            "message": "任务已删除",
+            "id": task_id,
+            "purge_id": purge.id,
+            "purge_status": purge.status,
+        }
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -382,6 +540,9 @@ def download_task_files(
 ):
     """下载任务的所有文件（打包成zip）
 
+    ZIP边读取文件边输出（不经过临时文件），缺失的文件在输出到该政策时
+    才重新生成，客户端立即开始接收数据。
+
     Args:
         task_id: 任务ID
         file_format: 文件格式筛选 (all, markdown, docx)
@@ -395,279 +556,216 @@ def download_task_files(
         if not task:
             raise HTTPException(status_code=404, detail="任务不存在")
 
-        # 获取任务关联的所有政策
-        task_policies = db.query(TaskPolicy).filter(TaskPolicy.task_id == task_id).all()
-        if not task_policies:
+        # 确定要下载的文件类型
+        if file_format == "all":
+            file_types = ["markdown", "docx"]
+        elif file_format in ("markdown", "docx"):
+            file_types = [file_format]
+        else:
+            raise HTTPException(
+                status_code=400, detail=f"不支持的文件格式: {file_format}"
+            )
+
+        # 获取任务关联的所有政策（只取ID，政策在打包时分批加载）
+        policy_ids = sorted(
+            policy_id
+            for (policy_id,) in db.query(TaskPolicy.policy_id)
+            .filter(TaskPolicy.task_id == task_id)
+            .all()
+        )
+        if not policy_ids:
             raise HTTPException(status_code=404, detail="该任务没有关联的政策")
 
-        policy_ids = [tp.policy_id for tp in task_policies]
-        policies = db.query(Policy).filter(Policy.id.in_(policy_ids)).all()
+        # 生成文件名 - 使用ASCII安全的文件名避免编码问题
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        # 将任务名称转换为ASCII安全的格式
+        safe_task_name = "".join(c if ord(c) < 128 else "_" for c in task.task_name)
+        zip_filename = f"{safe_task_name}_{timestamp}.zip"
 
-        if not policies:
-            raise HTTPException(status_code=404, detail="未找到任何政策")
+        logger.info(f"开始打包 {len(policy_ids)} 个政策的文件")
 
-        # 初始化存储服务
-        storage_service = StorageService()
+        # 开始输出前先取得第一个文件：没有任何可下载的文件时返回404，
+        # 而不是输出一个空ZIP
+        files = _task_export_files(task.task_name, policy_ids, file_types)
+        first_file = next(files, None)
+        if first_file is None:
+            raise HTTPException(status_code=404, detail="未找到任何可下载的文件")
 
-        # 对于大量文件，使用临时文件而不是内存缓冲区
-        # 创建临时ZIP文件路径
-        import tempfile
+        # 返回ZIP文件流 - 使用更兼容的Content-Disposition格式
+        # （缺失的文件边打包边生成，总大小事先未知，不设置Content-Length）
+        return StreamingResponse(
+            stream_zip(itertools.chain([first_file], files)),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": f'attachment; filename="{zip_filename}"',
+            },
+        )
 
-        temp_zip_fd, temp_zip_path = tempfile.mkstemp(suffix=".zip")
-        os.close(temp_zip_fd)  # 关闭文件描述符，让zipfile使用路径
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"下载任务文件失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"下载任务文件失败: {str(e)}")
 
-        try:
-            # 使用 ZIP_STORED 存储模式（不压缩）以提升速度
-            # 对于文本文件，压缩效果有限，但速度慢
-            # 如果需要压缩，可以改为 ZIP_DEFLATED，但压缩级别设为最低
-            with zipfile.ZipFile(temp_zip_path, "w", zipfile.ZIP_STORED) as zip_file:
-                file_count = 0
-
-                # 确定要下载的文件类型
-                file_types = []
-                if file_format == "all":
-                    file_types = ["markdown", "docx"]
-                elif file_format == "markdown":
-                    file_types = ["markdown"]
-                elif file_format == "docx":
-                    file_types = ["docx"]
-                else:
-                    raise HTTPException(
-                        status_code=400, detail=f"不支持的文件格式: {file_format}"
-                    )
 
-                # 导入文件生成工具
-                from ..core.converter import DocumentConverter
+# 打包时每批加载的政策数
+EXPORT_BATCH_SIZE = 100
 
-                converter = DocumentConverter()
 
-                # 遍历每个政策，获取文件 - 添加进度日志
-                total_policies = len(policies)
-                logger.info(f"开始打包 {total_policies} 个政策的文件")
+def _task_export_files(
+    task_name: str, policy_ids: List[int], file_types: List[str]
+) -> Iterator[Tuple[str, str]]:
+    """按需产出任务导出文件 (ZIP内路径, 本地文件路径)
 
-                for i, policy in enumerate(policies, 1):
-                    policy_title = (
-                        policy.title.replace("/", "_")
-                        .replace("\\", "_")
-                        .replace(":", "_")
-                    )
-                    safe_title = "".join(
-                        c
-                        for c in policy_title
-                        if c.isalnum() or c in (" ", "-", "_", "(", ")", "（", "）")
-                    )[:100]
-
-                    for file_type in file_types:
-                        # 直接构建本地存储路径（不通过get_policy_file_path，因为它优先返回缓存路径）
-                        file_ext = "md" if file_type == "markdown" else file_type
-                    if policy.task_id:
-                        file_dir = f"{policy.task_id}/{policy.id}"
-                    else:
-                        file_dir = str(policy.id)
+    在流式响应中迭代：分批加载政策（独立会话，请求的会话此时可能已关闭），
+    缺失的文件在迭代到该政策时才重新生成。
+    """
+    from ..database import worker_session
+    from ..core.converter import DocumentConverter
 
-                    file_path = os.path.join(
-                        str(storage_service.local_dir),
-                        "policies",
-                        file_dir,
-                        f"{policy.id}.{file_ext}",
-                    )
+    storage_service = StorageService()
+    converter = DocumentConverter()
+    total_policies = len(policy_ids)
+    file_count = 0
 
-                    # 检查本地存储文件是否存在
-                    if os.path.exists(file_path):
-                        # 文件存在，直接使用
-                        logger.debug(f"使用现有文件: {file_path}")
-                    else:
-                        # 文件不存在，尝试重新生成
-                        logger.warning(
-                            f"政策 {policy.id} 的 {file_type} 文件不存在，尝试重新生成..."
-                        )
-                        try:
-                            # 使用storage_service的临时目录，确保文件可以被多个任务共享
-                            from ..services.file_cleanup_service import (
-                                get_cleanup_service,
-                            )
+    db = worker_session("task_export")
+    try:
+        for start in range(0, total_policies, EXPORT_BATCH_SIZE):
+            # 导出需要正文，批量加载避免逐条查询正文表
+            policies = (
+                db.query(Policy)
+                .options(selectinload(Policy.content_row))
+                .filter(Policy.id.in_(policy_ids[start : start + EXPORT_BATCH_SIZE]))
+                .order_by(Policy.id)
+                .all()
+            )
+            for i, policy in enumerate(policies, start + 1):
+                policy_title = (
+                    policy.title.replace("/", "_").replace("\\", "_").replace(":", "_")
+                )
+                safe_title = "".join(
+                    c
+                    for c in policy_title
+                    if c.isalnum() or c in (" ", "-", "_", "(", ")", "（", "）")
+                )[:100]
+
+                for file_type in file_types:
+                    file_path = _policy_export_file(
+                        policy, file_type, storage_service, converter
+                    )
+                    if not file_path:
+                        continue
+                    # 构造ZIP内的文件路径
+                    # 格式: 任务名称/文件格式/政策ID_标题.扩展名
+                    file_ext = "md" if file_type == "markdown" else file_type
+                    zip_path = (
+                        f"{task_name}/{file_type}/{policy.id}_{safe_title}.{file_ext}"
+                    )
+                    file_count += 1
+                    yield zip_path, file_path
 
-                            cleanup_service = get_cleanup_service()
+                # 每处理10个政策记录一次进度
+                if i % 10 == 0 or i == total_policies:
+                    logger.info(
+                        f"已处理 {i}/{total_policies} 个政策，当前文件数: {file_count}"
+                    )
+            # 已输出的政策不再需要，释放内存
+            db.expunge_all()
+    finally:
+        db.close()
 
-                            # 创建临时目录（基于policy_id，确保同一政策的文件可以被多个任务共享）
-                            temp_base_dir = (
-                                storage_service.local_dir
-                                / "temp_generated"
-                                / str(policy.id)
-                            )
-                            temp_base_dir.mkdir(parents=True, exist_ok=True)
-                            # 将文件类型转换为实际扩展名
-                            temp_file_ext = (
-                                "md" if file_type == "markdown" else file_type
-                            )
-                            temp_file_path = (
-                                temp_base_dir / f"{policy.id}.{temp_file_ext}"
-                            )
+    logger.info(f"ZIP文件打包完成: {file_count} 个文件")
 
-                            # 如果临时文件已存在且未过期（1天内），直接使用
-                            if temp_file_path.exists():
-                                file_stat = temp_file_path.stat()
-                                file_age = datetime.now(
-                                    timezone.utc
-                                ) - datetime.fromtimestamp(
-                                    file_stat.st_mtime, tz=timezone.utc
-                                )
-                                if file_age < timedelta(hours=24):
-                                    file_path = str(temp_file_path)
-                                    logger.debug(f"使用已存在的临时文件: {file_path}")
-                                else:
-                                    # 删除过期文件
-                                    temp_file_path.unlink()
-                            else:
-                                # 根据文件类型生成文件
-                                if file_type == "markdown":
-                                    # 生成Markdown文件
-                                    md_content = _generate_markdown_from_policy(policy)
-                                    with open(
-                                        temp_file_path, "w", encoding="utf-8"
-                                    ) as f:
-                                        f.write(md_content)
-                                elif file_type == "docx":
-                                    # 生成DOCX文件
-                                    _generate_docx_from_policy(
-                                        policy, str(temp_file_path), converter
-                                    )
-
-                                # 如果生成成功，注册临时文件并保存到storage_service
-                                if (
-                                    temp_file_path.exists()
-                                    and temp_file_path.stat().st_size > 0
-                                ):
-                                    file_path = str(temp_file_path)
-                                    # 注册临时文件，用于后续清理
-                                    cleanup_service.register_temp_file(file_path)
-
-                                    # 尝试保存到storage_service（使用policy的task_id，确保文件路径正确）
-                                    try:
-                                        storage_result = (
-                                            storage_service.save_policy_file(
-                                                policy.id,
-                                                file_type,
-                                                file_path,
-                                                task_id=policy.task_id,
-                                            )
-                                        )
-                                        if storage_result.get("success"):
-                                            # 如果保存成功，使用正式存储路径
-                                            file_path = storage_result.get("local_path")
-                                            logger.debug(
-                                                f"文件已保存到存储服务: {file_path}"
-                                            )
-                                    except Exception as e:
-                                        logger.warning(f"保存文件到存储服务失败: {e}")
-
-                                    logger.info(
-                                        f"成功重新生成政策 {policy.id} 的 {file_type} 文件"
-                                    )
-                                else:
-                                    logger.warning(
-                                        f"重新生成政策 {policy.id} 的 {file_type} 文件失败"
-                                    )
-                                    continue
-                        except Exception as e:
-                            logger.error(
-                                f"重新生成政策 {policy.id} 的 {file_type} 文件时出错: {e}"
-                            )
-                            continue
 
-                    if file_path and os.path.exists(file_path):
-                        # 构造ZIP内的文件路径
-                        # 格式: 任务名称/文件格式/政策ID_标题.扩展名
-                        # 将文件类型转换为实际扩展名
-                        file_ext = "md" if file_type == "markdown" else file_type
-                        zip_path = f"{task.task_name}/{file_type}/{policy.id}_{safe_title}.{file_ext}"
+def _policy_export_file(
+    policy: Policy, file_type: str, storage_service: StorageService, converter
+) -> Optional[str]:
+    """返回政策导出文件的本地路径，文件不存在时重新生成
 
-                        # 添加到ZIP文件 - 优化文件读取
-                        try:
-                            # 使用二进制模式读取文件
-                            with open(file_path, "rb") as f:
-                                file_data = f.read()
-                                zip_file.writestr(zip_path, file_data)
-                            file_count += 1
-                            logger.debug(
-                                f"添加文件到ZIP: {zip_path} ({len(file_data)} bytes)"
-                            )
-                        except Exception as e:
-                            logger.warning(f"读取文件失败 {file_path}: {e}")
-                            continue
-
-                        # 每处理10个政策记录一次进度
-                        if i % 10 == 0 or i == total_policies:
-                            logger.info(
-                                f"已处理 {i}/{total_policies} 个政策，当前文件数: {file_count}"
-                            )
+    Returns:
+        文件路径，无法获取或生成时返回None
+    """
+    # 直接构建本地存储路径（不通过get_policy_file_path，因为它优先返回缓存路径）
+    file_ext = "md" if file_type == "markdown" else file_type
+    if policy.task_id:
+        file_dir = f"{policy.task_id}/{policy.id}"
+    else:
+        file_dir = str(policy.id)
 
-                if file_count == 0:
-                    raise HTTPException(
-                        status_code=404, detail="未找到任何可下载的文件"
-                    )
+    file_path = os.path.join(
+        str(storage_service.local_dir),
+        "policies",
+        file_dir,
+        f"{policy.id}.{file_ext}",
+    )
 
-        except Exception as zip_error:
-            # 确保临时文件被清理
-            try:
-                if "temp_zip_path" in locals() and os.path.exists(temp_zip_path):
-                    os.unlink(temp_zip_path)
-                    logger.debug(f"已清理临时ZIP文件: {temp_zip_path}")
-            except Exception as cleanup_error:
-                logger.warning(f"清理临时ZIP文件失败: {cleanup_error}")
-
-            # 重新抛出原始异常
-            raise zip_error
-
-        # 获取文件大小
-        final_size = os.path.getsize(temp_zip_path)
-        logger.info(f"ZIP文件打包完成: {file_count} 个文件, 大小: {final_size} bytes")
-
-        # 检查文件大小，如果为0则报错
-        if final_size == 0:
-            logger.error(
-                f"ZIP文件大小为0，可能是打包过程中出现问题。临时文件路径: {temp_zip_path}"
-            )
-            raise HTTPException(
-                status_code=500,
-                detail="文件打包失败，生成的文件大小为0字节。请检查系统内存和磁盘空间。",
-            )
+    # 检查本地存储文件是否存在
+    if os.path.exists(file_path):
+        # 文件存在，直接使用
+        logger.debug(f"使用现有文件: {file_path}")
+        return file_path
 
-        # 生成文件名 - 使用ASCII安全的文件名避免编码问题
-        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-        # 将任务名称转换为ASCII安全的格式
-        safe_task_name = "".join(c if ord(c) < 128 else "_" for c in task.task_name)
-        zip_filename = f"{safe_task_name}_{timestamp}.zip"
+    # 文件不存在，尝试重新生成
+    logger.warning(f"政策 {policy.id} 的 {file_type} 文件不存在，尝试重新生成...")
+    try:
+        # 使用storage_service的临时目录，确保文件可以被多个任务共享
+        from ..services.file_cleanup_service import get_cleanup_service
 
-        # 创建文件流生成器，用于StreamingResponse
-        def file_generator():
-            try:
-                with open(temp_zip_path, "rb") as f:
-                    while chunk := f.read(8192):  # 每次读取8KB
-                        yield chunk
-            finally:
-                # 在生成器完成后删除临时文件
-                try:
-                    os.unlink(temp_zip_path)
-                    logger.debug(f"已删除临时ZIP文件: {temp_zip_path}")
-                except Exception as e:
-                    logger.warning(f"删除临时ZIP文件失败: {e}")
+        cleanup_service = get_cleanup_service()
 
-        # 返回ZIP文件流 - 使用更兼容的Content-Disposition格式
-        return StreamingResponse(
-            file_generator(),
-            media_type="application/zip",
-            headers={
-                "Content-Disposition": f'attachment; filename="{zip_filename}"',
-                "Content-Length": str(final_size),
-            },
-        )
+        # 创建临时目录（基于policy_id，确保同一政策的文件可以被多个任务共享）
+        temp_base_dir = storage_service.local_dir / "temp_generated" / str(policy.id)
+        temp_base_dir.mkdir(parents=True, exist_ok=True)
+        temp_file_path = temp_base_dir / f"{policy.id}.{file_ext}"
 
-    except HTTPException:
-        raise
+        # 如果临时文件已存在且未过期（1天内），直接使用
+        if temp_file_path.exists():
+            file_stat = temp_file_path.stat()
+            file_age = datetime.now(timezone.utc) - datetime.fromtimestamp(
+                file_stat.st_mtime, tz=timezone.utc
+            )
+            if file_age < timedelta(hours=24):
+                logger.debug(f"使用已存在的临时文件: {temp_file_path}")
+                return str(temp_file_path)
+            # 删除过期文件后重新生成
+            temp_file_path.unlink()
+
+        # 根据文件类型生成文件
+        if file_type == "markdown":
+            # 生成Markdown文件
+            md_content = _generate_markdown_from_policy(policy)
+            with open(temp_file_path, "w", encoding="utf-8") as f:
+                f.write(md_content)
+        elif file_type == "docx":
+            # 生成DOCX文件
+            _generate_docx_from_policy(policy, str(temp_file_path), converter)
+
+        if not (temp_file_path.exists() and temp_file_path.stat().st_size > 0):
+            logger.warning(f"重新生成政策 {policy.id} 的 {file_type} 文件失败")
+            return None
+
+        # 如果生成成功，注册临时文件并保存到storage_service
+        file_path = str(temp_file_path)
+        # 注册临时文件，用于后续清理
+        cleanup_service.register_temp_file(file_path)
+
+        # 尝试保存到storage_service（使用policy的task_id，确保文件路径正确）
+        try:
+            storage_result = storage_service.save_policy_file(
+                policy.id, file_type, file_path, task_id=policy.task_id
+            )
+            if storage_result.get("success"):
+                # 如果保存成功，使用正式存储路径
+                file_path = storage_result.get("local_path")
+                logger.debug(f"文件已保存到存储服务: {file_path}")
+        except Exception as e:
+            logger.warning(f"保存文件到存储服务失败: {e}")
+
+        logger.info(f"成功重新生成政策 {policy.id} 的 {file_type} 文件")
+        return file_path
     except Exception as e:
-        logger.error(f"下载任务文件失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"下载任务文件失败: {str(e)}")
+        logger.error(f"重新生成政策 {policy.id} 的 {file_type} 文件时出错: {e}")
+        return None
 
 
 @router.get("/{task_id}/download-attachments")
@@ -723,16 +821,10 @@ def download_task_attachments(
                 files_added = 0
 
                 for attachment in attachments:
-                    file_path = None
-
-                    # 尝试获取文件路径
-                    if attachment.file_path and os.path.exists(attachment.file_path):
-                        file_path = attachment.file_path
-                    elif attachment.file_s3_key:
-                        # 从S3下载
-                        file_path = storage_service.get_attachment_file_path(
-                            attachment.policy_id, attachment.file_name, task_id=task_id
-                        )
+                    # 尝试获取文件路径（内容块存储、本地或S3）
+                    file_path = storage_service.get_attachment_record_path(
+                        attachment, task_id=task_id
+                    )
 
                     if file_path and os.path.exists(file_path):
                         # 获取政策信息（用于组织文件夹结构）
@@ -764,7 +856,10 @@ def download_task_attachments(
                             base, ext = os.path.splitext(arcname)
                             arcname = f"{base}_{files_added + 1}{ext}"
 
-                        zip_file.write(file_path, arcname)
+                        try:
+                            zip_file.write(file_path, arcname)
+                        finally:
+                            storage_service.release_attachment_path(file_path)
                         files_added += 1
                         logger.debug(f"添加附件到zip: {arcname}")
                     else:
@@ -784,8 +879,6 @@ def download_task_attachments(
             zip_filename = f"{safe_task_name}_attachments_{task_id}.zip"
 
             # 返回文件
-            from fastapi.responses import Response
-
             return Response(
                 content=zip_content,
                 media_type="application/zip",
@@ -810,81 +903,46 @@ def download_task_attachments(
 
 
 # SSE 连接管理器
-class TaskProgressManager:
-    """任务进度SSE管理器"""
-
-    def __init__(self):
-        self.active_connections: Dict[int, List[asyncio.Queue]] = (
-            {}
-        )  # task_id -> [queues]
-
-    async def connect(self, task_id: int) -> asyncio.Queue:
-        """建立SSE连接"""
-        if task_id not in self.active_connections:
-            self.active_connections[task_id] = []
-
-        queue = asyncio.Queue()
-        self.active_connections[task_id].append(queue)
-        return queue
-
-    def disconnect(self, task_id: int, queue: asyncio.Queue):
-        """断开SSE连接"""
-        if task_id in self.active_connections:
-            try:
-                self.active_connections[task_id].remove(queue)
-            except ValueError:
-                pass
-            # 如果没有连接了，清理
-            if not self.active_connections[task_id]:
-                del self.active_connections[task_id]
-
-    async def broadcast_progress(self, task_id: int, data: dict):
-        """广播进度更新"""
-        if task_id not in self.active_connections:
-            return
-
-        # 准备SSE数据
-        sse_data = f"data: {json.dumps(data)}\n\n"
-
-        # 发送给所有连接的客户端
-        disconnected_queues = []
-        for queue in self.active_connections[task_id]:
-            try:
-                await queue.put(sse_data)
-            except Exception:
-                # 连接可能已断开
-                disconnected_queues.append(queue)
-
-        # 清理断开的连接
-        for queue in disconnected_queues:
-            self.disconnect(task_id, queue)
-
-
-# 全局进度管理器实例
-progress_manager = TaskProgressManager()
-
-
-async def generate_progress_events(task_id: int, db: Session):
+def _task_update_event(task: Task) -> Dict:
+    """任务当前状态的SSE事件数据"""
+    return {
+        "type": "task_update",
+        "task_id": task.id,
+        "status": task.status,
+        "progress_message": task.progress_message or "",
+        "seq": task.progress_seq or 0,
+        "start_time": task.start_time.isoformat() if task.start_time else None,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _task_resume_event(task: Task, since: int) -> Dict:
+    """断线重连的SSE事件数据：只包含 since 之后的新进度行和变化的计数器"""
+    delta = progress_delta(
+        task.progress_message, task.progress_seq, task.progress_counters, since
+    )
+    lines = delta["lines"]
+    return {
+        "type": "progress_update",
+        "task_id": task.id,
+        "status": task.status,
+        "message": lines[-1]["text"] if lines else "",
+        **delta,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def generate_progress_events(task_id: int, initial_data: Optional[Dict]):
     """生成SSE事件流"""
     logger.info(f"建立SSE连接: task_id={task_id}")
+    # 订阅进度推送总线（爬虫线程发布的进度按间隔合并后推送到队列）
+    progress_bus = get_progress_bus()
+    queue = progress_bus.subscribe(task_id)
     try:
-        # 建立连接
-        queue = await progress_manager.connect(task_id)
-        logger.info(f"SSE队列已创建: task_id={task_id}")
-
         # 发送初始任务状态
-        task = task_service.get_task(db, task_id)
-        if task:
-            initial_data = {
-                "type": "task_update",
-                "task_id": task.id,
-                "status": task.status,
-                "progress_message": task.progress_message or "",
-                "start_time": task.start_time.isoformat() if task.start_time else None,
-                "updated_at": datetime.now(timezone.utc).isoformat(),
-            }
-            logger.info(f"发送初始任务状态: {task.status}")
-            yield f"data: {json.dumps(initial_data)}\n\n"
+        if initial_data:
+            logger.info(f"发送初始任务状态: {initial_data['status']}")
+            yield sse_frame(initial_data)
 
         # 发送连接确认消息
         connection_data = {
@@ -896,17 +954,6 @@ async def generate_progress_events(task_id: int, db: Session):
         logger.info(f"发送连接确认消息")
         yield f"data: {json.dumps(connection_data)}\n\n"
 
-        # 发送测试进度消息
-        test_data = {
-            "type": "progress_update",
-            "task_id": task_id,
-            "message": "测试进度更新消息",
-            "progress_message": "SSE连接测试消息\n连接已建立，等待任务开始...",
-            "updated_at": datetime.now(timezone.utc).isoformat(),
-        }
-        logger.info(f"发送测试进度消息")
-        yield f"data: {json.dumps(test_data)}\n\n"
-
         # 持续监听进度更新
         message_count = 0
         while True:
@@ -914,7 +961,7 @@ async def generate_progress_events(task_id: int, db: Session):
                 # 等待进度更新或超时
                 sse_data = await asyncio.wait_for(queue.get(), timeout=30.0)
                 message_count += 1
-                logger.info(f"SSE消息 {message_count}: 发送进度更新")
+                logger.debug(f"SSE消息 {message_count}: 发送进度更新")
                 yield sse_data
             except asyncio.TimeoutError:
                 # 30秒心跳
@@ -941,16 +988,20 @@ async def generate_progress_events(task_id: int, db: Session):
     finally:
         # 清理连接
         logger.info(f"清理SSE连接: task_id={task_id}")
-        progress_manager.disconnect(task_id, queue)
+        progress_bus.unsubscribe(task_id, queue)
 
 
 @router.get("/{task_id}/progress/stream")
 async def stream_task_progress(
     task_id: int,
     token: Optional[str] = Query(None),
+    last_event_id: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
-    """流式推送任务进度更新（SSE）"""
+    """流式推送任务进度更新（SSE）
+
+    事件ID为进度序号。客户端重连时带上 Last-Event-ID，只推送之后的新进度。
+    """
     # 验证token
     if not token:
         raise HTTPException(status_code=401, detail="缺少认证令牌")
@@ -969,8 +1020,19 @@ async def stream_task_progress(
     if task.created_by != current_user.id:
         raise HTTPException(status_code=403, detail="无权访问此任务")
 
+    # 先取好初始状态再释放会话，推送期间（可能持续数小时）不占用数据库连接
+    try:
+        since = int(last_event_id) if last_event_id else None
+    except ValueError:
+        since = None
+    if since is None:
+        initial_data = _task_update_event(task)
+    else:
+        initial_data = _task_resume_event(task, since)
+    db.close()
+
     return StreamingResponse(
-        generate_progress_events(task_id, db),
+        generate_progress_events(task_id, initial_data),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
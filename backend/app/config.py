@@ -39,6 +39,45 @@ class Settings(BaseSettings):
         env="DATABASE_URL",
     )
 
+    # 同步连接池（爬虫任务、定时任务和写接口使用），未配置大小时按并发自动计算
+    db_pool_size: Optional[int] = Field(default=None, env="DB_POOL_SIZE")
+    db_max_overflow: Optional[int] = Field(default=None, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: int = Field(default=30, env="DB_POOL_TIMEOUT")  # 秒
+    # 数据库允许的连接总数（所有worker进程的连接池合计不超过该值）
+    db_max_connections: int = Field(default=100, env="DB_MAX_CONNECTIONS")
+    # 每个进程的任务worker同时执行的爬虫任务数、uvicorn worker进程数、同步接口预留连接数
+    crawl_max_concurrent_tasks: int = Field(default=2, env="CRAWL_MAX_CONCURRENT_TASKS")
+    web_concurrency: int = Field(default=1, env="WEB_CONCURRENCY")
+    db_api_connections: int = Field(default=5, env="DB_API_CONNECTIONS")
+    # 后台任务短会话模式：网络等待前归还连接，政策写入推迟到批量提交时执行
+    db_worker_short_sessions: bool = Field(default=True, env="DB_WORKER_SHORT_SESSIONS")
+    # 借出超过该秒数的连接在连接池监控中列为长时间占用
+    db_long_held_seconds: int = Field(default=60, env="DB_LONG_HELD_SECONDS")
+
+    # 异步数据库（只读接口使用，连接池与爬虫任务使用的同步连接池分开）
+    async_db_enabled: bool = Field(default=True, env="ASYNC_DB_ENABLED")
+    async_db_pool_size: int = Field(default=10, env="ASYNC_DB_POOL_SIZE")
+    async_db_max_overflow: int = Field(default=10, env="ASYNC_DB_MAX_OVERFLOW")
+
+    # 爬虫任务队列：API进程内是否运行任务worker（单独部署 python -m app worker 时可关闭），
+    # worker续租间隔、租约时长（超时未续租的任务可被其他worker重新领取）和空闲轮询间隔
+    task_worker_enabled: bool = Field(default=True, env="TASK_WORKER_ENABLED")
+    task_heartbeat_seconds: int = Field(default=15, env="TASK_HEARTBEAT_SECONDS")
+    task_lease_seconds: int = Field(default=120, env="TASK_LEASE_SECONDS")
+    task_poll_seconds: float = Field(default=2.0, env="TASK_POLL_SECONDS")
+    # 任务进度消息写库的最短间隔（秒）和积累行数（先写入内存缓冲，按二者之一节流写库）
+    task_progress_flush_seconds: float = Field(
+        default=2.0, env="TASK_PROGRESS_FLUSH_SECONDS"
+    )
+    task_progress_flush_lines: int = Field(default=20, env="TASK_PROGRESS_FLUSH_LINES")
+    # 准入控制：所有worker合计同时执行的爬虫任务数、同一数据源同时执行的任务数，
+    # 预计开始时间的默认任务时长（没有已完成任务可参考时使用）
+    crawl_max_running_tasks: int = Field(default=4, env="CRAWL_MAX_RUNNING_TASKS")
+    crawl_max_tasks_per_source: int = Field(default=1, env="CRAWL_MAX_TASKS_PER_SOURCE")
+    crawl_default_duration_minutes: int = Field(
+        default=30, env="CRAWL_DEFAULT_DURATION_MINUTES"
+    )
+
     # JWT配置
     jwt_secret_key: str = Field(default="change-me-in-production", env="JWT_SECRET_KEY")
     jwt_algorithm: str = Field(default="HS256", env="JWT_ALGORITHM")
@@ -75,9 +114,42 @@ class Settings(BaseSettings):
     email_to_addresses: str = Field(
         default="[]", env="EMAIL_TO_ADDRESSES"
     )  # JSON数组字符串
+    # 发件箱：发件器检查待发送邮件的间隔（秒，本进程写入邮件时立即唤醒）
+    email_outbox_poll_seconds: float = Field(
+        default=30.0, env="EMAIL_OUTBOX_POLL_SECONDS"
+    )
+    # 唤醒后等待的合并窗口（秒），窗口内写入的邮件在同一个SMTP连接上批量发送
+    email_batch_window_seconds: float = Field(
+        default=1.0, env="EMAIL_BATCH_WINDOW_SECONDS"
+    )
+    # 发送失败的最大尝试次数，重试间隔从 email_retry_base_seconds 开始按指数退避
+    email_max_attempts: int = Field(default=5, env="EMAIL_MAX_ATTEMPTS")
+    email_retry_base_seconds: float = Field(
+        default=30.0, env="EMAIL_RETRY_BASE_SECONDS"
+    )
+    # SMTP连接空闲超过该时间（秒）后关闭，下次发送时重新连接登录
+    email_smtp_idle_seconds: float = Field(default=60.0, env="EMAIL_SMTP_IDLE_SECONDS")
+
+    # 搜索配置
+    search_engine: str = Field(
+        default="database", env="SEARCH_ENGINE"
+    )  # database（ILIKE+pg_trgm）/bigram（进程内二元组倒排索引）
+    search_index_dir: str = Field(default="./search_index", env="SEARCH_INDEX_DIR")
 
     # 定时任务配置
     scheduler_enabled: bool = Field(default=False, env="SCHEDULER_ENABLED")
+    # 检查已结束的爬虫任务、完成定时任务执行记录的间隔（秒）
+    # （本进程执行的任务结束时立即完成，由其他worker进程执行的任务由该检查完成）
+    scheduler_run_sweep_seconds: int = Field(
+        default=60, env="SCHEDULER_RUN_SWEEP_SECONDS"
+    )
+    # 多个进程启用调度时选出一个leader运行调度器：待命进程尝试接替、
+    # leader检查选主连接的间隔（秒）
+    scheduler_leader_check_seconds: float = Field(
+        default=10.0, env="SCHEDULER_LEADER_CHECK_SECONDS"
+    )
+    # leader从数据库同步定时任务作业的间隔（秒，其他进程修改的定时任务在此间隔内生效）
+    scheduler_sync_seconds: int = Field(default=30, env="SCHEDULER_SYNC_SECONDS")
 
     # 日志配置
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
@@ -74,6 +74,12 @@ class Config:
         "download_doc": True,
         "download_pdf": False,
         "download_all_files": False,  # 下载所有形式的附件（忽略文件类型）
+        "download_timeout": 60,  # 附件下载超时（秒）
+        "download_max_workers": 8,  # 附件并发下载线程数（所有政策共享）
+        "download_per_host_limit": 2,  # 每个主机的最大并发下载数
+        # 数据库写入配置
+        "db_batch_size": 20,  # 每个事务提交的政策条数（1表示逐条提交）
+        "db_batch_interval_ms": 2000,  # 事务最长持续时间（毫秒）
         # 代理配置
         "use_proxy": False,
         "kuaidaili_api_key": "",
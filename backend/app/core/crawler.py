@@ -35,6 +35,7 @@ from .models import Policy, CrawlProgress
 from .mnr_spider import MNRSpider
 from .gd_spider import GDSpider
 from .gd_api_client import GDAPIClient
+from .download_manager import get_download_manager
 
 # 使用模块级logger
 logger = logging.getLogger(__name__)
@@ -89,6 +90,8 @@ class PolicyCrawler:
         self.progress_callback = progress_callback
         self.stop_requested = False  # 停止标志
         self.progress = CrawlProgress()
+        self._gd_download_clients: Dict[str, GDAPIClient] = {}  # 附件下载用GD客户端
+        self._gd_download_clients_lock = threading.Lock()
 
         # 初始化 MNR 爬虫（使用新的核心实现，用于默认数据源）
         # 注意：在多数据源模式下，会为每个数据源创建新的爬虫实例
@@ -778,7 +781,11 @@ class PolicyCrawler:
         return all_policies
 
     def crawl_single_policy(
-        self, policy: Policy, callback: Optional[Callable] = None, retry_count: int = 0
+        self,
+        policy: Policy,
+        callback: Optional[Callable] = None,
+        retry_count: int = 0,
+        wait_attachments: bool = True,
     ) -> Optional[Policy]:
         """爬取单个政策（支持自动重试）
 
@@ -786,6 +793,8 @@ class PolicyCrawler:
             policy: 政策对象
             callback: 进度回调函数
             retry_count: 当前重试次数（内部使用）
+            wait_attachments: 是否等待附件下载完成；为False时附件在后台下载，
+                调用方需通过 wait_for_attachments() 获取结果
 
         Returns:
             爬取成功的政策对象，失败时返回None
@@ -1163,7 +1172,13 @@ class PolicyCrawler:
             # 4. 下载附件（如果启用）
             # 注意：所有数据源（包括广东省）都需要保存附件文件，以便用户可以下载
             if self.config.get("save_files", True) and attachments:
-                self._download_attachments(policy, attachments, file_number, callback)
+                self._download_attachments(
+                    policy,
+                    attachments,
+                    file_number,
+                    callback,
+                    wait=wait_attachments,
+                )
 
             # 5. 生成RAG Markdown
             save_markdown = self.config.get("save_markdown", True)
@@ -1210,7 +1225,7 @@ class PolicyCrawler:
 
                 time.sleep(retry_delay)
                 retry_result = self.crawl_single_policy(
-                    policy, callback, retry_count + 1
+                    policy, callback, retry_count + 1, wait_attachments
                 )
                 return retry_result
             else:
@@ -1484,14 +1499,16 @@ class PolicyCrawler:
         attachments: List[Dict[str, str]],
         file_number: int,
         callback: Optional[Callable] = None,
+        wait: bool = True,
     ):
-        """下载附件
+        """下载附件（提交到共享下载管理器并发下载）
 
         Args:
             policy: 政策对象
             attachments: 附件列表，每个附件包含 {'url': str, 'name': str}
             file_number: 文件编号
             callback: 进度回调函数
+            wait: 是否等待下载完成（否则由调用方稍后调用 wait_for_attachments）
         """
         if not attachments:
             return
@@ -1557,26 +1574,27 @@ class PolicyCrawler:
             data_source and data_source.get("type") == "gd"
         )
 
-        # 如果是广东省数据源，需要创建GD API客户端
+        # 如果是广东省数据源，需要使用GD API客户端（按API地址复用，爬虫关闭时统一释放）
         gd_api_client = None
         if is_gd_source:
             try:
-                from .gd_api_client import GDAPIClient
-
-                temp_config = Config()
-                temp_config.config = self.config.config.copy()
-                if data_source:
-                    temp_config.config["api_base_url"] = data_source.get(
-                        "api_base_url", "https://www.gdpc.gov.cn:443/bascdata"
-                    )
-                temp_config.config["use_proxy"] = self.config.get("use_proxy", False)
-                temp_config.config["kuaidaili_api_key"] = self.config.get(
-                    "kuaidaili_api_key", ""
-                )
-                gd_api_client = GDAPIClient(temp_config)
+                gd_api_client = self._get_gd_download_client(data_source)
             except Exception as e:
                 logger.warning(f"创建GD API客户端失败: {e}")
 
+        # 用于按主机限制并发的地址（GD附件传入的是服务器端路径，不是完整URL）
+        if is_gd_source and gd_api_client:
+            host_base_url = gd_api_client.config.get("api_base_url", "")
+        else:
+            host_base_url = self.config.get("base_url", "")
+
+        download_manager = get_download_manager(
+            max_workers=self.config.get("download_max_workers", 8),
+            per_host_limit=self.config.get("download_per_host_limit", 2),
+        )
+        if not hasattr(policy, "_attachment_downloads"):
+            policy._attachment_downloads = []
+
         for i, att in enumerate(target_files, 1):
             url = att.get("url", "") or att.get("file_url", "")
             name = att.get("name", "") or att.get("file_name", "")
@@ -1645,49 +1663,93 @@ class PolicyCrawler:
 
             save_path = f"{self.config.output_dir}/files/{save_filename}"
 
-            # 下载文件（根据数据源类型选择不同的下载方法）
-            download_success = False
+            # 提交下载（根据数据源类型选择不同的下载方法）
             if is_gd_source and gd_api_client:
                 # 广东省数据源：使用GD API客户端下载（file_url是文件路径，不是完整URL）
-                try:
-                    download_success = gd_api_client.download_file(url, save_path)
-                except Exception as e:
-                    logger.error(f"使用GD API客户端下载附件失败: {e}")
-                    download_success = False
+                download_fn = gd_api_client.download_file
             else:
                 # 其他数据源：使用MNR API客户端下载
-                download_success = self.api_client.download_file(url, save_path)
+                download_fn = self.api_client.download_file
 
-            if download_success:
-                if callback:
-                    callback(f"    [OK] 下载成功: {save_filename}")
-                logger.debug(f"附件下载成功: {save_path}")
-                # 保存附件路径到policy对象，以便后续保存到数据库
-                if not hasattr(policy, "_attachment_paths"):
-                    policy._attachment_paths = []
-                policy._attachment_paths.append(
+            host_url = url if url.startswith(("http://", "https://")) else host_base_url
+            future = download_manager.submit(host_url, download_fn, url, save_path)
+            policy._attachment_downloads.append(
+                (
+                    future,
                     {
                         "url": url,
                         "name": name,
                         "storage_path": save_path,
                         "file_name": save_filename,
-                    }
+                    },
                 )
+            )
+
+        if wait:
+            self.wait_for_attachments(policy, callback)
+
+    def wait_for_attachments(
+        self, policy: Policy, callback: Optional[Callable] = None
+    ) -> List[Dict[str, str]]:
+        """等待政策的附件下载完成，并记录成功下载的附件路径
+
+        进度回调只在调用方线程中执行（下载线程中不触发回调）。
+
+        Args:
+            policy: 政策对象
+            callback: 进度回调函数
+
+        Returns:
+            成功下载的附件信息列表（policy._attachment_paths）
+        """
+        pending = getattr(policy, "_attachment_downloads", None) or []
+        policy._attachment_downloads = []
+
+        for future, info in pending:
+            try:
+                download_success = future.result()
+            except Exception as e:
+                logger.error(f"附件下载异常: {info['url']} - {e}")
+                download_success = False
+
+            if download_success:
+                if callback:
+                    callback(f"    [OK] 下载成功: {info['file_name']}")
+                logger.debug(f"附件下载成功: {info['storage_path']}")
+                # 保存附件路径到policy对象，以便后续保存到数据库
+                if not hasattr(policy, "_attachment_paths"):
+                    policy._attachment_paths = []
+                policy._attachment_paths.append(info)
             else:
                 if callback:
-                    callback(f"    [X] 下载失败: {name or url}")
-                logger.warning(f"附件下载失败: {url}")
+                    callback(f"    [X] 下载失败: {info['name'] or info['url']}")
+                logger.warning(f"附件下载失败: {info['url']}")
 
-            # 下载间隔
-            if i < len(target_files):
-                time.sleep(0.3)
+        return getattr(policy, "_attachment_paths", [])
 
-        # 清理GD API客户端
-        if gd_api_client and hasattr(gd_api_client, "close"):
-            try:
-                gd_api_client.close()
-            except Exception:
-                pass
+    def attachments_ready(self, policy: Policy) -> bool:
+        """政策的附件是否都已下载结束（成功或失败）"""
+        pending = getattr(policy, "_attachment_downloads", None) or []
+        return all(future.done() for future, _ in pending)
+
+    def _get_gd_download_client(self, data_source: Optional[Dict[str, Any]]):
+        """获取（或创建）用于下载附件的GD API客户端"""
+        api_base_url = (data_source or {}).get(
+            "api_base_url", "https://www.gdpc.gov.cn:443/bascdata"
+        )
+        with self._gd_download_clients_lock:
+            client = self._gd_download_clients.get(api_base_url)
+            if client is None:
+                temp_config = Config()
+                temp_config.config = self.config.config.copy()
+                temp_config.config["api_base_url"] = api_base_url
+                temp_config.config["use_proxy"] = self.config.get("use_proxy", False)
+                temp_config.config["kuaidaili_api_key"] = self.config.get(
+                    "kuaidaili_api_key", ""
+                )
+                client = GDAPIClient(temp_config)
+                self._gd_download_clients[api_base_url] = client
+            return client
 
     def crawl_batch(
         self,
@@ -1986,3 +2048,10 @@ class PolicyCrawler:
         """关闭爬虫"""
         if hasattr(self.api_client, "close"):
             self.api_client.close()
+        # 清理附件下载用的GD API客户端
+        for gd_api_client in self._gd_download_clients.values():
+            try:
+                gd_api_client.close()
+            except Exception:
+                pass
+        self._gd_download_clients.clear()
@@ -0,0 +1,286 @@
+"""
+附件下载管理模块 - 并发下载、断点续传、原子写入
+"""
+
+import os
+import re
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+# 使用模块级logger
+logger = logging.getLogger(__name__)
+
+# 下载过程中的临时文件后缀（完成后原子重命名为目标文件）
+PART_SUFFIX = ".part"
+# 临时文件旁记录文件总长度（来自Content-Length/Content-Range）的文件后缀
+SIZE_SUFFIX = ".size"
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+_CONTENT_RANGE_UNSATISFIED_RE = re.compile(r"bytes\s+\*/(\d+)")
+
+
+class DownloadError(Exception):
+    """下载失败（已下载部分会保留在临时文件中，供下次续传）"""
+
+
+def _parse_content_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """解析 Content-Range 头，返回 (起始字节, 文件总长度)"""
+    if not value:
+        return None, None
+    match = _CONTENT_RANGE_RE.match(value.strip())
+    if not match:
+        return None, None
+    total = match.group(3)
+    return int(match.group(1)), (int(total) if total != "*" else None)
+
+
+def _write_expected_size(part_path: str, total: Optional[int]):
+    """记录临时文件对应的文件总长度（未知时删除记录）"""
+    size_path = part_path + SIZE_SUFFIX
+    if total is None:
+        if os.path.exists(size_path):
+            os.remove(size_path)
+        return
+    with open(size_path, "w") as f:
+        f.write(str(total))
+
+
+def _read_expected_size(part_path: str) -> Optional[int]:
+    """读取临时文件对应的文件总长度，没有记录时返回None"""
+    try:
+        with open(part_path + SIZE_SUFFIX) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _finish_part(part_path: str, save_path: Optional[str] = None):
+    """临时文件重命名为目标文件（save_path为None时删除），并删除长度记录"""
+    if save_path is None:
+        os.remove(part_path)
+    else:
+        os.replace(part_path, save_path)
+    if os.path.exists(part_path + SIZE_SUFFIX):
+        os.remove(part_path + SIZE_SUFFIX)
+
+
+def stream_download(
+    session: requests.Session,
+    url: str,
+    save_path: str,
+    timeout: float = 60,
+    proxies: Optional[Dict[str, str]] = None,
+    chunk_size: int = 65536,
+) -> int:
+    """流式下载文件（支持Range断点续传、长度校验和原子写入）
+
+    数据先写入 ``save_path + ".part"``；若临时文件已存在，则通过 ``Range``
+    请求从已下载位置继续。下载完成并校验长度后才重命名为 ``save_path``，
+    因此目标文件要么不存在，要么是完整的。
+
+    Args:
+        session: requests会话
+        url: 下载地址
+        save_path: 保存路径（本地）
+        timeout: 连接/读取超时（秒）
+        proxies: 代理配置
+        chunk_size: 分块大小
+
+    Returns:
+        文件大小（字节）
+
+    Raises:
+        DownloadError: 长度不符、文件为空或服务器返回异常
+        requests.RequestException: 网络错误（已下载部分保留，可续传）
+    """
+    part_path = save_path + PART_SUFFIX
+    os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
+
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    # 禁止压缩传输，保证 Content-Length 与落盘字节数一致，且Range偏移有效
+    headers = {"Accept-Encoding": "identity"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+
+    response = session.get(
+        url, stream=True, timeout=timeout, proxies=proxies, headers=headers
+    )
+    with response:
+        if offset and response.status_code == 416:
+            # 请求范围无效：若临时文件已是完整文件则直接完成，否则重新下载
+            match = _CONTENT_RANGE_UNSATISFIED_RE.match(
+                response.headers.get("Content-Range", "")
+            )
+            if match and int(match.group(1)) == offset:
+                _finish_part(part_path, save_path)
+                return offset
+            _finish_part(part_path)
+            raise DownloadError(f"续传范围无效，已丢弃临时文件: {url}")
+
+        response.raise_for_status()
+
+        if offset and response.status_code == 206:
+            start, total = _parse_content_range(response.headers.get("Content-Range"))
+            if start != offset:
+                _finish_part(part_path)
+                raise DownloadError(f"续传起始位置不一致 ({start} != {offset}): {url}")
+            mode = "ab"
+            logger.debug(f"断点续传: {url} 从 {offset} 字节继续")
+        else:
+            # 服务器不支持Range（返回200），从头下载
+            offset = 0
+            mode = "wb"
+            content_length = response.headers.get("Content-Length")
+            total = int(content_length) if content_length else None
+
+        # 记录文件总长度，响应头解析出错时据此判断临时文件是否完整
+        _write_expected_size(part_path, total)
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    f.write(chunk)
+
+    size = os.path.getsize(part_path)
+    if total is not None and size != total:
+        raise DownloadError(f"文件长度不符 ({size}/{total})，保留临时文件待续传: {url}")
+    if size == 0:
+        _finish_part(part_path)
+        raise DownloadError(f"文件为空: {url}")
+
+    _finish_part(part_path, save_path)
+    return size
+
+
+def accept_header_parsing_error(error: Exception, save_path: str) -> bool:
+    """响应头解析错误时接受已下载的文件
+
+    部分站点返回不规范的响应头，urllib3 会抛出 HeaderParsingError
+    （或提示 NoBoundaryInMultipartDefect），但文件内容已正常下载。
+    只有临时文件长度等于记录的文件总长度（Content-Length/Content-Range）时
+    才把临时文件重命名为目标文件并视为成功；长度不符或总长度未知时保留
+    临时文件，由重试通过Range续传完成。
+
+    Args:
+        error: 下载时捕获的异常
+        save_path: 保存路径（本地）
+
+    Returns:
+        是否视为下载成功
+    """
+    error_str = str(error)
+    if not (
+        "HeaderParsingError" in type(error).__name__
+        or "HeaderParsingError" in error_str
+        or "NoBoundaryInMultipartDefect" in error_str
+    ):
+        return False
+
+    part_path = save_path + PART_SUFFIX
+    if os.path.exists(part_path):
+        total = _read_expected_size(part_path)
+        if total and os.path.getsize(part_path) == total:
+            _finish_part(part_path, save_path)
+            return True
+        return False
+    # 目标文件只在下载完成并校验长度后生成
+    return os.path.exists(save_path) and os.path.getsize(save_path) > 0
+
+
+class AttachmentDownloadManager:
+    """附件下载管理器
+
+    所有爬虫实例共享一个线程池：同一政策的附件并发下载，不同政策（以及
+    并行运行的多个任务）的下载也可以重叠进行；每个主机同时进行的下载数
+    受 ``per_host_limit`` 限制，避免对单个站点造成压力。
+    """
+
+    def __init__(self, max_workers: int = 8, per_host_limit: int = 2):
+        """初始化下载管理器
+
+        Args:
+            max_workers: 下载线程数
+            per_host_limit: 每个主机的最大并发下载数
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="attachment-download"
+        )
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _get_host_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        """获取主机并发信号量"""
+        with self._lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_semaphores[host] = semaphore
+            return semaphore
+
+    def submit(self, url: str, download_fn: Callable[..., bool], *args) -> Future:
+        """提交下载任务
+
+        在调用线程中获取主机并发信号量后再提交到线程池：主机已达到并发上限时
+        调用方阻塞等待，线程池中的线程只执行已获得许可的下载，不会被等待同一
+        主机的任务占满而使其他主机的下载饿死。
+
+        Args:
+            url: 下载地址（用于确定主机）
+            download_fn: 实际执行下载的函数，返回是否成功
+            *args: 传给 download_fn 的参数
+
+        Returns:
+            Future，结果为 download_fn 的返回值（异常时为False）
+        """
+        host = urlparse(url).netloc.lower() or "default"
+        semaphore = self._get_host_semaphore(host)
+
+        def run() -> bool:
+            try:
+                return bool(download_fn(*args))
+            except Exception as e:
+                logger.error(f"附件下载异常: {url} - {e}")
+                return False
+            finally:
+                semaphore.release()
+
+        semaphore.acquire()
+        try:
+            return self._executor.submit(run)
+        except BaseException:
+            semaphore.release()
+            raise
+
+    def shutdown(self, wait: bool = False):
+        """关闭下载线程池"""
+        self._executor.shutdown(wait=wait)
+
+
+# 全局下载管理器实例（按并发参数区分，不同配置的爬虫各自使用对应的线程池）
+_download_managers: Dict[Tuple[int, int], AttachmentDownloadManager] = {}
+_download_manager_lock = threading.Lock()
+
+
+def get_download_manager(
+    max_workers: int = 8, per_host_limit: int = 2
+) -> AttachmentDownloadManager:
+    """获取下载管理器单例
+
+    相同并发参数的调用方共享同一个管理器；参数不同时使用另一个管理器，
+    不会关闭其他调用方正在使用的线程池。
+    """
+    key = (max(1, int(max_workers)), max(1, int(per_host_limit)))
+    with _download_manager_lock:
+        manager = _download_managers.get(key)
+        if manager is None:
+            manager = AttachmentDownloadManager(
+                max_workers=key[0], per_host_limit=key[1]
+            )
+            _download_managers[key] = manager
+        return manager
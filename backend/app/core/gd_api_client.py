@@ -34,6 +34,7 @@ except (ImportError, AttributeError):
     pass
 
 from .config import Config
+from .download_manager import accept_header_parsing_error, stream_download
 
 # 使用模块级logger
 logger = logging.getLogger(__name__)
@@ -322,7 +323,7 @@ class GDAPIClient:
         return None
 
     def download_file(
-        self, file_path: str, save_path: str, chunk_size: int = 8192
+        self, file_path: str, save_path: str, chunk_size: int = 65536
     ) -> bool:
         """下载文件
 
@@ -349,6 +350,8 @@ class GDAPIClient:
 
         self._check_and_rotate_session()
 
+        # 超时可配置（默认60秒），多MB的PDF经代理下载时可适当调大
+        timeout = self.config.get("download_timeout", 60)
         for retry in range(self.config.get("max_retries", 3)):
             try:
                 proxies = self._get_proxy(force_new=(retry > 0))
@@ -363,55 +366,21 @@ class GDAPIClient:
                     except (ImportError, AttributeError):
                         pass
 
-                    response = self.session.get(
-                        url, stream=True, timeout=60, proxies=proxies
+                    # 失败重试时从已下载位置续传（Range），完成后校验长度并原子重命名
+                    stream_download(
+                        self.session,
+                        url,
+                        save_path,
+                        timeout=timeout,
+                        proxies=proxies,
+                        chunk_size=chunk_size,
                     )
-                    response.raise_for_status()
-
-                # 下载文件
-                import os
-
-                try:
-                    with open(save_path, "wb") as f:
-                        for chunk in response.iter_content(chunk_size=chunk_size):
-                            if chunk:
-                                f.write(chunk)
-
-                    # 检查文件是否成功下载
-                    if os.path.exists(save_path) and os.path.getsize(save_path) > 0:
-                        return True
-                    else:
-                        logger.error("  [X] 下载失败：文件为空或不存在")
-                        return False
-
-                except Exception as download_error:
-                    # 即使下载过程中出错，也检查文件是否已部分下载
-                    if os.path.exists(save_path) and os.path.getsize(save_path) > 0:
-                        # 文件已部分下载，可能是 HeaderParsingError 导致的
-                        error_str = str(download_error)
-                        if (
-                            "HeaderParsingError" in error_str
-                            or "NoBoundaryInMultipartDefect" in error_str
-                        ):
-                            # 忽略这个解析错误，文件已成功下载
-                            return True
-                    raise  # 重新抛出异常
+                return True
 
             except Exception as e:
-                # 检查是否是 HeaderParsingError（文件可能已成功下载）
-                import os
-
-                error_str = str(e)
-                error_type = type(e).__name__
-
-                if (
-                    "HeaderParsingError" in error_type
-                    or "NoBoundaryInMultipartDefect" in error_str
-                ):
-                    # 检查文件是否已成功下载
-                    if os.path.exists(save_path) and os.path.getsize(save_path) > 0:
-                        # 文件已成功下载，忽略这个解析错误
-                        return True
+                # 响应头解析错误（HeaderParsingError）时文件可能已成功下载
+                if accept_header_parsing_error(e, save_path):
+                    return True
 
                 logger.error(f"  [X] 下载失败: {e}")
 
@@ -2,21 +2,96 @@
 数据库连接和会话管理
 """
 
-from sqlalchemy import create_engine
+import logging
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Any, AsyncGenerator, Callable, Generator, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
 from .config import settings
+from .pool_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+# 每个爬虫任务同时占用的连接：任务会话 + 附件处理会话
+CONNECTIONS_PER_CRAWL_TASK = 2
+# 定时任务调度、文件清理等后台作业预留的连接
+BACKGROUND_CONNECTIONS = 2
+
+
+def _async_database_url(url: str) -> Optional[str]:
+    """把同步连接串转换为 asyncpg 连接串（非PostgreSQL返回None）"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return None
+    return parsed.set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
+
+
+def _async_pool_connections() -> int:
+    """异步连接池最多占用的连接数（未启用异步引擎时为0）"""
+    if not settings.async_db_enabled or not _async_database_url(settings.database_url):
+        return 0
+    return settings.async_db_pool_size + settings.async_db_max_overflow
+
+
+def pool_sizing() -> Tuple[int, int]:
+    """计算同步连接池大小
+
+    未配置 DB_POOL_SIZE 时按 爬虫并发任务数 x 每任务连接数 + 同步接口预留
+    + 后台作业预留 计算；未配置 DB_MAX_OVERFLOW 时，把数据库连接总数按
+    worker进程平分，扣除异步连接池和常驻连接后剩余的作为溢出上限
+    （最多与常驻连接数相同）。
+
+    Returns:
+        (pool_size, max_overflow)
+    """
+    pool_size = settings.db_pool_size
+    if pool_size is None:
+        pool_size = (
+            settings.crawl_max_concurrent_tasks * CONNECTIONS_PER_CRAWL_TASK
+            + settings.db_api_connections
+            + BACKGROUND_CONNECTIONS
+        )
+
+    max_overflow = settings.db_max_overflow
+    if max_overflow is None:
+        per_process = (
+            settings.db_max_connections // max(1, settings.web_concurrency)
+            - _async_pool_connections()
+        )
+        if per_process < pool_size:
+            logger.warning(
+                f"数据库连接预算不足: 每个进程可用 {per_process} 个连接，"
+                f"连接池常驻 {pool_size} 个（DB_MAX_CONNECTIONS={settings.db_max_connections}, "
+                f"WEB_CONCURRENCY={settings.web_concurrency}）"
+            )
+        max_overflow = max(0, min(pool_size, per_process - pool_size))
+
+    return pool_size, max_overflow
+
 
-# 创建数据库引擎 - 优化内存占用
+_pool_size, _max_overflow = pool_sizing()
+
+# 创建数据库引擎
 engine = create_engine(
     settings.database_url,
+    poolclass=InstrumentedQueuePool,
     pool_pre_ping=True,  # 连接前检查
-    pool_size=5,  # 减少连接池大小
-    max_overflow=10,  # 减少最大溢出连接
+    pool_size=_pool_size,
+    max_overflow=_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
     pool_recycle=300,  # 5分钟后回收连接，避免连接失效
     echo=settings.debug,  # 调试模式下打印SQL
 )
+instrument_engine(engine, "sync")
+logger.info(f"同步连接池: pool_size={_pool_size}, max_overflow={_max_overflow}")
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -25,6 +100,45 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def _create_async_engine():
+    """创建只读接口使用的异步引擎（未启用或缺少驱动时返回None）"""
+    if not settings.async_db_enabled:
+        return None
+    async_url = _async_database_url(settings.database_url)
+    if async_url is None:
+        return None
+    try:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        async_engine = create_async_engine(
+            async_url,
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_pre_ping=True,
+            pool_size=settings.async_db_pool_size,
+            max_overflow=settings.async_db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=300,
+            echo=settings.debug,
+        )
+    except ImportError as e:
+        # asyncpg/greenlet 是可选依赖，缺少时只读接口退回同步会话
+        logger.warning(f"异步数据库驱动不可用，只读接口使用同步连接: {e}")
+        return None
+    instrument_engine(async_engine.sync_engine, "async")
+    return async_engine
+
+
+# 异步引擎（只读接口使用，连接池与同步引擎分开）
+async_engine = _create_async_engine()
+AsyncSessionLocal = None
+if async_engine is not None:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     获取数据库会话（依赖注入）
@@ -40,6 +154,113 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def worker_session(owner: str) -> Session:
+    """创建后台任务使用的会话
+
+    owner 用于连接池监控中标记连接的持有者（如 "task:12"），
+    调用方负责关闭会话。
+    """
+    db = SessionLocal()
+    db.info["owner"] = owner
+    return db
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed_writes(session, flush_context):
+    session.info["flushed_writes"] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_flushed_writes(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("flushed_writes", None)
+
+
+def release_connection(db: Session) -> bool:
+    """短会话模式下结束会话当前的事务，把连接归还连接池
+
+    后台任务在网络请求、等待下载等长时间不访问数据库的操作前调用。
+    会话中尚未刷新的修改（如进度、统计）随之提交；事务中已有刷新但未提交的
+    写入（如批量事务中的政策）时不做处理，由批量事务按原计划提交。
+
+    Returns:
+        是否归还了连接
+    """
+    if not settings.db_worker_short_sessions or not db.in_transaction():
+        return False
+    if db.info.get("flushed_writes"):
+        return False
+    try:
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"归还数据库连接时提交失败: {e}")
+        return False
+
+
+class ReadSession:
+    """只读接口使用的会话
+
+    服务层是同步代码，异步会话上通过 run_sync 在事件循环中执行（IO等待时让出，
+    不占用线程池）；没有异步引擎时退回同步会话，在线程池中执行。
+    ORM对象的延迟加载只能在 run 执行的函数内进行，序列化也应放在函数内完成。
+
+    run_sync 在事件循环线程中执行整个函数，只适合以数据库IO为主的查询；
+    计算量大或会获取阻塞锁的函数（如二元组索引检索）使用 run_blocking。
+    """
+
+    def __init__(
+        self, async_session: Any = None, sync_session: Optional[Session] = None
+    ):
+        self.async_session = async_session
+        self.sync_session = sync_session
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """执行 fn(同步会话, *args, **kwargs)"""
+        if self.async_session is not None:
+            return await self.async_session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def run_blocking(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """在线程池中执行 fn(同步会话, *args, **kwargs)，不占用事件循环
+
+        使用异步会话时为本次调用创建独立的同步会话。
+        """
+        if self.sync_session is not None:
+            return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+        return await run_in_threadpool(_run_in_sync_session, fn, *args, **kwargs)
+
+
+def _run_in_sync_session(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """在新建的同步会话中执行 fn（用完关闭）"""
+    db = worker_session("read_blocking")
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+async def get_read_db() -> AsyncGenerator[ReadSession, None]:
+    """
+    获取只读接口的数据库会话（依赖注入）
+    使用方式：
+        @app.get("/api/...")
+        async def endpoint(db: ReadSession = Depends(get_read_db)):
+            return await db.run(query_function, ...)
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield ReadSession(async_session=session)
+        return
+
+    db = SessionLocal()
+    try:
+        yield ReadSession(sync_session=db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
 def init_db():
     """初始化数据库（创建所有表）"""
     # 导入所有模型以确保它们被注册
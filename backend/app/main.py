@@ -23,6 +23,7 @@ from contextlib import asynccontextmanager
 
 from .config import settings
 from .database import engine, Base
+from .pool_metrics import ConnectionOwnerMiddleware, get_pool_status
 from .api import auth, policies, tasks, scheduled_tasks, config, backups
 
 # 配置日志
@@ -218,56 +219,108 @@ async def lifespan(app: FastAPI):
     try:
         from .services.scheduler_service import get_scheduler_service
 
+        # 启用时参与选主，只有leader进程调度定时任务和文件清理等周期作业
         scheduler_service = get_scheduler_service()
         scheduler_service.start()
         logger.info("定时任务调度器启动完成")
+    except Exception as e:
+        logger.error(f"启动定时任务调度器失败: {e}", exc_info=True)
 
-        # 注册文件清理任务（每天凌晨2点执行）
-        if scheduler_service.scheduler and scheduler_service.scheduler.running:
-            from .services.file_cleanup_service import get_cleanup_service
+    # 加载二元组搜索索引（启用时在后台加载并追平数据库，未就绪前使用数据库搜索）
+    try:
+        from .services.search_service import SearchService
 
-            cleanup_service = get_cleanup_service()
+        SearchService().load_bigram_index()
+    except Exception as e:
+        logger.error(f"加载搜索索引失败: {e}", exc_info=True)
 
-            def cleanup_job():
-                """清理过期临时文件的任务"""
-                try:
-                    # 执行垃圾回收，释放内存
-                    import gc
+    # 继续执行上次未完成的任务文件清理作业
+    try:
+        from .services.file_purge_service import get_file_purge_service
 
-                    gc.collect()
+        get_file_purge_service().resume_pending()
+    except Exception as e:
+        logger.error(f"恢复文件清理作业失败: {e}", exc_info=True)
 
-                    cleanup_service.cleanup_old_files(max_age_hours=24)
+    # 启动爬虫任务worker（领取数据库任务队列中的任务；独立部署worker进程时可关闭）
+    if settings.task_worker_enabled:
+        try:
+            from .services.task_queue_service import get_task_worker
 
-                    # 记录内存使用情况
-                    import psutil
+            get_task_worker().start()
+        except Exception as e:
+            logger.error(f"启动任务worker失败: {e}", exc_info=True)
 
-                    process = psutil.Process()
-                    memory_info = process.memory_info()
-                    logger.info(
-                        f"内存清理完成，当前内存使用: {memory_info.rss / 1024 / 1024:.1f} MB"
-                    )
+    # 监听跨进程任务进度通知（PostgreSQL），任意进程都能推送任意任务的进度
+    try:
+        from .services.progress_channel import get_progress_channel
 
-                except Exception as e:
-                    logger.error(f"文件清理任务执行失败: {e}", exc_info=True)
-
-            scheduler_service.scheduler.add_job(
-                cleanup_job,
-                trigger="cron",
-                hour=2,
-                minute=0,
-                id="file_cleanup",
-                name="清理过期临时文件",
-                replace_existing=True,
-            )
-            logger.info("文件清理任务已注册（每天凌晨2点执行）")
+        get_progress_channel().start()
     except Exception as e:
-        logger.error(f"启动定时任务调度器失败: {e}", exc_info=True)
+        logger.error(f"启动进度通知监听失败: {e}", exc_info=True)
+
+    # 启动邮件发件器（发送发件箱中的通知邮件）
+    try:
+        from .services.email_outbox import get_email_sender
+
+        get_email_sender().start()
+    except Exception as e:
+        logger.error(f"启动邮件发件器失败: {e}", exc_info=True)
+
+    # 筛选项汇总表为空但已有政策时（如直接建表升级的旧库）全量构建一次
+    try:
+        from .database import SessionLocal
+        from .models.policy import Policy, PolicyFacetCount
+        from .services.facet_service import get_facet_service
+
+        db = SessionLocal()
+        try:
+            if (
+                db.query(PolicyFacetCount).first() is None
+                and db.query(Policy.id).first() is not None
+            ):
+                get_facet_service().rebuild(db)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"构建筛选项汇总表失败: {e}", exc_info=True)
 
     yield
 
     # 关闭时执行
     logger.info("应用关闭中...")
 
+    # 停止任务worker，执行中的任务放回队列由其他worker继续
+    if settings.task_worker_enabled:
+        try:
+            from .services.task_queue_service import get_task_worker
+
+            get_task_worker().stop()
+        except Exception as e:
+            logger.error(f"停止任务worker失败: {e}", exc_info=True)
+
+    try:
+        from .services.progress_channel import get_progress_channel
+
+        get_progress_channel().stop()
+    except Exception as e:
+        logger.error(f"停止进度通知监听失败: {e}", exc_info=True)
+
+    try:
+        from .services.email_outbox import get_email_sender
+
+        get_email_sender().stop()
+    except Exception as e:
+        logger.error(f"停止邮件发件器失败: {e}", exc_info=True)
+
+    # 保存二元组搜索索引
+    try:
+        from .services.search_service import SearchService
+
+        SearchService().save_bigram_index()
+    except Exception as e:
+        logger.error(f"保存搜索索引失败: {e}", exc_info=True)
+
     # 关闭定时任务调度器
     try:
         from .services.scheduler_service import get_scheduler_service
@@ -278,6 +331,15 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"关闭定时任务调度器失败: {e}", exc_info=True)
 
+    # 关闭异步数据库连接池
+    try:
+        from .database import async_engine
+
+        if async_engine is not None:
+            await async_engine.dispose()
+    except Exception as e:
+        logger.error(f"关闭异步数据库连接池失败: {e}", exc_info=True)
+
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -287,6 +349,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# 连接池监控：标记API请求借出的数据库连接
+app.add_middleware(ConnectionOwnerMiddleware)
+
 # 配置CORS
 app.add_middleware(
     CORSMiddleware,
@@ -340,6 +405,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/api/health/db-pool")
+async def db_pool_status():
+    """数据库连接池状态（借出/溢出连接数、等待时间、长时间占用连接的持有者）"""
+    return get_pool_status(long_held_seconds=settings.db_long_held_seconds)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -6,21 +6,16 @@ from typing import Optional
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..database import ReadSession, get_db, get_read_db
 from ..services.auth_service import AuthService
 from ..models.user import User
 
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """获取当前用户（依赖注入）"""
+def _authenticate(db: Session, token: str) -> User:
+    """校验令牌并返回当前用户，失败时抛出HTTP异常"""
     try:
-        token = credentials.credentials
-
         user = AuthService.get_current_user(db, token)
         if user is None:
             raise HTTPException(
@@ -47,6 +42,22 @@ def get_current_user(
         )
 
 
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+) -> User:
+    """获取当前用户（依赖注入）"""
+    return _authenticate(db, credentials.credentials)
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: ReadSession = Depends(get_read_db),
+) -> User:
+    """获取当前用户（异步接口使用，与接口共用同一个只读会话）"""
+    return await db.run(_authenticate, credentials.credentials)
+
+
 def get_optional_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(
         HTTPBearer(auto_error=False)
@@ -1,21 +1,27 @@
 """数据库模型模块"""
 
 from .user import User
-from .policy import Policy
-from .task import Task, TaskPolicy
-from .attachment import Attachment
+from .policy import Policy, PolicyContent, PolicyFacetCount
+from .task import Task, TaskPolicy, TaskFilePurge, TaskQueueItem
+from .attachment import Attachment, AttachmentBlob
 from .scheduled_task import ScheduledTask, ScheduledTaskRun
-from .system_config import SystemConfig, BackupRecord
+from .system_config import SystemConfig, BackupRecord, EmailOutbox
 
 # 导入所有模型以确保它们被注册
 __all__ = [
     "User",
     "Policy",
+    "PolicyContent",
+    "PolicyFacetCount",
     "Task",
     "TaskPolicy",
+    "TaskFilePurge",
+    "TaskQueueItem",
     "Attachment",
+    "AttachmentBlob",
     "ScheduledTask",
     "ScheduledTaskRun",
     "SystemConfig",
     "BackupRecord",
+    "EmailOutbox",
 ]
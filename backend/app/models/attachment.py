@@ -2,17 +2,47 @@
 附件模型
 """
 
-from sqlalchemy import Column, BigInteger, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    Integer,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+    Index,
+)
 from sqlalchemy.sql import func
 from ..database import Base
 
 
+class AttachmentBlob(Base):
+    """附件内容块表（按SHA-256内容寻址，跨任务去重）"""
+
+    __tablename__ = "attachment_blobs"
+
+    sha256 = Column(String(64), primary_key=True)  # 文件内容的SHA-256（十六进制）
+    file_size = Column(BigInteger)  # 字节
+    local_path = Column(String(500))  # 本地路径
+    s3_key = Column(String(500))  # S3键（为空表示尚未上传）
+    ref_count = Column(Integer, nullable=False, default=0)  # 引用该内容块的附件数
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    __table_args__ = (Index("idx_attachment_blobs_ref_count", "ref_count"),)
+
+
 class Attachment(Base):
     """附件表"""
 
     __tablename__ = "attachments"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    # SQLite（测试环境）只有INTEGER主键才会自增
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True
+    )
     policy_id = Column(
         BigInteger,
         ForeignKey("policies.id", ondelete="CASCADE"),
@@ -25,6 +55,12 @@ class Attachment(Base):
     file_s3_key = Column(String(500))  # S3键
     file_type = Column(String(50))  # docx/pdf/doc
     file_size = Column(BigInteger)  # 字节
+    blob_sha256 = Column(
+        String(64), ForeignKey("attachment_blobs.sha256"), nullable=True
+    )  # 内容块（为空表示旧数据，文件按任务目录存放）
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    __table_args__ = (Index("idx_attachments_policy_id", "policy_id"),)
+    __table_args__ = (
+        Index("idx_attachments_policy_id", "policy_id"),
+        Index("idx_attachments_blob_sha256", "blob_sha256"),
+    )
@@ -15,6 +15,11 @@
 政策模型
 """
 
+import zlib
+import base64
+import hashlib
+from typing import Any, Dict, Optional
+
 from sqlalchemy import (
     Column,
     BigInteger,
@@ -26,17 +31,26 @@ from sqlalchemy import (
     DateTime,
     Index,
     ForeignKey,
+    DDL,
+    event,
 )
-from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func, text
 from ..database import Base
 
+# 唯一索引中发布日期的表达式（NULL替换为固定日期，使发布日期为空的政策也能判重）
+PUB_DATE_KEY = "COALESCE(pub_date, '1900-01-01')"
+
 
 class Policy(Base):
     """政策主表"""
 
     __tablename__ = "policies"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    # SQLite（测试环境）只有INTEGER主键才会自增
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True
+    )
 
     # 基本信息
     title = Column(String(500), nullable=False, index=True)
@@ -56,8 +70,7 @@ class Policy(Base):
     source_url = Column(Text, nullable=False)
     source_name = Column(String(200), index=True)
 
-    # 内容
-    content = Column(Text, nullable=False)  # 全文内容
+    # 内容（全文存放在 policy_contents 表，见 PolicyContent）
     content_summary = Column(Text)  # 摘要
 
     # 元数据
@@ -103,14 +116,164 @@ class Policy(Base):
         index=True,
     )
 
-    # 唯一约束
-    # 注意：PostgreSQL不支持部分唯一索引，所以使用应用层逻辑检查唯一性
+    # 唯一约束（部分唯一索引，由数据库保证，写入时使用 ON CONFLICT DO NOTHING）
     # 对于task_id不为NULL的情况：(title, source_url, pub_date, task_id)唯一
     # 对于task_id为NULL的情况：(title, source_url, pub_date)唯一（兼容旧数据）
+    # pub_date可以为NULL，而NULL在唯一索引中互不相等，因此索引使用
+    # COALESCE(pub_date, '1900-01-01')，发布日期为空的同一政策也只保存一次
     __table_args__ = (
-        Index("idx_policy_unique", "title", "source_url", "pub_date"),
+        Index(
+            "uq_policies_identity_task",
+            "title",
+            "source_url",
+            text(PUB_DATE_KEY),
+            "task_id",
+            unique=True,
+            postgresql_where=text("task_id IS NOT NULL"),
+            sqlite_where=text("task_id IS NOT NULL"),
+        ),
+        Index(
+            "uq_policies_identity_legacy",
+            "title",
+            "source_url",
+            text(PUB_DATE_KEY),
+            unique=True,
+            postgresql_where=text("task_id IS NULL"),
+            sqlite_where=text("task_id IS NULL"),
+        ),
         Index("idx_policy_task", "task_id"),
-        # 注意：全文搜索应该使用PostgreSQL的GIN索引和tsvector，而不是普通的btree索引
-        # 这里只对title建立索引，content字段太大无法用btree索引
-        # 全文搜索功能在search_service中使用tsvector实现
+        # 政策列表按 (pub_date, id) 倒序键集分页，索引顺序与 ORDER BY 一致
+        Index(
+            "idx_policies_pub_date_id",
+            text("pub_date DESC NULLS LAST"),
+            text("id DESC"),
+        ).ddl_if(dialect="postgresql"),
+        # 关键词搜索（ILIKE '%词%'）使用 pg_trgm 的 GIN 三元组索引
+        Index(
+            "idx_policies_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "idx_policies_keywords_trgm",
+            "keywords",
+            postgresql_using="gin",
+            postgresql_ops={"keywords": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    # 全文（一对一，访问 content 时才加载；导出时用 selectinload 批量加载）
+    # 删除政策时由数据库的 ON DELETE CASCADE 删除正文，不需要先加载
+    content_row = relationship(
+        "PolicyContent",
+        uselist=False,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    @property
+    def content(self) -> str:
+        """全文内容"""
+        row = self.content_row
+        return row.text if row is not None else ""
+
+    @content.setter
+    def content(self, value: str):
+        fields = PolicyContent.pack(value)
+        if self.content_row is None:
+            self.content_row = PolicyContent(**fields)
+        elif self.content_row.content_hash != fields["content_hash"]:
+            for name, field_value in fields.items():
+                setattr(self.content_row, name, field_value)
+
+
+class PolicyContent(Base):
+    """政策全文表
+
+    全文与政策主表分开存放：主表只保留筛选、排序和列表展示用的窄字段，
+    筛选类查询读取的数据页大幅减少，更新文件路径等字段也不会复制大段正文。
+    超长正文（超过 COMPRESS_THRESHOLD 个字符）压缩后存放，这类正文不参与
+    数据库关键词匹配（二元组索引引擎仍会索引解压后的内容）。
+    """
+
+    __tablename__ = "policy_contents"
+
+    # 超过该字符数的正文用 zlib 压缩后 base64 编码存放
+    COMPRESS_THRESHOLD = 1_000_000
+
+    policy_id = Column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        ForeignKey("policies.id", ondelete="CASCADE"),
+        primary_key=True,
     )
+    content = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=False)  # 原文的SHA256
+    compressed = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        # 关键词搜索（ILIKE '%词%'）使用 pg_trgm 的 GIN 三元组索引
+        # content字段太大无法用btree索引，GIN索引没有单值长度限制
+        Index(
+            "idx_policy_contents_content_trgm",
+            "content",
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    @classmethod
+    def pack(cls, text_value: Optional[str]) -> Dict[str, Any]:
+        """把正文转换为存储字段 (content, content_hash, compressed)"""
+        text_value = text_value or ""
+        content_hash = hashlib.sha256(text_value.encode("utf-8")).hexdigest()
+        if len(text_value) <= cls.COMPRESS_THRESHOLD:
+            return {
+                "content": text_value,
+                "content_hash": content_hash,
+                "compressed": False,
+            }
+        packed = base64.b64encode(zlib.compress(text_value.encode("utf-8"), 6))
+        return {
+            "content": packed.decode("ascii"),
+            "content_hash": content_hash,
+            "compressed": True,
+        }
+
+    @staticmethod
+    def unpack(content: Optional[str], compressed: Optional[bool]) -> str:
+        """把存储字段还原为正文"""
+        if not content:
+            return ""
+        if not compressed:
+            return content
+        return zlib.decompress(base64.b64decode(content)).decode("utf-8")
+
+    @property
+    def text(self) -> str:
+        """解压后的正文"""
+        return self.unpack(self.content, self.compressed)
+
+
+class PolicyFacetCount(Base):
+    """政策筛选项计数汇总表
+
+    按 (数据源, 分类, 效力级别) 汇总政策数量，写入和删除政策时在同一事务中
+    增量更新，筛选面板读取这张小表即可得到各筛选项及其数量，
+    不需要对政策表做 SELECT DISTINCT。空值统一存为空字符串。
+    """
+
+    __tablename__ = "policy_facet_counts"
+
+    source_name = Column(String(200), primary_key=True, default="")
+    category = Column(String(200), primary_key=True, default="")
+    level = Column(String(100), primary_key=True, default="")
+    policy_count = Column(BigInteger, nullable=False, default=0)
+
+
+# 三元组索引依赖 pg_trgm 扩展（直接 create_all 建表时先创建扩展）
+event.listen(
+    Policy.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
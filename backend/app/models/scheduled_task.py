@@ -23,7 +23,9 @@ class ScheduledTask(Base):
 
     __tablename__ = "scheduled_tasks"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True
+    )
     task_type = Column(String(50), nullable=False)  # crawl_task/backup_task等
     task_name = Column(String(255), nullable=False, unique=True)
     cron_expression = Column(String(100), nullable=False)
@@ -44,7 +46,9 @@ class ScheduledTaskRun(Base):
 
     __tablename__ = "scheduled_task_runs"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True
+    )
     task_id = Column(
         BigInteger,
         ForeignKey("scheduled_tasks.id", ondelete="CASCADE"),
@@ -53,6 +57,8 @@ class ScheduledTaskRun(Base):
     )
     run_time = Column(DateTime(timezone=True), nullable=False, index=True)
     status = Column(String(50), nullable=False)  # running/completed/failed
+    # 爬虫任务的任务ID（任务在队列中执行，结束后完成执行记录；任务可能已删除，不设外键）
+    crawl_task_id = Column(BigInteger, index=True)
     result_json = Column(JSON)
     error_message = Column(Text)
     duration_seconds = Column(Integer)  # 执行耗时（秒）
@@ -2,7 +2,17 @@
 系统配置模型
 """
 
-from sqlalchemy import Column, String, Text, Boolean, DateTime
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    Integer,
+    String,
+    Text,
+    Boolean,
+    DateTime,
+    JSON,
+    Index,
+)
 from sqlalchemy.sql import func
 from ..database import Base
 
@@ -49,3 +59,35 @@ class BackupRecord(Base):
     source_name = Column(
         String(255)
     )  # 备份时保存的任务名称（用于追溯，即使任务删除也能知道来源）
+
+
+class EmailOutbox(Base):
+    """邮件发件箱
+
+    发送通知邮件时只写入一行，由后台发件器批量发送（复用已登录的SMTP连接）。
+    发件器领取时把 next_attempt_at 推迟到领取超时之后，发送进程中途退出时
+    超时后由其他发件器重新发送；发送失败按指数退避重试，超过最大次数后标记为失败。
+    """
+
+    __tablename__ = "email_outbox"
+
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True
+    )
+    subject = Column(String(500), nullable=False)
+    body = Column(Text, nullable=False)
+    body_html = Column(Text)
+    to_addresses = Column(JSON, nullable=False)  # 收件人地址列表
+    status = Column(
+        String(20), nullable=False, default="pending"
+    )  # pending/sent/failed
+    attempts = Column(Integer, nullable=False, default=0)  # 已尝试发送次数
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # 发件器按状态筛选、按下次发送时间排序领取
+        Index("idx_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
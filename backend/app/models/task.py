@@ -12,6 +12,7 @@ from sqlalchemy import (
     ForeignKey,
     JSON,
     Index,
+    text,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -23,7 +24,9 @@ class Task(Base):
 
     __tablename__ = "tasks"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True
+    )
     task_name = Column(String(255), nullable=False)
     task_type = Column(String(50), nullable=False, index=True)  # manual/scheduled
     status = Column(
@@ -37,6 +40,8 @@ class Task(Base):
     failed_count = Column(Integer, default=0)
     error_message = Column(Text)
     progress_message = Column(Text)  # 实时进度消息（列表爬取状态等）
+    progress_seq = Column(Integer, default=0)  # 最后一行进度消息的序号
+    progress_counters = Column(JSON)  # 进度计数器及其最后变化时的消息序号
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
@@ -46,6 +51,12 @@ class Task(Base):
     __table_args__ = (
         Index("idx_tasks_status", "status"),
         Index("idx_tasks_created_at", "created_at"),
+        # 任务列表按 (created_at, id) 倒序键集分页
+        Index(
+            "idx_tasks_created_at_id",
+            text("created_at DESC NULLS LAST"),
+            text("id DESC"),
+        ).ddl_if(dialect="postgresql"),
     )
 
 
@@ -65,3 +76,71 @@ class TaskPolicy(Base):
     # 关系
     task = relationship("Task", backref="task_policies")
     policy = relationship("Policy", backref="task_policies")
+
+
+class TaskFilePurge(Base):
+    """任务文件清理作业表
+
+    删除任务时数据库记录在请求内按集合删除，文件（本地目录、S3对象、缓存）
+    的清理记录为一条作业由后台执行，任务删除后仍可通过作业查询清理进度。
+    """
+
+    __tablename__ = "task_file_purges"
+
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True
+    )
+    task_id = Column(BigInteger, nullable=False, index=True)  # 任务已删除，不设外键
+    task_name = Column(String(255))
+    status = Column(
+        String(50), nullable=False, default="pending", index=True
+    )  # pending/running/completed/failed
+    local_paths = Column(JSON)  # 需要删除的本地目录或文件
+    s3_prefixes = Column(JSON)  # 需要删除的S3前缀
+    s3_keys = Column(JSON)  # 需要删除的单个S3对象（不在任务前缀下的旧附件）
+    blob_hashes = Column(JSON)  # 已释放引用的附件内容块（引用归零的由作业回收）
+    deleted_files = Column(Integer, default=0)  # 删除的本地目录/文件数
+    deleted_objects = Column(Integer, default=0)  # 删除的S3对象数
+    failed_count = Column(Integer, default=0)
+    error_message = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+
+class TaskQueueItem(Base):
+    """爬虫任务队列表
+
+    启动任务时写入一行，由任意进程中的任务worker用
+    SELECT ... FOR UPDATE SKIP LOCKED 领取执行。执行期间worker定时刷新
+    heartbeat_at 续租，超过租约时间未续租的任务视为执行进程已退出，
+    可被其他worker重新领取；任务结束后删除该行。领取时按优先级和入队时间
+    排序，并受全局和按数据源的并发上限约束（准入控制）。
+    """
+
+    __tablename__ = "task_queue"
+
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True
+    )
+    task_id = Column(
+        BigInteger,
+        ForeignKey("tasks.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+    status = Column(String(20), nullable=False, default="queued")  # queued/claimed
+    priority = Column(
+        Integer, nullable=False, default=0
+    )  # 数值小的优先（手动任务优先于定时任务）
+    sources = Column(JSON)  # 任务使用的数据源名称（按数据源限制并发）
+    enqueued_at = Column(DateTime(timezone=True), server_default=func.now())
+    claimed_by = Column(String(200))  # 领取任务的worker标识（主机名:进程号）
+    claimed_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))
+    attempts = Column(Integer, nullable=False, default=0)  # 领取次数
+
+    __table_args__ = (
+        # 领取时按状态筛选、按优先级和入队时间排序
+        Index("idx_task_queue_status_priority", "status", "priority", "enqueued_at"),
+    )
@@ -0,0 +1,200 @@
+"""
+数据库连接池监控
+
+记录每个连接池的借出/溢出数量、等待连接的时间和超时次数，以及当前借出
+的每个连接的持有者和借出时长，用于定位长时间占用连接的后台任务。
+
+持有者按以下顺序确定：会话的 info["owner"]（后台任务使用 worker_session 创建
+的会话）> 当前上下文的 connection_owner（API请求）> 线程名。
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+_connection_owner: ContextVar[Optional[str]] = ContextVar(
+    "db_connection_owner", default=None
+)
+
+
+@contextmanager
+def connection_owner(owner: str) -> Iterator[None]:
+    """标记当前上下文中借出的连接的持有者"""
+    token = _connection_owner.set(owner)
+    try:
+        yield
+    finally:
+        _connection_owner.reset(token)
+
+
+def current_owner() -> str:
+    """当前上下文的连接持有者"""
+    return _connection_owner.get() or threading.current_thread().name
+
+
+class PoolMetrics:
+    """单个连接池的监控数据"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        # id(DBAPI连接) -> [持有者, 借出时间]
+        self._checked_out: Dict[int, list] = {}
+        self.checkouts = 0
+        self.waits = 0  # 需要等待（超过1毫秒）才拿到连接的次数
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        """记录一次获取连接的等待时间"""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            if seconds >= 0.001:
+                self.waits += 1
+                self.wait_seconds_total += seconds
+                self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def on_checkout(self, dbapi_connection: Any, owner: str):
+        with self._lock:
+            self.checkouts += 1
+            self._checked_out[id(dbapi_connection)] = [owner, time.monotonic()]
+
+    def on_checkin(self, dbapi_connection: Any):
+        with self._lock:
+            self._checked_out.pop(id(dbapi_connection), None)
+
+    def set_owner(self, dbapi_connection: Any, owner: str):
+        """会话开始事务时用会话的持有者覆盖默认持有者"""
+        with self._lock:
+            entry = self._checked_out.get(id(dbapi_connection))
+            if entry is not None:
+                entry[0] = owner
+
+    def snapshot(self, pool: Any, long_held_seconds: float) -> Dict[str, Any]:
+        """当前连接池状态
+
+        Args:
+            pool: 连接池
+            long_held_seconds: 借出超过该秒数的连接列为长时间占用
+        """
+        now = time.monotonic()
+        with self._lock:
+            held = [(owner, now - since) for owner, since in self._checked_out.values()]
+            by_owner: Dict[str, int] = {}
+            for owner, _ in held:
+                by_owner[owner] = by_owner.get(owner, 0) + 1
+            return {
+                "name": self.name,
+                "pool_size": pool.size(),
+                "max_overflow": getattr(pool, "_max_overflow", 0),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_ms_avg": (
+                    round(self.wait_seconds_total / self.waits * 1000, 1)
+                    if self.waits
+                    else 0.0
+                ),
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 1),
+                "timeouts": self.timeouts,
+                "checked_out_by_owner": by_owner,
+                "long_held": [
+                    {"owner": owner, "held_seconds": round(seconds, 1)}
+                    for owner, seconds in sorted(held, key=lambda item: -item[1])
+                    if seconds >= long_held_seconds
+                ],
+            }
+
+
+class _TimedGetMixin:
+    """记录从连接池获取连接的等待时间"""
+
+    _metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self._metrics is not None:
+                self._metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self._metrics is not None:
+            self._metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # dispose() 会重建连接池，监控数据沿用到新的连接池
+        pool = super().recreate()
+        pool._metrics = self._metrics
+        return pool
+
+
+class InstrumentedQueuePool(_TimedGetMixin, QueuePool):
+    """带监控的连接池（同步引擎）"""
+
+
+class InstrumentedAsyncQueuePool(_TimedGetMixin, AsyncAdaptedQueuePool):
+    """带监控的连接池（异步引擎）"""
+
+
+# 连接池名称 -> (引擎, 监控数据)
+_registry: Dict[str, tuple] = {}
+
+
+def instrument_engine(engine: Any, name: str) -> PoolMetrics:
+    """为引擎的连接池注册监控（异步引擎传入 sync_engine）"""
+    metrics = PoolMetrics(name)
+    engine.pool._metrics = metrics
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.on_checkout(dbapi_connection, current_owner())
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.on_checkin(dbapi_connection)
+
+    _registry[name] = (engine, metrics)
+    return metrics
+
+
+@event.listens_for(Session, "after_begin")
+def _tag_session_owner(session, transaction, connection):
+    """会话开始事务时，把连接的持有者标记为会话的持有者"""
+    owner = session.info.get("owner")
+    metrics = getattr(connection.engine.pool, "_metrics", None)
+    if owner and metrics is not None:
+        metrics.set_owner(connection.connection.dbapi_connection, owner)
+
+
+class ConnectionOwnerMiddleware:
+    """ASGI中间件：把请求中借出的连接的持有者标记为 api:方法 路径"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with connection_owner(f"api:{scope['method']} {scope['path']}"):
+            await self.app(scope, receive, send)
+
+
+def get_pool_status(long_held_seconds: float = 60.0) -> Dict[str, Any]:
+    """所有已注册连接池的状态"""
+    return {
+        name: metrics.snapshot(engine.pool, long_held_seconds)
+        for name, (engine, metrics) in _registry.items()
+    }
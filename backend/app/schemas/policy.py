@@ -148,6 +148,27 @@ class PolicyListResponse(BaseModel):
     total: int
     skip: int
     limit: int
+    total_is_estimate: bool = Field(
+        False, description="total是否为估算值（大结果集按查询规划器估算）"
+    )
+    next_cursor: Optional[str] = Field(
+        None, description="下一页游标（原样传回cursor参数翻页，没有下一页时为空）"
+    )
+
+
+class FacetValue(BaseModel):
+    """筛选项及其政策数量"""
+
+    value: str
+    count: int
+
+
+class PolicyFacetsResponse(BaseModel):
+    """筛选项响应（分类/效力级别/数据源及数量）"""
+
+    categories: List[FacetValue] = Field(default_factory=list)
+    levels: List[FacetValue] = Field(default_factory=list)
+    source_names: List[FacetValue] = Field(default_factory=list)
 
 
 class PolicySearchRequest(BaseModel):
@@ -160,6 +181,9 @@ class PolicySearchRequest(BaseModel):
     end_date: Optional[date] = Field(None, description="结束日期")
     skip: int = Field(0, ge=0, description="跳过数量")
     limit: int = Field(20, ge=1, le=100, description="每页数量")
+    cursor: Optional[str] = Field(
+        None, description="分页游标（上一页返回的next_cursor，优先于skip）"
+    )
 
 
 class AttachmentResponse(BaseModel):
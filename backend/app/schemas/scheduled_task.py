@@ -122,6 +122,7 @@ class ScheduledTaskRunResponse(BaseModel):
     task_id: int
     run_time: datetime
     status: str
+    crawl_task_id: Optional[int] = None  # 爬虫任务ID
     result_json: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
     duration_seconds: Optional[int] = None
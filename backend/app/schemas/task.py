@@ -44,8 +44,13 @@ class TaskResponse(BaseModel):
     failed_count: int = 0
     error_message: Optional[str] = None
     progress_message: Optional[str] = None  # 实时进度消息
+    progress_seq: Optional[int] = 0  # 进度消息最后一行的序号（增量进度接口的 since）
     created_by: Optional[int] = None
     created_at: datetime
+    # 任务队列（已启动的任务）：queued 排队中 / running 已由worker领取执行
+    queue_status: Optional[str] = None
+    queue_position: Optional[int] = None  # 排队位置（从1开始）
+    estimated_start_time: Optional[datetime] = None  # 预计开始时间（估算）
 
     class Config:
         from_attributes = True
@@ -78,3 +83,59 @@ class TaskListResponse(BaseModel):
     total: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = Field(
+        None, description="下一页游标（原样传回cursor参数翻页，没有下一页时为空）"
+    )
+
+
+class TaskQueueEntry(BaseModel):
+    """任务队列项"""
+
+    task_id: int
+    task_name: Optional[str] = None
+    status: str  # queued/running
+    priority: int = 0  # 数值小的优先（手动0，定时10）
+    sources: List[str] = []
+    position: Optional[int] = None  # 排队位置（从1开始，执行中的为空）
+    enqueued_at: Optional[datetime] = None
+    claimed_by: Optional[str] = None  # 执行任务的worker
+    estimated_start_time: Optional[datetime] = (
+        None  # 预计开始时间（执行中的为领取时间）
+    )
+
+
+class TaskProgressLine(BaseModel):
+    """带序号的进度消息行"""
+
+    seq: int
+    text: str
+
+
+class TaskProgressDelta(BaseModel):
+    """任务增量进度"""
+
+    task_id: int
+    status: str
+    seq: int  # 最新进度序号（下次请求的 since）
+    reset: bool  # 为真时返回的是全部进度，客户端应替换本地的进度消息
+    lines: List[TaskProgressLine] = []  # since 之后的新进度行
+    counters: Dict[str, int] = {}  # since 之后变化过的计数器
+
+
+class TaskFilePurgeResponse(BaseModel):
+    """任务文件清理作业响应"""
+
+    id: int
+    task_id: int
+    task_name: Optional[str] = None
+    status: str  # pending/running/completed/failed
+    deleted_files: int = 0
+    deleted_objects: int = 0
+    failed_count: int = 0
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
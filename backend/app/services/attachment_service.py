@@ -22,7 +22,11 @@ class AttachmentService:
         self.document_converter = DocumentConverter()
 
     def extract_attachment_content(
-        self, policy_id: int, attachment_filename: str, task_id: Optional[int] = None
+        self,
+        policy_id: int,
+        attachment_filename: str,
+        task_id: Optional[int] = None,
+        blob_sha256: Optional[str] = None,
     ) -> Optional[str]:
         """
         从附件文件中提取文本内容
@@ -31,15 +35,22 @@ class AttachmentService:
             policy_id: 政策ID
             attachment_filename: 附件文件名
             task_id: 任务ID（可选，用于路径构造）
+            blob_sha256: 附件内容块哈希（可选，优先从内容块存储读取）
 
         Returns:
             提取的文本内容，如果提取失败则返回None
         """
+        file_path = None
         try:
             # 获取附件文件路径
-            file_path = self.storage_service.get_attachment_file_path(
-                policy_id, attachment_filename, task_id
-            )
+            if blob_sha256:
+                from .blob_store_service import get_blob_store_service
+
+                file_path = get_blob_store_service().get_blob_file_path(blob_sha256)
+            if not file_path:
+                file_path = self.storage_service.get_attachment_file_path(
+                    policy_id, attachment_filename, task_id
+                )
 
             if not file_path or not os.path.exists(file_path):
                 logger.warning(f"附件文件不存在: {file_path}")
@@ -61,6 +72,12 @@ class AttachmentService:
         except Exception as e:
             logger.error(f"提取附件内容失败: {e}", exc_info=True)
             return None
+        finally:
+            if blob_sha256:
+                # 删除从S3下载的内容块临时文件
+                from .blob_store_service import get_blob_store_service
+
+                get_blob_store_service().release_file_path(file_path)
 
     def _extract_doc_content(self, file_path: str) -> Optional[str]:
         """从DOC文件中提取文本内容"""
@@ -136,7 +153,10 @@ class AttachmentService:
                     try:
                         # 提取附件内容
                         content = self.extract_attachment_content(
-                            policy_id, attachment.file_name, task_id
+                            policy_id,
+                            attachment.file_name,
+                            task_id,
+                            blob_sha256=attachment.blob_sha256,
                         )
 
                         if content:
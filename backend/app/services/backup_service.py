@@ -171,25 +171,15 @@ class BackupService:
                 email_service = get_email_service()
                 # 传入db以实时加载配置
                 if email_service.is_enabled(db) and email_service.to_addresses:
-                    import asyncio
-                    from datetime import datetime
-
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        loop.run_until_complete(
-                            email_service.send_backup_notification(
-                                backup_type=backup_type,
-                                backup_path=str(backup_path),
-                                file_size=file_size_str,
-                                status="completed",
-                                start_time=backup_record.start_time,
-                                end_time=backup_record.end_time,
-                                db=db,  # 传入db以实时加载配置
-                            )
-                        )
-                    finally:
-                        loop.close()
+                    email_service.send_backup_notification(
+                        backup_type=backup_type,
+                        backup_path=str(backup_path),
+                        file_size=file_size_str,
+                        status="completed",
+                        start_time=backup_record.start_time,
+                        end_time=backup_record.end_time,
+                        db=db,  # 传入db以实时加载配置
+                    )
             except Exception as email_error:
                 logger.warning(f"发送备份通知邮件失败: {email_error}")
 
@@ -211,28 +201,18 @@ class BackupService:
                 email_service = get_email_service()
                 # 传入db以实时加载配置
                 if email_service.is_enabled(db) and email_service.to_addresses:
-                    import asyncio
-                    from datetime import datetime
-
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        loop.run_until_complete(
-                            email_service.send_backup_notification(
-                                backup_type=backup_type,
-                                backup_path=(
-                                    str(backup_path) if backup_path.exists() else "N/A"
-                                ),
-                                file_size="0",
-                                status="failed",
-                                error_message=str(e),
-                                start_time=backup_record.start_time,
-                                end_time=backup_record.end_time,
-                                db=db,  # 传入db以实时加载配置
-                            )
-                        )
-                    finally:
-                        loop.close()
+                    email_service.send_backup_notification(
+                        backup_type=backup_type,
+                        backup_path=(
+                            str(backup_path) if backup_path.exists() else "N/A"
+                        ),
+                        file_size="0",
+                        status="failed",
+                        error_message=str(e),
+                        start_time=backup_record.start_time,
+                        end_time=backup_record.end_time,
+                        db=db,  # 传入db以实时加载配置
+                    )
             except Exception as email_error:
                 logger.warning(f"发送备份失败通知邮件失败: {email_error}")
 
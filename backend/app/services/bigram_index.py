@@ -0,0 +1,626 @@
+"""
+二元组倒排索引 - 进程内中文全文检索引擎
+
+PostgreSQL 默认没有中文分词器，这里把文本中的连续汉字切成相邻二字组
+（bigram），字母数字按词切分，建立带位置信息的倒排索引：
+
+- 倒排列表按块存储，文档号差分后压缩（zlib），位置信息单独压缩，
+  只在需要短语校验时才解压；
+- 政策写入时增量加入索引，更新即“删除旧文档号 + 追加新文档号”，
+  因此倒排列表始终按文档号递增，已删除文档在压缩（compact）时清理；
+- 支持 AND / OR、引号短语、BM25 相关度排序以及分类、级别、日期筛选；
+- 定期持久化到磁盘，重启后直接加载。
+"""
+
+import os
+import re
+import math
+import bisect
+import pickle
+import logging
+import tempfile
+import threading
+import time
+import unicodedata
+import zlib
+from array import array
+from datetime import date, datetime
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 汉字（含扩展A区、兼容汉字）连续片段，或字母数字词
+_TOKEN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[0-9a-z]+")
+# 查询语法：引号短语或普通词
+_QUERY_RE = re.compile(r'"([^"]+)"|(\S+)')
+_OR_TOKENS = {"OR", "|"}
+
+INDEX_FORMAT_VERSION = 1
+
+
+def _is_cjk(char: str) -> bool:
+    """是否为汉字（词项只有汉字片段和字母数字词两种）"""
+    return not ("0" <= char <= "9" or "a" <= char <= "z")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """规范化文本（全角转半角、小写），索引和查询使用同一规则"""
+    if not text:
+        return ""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def tokenize(text: Optional[str]) -> List[Tuple[str, int]]:
+    """切分文本为 (词项, 位置) 列表
+
+    位置是词项在规范化文本中的字符偏移：相邻二字组的位置相差1，
+    短语校验通过比较相对偏移完成。
+    """
+    tokens = []
+    for match in _TOKEN_RE.finditer(normalize_text(text)):
+        run, start = match.group(), match.start()
+        if _is_cjk(run[0]) and len(run) > 1:
+            tokens.extend((run[i : i + 2], start + i) for i in range(len(run) - 1))
+        else:
+            tokens.append((run, start))
+    return tokens
+
+
+class _PostingList:
+    """单个词项的倒排列表
+
+    每块最多 BLOCK_SIZE 个文档：``(块内最大文档号, 文档块, 位置块)``。
+    文档块为 zlib 压缩的 array('I')：前半部分是文档号差分，后半部分是词频；
+    位置块为各文档位置差分依次拼接后的压缩数组。最近加入、尚未满块的
+    文档保存在未压缩的尾部缓冲中。
+    """
+
+    BLOCK_SIZE = 128
+
+    __slots__ = ("blocks", "last_docs", "tail", "count")
+
+    def __init__(self):
+        self.blocks: List[Tuple[bytes, bytes]] = []
+        self.last_docs: List[int] = []
+        self.tail: List[Tuple[int, List[int]]] = []
+        self.count = 0
+
+    def add(self, docno: int, positions: List[int]):
+        """追加文档（文档号必须递增）"""
+        self.tail.append((docno, positions))
+        self.count += 1
+        if len(self.tail) >= self.BLOCK_SIZE:
+            self._seal()
+
+    def _seal(self):
+        """把尾部缓冲压缩为一个块"""
+        base = self.last_docs[-1] if self.last_docs else 0
+        docnos = [docno for docno, _ in self.tail]
+        gaps = [b - a for a, b in zip([base] + docnos[:-1], docnos)]
+        tfs = [len(positions) for _, positions in self.tail]
+        position_gaps = []
+        for _, positions in self.tail:
+            position_gaps.extend(b - a for a, b in zip([0] + positions[:-1], positions))
+        self.blocks.append(
+            (
+                zlib.compress(array("I", gaps + tfs).tobytes()),
+                zlib.compress(array("I", position_gaps).tobytes()),
+            )
+        )
+        self.last_docs.append(docnos[-1])
+        self.tail = []
+
+    def _decode_block(self, index: int) -> Tuple[List[int], List[int]]:
+        """解压块的文档号和词频"""
+        values = array("I")
+        values.frombytes(zlib.decompress(self.blocks[index][0]))
+        size = len(values) // 2
+        base = self.last_docs[index - 1] if index else 0
+        docnos = list(accumulate(values[:size], initial=base))[1:]
+        return docnos, values[size:].tolist()
+
+    def _candidate_blocks(self, candidates: Optional[List[int]]) -> Iterable[int]:
+        """与候选文档（已排序）有交集的块"""
+        if candidates is None:
+            return range(len(self.blocks))
+        blocks = []
+        for index, last_doc in enumerate(self.last_docs):
+            first_doc = self.last_docs[index - 1] + 1 if index else 0
+            pos = bisect.bisect_left(candidates, first_doc)
+            if pos < len(candidates) and candidates[pos] <= last_doc:
+                blocks.append(index)
+        return blocks
+
+    def doc_tfs(self, candidates: Optional[List[int]] = None) -> Dict[int, int]:
+        """获取 {文档号: 词频}，给出候选文档（已排序）时跳过无关的块"""
+        result: Dict[int, int] = {}
+        for index in self._candidate_blocks(candidates):
+            docnos, tfs = self._decode_block(index)
+            result.update(zip(docnos, tfs))
+        for docno, positions in self.tail:
+            result[docno] = len(positions)
+        if candidates is not None:
+            wanted = set(candidates)
+            result = {d: tf for d, tf in result.items() if d in wanted}
+        return result
+
+    def entries(
+        self, candidates: Optional[List[int]] = None
+    ) -> Iterable[Tuple[int, List[int]]]:
+        """按文档号顺序遍历 (文档号, 位置列表)，每个块只解压一次
+
+        给出候选文档（已排序）时只解压相关的块，并只返回候选文档。
+        """
+        wanted = set(candidates) if candidates is not None else None
+        for index in self._candidate_blocks(candidates):
+            docnos, tfs = self._decode_block(index)
+            values = array("I")
+            values.frombytes(zlib.decompress(self.blocks[index][1]))
+            start = 0
+            for docno, tf in zip(docnos, tfs):
+                if wanted is None or docno in wanted:
+                    yield docno, list(accumulate(values[start : start + tf]))
+                start += tf
+        for docno, positions in self.tail:
+            if wanted is None or docno in wanted:
+                yield docno, positions
+
+
+# 文档信息：(政策ID, 词项数, 分类, 效力级别, 发布日期序数, 规范化标题)
+_DocInfo = Tuple[int, int, str, str, int, str]
+
+
+class BigramIndex:
+    """二元组倒排索引"""
+
+    # BM25 参数
+    K1 = 1.2
+    B = 0.75
+    # 标题命中查询词时的额外得分
+    TITLE_BOOST = 2.0
+    # 已删除文档占比超过该值时，持久化前先压缩
+    COMPACT_RATIO = 0.2
+
+    def __init__(self, index_dir: str, persist_interval: float = 60.0):
+        """初始化索引
+
+        Args:
+            index_dir: 持久化目录
+            persist_interval: 有修改时两次自动持久化的最小间隔（秒）
+        """
+        self.index_path = os.path.join(index_dir, "bigram_index.pkl")
+        self.persist_interval = persist_interval
+        self._lock = threading.RLock()
+        self._persist_lock = threading.Lock()
+        self._reset()
+        self.ready = False
+        self._dirty = False
+        self._last_persist = time.monotonic()
+
+    def _reset(self):
+        self._postings: Dict[str, _PostingList] = {}
+        self._docs: Dict[int, _DocInfo] = {}
+        self._docno_by_policy: Dict[int, int] = {}
+        # 政策版本（updated_at），同步时跳过未变化的政策
+        self._versions: Dict[int, Any] = {}
+        self._char_terms: Dict[str, Set[str]] = {}
+        self._next_docno = 1
+        self._total_length = 0
+        self._dead_count = 0
+        # 已从数据库同步到的最大 updated_at
+        self.high_water_mark: Optional[datetime] = None
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    @property
+    def doc_count(self) -> int:
+        """索引中的有效文档数"""
+        return len(self._docs)
+
+    def policy_ids(self) -> Set[int]:
+        """索引中的全部政策ID"""
+        with self._lock:
+            return set(self._docno_by_policy)
+
+    def add_document(
+        self,
+        policy_id: int,
+        title: Optional[str],
+        text: Optional[str],
+        category: Optional[str] = None,
+        level: Optional[str] = None,
+        pub_date: Optional[date] = None,
+        version: Any = None,
+    ) -> bool:
+        """加入或更新一篇政策（标题与正文等文本合并索引）
+
+        Args:
+            version: 政策版本（如 updated_at），与已索引版本相同时跳过
+
+        Returns:
+            是否写入了索引
+        """
+        if version is not None and self._versions.get(policy_id) == version:
+            return False
+
+        tokens = tokenize(f"{title or ''}\n{text or ''}")
+        term_positions: Dict[str, List[int]] = {}
+        for term, position in tokens:
+            term_positions.setdefault(term, []).append(position)
+
+        with self._lock:
+            self._remove(policy_id)
+
+            docno = self._next_docno
+            self._next_docno += 1
+            for term, positions in term_positions.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = _PostingList()
+                    self._register_term(term)
+                posting.add(docno, positions)
+
+            self._docs[docno] = (
+                policy_id,
+                len(tokens),
+                category or "",
+                level or "",
+                pub_date.toordinal() if pub_date else 0,
+                normalize_text(title),
+            )
+            self._docno_by_policy[policy_id] = docno
+            self._versions[policy_id] = version
+            self._total_length += len(tokens)
+            self._dirty = True
+        return True
+
+    def remove_documents(self, policy_ids: Iterable[int]) -> int:
+        """删除政策（倒排列表中的旧文档号在压缩时清理）"""
+        removed = 0
+        with self._lock:
+            for policy_id in policy_ids:
+                removed += self._remove(policy_id)
+            if removed:
+                self._dirty = True
+        return removed
+
+    def _remove(self, policy_id: int) -> int:
+        docno = self._docno_by_policy.pop(policy_id, None)
+        if docno is None:
+            return 0
+        self._versions.pop(policy_id, None)
+        info = self._docs.pop(docno)
+        self._total_length -= info[1]
+        self._dead_count += 1
+        return 1
+
+    def _register_term(self, term: str):
+        """记录汉字到二字组的映射（用于单字查询）"""
+        if len(term) == 2 and _is_cjk(term[0]):
+            for char in term:
+                self._char_terms.setdefault(char, set()).add(term)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def parse_query(query: str) -> List[List[str]]:
+        """解析查询：空白分隔的词为 AND，``OR``/``|`` 分隔 OR 组，引号内为短语"""
+        groups: List[List[str]] = [[]]
+        for phrase, word in _QUERY_RE.findall(query or ""):
+            if not phrase and word in _OR_TOKENS:
+                if groups[-1]:
+                    groups.append([])
+                continue
+            term = phrase or word
+            if tokenize(term):
+                groups[-1].append(term)
+        return [group for group in groups if group]
+
+    def search(
+        self,
+        query: str,
+        skip: int = 0,
+        limit: int = 20,
+        category: Optional[str] = None,
+        level: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> Tuple[List[Tuple[int, float]], int]:
+        """检索政策
+
+        Returns:
+            ([(政策ID, 得分)], 命中总数)，按得分降序、发布日期降序排列
+        """
+        groups = self.parse_query(query)
+        if not groups:
+            return [], 0
+
+        start_ordinal = start_date.toordinal() if start_date else None
+        end_ordinal = end_date.toordinal() if end_date else None
+
+        def accept(docno: int) -> bool:
+            info = self._docs.get(docno)
+            if info is None:
+                return False
+            if category and info[2] != category:
+                return False
+            if level and info[3] != level:
+                return False
+            if start_ordinal and info[4] < start_ordinal:
+                return False
+            if end_ordinal and (not info[4] or info[4] > end_ordinal):
+                return False
+            return True
+
+        with self._lock:
+            doc_count = max(len(self._docs), 1)
+            avg_length = self._total_length / doc_count or 1.0
+            scores: Dict[int, float] = {}
+
+            for group in groups:
+                for docno, score in self._search_group(
+                    group, accept, doc_count, avg_length
+                ).items():
+                    scores[docno] = scores.get(docno, 0.0) + score
+
+            ranked = sorted(
+                scores.items(),
+                key=lambda item: (-item[1], -self._docs[item[0]][4]),
+            )
+            page = [
+                (self._docs[docno][0], round(score, 4))
+                for docno, score in ranked[skip : skip + limit]
+            ]
+            return page, len(ranked)
+
+    def _search_group(
+        self, terms: List[str], accept, doc_count: int, avg_length: float
+    ) -> Dict[int, float]:
+        """AND 组：所有词都命中的文档及其 BM25 得分"""
+        term_tokens = [tokenize(term) for term in terms]
+        # 先处理文档频率低的词，尽早缩小候选集
+        order = sorted(
+            range(len(terms)), key=lambda i: self._estimate_df(term_tokens[i])
+        )
+
+        candidates: Optional[List[int]] = None
+        term_tfs: List[Tuple[int, Dict[int, int]]] = []
+        for i in order:
+            tfs = self._match_term(term_tokens[i], candidates, accept)
+            if not tfs:
+                return {}
+            candidates = sorted(tfs)
+            term_tfs.append((i, tfs))
+
+        scores: Dict[int, float] = {}
+        for i, tfs in term_tfs:
+            idf = self._idf(self._estimate_df(term_tokens[i]), doc_count)
+            normalized_term = normalize_text(terms[i])
+            for docno in candidates:
+                tf = tfs[docno]
+                length = self._docs[docno][1]
+                score = (
+                    idf
+                    * tf
+                    * (self.K1 + 1)
+                    / (tf + self.K1 * (1 - self.B + self.B * length / avg_length))
+                )
+                if normalized_term in self._docs[docno][5]:
+                    score += self.TITLE_BOOST
+                scores[docno] = scores.get(docno, 0.0) + score
+        return scores
+
+    def _match_term(
+        self,
+        tokens: List[Tuple[str, int]],
+        candidates: Optional[List[int]],
+        accept,
+    ) -> Dict[int, int]:
+        """单个查询词（或短语）命中的文档 {文档号: 出现次数}"""
+        # 单个汉字：合并所有包含该字的二字组
+        if len(tokens) == 1 and len(tokens[0][0]) == 1 and _is_cjk(tokens[0][0]):
+            char = tokens[0][0]
+            merged: Dict[int, int] = {}
+            for term in self._char_terms.get(char, set()) | {char}:
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                for docno, tf in posting.doc_tfs(candidates).items():
+                    merged[docno] = merged.get(docno, 0) + tf
+            return {d: tf for d, tf in merged.items() if accept(d)}
+
+        postings = []
+        for token, offset in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                return {}
+            postings.append((posting, offset))
+
+        # 按文档频率从低到高求交集
+        by_df = sorted(postings, key=lambda item: item[0].count)
+        docs = {d: tf for d, tf in by_df[0][0].doc_tfs(candidates).items() if accept(d)}
+        for posting, _ in by_df[1:]:
+            if not docs:
+                return {}
+            tfs = posting.doc_tfs(sorted(docs))
+            docs = {d: tf for d, tf in docs.items() if d in tfs}
+
+        if len(postings) == 1:
+            return docs
+
+        # 短语校验：各词项在文档中的相对位置与查询一致（出现次数作为词频）
+        starts: Optional[Dict[int, Set[int]]] = None
+        for posting, offset in by_df:
+            current = {
+                docno: {p - offset for p in positions}
+                for docno, positions in posting.entries(sorted(docs))
+            }
+            if starts is None:
+                starts = current
+            else:
+                starts = {
+                    docno: common
+                    for docno, common in (
+                        (d, s & current.get(d, set())) for d, s in starts.items()
+                    )
+                    if common
+                }
+            docs = {d: docs[d] for d in starts}
+            if not docs:
+                return {}
+        return {docno: len(positions) for docno, positions in starts.items()}
+
+    def _estimate_df(self, tokens: List[Tuple[str, int]]) -> int:
+        """估计查询词的文档频率（取各词项文档数的最小值）"""
+        if len(tokens) == 1 and len(tokens[0][0]) == 1 and _is_cjk(tokens[0][0]):
+            terms = self._char_terms.get(tokens[0][0], set()) | {tokens[0][0]}
+            return sum(self._postings[t].count for t in terms if t in self._postings)
+        counts = [
+            self._postings[token].count if token in self._postings else 0
+            for token, _ in tokens
+        ]
+        return min(counts) if counts else 0
+
+    @staticmethod
+    def _idf(df: int, doc_count: int) -> float:
+        """BM25 逆文档频率"""
+        df = min(df, doc_count)
+        return math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+
+    # ------------------------------------------------------------------
+    # 压缩与持久化
+    # ------------------------------------------------------------------
+
+    def compact(self):
+        """清理已删除文档并重新编号（在锁内重建全部倒排列表）"""
+        with self._lock:
+            if not self._dead_count:
+                return
+            renumber = {old: new for new, old in enumerate(sorted(self._docs), start=1)}
+            postings: Dict[str, _PostingList] = {}
+            for term, posting in self._postings.items():
+                rebuilt = _PostingList()
+                for docno, positions in posting.entries():
+                    if docno in renumber:
+                        rebuilt.add(renumber[docno], positions)
+                if rebuilt.count:
+                    postings[term] = rebuilt
+
+            self._postings = postings
+            self._docs = {renumber[d]: info for d, info in self._docs.items()}
+            self._docno_by_policy = {
+                info[0]: docno for docno, info in self._docs.items()
+            }
+            self._char_terms = {}
+            for term in self._postings:
+                self._register_term(term)
+            self._next_docno = len(self._docs) + 1
+            self._dead_count = 0
+            self._dirty = True
+
+    def save(self):
+        """持久化到磁盘（写临时文件后原子替换）"""
+        with self._persist_lock:
+            with self._lock:
+                if self._dead_count > self.COMPACT_RATIO * max(len(self._docs), 1):
+                    self.compact()
+                state = {
+                    "version": INDEX_FORMAT_VERSION,
+                    "next_docno": self._next_docno,
+                    "docs": dict(self._docs),
+                    "postings": {
+                        term: (
+                            list(p.blocks),
+                            list(p.last_docs),
+                            list(p.tail),
+                            p.count,
+                        )
+                        for term, p in self._postings.items()
+                    },
+                    "dead_count": self._dead_count,
+                    "versions": dict(self._versions),
+                    "high_water_mark": self.high_water_mark,
+                }
+                self._dirty = False
+                self._last_persist = time.monotonic()
+
+            directory = os.path.dirname(os.path.abspath(self.index_path))
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self.index_path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            logger.info(f"搜索索引已保存: {len(state['docs'])} 篇文档")
+
+    def load(self) -> bool:
+        """从磁盘加载索引
+
+        Returns:
+            是否加载成功（文件不存在或格式不兼容时返回False）
+        """
+        if not os.path.exists(self.index_path):
+            return False
+        try:
+            with open(self.index_path, "rb") as f:
+                state = pickle.load(f)
+            if state.get("version") != INDEX_FORMAT_VERSION:
+                logger.warning("搜索索引格式版本不兼容，需要重建")
+                return False
+        except Exception as e:
+            logger.warning(f"加载搜索索引失败，需要重建: {e}")
+            return False
+
+        with self._lock:
+            self._reset()
+            for term, (blocks, last_docs, tail, count) in state["postings"].items():
+                posting = _PostingList()
+                posting.blocks, posting.last_docs = blocks, last_docs
+                posting.tail, posting.count = tail, count
+                self._postings[term] = posting
+                self._register_term(term)
+            self._docs = state["docs"]
+            self._docno_by_policy = {
+                info[0]: docno for docno, info in self._docs.items()
+            }
+            self._total_length = sum(info[1] for info in self._docs.values())
+            self._next_docno = state["next_docno"]
+            self._dead_count = state.get("dead_count", 0)
+            self._versions = state.get("versions", {})
+            self.high_water_mark = state.get("high_water_mark")
+            self._dirty = False
+        logger.info(f"搜索索引已加载: {len(self._docs)} 篇文档")
+        return True
+
+    def maybe_persist(self):
+        """有修改且距上次持久化超过间隔时，在后台线程保存"""
+        if not self._dirty or not self.ready:
+            return
+        if time.monotonic() - self._last_persist < self.persist_interval:
+            return
+        if self._persist_lock.locked():
+            return
+        self._last_persist = time.monotonic()
+        threading.Thread(target=self._persist_quietly, daemon=True).start()
+
+    def _persist_quietly(self):
+        """后台保存（异常只记录日志）"""
+        try:
+            self.save()
+        except Exception as e:
+            logger.error(f"保存搜索索引失败: {e}", exc_info=True)
+
+    def clear(self):
+        """清空索引（重建前调用）"""
+        with self._lock:
+            self._reset()
+            self._dirty = True
@@ -0,0 +1,368 @@
+"""
+附件内容寻址存储服务（按SHA-256去重）
+
+附件文件按内容哈希存放在 blobs/{sha[0:2]}/{sha[2:4]}/{sha}，本地与S3使用相同的键。
+同一份附件无论被多少个任务爬取，都只保存/上传一次；附件记录通过 blob_sha256
+引用内容块，内容块维护引用计数，引用归零后由垃圾回收删除文件。
+"""
+
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, List, Iterable, Dict, Any, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.attachment import Attachment, AttachmentBlob
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStoreService:
+    """附件内容寻址存储服务"""
+
+    BLOB_PREFIX = "blobs"
+    HASH_CHUNK_SIZE = 1024 * 1024
+    # 最近更新过的内容块不参与引用计数重算和全量回收
+    GC_GRACE = timedelta(hours=1)
+
+    def __init__(self):
+        """初始化内容块存储"""
+        self.storage_mode = settings.storage_mode
+        self.local_dir = Path(settings.storage_local_dir)
+        from .s3_service import get_s3_service
+
+        self.s3_service = get_s3_service()  # 使用单例
+        # 从S3下载的临时文件（调用方用完后通过 release_file_path 删除）
+        self._temp_paths: Set[str] = set()
+        self._temp_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 键与路径
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def compute_sha256(cls, file_path: str) -> str:
+        """计算文件的SHA-256（十六进制）"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(cls.HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_blob_key(self, sha256: str) -> str:
+        """获取内容块的存储键（本地相对路径与S3键相同）"""
+        return f"{self.BLOB_PREFIX}/{sha256[0:2]}/{sha256[2:4]}/{sha256}"
+
+    def get_local_blob_path(self, sha256: str) -> Path:
+        """获取内容块的本地路径"""
+        return self.local_dir / self.get_blob_key(sha256)
+
+    # ------------------------------------------------------------------
+    # 写入与引用计数
+    # ------------------------------------------------------------------
+
+    def put_file(
+        self, db: Session, source_path: str, move: bool = False
+    ) -> Optional[AttachmentBlob]:
+        """将文件存入内容块存储，并为调用方增加一次引用
+
+        已知内容块不会重复写入本地或重复上传S3。调用方需要在同一事务中
+        把返回内容块的 sha256 写入附件记录，并负责提交。
+
+        Args:
+            db: 数据库会话
+            source_path: 源文件路径
+            move: 存入后删除源文件（如爬虫下载的附件）：新内容块直接把源文件
+                移动为内容块文件，已有内容块时删除源文件；内容块未能保存到
+                本地或S3时保留源文件
+
+        Returns:
+            内容块记录，文件不存在或存储失败时返回None
+        """
+        if not source_path or not os.path.exists(source_path):
+            return None
+
+        try:
+            sha256 = self.compute_sha256(source_path)
+            file_size = os.path.getsize(source_path)
+
+            # 先登记引用再落盘：垃圾回收在持有行锁时删除文件，
+            # 这样并发的引用方会等到回收提交后再补写文件，不会丢失内容
+            blob = self._acquire(db, sha256, file_size)
+            self._ensure_stored(blob, source_path, move=move)
+            if move and os.path.exists(source_path) and self._is_stored(blob):
+                os.remove(source_path)
+                logger.debug(f"内容块已保存，删除源文件: {source_path}")
+            return blob
+
+        except Exception as e:
+            logger.error(f"保存附件内容块失败: {source_path} - {e}")
+            return None
+
+    def _acquire(self, db: Session, sha256: str, file_size: int) -> AttachmentBlob:
+        """增加内容块引用（不存在则创建）"""
+        for _ in range(2):
+            updated = (
+                db.query(AttachmentBlob)
+                .filter(AttachmentBlob.sha256 == sha256)
+                .update(
+                    {AttachmentBlob.ref_count: AttachmentBlob.ref_count + 1},
+                    synchronize_session=False,
+                )
+            )
+            if updated:
+                blob = db.get(AttachmentBlob, sha256)
+                db.refresh(blob)
+                return blob
+
+            # 新内容块：在保存点中插入，并发插入冲突时回到更新分支
+            try:
+                with db.begin_nested():
+                    blob = AttachmentBlob(
+                        sha256=sha256, file_size=file_size, ref_count=1
+                    )
+                    db.add(blob)
+                return blob
+            except IntegrityError:
+                logger.debug(f"内容块已被并发创建，改为增加引用: {sha256}")
+
+        raise RuntimeError(f"无法登记内容块引用: {sha256}")
+
+    def _ensure_stored(
+        self, blob: AttachmentBlob, source_path: str, move: bool = False
+    ):
+        """确保内容块已写入本地和/或S3（已存在则跳过）"""
+        # 1. 本地存储（原子写入：先写临时文件再重命名）
+        if self.storage_mode == "local":
+            local_path = self.get_local_blob_path(blob.sha256)
+            if not local_path.exists() and move:
+                # 源文件直接重命名为内容块文件（同一文件系统时不复制）
+                local_path.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.replace(source_path, local_path)
+                    source_path = str(local_path)
+                    logger.debug(f"内容块移动到本地: {local_path}")
+                except OSError:
+                    pass
+            if not local_path.exists():
+                local_path.parent.mkdir(parents=True, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(
+                    dir=str(local_path.parent), prefix=".tmp-"
+                )
+                os.close(fd)
+                try:
+                    shutil.copyfile(source_path, temp_path)
+                    os.replace(temp_path, local_path)
+                except Exception:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    raise
+                logger.debug(f"内容块保存到本地: {local_path}")
+            if blob.local_path != str(local_path):
+                blob.local_path = str(local_path)
+
+        # 2. S3存储（已上传的内容块直接跳过）
+        if self.s3_service.is_enabled() and not blob.s3_key:
+            if not os.path.exists(source_path) and blob.local_path:
+                source_path = blob.local_path
+            s3_key = self.get_blob_key(blob.sha256)
+            if self.s3_service.file_exists(s3_key) or self.s3_service.upload_file(
+                source_path, s3_key
+            ):
+                blob.s3_key = s3_key
+                logger.debug(f"内容块上传到S3: {s3_key}")
+
+    def _is_stored(self, blob: AttachmentBlob) -> bool:
+        """内容块是否已保存到本地或S3"""
+        if blob.s3_key:
+            return True
+        return (
+            self.storage_mode == "local"
+            and self.get_local_blob_path(blob.sha256).exists()
+        )
+
+    def release(self, db: Session, sha256_list: Iterable[Optional[str]]) -> int:
+        """释放内容块引用（每个元素对应一个被删除的附件记录）
+
+        Returns:
+            释放的引用数
+        """
+        counts: Dict[str, int] = {}
+        for sha256 in sha256_list:
+            if sha256:
+                counts[sha256] = counts.get(sha256, 0) + 1
+
+        for sha256, count in counts.items():
+            db.query(AttachmentBlob).filter(AttachmentBlob.sha256 == sha256).update(
+                {AttachmentBlob.ref_count: AttachmentBlob.ref_count - count},
+                synchronize_session=False,
+            )
+
+        return sum(counts.values())
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def get_blob_file_path(self, sha256: str) -> Optional[str]:
+        """获取内容块文件路径（优先本地，其次从S3下载到临时文件）
+
+        返回临时文件时，调用方用完后需要调用 release_file_path 删除。
+        """
+        local_path = self.get_local_blob_path(sha256)
+        if local_path.exists():
+            return str(local_path)
+
+        if self.s3_service.is_enabled():
+            fd, temp_path = tempfile.mkstemp(prefix="blob-", suffix=f"_{sha256}")
+            os.close(fd)
+
+            if self.s3_service.download_file(self.get_blob_key(sha256), temp_path):
+                with self._temp_lock:
+                    self._temp_paths.add(temp_path)
+                return temp_path
+            os.remove(temp_path)
+
+        return None
+
+    def release_file_path(self, file_path: Optional[str]):
+        """删除 get_blob_file_path 下载的临时文件（其他路径忽略）"""
+        if not file_path:
+            return
+        with self._temp_lock:
+            if file_path not in self._temp_paths:
+                return
+            self._temp_paths.discard(file_path)
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"删除内容块临时文件失败: {file_path} - {e}")
+
+    # ------------------------------------------------------------------
+    # 垃圾回收
+    # ------------------------------------------------------------------
+
+    def reconcile_ref_counts(self, db: Session) -> int:
+        """按附件表重新计算引用计数（修正级联删除等绕过release的情况）
+
+        用一条 UPDATE 在行锁下重算。最近更新过的内容块（可能有未提交的
+        put_file/_acquire 引用，其附件记录还看不到）不参与重算：UPDATE 等到
+        并发事务提交后按最新行重新判断条件，updated_at 已刷新的行会被跳过，
+        不会把尚未提交的引用覆盖掉。
+
+        Returns:
+            被修正的内容块数量
+        """
+        cutoff = datetime.now(timezone.utc) - self.GC_GRACE
+        actual = (
+            select(func.count(Attachment.id))
+            .where(Attachment.blob_sha256 == AttachmentBlob.sha256)
+            .scalar_subquery()
+        )
+        fixed = (
+            db.query(AttachmentBlob)
+            .filter(
+                AttachmentBlob.ref_count != actual,
+                AttachmentBlob.updated_at < cutoff,
+            )
+            .update(
+                {AttachmentBlob.ref_count: actual},
+                synchronize_session=False,
+            )
+        )
+
+        db.commit()
+        if fixed:
+            logger.info(f"已修正 {fixed} 个内容块的引用计数")
+        return fixed
+
+    def collect_garbage(
+        self, db: Session, sha256_list: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """删除引用计数归零的内容块（数据库记录、本地文件和S3对象）
+
+        Args:
+            db: 数据库会话
+            sha256_list: 只检查这些内容块（为空则检查全部，跳过 GC_GRACE 内更新过的内容块）
+
+        Returns:
+            回收结果统计
+        """
+        result = {"deleted_blobs": 0, "freed_bytes": 0, "failed": 0}
+
+        conditions = [AttachmentBlob.ref_count <= 0]
+        if sha256_list is not None:
+            if not sha256_list:
+                return result
+            conditions.append(AttachmentBlob.sha256.in_(set(sha256_list)))
+        else:
+            # 全量回收跳过最近更新过的内容块（引用计数可能刚被重算，
+            # 或有尚未提交的新引用），留到下一次回收
+            cutoff = datetime.now(timezone.utc) - self.GC_GRACE
+            conditions.append(AttachmentBlob.updated_at < cutoff)
+        candidates = [
+            row[0] for row in db.query(AttachmentBlob.sha256).filter(*conditions).all()
+        ]
+
+        for sha256 in candidates:
+            try:
+                # 锁定并复查：期间可能被新的附件重新引用
+                blob = (
+                    db.query(AttachmentBlob)
+                    .filter(AttachmentBlob.sha256 == sha256, *conditions)
+                    .with_for_update()
+                    .first()
+                )
+                if not blob:
+                    db.rollback()
+                    continue
+
+                freed = blob.file_size or 0
+
+                local_path = self.get_local_blob_path(sha256)
+                if local_path.exists():
+                    local_path.unlink()
+
+                if blob.s3_key and self.s3_service.is_enabled():
+                    if not self.s3_service.delete_file(blob.s3_key):
+                        raise RuntimeError(f"删除S3内容块失败: {blob.s3_key}")
+
+                db.delete(blob)
+                db.commit()
+
+                result["deleted_blobs"] += 1
+                result["freed_bytes"] += freed
+            except Exception as e:
+                db.rollback()
+                result["failed"] += 1
+                logger.warning(f"回收内容块失败: {sha256} - {e}")
+
+        if result["deleted_blobs"]:
+            logger.info(
+                f"内容块回收完成: 删除 {result['deleted_blobs']} 个, "
+                f"释放 {result['freed_bytes'] / 1024 / 1024:.1f} MB"
+            )
+        return result
+
+
+# 全局内容块存储实例
+_blob_store_service: Optional[BlobStoreService] = None
+
+
+def get_blob_store_service() -> BlobStoreService:
+    """获取内容块存储服务单例"""
+    global _blob_store_service
+    if _blob_store_service is None:
+        _blob_store_service = BlobStoreService()
+    return _blob_store_service
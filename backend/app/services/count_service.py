@@ -0,0 +1,157 @@
+"""
+列表总数服务 - 计数策略（规划器估算 / TTL缓存的精确计数）
+
+列表接口每次都执行 COUNT(*)，大表上与查询本身开销相当。计数策略：
+1. 缓存命中：直接返回相同筛选条件下的精确总数（TTL内）
+2. PostgreSQL 且允许估算：无筛选条件时读取 pg_class.reltuples，
+   有筛选条件时读取 EXPLAIN 的估算行数；估算值足够大时直接返回（标记为估算值），
+   此时页面只需要一个“约 N 条”的量级
+3. 否则执行精确计数并缓存
+"""
+
+import json
+import time
+import logging
+import threading
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Query, Session
+
+logger = logging.getLogger(__name__)
+
+
+class CountService:
+    """列表总数服务"""
+
+    # 精确计数缓存有效期（秒）
+    CACHE_TTL = 30.0
+    # 缓存的筛选组合上限，超出时淘汰最早过期的条目
+    CACHE_MAX_ENTRIES = 1024
+    # 估算行数不低于该值时使用估算值，较小的结果集精确计数本身就很便宜
+    ESTIMATE_MIN_ROWS = 10000
+
+    def __init__(self):
+        """初始化计数服务"""
+        self._cache: Dict[tuple, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def count(
+        self,
+        db: Session,
+        query: Query,
+        table: str,
+        filters: Dict[str, Any],
+        allow_estimate: bool = True,
+    ) -> Tuple[int, bool]:
+        """获取查询的总数
+
+        Args:
+            db: 数据库会话
+            query: 已应用筛选条件的查询（不含排序和分页）
+            table: 表名（估算和缓存失效使用）
+            filters: 筛选条件（作为缓存键，需要与 query 的条件一一对应）
+            allow_estimate: 是否允许返回估算值（关键词模糊匹配等选择率难以估算的条件应关闭）
+
+        Returns:
+            (总数, 是否为估算值)
+        """
+        key = self._cache_key(table, filters)
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached, False
+
+        if allow_estimate and db.get_bind().dialect.name == "postgresql":
+            estimate = self._estimate(db, query, table, filtered=len(key) > 1)
+            if estimate is not None and estimate >= self.ESTIMATE_MIN_ROWS:
+                return estimate, True
+
+        total = query.count()
+        self._set_cached(key, total)
+        return total, False
+
+    def invalidate(self, table: str):
+        """使某个表的缓存计数失效（删除数据后调用，避免总数明显滞后）"""
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == table]:
+                del self._cache[key]
+
+    @staticmethod
+    def _cache_key(table: str, filters: Dict[str, Any]) -> tuple:
+        """规范化筛选条件作为缓存键（忽略空值，关键词不区分大小写和顺序）"""
+        items = []
+        for name, value in filters.items():
+            if value is None or value == "":
+                continue
+            if isinstance(value, date):
+                value = value.isoformat()
+            elif name == "keyword":
+                value = " ".join(sorted(set(str(value).lower().split())))
+            items.append((name, value))
+        return (table, *sorted(items))
+
+    def _get_cached(self, key: tuple) -> Optional[int]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            expires_at, total = entry
+            if expires_at < time.monotonic():
+                del self._cache[key]
+                return None
+            return total
+
+    def _set_cached(self, key: tuple, total: int):
+        with self._lock:
+            if len(self._cache) >= self.CACHE_MAX_ENTRIES:
+                oldest = min(self._cache, key=lambda k: self._cache[k][0])
+                del self._cache[oldest]
+            self._cache[key] = (time.monotonic() + self.CACHE_TTL, total)
+
+    def _estimate(
+        self, db: Session, query: Query, table: str, filtered: bool
+    ) -> Optional[int]:
+        """读取PostgreSQL查询规划器的估算行数，失败或未ANALYZE时返回None"""
+        try:
+            # 放在保存点中执行，失败时不会中止外层事务
+            with db.begin_nested():
+                if not filtered:
+                    reltuples = db.execute(
+                        text(
+                            "SELECT reltuples FROM pg_class WHERE oid = to_regclass(:t)"
+                        ),
+                        {"t": table},
+                    ).scalar()
+                    # -1 表示表从未 VACUUM/ANALYZE，没有统计信息
+                    if reltuples is None or reltuples < 0:
+                        return None
+                    return int(reltuples)
+
+                connection = db.connection()
+                compiled = query.statement.compile(dialect=connection.dialect)
+                params = compiled.params
+                # asyncpg 等驱动使用位置参数（$1, $2...）
+                if compiled.positional:
+                    params = tuple(params[name] for name in compiled.positiontup)
+                plan = connection.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {compiled}", params
+                ).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except Exception as e:
+            logger.debug(f"获取估算行数失败，使用精确计数: {e}")
+            return None
+
+
+# 全局计数服务实例（各服务共享同一份缓存）
+_count_service: Optional[CountService] = None
+
+
+def get_count_service() -> CountService:
+    """获取计数服务实例"""
+    global _count_service
+    if _count_service is None:
+        _count_service = CountService()
+    return _count_service
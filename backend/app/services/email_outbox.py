@@ -0,0 +1,330 @@
+"""
+邮件发件器 - 从发件箱批量发送邮件
+
+发送通知邮件只写入发件箱（email_outbox 表），由本进程的发件线程发送：
+写入时唤醒发件线程，等待一个合并窗口后把到期的邮件一次领取，在同一个
+已登录的SMTP连接上依次发送。连接在空闲超过 EMAIL_SMTP_IDLE_SECONDS 后关闭，
+SMTP配置变化时重新连接。发送失败的邮件按指数退避重试，超过最大次数后标记
+为失败。
+
+领取使用 SELECT ... FOR UPDATE SKIP LOCKED，多个进程同时运行发件器时
+同一封邮件只会被一个进程领取。
+"""
+
+import os
+import time
+import socket
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiosmtplib
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.system_config import EmailOutbox
+from .email_service import EmailService, get_email_service
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutboxSender:
+    """发件箱发件器"""
+
+    # 每批最多领取的邮件数
+    BATCH_SIZE = 50
+    # 领取后未记录结果的邮件在该时间（秒）后可被重新领取（发送进程中途退出）
+    CLAIM_TIMEOUT = 300
+    # 重试间隔上限（秒）
+    MAX_RETRY_DELAY = 3600
+
+    def __init__(self):
+        """初始化发件器"""
+        self.sender_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._smtp_key: Optional[Tuple[Any, ...]] = None
+        self._last_used = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._stopping.is_set()
+
+    def start(self):
+        """启动发件线程"""
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="email-sender", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"邮件发件器已启动: {self.sender_id}")
+
+    def stop(self):
+        """停止发件线程并关闭SMTP连接"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+        logger.info(f"邮件发件器已停止: {self.sender_id}")
+
+    def wake(self):
+        """有新邮件写入发件箱时唤醒发件线程"""
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # 发件线程
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        try:
+            while not self._stopping.is_set():
+                try:
+                    sent = self.send_pending()
+                except Exception as e:
+                    logger.error(f"发送发件箱邮件失败: {e}", exc_info=True)
+                    sent = 0
+                if sent >= self.BATCH_SIZE:
+                    # 可能还有到期的邮件
+                    continue
+
+                timeout = settings.email_outbox_poll_seconds
+                if self._smtp is not None:
+                    idle = time.monotonic() - self._last_used
+                    if idle >= settings.email_smtp_idle_seconds:
+                        self._run_async(self._disconnect())
+                    else:
+                        timeout = min(timeout, settings.email_smtp_idle_seconds - idle)
+                if self._wake.wait(timeout) and not self._stopping.is_set():
+                    # 合并窗口：窗口内写入的邮件一起发送
+                    self._stopping.wait(settings.email_batch_window_seconds)
+                self._wake.clear()
+        finally:
+            self._run_async(self._disconnect())
+            if self._loop is not None:
+                self._loop.close()
+                self._loop = None
+
+    def _run_async(self, coro):
+        # 发件器的SMTP连接属于一个专用事件循环，只在发件线程（或测试）中使用
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    def send_pending(self) -> int:
+        """领取并发送一批到期的邮件
+
+        Returns:
+            本批领取的邮件数
+        """
+        from ..database import worker_session
+
+        email_service = get_email_service()
+        db = worker_session("email_sender")
+        try:
+            # 邮件服务未启用时不领取，邮件保留在发件箱中
+            if not email_service.is_enabled(db):
+                db.commit()
+                return 0
+            messages = self._claim(db)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        if not messages:
+            return 0
+
+        results = self._run_async(self._deliver(email_service, messages))
+
+        db = worker_session("email_sender")
+        try:
+            self._record(db, messages, results)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return len(messages)
+
+    def _claim(self, db: Session) -> List[Dict[str, Any]]:
+        """领取到期的邮件（并提交），把下次发送时间推迟到领取超时之后"""
+        now = datetime.now(timezone.utc)
+        rows = (
+            db.query(EmailOutbox)
+            .filter(
+                EmailOutbox.status == "pending",
+                EmailOutbox.next_attempt_at <= now,
+            )
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(self.BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        messages = []
+        for row in rows:
+            row.attempts = (row.attempts or 0) + 1
+            row.next_attempt_at = now + timedelta(seconds=self.CLAIM_TIMEOUT)
+            messages.append(
+                {
+                    "id": row.id,
+                    "subject": row.subject,
+                    "body": row.body,
+                    "body_html": row.body_html,
+                    "to_addresses": list(row.to_addresses or []),
+                    "attempts": row.attempts,
+                }
+            )
+        db.commit()
+        return messages
+
+    def _record(
+        self,
+        db: Session,
+        messages: List[Dict[str, Any]],
+        results: Dict[int, Optional[str]],
+    ):
+        """记录发送结果（并提交）：成功标记为已发送，失败按指数退避重试"""
+        now = datetime.now(timezone.utc)
+        rows = {
+            row.id: row
+            for row in db.query(EmailOutbox)
+            .filter(EmailOutbox.id.in_([message["id"] for message in messages]))
+            .all()
+        }
+        for message in messages:
+            row = rows.get(message["id"])
+            if row is None:
+                continue
+            error = results.get(message["id"])
+            if error is None:
+                row.status = "sent"
+                row.sent_at = now
+                row.last_error = None
+                logger.info(
+                    f"邮件发送成功: {row.subject} -> {', '.join(row.to_addresses or [])}"
+                )
+                continue
+
+            row.last_error = error
+            if row.attempts >= settings.email_max_attempts:
+                row.status = "failed"
+                logger.error(
+                    f"邮件发送失败，已尝试 {row.attempts} 次，不再重试: {row.subject}: {error}"
+                )
+            else:
+                delay = min(
+                    settings.email_retry_base_seconds * 2 ** (row.attempts - 1),
+                    self.MAX_RETRY_DELAY,
+                )
+                row.next_attempt_at = now + timedelta(seconds=delay)
+                logger.warning(
+                    f"邮件发送失败，{delay:.0f}秒后重试（第 {row.attempts} 次）: "
+                    f"{row.subject}: {error}"
+                )
+        db.commit()
+
+    # ------------------------------------------------------------------
+    # SMTP（在发件器的事件循环中执行）
+    # ------------------------------------------------------------------
+
+    async def _deliver(
+        self, email_service: EmailService, messages: List[Dict[str, Any]]
+    ) -> Dict[int, Optional[str]]:
+        """在同一个SMTP连接上依次发送，返回每封邮件的错误（成功为None）"""
+        results: Dict[int, Optional[str]] = {}
+        for message in messages:
+            msg = email_service.build_message(
+                message["subject"],
+                message["body"],
+                message["to_addresses"],
+                message["body_html"],
+            )
+            try:
+                await self._send(email_service, msg)
+                results[message["id"]] = None
+            except Exception as e:
+                results[message["id"]] = str(e) or type(e).__name__
+        return results
+
+    async def _send(self, email_service: EmailService, msg):
+        reused = self._smtp is not None
+        smtp = await self._connect(email_service)
+        try:
+            await smtp.send_message(msg)
+        except aiosmtplib.SMTPRecipientsRefused:
+            # 收件人被拒绝，连接仍然可用
+            raise
+        except Exception:
+            await self._disconnect()
+            if not reused:
+                raise
+            # 复用的连接可能已被服务器关闭，重新连接后再试一次
+            smtp = await self._connect(email_service)
+            try:
+                await smtp.send_message(msg)
+            except Exception:
+                await self._disconnect()
+                raise
+        self._last_used = time.monotonic()
+
+    async def _connect(self, email_service: EmailService) -> aiosmtplib.SMTP:
+        """返回已登录的SMTP连接，配置变化或连接断开时重新连接"""
+        key = (
+            email_service.smtp_host,
+            email_service.smtp_port,
+            email_service.smtp_user,
+            email_service.smtp_password,
+        )
+        if self._smtp is not None:
+            if self._smtp_key == key and self._smtp.is_connected:
+                return self._smtp
+            await self._disconnect()
+
+        smtp = email_service.create_smtp()
+        await smtp.connect()
+        try:
+            await smtp.login(email_service.smtp_user, email_service.smtp_password)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self._smtp_key = key
+        self._last_used = time.monotonic()
+        return smtp
+
+    async def _disconnect(self):
+        if self._smtp is None:
+            return
+        smtp, self._smtp, self._smtp_key = self._smtp, None, None
+        # 某些SMTP服务器会主动关闭连接，导致quit()失败，直接关闭即可
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+
+# 本进程的邮件发件器
+_email_sender: Optional[EmailOutboxSender] = None
+
+
+def get_email_sender() -> EmailOutboxSender:
+    """获取本进程的邮件发件器"""
+    global _email_sender
+    if _email_sender is None:
+        _email_sender = EmailOutboxSender()
+    return _email_sender
+
+
+def wake_email_sender():
+    """通知本进程的发件器有新邮件（本进程未运行发件器时忽略，由其他进程轮询发送）"""
+    if _email_sender is not None and _email_sender.running:
+        _email_sender.wake()
@@ -1,5 +1,7 @@
 """
 邮件服务（基于aiosmtplib）
+
+通知邮件写入发件箱后立即返回，由后台发件器（email_outbox）批量发送。
 """
 
 import logging
@@ -111,7 +113,7 @@ class EmailService:
             ]
         )
 
-    async def send_email(
+    def send_email(
         self,
         subject: str,
         body: str,
@@ -119,7 +121,7 @@ class EmailService:
         body_html: Optional[str] = None,
         db: Optional[Any] = None,
     ) -> Dict[str, Any]:
-        """发送邮件（支持实时配置更新）
+        """发送邮件（写入发件箱，由后台发件器异步发送，不等待SMTP服务器）
 
         Args:
             subject: 邮件主题
@@ -129,12 +131,8 @@ class EmailService:
             db: 数据库会话（可选，如果提供则实时加载配置）
 
         Returns:
-            发送结果字典
+            发送结果字典（success 表示已写入发件箱）
         """
-        # 如果提供了db，重新加载配置以确保使用最新配置
-        if db is not None:
-            self._load_config(db)
-
         if not self.is_enabled(db):
             return {"success": False, "message": "邮件服务未启用或配置不完整"}
 
@@ -142,60 +140,80 @@ class EmailService:
         if not to_list:
             return {"success": False, "message": "未指定收件人地址"}
 
+        from ..database import worker_session
+        from ..models.system_config import EmailOutbox
+
+        # 独立会话写入，不影响调用方的事务
+        outbox_db = worker_session("email_outbox")
         try:
-            # 创建邮件消息
-            if body_html:
-                msg = MIMEMultipart("alternative")
-                msg.attach(MIMEText(body, "plain", "utf-8"))
-                msg.attach(MIMEText(body_html, "html", "utf-8"))
-            else:
-                msg = MIMEText(body, "plain", "utf-8")
-
-            msg["Subject"] = subject
-            msg["From"] = self.from_address
-            msg["To"] = ", ".join(to_list)
-
-            # 发送邮件
-            # 端口587使用STARTTLS（先建立普通连接，然后升级到TLS）
-            # 端口465使用SSL/TLS（直接建立TLS连接）
-            use_tls = self.smtp_port == 465
-            start_tls = self.smtp_port == 587
-
-            smtp = aiosmtplib.SMTP(
-                hostname=self.smtp_host,
-                port=self.smtp_port,
-                use_tls=use_tls,
-                start_tls=start_tls,  # 如果为True，connect()会自动处理STARTTLS，无需手动调用
+            message = EmailOutbox(
+                subject=subject,
+                body=body,
+                body_html=body_html,
+                to_addresses=list(to_list),
+                status="pending",
+                attempts=0,
+                next_attempt_at=datetime.now(timezone.utc),
             )
-
-            await smtp.connect()
-            # 注意：如果start_tls=True，connect()已经自动处理了STARTTLS升级
-            # 不要再手动调用 starttls()，否则会报错 "Connection already using TLS"
-            await smtp.login(self.smtp_user, self.smtp_password)
-            await smtp.send_message(msg)
-            # 某些SMTP服务器在发送完成后会立即关闭连接，导致quit()失败
-            # 如果邮件已成功发送，忽略quit()的错误
-            try:
-                await smtp.quit()
-            except Exception:
-                # 邮件已成功发送，quit()失败不影响整体结果
-                pass
-
-            logger.info(f"邮件发送成功: {subject} -> {', '.join(to_list)}")
-            return {
-                "success": True,
-                "message": f"邮件已发送到 {', '.join(to_list)}",
-                "to": to_list,
-            }
+            outbox_db.add(message)
+            outbox_db.commit()
+            outbox_id = message.id
         except Exception as e:
-            logger.error(f"发送邮件失败: {e}", exc_info=True)
+            outbox_db.rollback()
+            logger.error(f"写入邮件发件箱失败: {e}", exc_info=True)
             return {
                 "success": False,
-                "message": f"发送邮件失败: {str(e)}",
+                "message": f"写入邮件发件箱失败: {str(e)}",
                 "error": str(e),
             }
+        finally:
+            outbox_db.close()
+
+        from .email_outbox import wake_email_sender
+
+        wake_email_sender()
+        logger.info(f"邮件已加入发件箱: {subject} -> {', '.join(to_list)}")
+        return {
+            "success": True,
+            "message": f"邮件已加入发件箱，将发送到 {', '.join(to_list)}",
+            "to": to_list,
+            "outbox_id": outbox_id,
+        }
+
+    def build_message(
+        self,
+        subject: str,
+        body: str,
+        to_addresses: List[str],
+        body_html: Optional[str] = None,
+    ):
+        """创建邮件消息"""
+        if body_html:
+            msg = MIMEMultipart("alternative")
+            msg.attach(MIMEText(body, "plain", "utf-8"))
+            msg.attach(MIMEText(body_html, "html", "utf-8"))
+        else:
+            msg = MIMEText(body, "plain", "utf-8")
+
+        msg["Subject"] = subject
+        msg["From"] = self.from_address
+        msg["To"] = ", ".join(to_addresses)
+        return msg
+
+    def create_smtp(self) -> aiosmtplib.SMTP:
+        """创建SMTP客户端（未连接）"""
+        # 端口587使用STARTTLS（先建立普通连接，然后升级到TLS）
+        # 端口465使用SSL/TLS（直接建立TLS连接）
+        # 如果start_tls=True，connect()会自动处理STARTTLS，无需手动调用 starttls()，
+        # 否则会报错 "Connection already using TLS"
+        return aiosmtplib.SMTP(
+            hostname=self.smtp_host,
+            port=self.smtp_port,
+            use_tls=self.smtp_port == 465,
+            start_tls=self.smtp_port == 587,
+        )
 
-    async def send_task_start_notification(
+    def send_task_start_notification(
         self,
         task_name: str,
         task_type: str,
@@ -281,7 +299,7 @@ class EmailService:
 </html>
 """
 
-        return await self.send_email(
+        return self.send_email(
             subject=subject,
             body=body,
             body_html=body_html,
@@ -289,7 +307,7 @@ class EmailService:
             db=db,
         )
 
-    async def send_task_completion_notification(
+    def send_task_completion_notification(
         self,
         task_name: str,
         task_status: str,
@@ -413,9 +431,9 @@ class EmailService:
 </html>
 """
 
-        return await self.send_email(subject, body, to_addresses, body_html, db)
+        return self.send_email(subject, body, to_addresses, body_html, db)
 
-    async def send_backup_notification(
+    def send_backup_notification(
         self,
         backup_type: str,
         backup_path: str,
@@ -508,9 +526,9 @@ class EmailService:
 </html>
 """
 
-        return await self.send_email(subject, body, to_addresses, body_html, db)
+        return self.send_email(subject, body, to_addresses, body_html, db)
 
-    async def send_system_notification(
+    def send_system_notification(
         self,
         title: str,
         message: str,
@@ -558,7 +576,7 @@ class EmailService:
 </html>
 """
 
-        return await self.send_email(subject, body, to_addresses, body_html)
+        return self.send_email(subject, body, to_addresses, body_html)
 
 
 # 全局邮件服务实例
@@ -0,0 +1,202 @@
+"""
+筛选项服务 - 分类/效力级别/数据源及其政策数量
+
+计数保存在 policy_facet_counts 汇总表中，保存、删除政策时在同一事务内
+增量更新（加减计数），因此多个worker进程看到的数量一致；读取时整张汇总表
+在进程内缓存一小段时间，筛选面板渲染不再访问政策表。
+"""
+
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models.policy import Policy, PolicyFacetCount
+from .utils import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+FacetKey = Tuple[str, str, str]
+
+
+def facet_key(policy: Any) -> FacetKey:
+    """政策的筛选项键 (数据源, 分类, 效力级别)，支持ORM对象、查询行和字段字典"""
+    if isinstance(policy, dict):
+        values = (
+            policy.get("source_name"),
+            policy.get("category"),
+            policy.get("level"),
+        )
+    else:
+        values = (policy.source_name, policy.category, policy.level)
+    return tuple(value or "" for value in values)
+
+
+class FacetService:
+    """筛选项服务"""
+
+    # 进程内缓存汇总表的时间（秒），其他进程写入后最多延迟这么久可见
+    CACHE_TTL = 10.0
+
+    def __init__(self):
+        """初始化筛选项服务"""
+        self._lock = threading.Lock()
+        self._counts: Optional[Dict[FacetKey, int]] = None
+        self._expires_at = 0.0
+
+    # ------------------------------------------------------------------
+    # 写入（在调用方事务中执行，随调用方一起提交或回滚）
+    # ------------------------------------------------------------------
+
+    def record(self, db: Session, deltas: Dict[FacetKey, int]):
+        """累加各筛选项的政策数量变化（不提交）
+
+        按键排序后用一条多行 upsert 写入，多个事务并发更新时加锁顺序一致，
+        避免相互死锁。
+
+        Args:
+            db: 数据库会话
+            deltas: {筛选项键: 数量变化}
+        """
+        rows = [
+            {
+                "source_name": key[0],
+                "category": key[1],
+                "level": key[2],
+                "policy_count": delta,
+            }
+            for key, delta in sorted(deltas.items())
+            if delta
+        ]
+        if not rows:
+            return
+
+        insert = dialect_insert(db)
+        stmt = insert(PolicyFacetCount).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["source_name", "category", "level"],
+            set_={
+                "policy_count": PolicyFacetCount.policy_count
+                + stmt.excluded.policy_count
+            },
+        )
+        db.execute(stmt)
+        self.invalidate()
+
+    def record_added(self, db: Session, policies: Iterable[Any]):
+        """记录新增的政策（不提交）"""
+        self.record(db, Counter(facet_key(policy) for policy in policies))
+
+    def record_removed(self, db: Session, policies: Iterable[Any]):
+        """记录删除的政策（不提交）"""
+        counts = Counter(facet_key(policy) for policy in policies)
+        self.record(db, {key: -count for key, count in counts.items()})
+
+    def rebuild(self, db: Session) -> int:
+        """从政策表全量重建汇总表（并提交）
+
+        Returns:
+            筛选项组合数
+        """
+        groups = (
+            db.query(
+                func.coalesce(Policy.source_name, ""),
+                func.coalesce(Policy.category, ""),
+                func.coalesce(Policy.level, ""),
+                func.count(Policy.id),
+            )
+            .group_by(Policy.source_name, Policy.category, Policy.level)
+            .all()
+        )
+        deltas: Counter = Counter()
+        for source_name, category, level, count in groups:
+            deltas[(source_name, category, level)] += count
+
+        db.query(PolicyFacetCount).delete()
+        self.record(db, deltas)
+        db.commit()
+        self.invalidate()
+        logger.info(f"筛选项汇总表重建完成: {len(deltas)} 个组合")
+        return len(deltas)
+
+    def invalidate(self):
+        """清空进程内缓存"""
+        with self._lock:
+            self._counts = None
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def get_counts(self, db: Session) -> Dict[FacetKey, int]:
+        """获取全部筛选项组合的政策数量（进程内缓存）"""
+        with self._lock:
+            if self._counts is not None and time.monotonic() < self._expires_at:
+                return self._counts
+
+        counts = {
+            (row.source_name, row.category, row.level): row.policy_count
+            for row in db.query(PolicyFacetCount).filter(
+                PolicyFacetCount.policy_count > 0
+            )
+        }
+        with self._lock:
+            self._counts = counts
+            self._expires_at = time.monotonic() + self.CACHE_TTL
+        return counts
+
+    def get_facets(
+        self, db: Session, source_name: Optional[str] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """获取各筛选项及数量（按数量倒序）
+
+        Args:
+            db: 数据库会话
+            source_name: 可选的数据源名称，如果提供则分类和效力级别只统计该数据源
+
+        Returns:
+            {"categories": [...], "levels": [...], "source_names": [...]}，
+            每项为 {"value": 名称, "count": 政策数}
+        """
+        categories: Counter = Counter()
+        levels: Counter = Counter()
+        source_names: Counter = Counter()
+        for (source, category, level), count in self.get_counts(db).items():
+            source_names[source] += count
+            if source_name and source != source_name:
+                continue
+            categories[category] += count
+            levels[level] += count
+
+        return {
+            "categories": _facet_values(categories),
+            "levels": _facet_values(levels),
+            "source_names": _facet_values(source_names),
+        }
+
+
+def _facet_values(counter: Counter) -> List[Dict[str, Any]]:
+    """转换为 [{"value", "count"}] 列表，忽略空值和数量为0的项"""
+    return [
+        {"value": value, "count": count}
+        for value, count in sorted(
+            counter.items(), key=lambda item: (-item[1], item[0])
+        )
+        if value and count > 0
+    ]
+
+
+# 全局筛选项服务实例（进程内共享缓存）
+_facet_service: Optional[FacetService] = None
+
+
+def get_facet_service() -> FacetService:
+    """获取筛选项服务实例"""
+    global _facet_service
+    if _facet_service is None:
+        _facet_service = FacetService()
+    return _facet_service
@@ -83,6 +83,46 @@ class FileCleanupService:
         )
         return cleaned_count, failed_count
 
+    def run_daily_cleanup(self):
+        """每日清理作业：清理过期临时文件、回收附件内容块（由调度器leader执行）"""
+        try:
+            # 执行垃圾回收，释放内存
+            import gc
+
+            gc.collect()
+
+            self.cleanup_old_files(max_age_hours=24)
+            self.cleanup_orphan_blobs()
+
+            # 记录内存使用情况
+            import psutil
+
+            process = psutil.Process()
+            memory_info = process.memory_info()
+            logger.info(
+                f"内存清理完成，当前内存使用: {memory_info.rss / 1024 / 1024:.1f} MB"
+            )
+
+        except Exception as e:
+            logger.error(f"文件清理任务执行失败: {e}", exc_info=True)
+
+    def cleanup_orphan_blobs(self) -> dict:
+        """修正附件内容块引用计数，并回收不再被引用的内容块"""
+        from ..database import SessionLocal
+        from .blob_store_service import get_blob_store_service
+
+        blob_store = get_blob_store_service()
+        db = SessionLocal()
+        try:
+            blob_store.reconcile_ref_counts(db)
+            return blob_store.collect_garbage(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"回收附件内容块失败: {e}", exc_info=True)
+            return {"deleted_blobs": 0, "freed_bytes": 0, "failed": 0}
+        finally:
+            db.close()
+
     def _cleanup_directory(
         self, directory: Path, max_age: timedelta, current_time: datetime
     ):
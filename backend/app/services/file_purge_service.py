@@ -0,0 +1,267 @@
+"""
+文件清理作业服务 - 删除任务后在后台清理任务的文件
+
+删除任务时数据库记录在请求内按集合删除并提交，同一事务中写入一条
+task_file_purges 作业，记录需要删除的本地目录、S3前缀和零散对象。
+作业在后台线程中执行：本地按任务目录整体 rmtree，S3 逐页列出前缀后用
+DeleteObjects 每批 1000 个删除。作业状态保存在数据库中，任意worker进程
+都可以查询；进程重启后未完成的作业在启动时重新领取执行。
+"""
+
+import os
+import shutil
+import logging
+import threading
+from itertools import chain
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from ..models.task import Task, TaskFilePurge
+
+logger = logging.getLogger(__name__)
+
+
+class FilePurgeService:
+    """文件清理作业服务"""
+
+    # 执行中的作业超过该时间未结束视为执行进程已退出，可被重新领取
+    STALE_AFTER = timedelta(hours=1)
+
+    def create_purge(
+        self,
+        db: Session,
+        task: Task,
+        policy_ids: Iterable[int],
+        legacy_attachments: Iterable[Any] = (),
+        blob_hashes: Iterable[str] = (),
+    ) -> TaskFilePurge:
+        """为被删除的任务创建文件清理作业（不提交，随任务删除一起提交）
+
+        Args:
+            db: 数据库会话
+            task: 被删除的任务
+            policy_ids: 任务的政策ID（用于清理按政策ID存放的缓存）
+            legacy_attachments: 不使用内容块存储的旧附件（file_path, file_s3_key）
+            blob_hashes: 释放了引用的附件内容块
+
+        Returns:
+            清理作业
+        """
+        from .storage_service import StorageService
+        from .cache_service import CacheService
+
+        storage_service = StorageService()
+        task_dir = storage_service.local_dir / "policies" / str(task.id)
+        s3_prefix = f"policies/{task.id}/"
+
+        local_paths: List[str] = [str(task_dir)]
+        s3_keys: List[str] = []
+        for attachment in legacy_attachments:
+            # 文件路径包含task_id的附件随任务目录一起删除
+            if attachment.file_path and not _is_within(attachment.file_path, task_dir):
+                local_paths.append(attachment.file_path)
+            if attachment.file_s3_key and not attachment.file_s3_key.startswith(
+                s3_prefix
+            ):
+                s3_keys.append(attachment.file_s3_key)
+
+        cache_service = CacheService()
+        if cache_service.is_enabled():
+            cache_root = cache_service.cache_dir / "policies"
+            local_paths.extend(str(cache_root / str(pid)) for pid in policy_ids)
+
+        purge = TaskFilePurge(
+            task_id=task.id,
+            task_name=task.task_name,
+            status="pending",
+            local_paths=local_paths,
+            s3_prefixes=[s3_prefix] if storage_service.s3_service.is_enabled() else [],
+            s3_keys=s3_keys,
+            blob_hashes=sorted(set(blob_hashes)),
+            deleted_files=0,
+            deleted_objects=0,
+            failed_count=0,
+        )
+        db.add(purge)
+        db.flush()
+        return purge
+
+    def submit(self, purge_id: int):
+        """在后台线程中执行清理作业"""
+
+        def run():
+            from ..database import worker_session
+
+            db = worker_session(f"file_purge:{purge_id}")
+            try:
+                self.run(db, purge_id)
+            except Exception as e:
+                logger.error(f"文件清理作业 {purge_id} 执行失败: {e}", exc_info=True)
+            finally:
+                db.close()
+
+        threading.Thread(target=run, name=f"file-purge-{purge_id}", daemon=True).start()
+
+    def resume_pending(self) -> int:
+        """重新提交未完成的清理作业（启动时调用）
+
+        Returns:
+            提交的作业数
+        """
+        from ..database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            purge_ids = [
+                row[0]
+                for row in db.query(TaskFilePurge.id)
+                .filter(self._claimable())
+                .order_by(TaskFilePurge.id)
+            ]
+        finally:
+            db.close()
+
+        for purge_id in purge_ids:
+            self.submit(purge_id)
+        if purge_ids:
+            logger.info(f"重新提交 {len(purge_ids)} 个未完成的文件清理作业")
+        return len(purge_ids)
+
+    def run(self, db: Session, purge_id: int) -> Optional[TaskFilePurge]:
+        """执行清理作业
+
+        先用条件更新领取作业，多个进程同时启动时同一作业只会执行一次。
+
+        Returns:
+            执行后的作业，作业不存在或已被其他进程领取时返回None
+        """
+        claimed = (
+            db.query(TaskFilePurge)
+            .filter(TaskFilePurge.id == purge_id, self._claimable())
+            .update(
+                {
+                    TaskFilePurge.status: "running",
+                    TaskFilePurge.started_at: datetime.now(timezone.utc),
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if not claimed:
+            return None
+
+        purge = db.query(TaskFilePurge).filter(TaskFilePurge.id == purge_id).one()
+        try:
+            # 1. 本地目录和文件
+            deleted_files, failed = self._delete_local_paths(purge.local_paths or [])
+            purge.deleted_files = deleted_files
+            purge.failed_count = failed
+            db.commit()
+
+            # 2. S3对象（前缀下的对象逐页列出，按批删除）
+            from .s3_service import get_s3_service
+
+            s3_service = get_s3_service()
+            if s3_service.is_enabled():
+                keys = chain(
+                    chain.from_iterable(
+                        s3_service.iter_files(prefix)
+                        for prefix in purge.s3_prefixes or []
+                    ),
+                    purge.s3_keys or [],
+                )
+                deleted_objects, failed = s3_service.delete_files(keys)
+                purge.deleted_objects = deleted_objects
+                purge.failed_count += failed
+            db.commit()
+
+            # 3. 回收引用归零的附件内容块
+            if purge.blob_hashes:
+                from .blob_store_service import get_blob_store_service
+
+                gc_result = get_blob_store_service().collect_garbage(
+                    db, list(purge.blob_hashes)
+                )
+                purge.deleted_files += gc_result["deleted_blobs"]
+                purge.failed_count += gc_result["failed"]
+
+            purge.status = "failed" if purge.failed_count else "completed"
+            if purge.failed_count:
+                purge.error_message = f"{purge.failed_count} 个文件或对象删除失败"
+        except Exception as e:
+            db.rollback()
+            purge = db.query(TaskFilePurge).filter(TaskFilePurge.id == purge_id).one()
+            purge.status = "failed"
+            purge.error_message = str(e)
+            logger.error(f"文件清理作业 {purge_id} 失败: {e}", exc_info=True)
+
+        purge.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        logger.info(
+            f"任务 {purge.task_id} 的文件清理完成: 状态={purge.status}, "
+            f"本地 {purge.deleted_files} 项, S3 {purge.deleted_objects} 个对象, "
+            f"失败 {purge.failed_count}"
+        )
+        return purge
+
+    def get_purge(self, db: Session, purge_id: int) -> Optional[TaskFilePurge]:
+        """获取清理作业"""
+        return db.query(TaskFilePurge).filter(TaskFilePurge.id == purge_id).first()
+
+    def _claimable(self):
+        """可领取的作业：等待中，或执行中但已超时"""
+        stale_before = datetime.now(timezone.utc) - self.STALE_AFTER
+        return or_(
+            TaskFilePurge.status == "pending",
+            and_(
+                TaskFilePurge.status == "running",
+                TaskFilePurge.started_at < stale_before,
+            ),
+        )
+
+    @staticmethod
+    def _delete_local_paths(paths: Iterable[str]) -> tuple:
+        """删除本地目录（整体 rmtree）和文件
+
+        Returns:
+            (删除数, 失败数)
+        """
+        deleted = failed = 0
+        for path in paths:
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.lexists(path):
+                    os.remove(path)
+                else:
+                    continue
+                deleted += 1
+            except Exception as e:
+                failed += 1
+                logger.warning(f"删除本地路径失败: {path} - {e}")
+        return deleted, failed
+
+
+def _is_within(path: str, directory: Path) -> bool:
+    """路径是否位于目录内"""
+    try:
+        Path(path).resolve().relative_to(directory.resolve())
+        return True
+    except ValueError:
+        return False
+
+
+# 全局文件清理作业服务实例
+_file_purge_service: Optional[FilePurgeService] = None
+
+
+def get_file_purge_service() -> FilePurgeService:
+    """获取文件清理作业服务实例"""
+    global _file_purge_service
+    if _file_purge_service is None:
+        _file_purge_service = FilePurgeService()
+    return _file_purge_service
@@ -0,0 +1,147 @@
+"""
+多进程选主 - PostgreSQL会话级advisory锁
+
+每个进程用一个独立的数据库连接尝试 pg_try_advisory_lock，拿到锁的进程成为
+leader。锁跟随连接：leader进程退出或连接断开时锁自动释放，其他进程在下一次
+尝试时接替。leader定期在该连接上执行查询确认连接（也就是锁）仍然有效，
+连接失效时立即放弃leader身份，避免两个进程同时工作。
+
+非PostgreSQL数据库（SQLite，单进程开发/测试）不选主，当前进程直接成为leader。
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """基于advisory锁租约的选主"""
+
+    def __init__(
+        self,
+        name: str,
+        lock_key: int,
+        on_elected: Callable[[], None],
+        on_demoted: Callable[[], None],
+        interval: float = 10.0,
+    ):
+        """初始化选主
+
+        Args:
+            name: 名称（日志和线程名）
+            lock_key: advisory锁的键
+            on_elected: 成为leader时的回调（在选主线程中调用）
+            on_demoted: 失去leader身份时的回调（在选主线程或 stop 的调用线程中调用）
+            interval: 未当选时重试、当选后检查连接的间隔（秒）
+        """
+        self.name = name
+        self.lock_key = lock_key
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._connection: Any = None
+        self._is_leader = False
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def start(self):
+        """开始参与选主"""
+        from ..database import engine
+
+        if engine.dialect.name != "postgresql":
+            with self._lock:
+                if not self._is_leader:
+                    self._elect()
+            return
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"leader-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """退出选主（是leader时先放弃leader身份并释放锁）"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        with self._lock:
+            self._demote()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            with self._lock:
+                if self._is_leader:
+                    if not self._check():
+                        logger.warning(f"[{self.name}] 选主连接已断开，放弃leader身份")
+                        self._demote()
+                elif self._try_acquire():
+                    self._elect()
+            self._stopping.wait(self.interval)
+
+    def _elect(self):
+        self._is_leader = True
+        logger.info(f"[{self.name}] 当前进程成为leader")
+        try:
+            self.on_elected()
+        except Exception as e:
+            logger.error(f"[{self.name}] 成为leader后启动失败: {e}", exc_info=True)
+            self._demote()
+
+    def _demote(self):
+        if not self._is_leader:
+            self._close()
+            return
+        self._is_leader = False
+        try:
+            self.on_demoted()
+        except Exception as e:
+            logger.error(f"[{self.name}] 放弃leader身份时出错: {e}", exc_info=True)
+        finally:
+            # 关闭连接即释放锁
+            self._close()
+        logger.info(f"[{self.name}] 当前进程已放弃leader身份")
+
+    def _try_acquire(self) -> bool:
+        from ..database import engine
+
+        try:
+            if self._connection is None:
+                # 独立连接（不占用连接池），锁在连接关闭前一直有效
+                cargs, cparams = engine.dialect.create_connect_args(engine.url)
+                self._connection = engine.dialect.dbapi.connect(*cargs, **cparams)
+                self._connection.autocommit = True
+            with self._connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", (self.lock_key,))
+                return bool(cursor.fetchone()[0])
+        except Exception as e:
+            logger.warning(f"[{self.name}] 尝试获取leader锁失败: {e}")
+            self._close()
+            return False
+
+    def _check(self) -> bool:
+        try:
+            with self._connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            return True
+        except Exception:
+            return False
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
@@ -0,0 +1,158 @@
+"""
+分页工具 - 基于游标的键集分页（keyset pagination）
+
+列表按 (排序列 DESC NULLS LAST, id DESC) 排序，游标记录上一页最后一行的
+(排序值, id)，下一页直接从该位置继续走复合索引，不再 OFFSET 扫描前面的行，
+因此翻到第500页与第1页的开销相同。
+
+游标是不透明的 base64 字符串，客户端只需原样传回；服务端也可以用它
+承载偏移量（进程内搜索引擎等不适合键集分页的场景）。
+"""
+
+import json
+import base64
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+class Page(list):
+    """一页结果（list子类，额外携带下一页游标，没有下一页时为None）"""
+
+    next_cursor: Optional[str] = None
+    # 同时返回的总数是否为估算值（见 CountService）
+    total_is_estimate: bool = False
+
+    def __init__(self, items=(), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def _encode(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("无效的分页游标")
+    if not isinstance(payload, dict):
+        raise ValueError("无效的分页游标")
+    return payload
+
+
+def encode_keyset_cursor(sort_value: Any, row_id: int) -> str:
+    """编码键集游标 (排序值, id)"""
+    if isinstance(sort_value, (date, datetime)):
+        sort_value = sort_value.isoformat()
+    return _encode({"k": [sort_value, row_id]})
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """编码偏移量游标"""
+    return _encode({"o": offset})
+
+
+def decode_cursor(cursor: str, sort_column=None) -> Tuple[str, Any]:
+    """解析游标
+
+    Args:
+        cursor: 游标字符串
+        sort_column: 键集游标对应的排序列（用于还原日期/时间类型）
+
+    Returns:
+        ("keyset", (排序值, id)) 或 ("offset", 偏移量)
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    payload = _decode(cursor)
+    if "o" in payload:
+        offset = payload["o"]
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError("无效的分页游标")
+        return "offset", offset
+
+    try:
+        sort_value, row_id = payload["k"]
+        row_id = int(row_id)
+        if sort_value is not None and sort_column is not None:
+            python_type = sort_column.type.python_type
+            if python_type is datetime:
+                sort_value = datetime.fromisoformat(sort_value)
+            elif python_type is date:
+                sort_value = date.fromisoformat(sort_value)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("无效的分页游标")
+    return "keyset", (sort_value, row_id)
+
+
+def keyset_paginate(
+    query: Query,
+    sort_column,
+    id_column,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+) -> Page:
+    """按 (排序列 DESC NULLS LAST, id DESC) 分页
+
+    有游标时分两段查询：先取排序值非空、位于游标之后的行（复合索引范围扫描），
+    不足一页再从排序值为空的行中补齐；无游标时按 skip 偏移（兼容旧客户端）。
+    返回的下一页游标总是键集游标，客户端翻页时即可切换到键集分页。
+
+    Args:
+        query: 已应用筛选条件的查询
+        sort_column: 排序列（如 Policy.pub_date）
+        id_column: 主键列
+        limit: 每页数量
+        skip: 跳过数量（仅无游标时使用）
+        cursor: 上一页返回的游标
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    order = (sort_column.desc().nulls_last(), id_column.desc())
+
+    if cursor:
+        kind, value = decode_cursor(cursor, sort_column)
+        if kind == "offset":
+            skip, cursor = value, None
+
+    if not cursor:
+        items = query.order_by(*order).offset(skip).limit(limit).all()
+    else:
+        sort_value, last_id = value
+        items: List[Any] = []
+        if sort_value is not None:
+            items = (
+                query.filter(
+                    sort_column.isnot(None),
+                    tuple_(sort_column, id_column) < tuple_(sort_value, last_id),
+                )
+                .order_by(*order)
+                .limit(limit)
+                .all()
+            )
+            # 排序值非空的行已取完，空值部分从头开始
+            last_id = None
+        if len(items) < limit:
+            null_query = query.filter(sort_column.is_(None))
+            if last_id is not None:
+                null_query = null_query.filter(id_column < last_id)
+            items += (
+                null_query.order_by(id_column.desc()).limit(limit - len(items)).all()
+            )
+
+    next_cursor = None
+    if len(items) == limit:
+        last = items[-1]
+        next_cursor = encode_keyset_cursor(
+            getattr(last, sort_column.key), getattr(last, id_column.key)
+        )
+    return Page(items, next_cursor)
@@ -4,15 +4,22 @@
 
 import json
 import logging
-from typing import List, Optional, Dict, Any
+from types import SimpleNamespace
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 from datetime import datetime, date, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
 
-from ..models.policy import Policy as PolicyModel
+from ..models.policy import Policy as PolicyModel, PolicyContent
 from ..models.attachment import Attachment
 from .storage_service import StorageService
 from .attachment_service import AttachmentService
+from .blob_store_service import get_blob_store_service
+from .search_service import SearchService
+from .pagination import keyset_paginate
+from .count_service import get_count_service
+from .facet_service import get_facet_service
+from .utils import dialect_insert, load_only_columns
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +31,16 @@ class PolicyService:
         """初始化政策服务"""
         self.storage_service = StorageService()
         self.attachment_service = AttachmentService()
+        self.blob_store = get_blob_store_service()
+        self.search_service = SearchService()
+        self.facet_service = get_facet_service()
 
     def save_policy(
-        self, db: Session, policy_data: Dict[str, Any], task_id: Optional[int] = None
+        self,
+        db: Session,
+        policy_data: Dict[str, Any],
+        task_id: Optional[int] = None,
+        commit: bool = True,
     ) -> Optional[PolicyModel]:
         """保存政策到数据库
 
@@ -34,199 +48,233 @@ class PolicyService:
             db: 数据库会话
             policy_data: 政策数据字典（来自爬虫）
             task_id: 关联的任务ID
+            commit: 是否立即提交；为False时只flush，由调用方（如批量事务）
+                负责提交，失败时抛出异常而不是回滚整个会话
 
         Returns:
             PolicyModel对象，如果已存在则返回现有对象
         """
-        try:
-            # 解析日期
-            pub_date = self._parse_date(policy_data.get("pub_date"))
-            effective_date = self._parse_date(policy_data.get("effective_date"))
-            crawl_time = datetime.now(timezone.utc)
-
-            # 检查政策是否已存在（基于任务ID，确保每个任务的数据独立）
-            if task_id:
-                # 如果提供了task_id，检查是否存在相同的(title, source_url, pub_date, task_id)
-                existing_policy = (
-                    db.query(PolicyModel)
-                    .filter(
-                        PolicyModel.title == policy_data.get("title", ""),
-                        PolicyModel.source_url
-                        == policy_data.get("source", policy_data.get("url", "")),
-                        PolicyModel.pub_date == pub_date,
-                        PolicyModel.task_id == task_id,
-                    )
-                    .first()
-                )
-            else:
-                # 如果没有task_id，检查是否存在相同的(title, source_url, pub_date)且task_id为NULL（兼容旧数据）
-                existing_policy = (
-                    db.query(PolicyModel)
-                    .filter(
-                        PolicyModel.title == policy_data.get("title", ""),
-                        PolicyModel.source_url
-                        == policy_data.get("source", policy_data.get("url", "")),
-                        PolicyModel.pub_date == pub_date,
-                        PolicyModel.task_id.is_(None),
-                    )
-                    .first()
-                )
+        policy, _ = self.save_policy_with_status(db, policy_data, task_id, commit)
+        return policy
 
-            if existing_policy:
-                logger.debug(
-                    f"政策已存在，跳过: {existing_policy.title} (Task: {task_id})"
-                )
-                return existing_policy
-
-            # 计算字数
-            content = policy_data.get("content", "")
-            word_count = len(content) if content else 0
-
-            # 处理关键词（JSON数组字符串）
-            keywords = policy_data.get("keywords", [])
-            if isinstance(keywords, list):
-                keywords_str = json.dumps(keywords, ensure_ascii=False)
-            elif isinstance(keywords, str):
-                keywords_str = keywords
-            else:
-                keywords_str = "[]"
-
-            # 处理source_name：优先使用policy_data中的source_name，如果没有则从_data_source获取
-            source_name = policy_data.get("source_name", "")
-            if not source_name:
-                # 尝试从_data_source获取数据源名称
-                data_source = policy_data.get("_data_source") or policy_data.get(
-                    "data_source"
-                )
-                if data_source and isinstance(data_source, dict):
-                    source_name = data_source.get("name", "")
-
-            # 如果还是没有，尝试从source_url推断（兼容旧数据）
-            if not source_name:
-                source_url = policy_data.get("source", policy_data.get("url", ""))
-                if source_url:
-                    # 根据URL判断数据源
-                    if "gi.mnr.gov.cn" in source_url:
-                        source_name = "政府信息公开平台"
-                    elif "f.mnr.gov.cn" in source_url:
-                        source_name = "政策法规库"
-                    else:
-                        from urllib.parse import urlparse
-
-                        parsed = urlparse(source_url)
-                        source_name = parsed.netloc or "未知来源"
-
-            # 创建政策记录（包含task_id，确保每个任务的数据独立）
-            policy = PolicyModel(
-                title=policy_data.get("title", ""),
-                doc_number=policy_data.get("doc_number", ""),
-                pub_date=pub_date,
-                effective_date=effective_date,
-                category=policy_data.get("category", ""),
-                category_code=policy_data.get("category_code", ""),
-                level=policy_data.get("level", ""),
-                validity=policy_data.get("validity", ""),
-                source_url=policy_data.get("source", policy_data.get("url", "")),
-                source_name=source_name,
-                content=content,
-                content_summary=policy_data.get("content_summary", ""),
-                publisher=policy_data.get("publisher", ""),
-                keywords=keywords_str,
-                word_count=word_count,
-                crawl_time=crawl_time,
-                is_indexed=False,
-                task_id=task_id,  # 添加task_id，确保每个任务的数据独立
-            )
+    def save_policy_with_status(
+        self,
+        db: Session,
+        policy_data: Dict[str, Any],
+        task_id: Optional[int] = None,
+        commit: bool = True,
+    ) -> Tuple[Optional[PolicyModel], bool]:
+        """保存政策到数据库，并返回是否新插入
 
-            # 保存文件路径信息（如果有）
-            # 兼容多种字段名
-            if "json_path" in policy_data:
-                policy.json_local_path = policy_data.get("json_path")
-            elif "json_local_path" in policy_data:
-                policy.json_local_path = policy_data.get("json_local_path")
+        参数同 save_policy。是否新插入由 ON CONFLICT ... RETURNING 是否返回行决定。
 
-            if "markdown_path" in policy_data:
-                policy.markdown_local_path = policy_data.get("markdown_path")
-            elif "markdown_local_path" in policy_data:
-                policy.markdown_local_path = policy_data.get("markdown_local_path")
+        Returns:
+            (PolicyModel对象, 是否新插入)；已存在时返回 (现有对象, False)，
+            保存失败时返回 (None, False)
+        """
+        try:
+            fields = self._build_policy_fields(
+                policy_data, task_id, datetime.now(timezone.utc)
+            )
+            content = fields.pop("content")
+            attachments = policy_data.get("attachments", [])
+            fields["attachment_count"] = len(attachments)
+            # 标记为已索引（PostgreSQL会自动维护GIN索引）
+            fields["is_indexed"] = True
+
+            # 唯一性由部分唯一索引保证：冲突时不插入、不报错，RETURNING为空
+            insert = self._dialect_insert(db)
+            stmt = (
+                insert(PolicyModel)
+                .values(**fields)
+                .on_conflict_do_nothing()
+                .returning(PolicyModel)
+            )
+            policy = db.scalars(stmt).first()
 
-            if "docx_path" in policy_data:
-                policy.docx_local_path = policy_data.get("docx_path")
-            elif "docx_local_path" in policy_data:
-                policy.docx_local_path = policy_data.get("docx_local_path")
+            if policy is None:
+                # 已存在（基于任务ID，确保每个任务的数据独立），返回现有政策
+                existing_policy = self._find_policy_by_identity(db, fields)
+                logger.debug(f"政策已存在，跳过: {fields['title']} (Task: {task_id})")
+                return existing_policy, False
 
-            db.add(policy)
-            db.flush()  # 获取policy.id
+            # 正文写入独立的正文表（同时挂到政策对象上，后续访问不再查询）
+            content_row = PolicyContent(
+                policy_id=policy.id, **PolicyContent.pack(content)
+            )
+            db.add(content_row)
+            set_committed_value(policy, "content_row", content_row)
+            self.facet_service.record_added(db, [fields])
 
             # 保存附件（如果有）
-            attachments = policy_data.get("attachments", [])
-            if attachments:
-                for att_data in attachments:
-                    attachment = Attachment(
-                        policy_id=policy.id,
-                        file_name=att_data.get("file_name", ""),
-                        file_url=att_data.get("file_url", ""),
-                        file_size=att_data.get("file_size", 0),
-                        file_type=att_data.get("file_ext", ""),
-                        storage_path=att_data.get("storage_path", ""),
-                    )
-                    db.add(attachment)
-                policy.attachment_count = len(attachments)
+            for att_data in attachments:
+                db.add(Attachment(**self._build_attachment_fields(att_data, policy.id)))
 
-            # 标记为已索引（PostgreSQL会自动维护GIN索引）
-            policy.is_indexed = True
+            # 增量加入二元组搜索索引（未启用时不做任何事）
+            self.search_service.index_policies([policy])
 
-            db.commit()
-            db.refresh(policy)
+            if commit:
+                db.commit()
+            else:
+                db.flush()
 
             logger.info(f"政策保存成功: {policy.title} (ID: {policy.id})")
-            return policy
-
-        except IntegrityError:
-            db.rollback()
-            logger.warning(
-                f"政策已存在（唯一约束冲突）: {policy_data.get('title', 'Unknown')} (Task: {task_id})"
-            )
-            # 尝试查找并返回现有政策（基于task_id）
-            if task_id:
-                existing_policy = (
-                    db.query(PolicyModel)
-                    .filter(
-                        PolicyModel.title == policy_data.get("title", ""),
-                        PolicyModel.source_url
-                        == policy_data.get("source", policy_data.get("url", "")),
-                        PolicyModel.pub_date == pub_date,
-                        PolicyModel.task_id == task_id,
-                    )
-                    .first()
-                )
-            else:
-                existing_policy = (
-                    db.query(PolicyModel)
-                    .filter(
-                        PolicyModel.title == policy_data.get("title", ""),
-                        PolicyModel.source_url
-                        == policy_data.get("source", policy_data.get("url", "")),
-                        PolicyModel.pub_date == pub_date,
-                        PolicyModel.task_id.is_(None),
-                    )
-                    .first()
-                )
-            return existing_policy
+            return policy, True
 
         except Exception as e:
+            if not commit:
+                raise
             db.rollback()
             logger.error(f"保存政策失败: {e}", exc_info=True)
-            return None
+            return None, False
+
+    @staticmethod
+    def _dialect_insert(db: Session):
+        """获取支持 ON CONFLICT 的 insert 构造函数（PostgreSQL，测试环境为SQLite）"""
+        return dialect_insert(db)
+
+    def _find_policy_by_identity(
+        self, db: Session, fields: Dict[str, Any]
+    ) -> Optional[PolicyModel]:
+        """按唯一标识 (title, source_url, pub_date, task_id) 查找政策"""
+        query = db.query(PolicyModel).filter(
+            PolicyModel.title == fields["title"],
+            PolicyModel.source_url == fields["source_url"],
+            PolicyModel.pub_date == fields["pub_date"],
+        )
+        if fields.get("task_id"):
+            query = query.filter(PolicyModel.task_id == fields["task_id"])
+        else:
+            # 兼容旧数据：task_id为NULL
+            query = query.filter(PolicyModel.task_id.is_(None))
+        return query.first()
+
+    def _build_policy_fields(
+        self,
+        policy_data: Dict[str, Any],
+        task_id: Optional[int],
+        crawl_time: datetime,
+    ) -> Dict[str, Any]:
+        """根据爬虫数据构造政策记录的字段值（单条保存与批量保存共用）"""
+        # 计算字数
+        content = policy_data.get("content", "")
+        word_count = len(content) if content else 0
+
+        # 处理关键词（JSON数组字符串）
+        keywords = policy_data.get("keywords", [])
+        if isinstance(keywords, list):
+            keywords_str = json.dumps(keywords, ensure_ascii=False)
+        elif isinstance(keywords, str):
+            keywords_str = keywords
+        else:
+            keywords_str = "[]"
+
+        # 处理source_name：优先使用policy_data中的source_name，如果没有则从_data_source获取
+        source_name = policy_data.get("source_name", "")
+        if not source_name:
+            # 尝试从_data_source获取数据源名称
+            data_source = policy_data.get("_data_source") or policy_data.get(
+                "data_source"
+            )
+            if data_source and isinstance(data_source, dict):
+                source_name = data_source.get("name", "")
+
+        # 如果还是没有，尝试从source_url推断（兼容旧数据）
+        if not source_name:
+            source_url = policy_data.get("source", policy_data.get("url", ""))
+            if source_url:
+                # 根据URL判断数据源
+                if "gi.mnr.gov.cn" in source_url:
+                    source_name = "政府信息公开平台"
+                elif "f.mnr.gov.cn" in source_url:
+                    source_name = "政策法规库"
+                else:
+                    from urllib.parse import urlparse
+
+                    parsed = urlparse(source_url)
+                    source_name = parsed.netloc or "未知来源"
+
+        # 政策记录字段（包含task_id，确保每个任务的数据独立）
+        fields = {
+            "title": policy_data.get("title", ""),
+            "doc_number": policy_data.get("doc_number", ""),
+            "pub_date": self._parse_date(policy_data.get("pub_date")),
+            "effective_date": self._parse_date(policy_data.get("effective_date")),
+            "category": policy_data.get("category", ""),
+            "category_code": policy_data.get("category_code", ""),
+            "level": policy_data.get("level", ""),
+            "validity": policy_data.get("validity", ""),
+            "source_url": policy_data.get("source", policy_data.get("url", "")),
+            "source_name": source_name,
+            "content": content,
+            "content_summary": policy_data.get("content_summary", ""),
+            "publisher": policy_data.get("publisher", ""),
+            "keywords": keywords_str,
+            "word_count": word_count,
+            "crawl_time": crawl_time,
+            "is_indexed": False,
+            "task_id": task_id,  # 添加task_id，确保每个任务的数据独立
+        }
+
+        # 保存文件路径信息（如果有，批量写入要求每行字段一致，缺省为None）
+        # 兼容多种字段名
+        for column, keys in (
+            ("json_local_path", ("json_path", "json_local_path")),
+            ("markdown_local_path", ("markdown_path", "markdown_local_path")),
+            ("docx_local_path", ("docx_path", "docx_local_path")),
+        ):
+            fields[column] = None
+            for key in keys:
+                if key in policy_data:
+                    fields[column] = policy_data.get(key)
+                    break
+
+        return fields
+
+    @staticmethod
+    def _build_attachment_fields(
+        att_data: Dict[str, Any], policy_id: int
+    ) -> Dict[str, Any]:
+        """根据爬虫附件数据构造附件记录的字段值"""
+        return {
+            "policy_id": policy_id,
+            "file_name": att_data.get("file_name", ""),
+            "file_url": att_data.get("file_url", ""),
+            "file_size": att_data.get("file_size", 0),
+            "file_type": att_data.get("file_ext", ""),
+            "file_path": att_data.get("storage_path") or None,
+        }
+
+    @staticmethod
+    def _policy_identity(fields: Dict[str, Any]) -> tuple:
+        """政策唯一标识 (title, source_url, pub_date, task_id)"""
+        return (
+            fields.get("title"),
+            fields.get("source_url"),
+            fields.get("pub_date"),
+            fields.get("task_id"),
+        )
 
     def save_policies_batch(
         self,
         db: Session,
         policies_data: List[Dict[str, Any]],
         task_id: Optional[int] = None,
+        page_size: int = 500,
     ) -> Dict[str, int]:
         """批量保存政策
 
+        PostgreSQL/SQLite 下按页使用多行 ``INSERT … ON CONFLICT DO NOTHING
+        RETURNING`` 写入政策（已存在的政策由部分唯一索引跳过），再用一条多行
+        INSERT 写入新政策的附件，每页只需两次往返和一次提交；saved/skipped 由
+        RETURNING 返回的行精确得出。写入失败的页回退为逐条 save_policy。
+
+        Args:
+            db: 数据库会话
+            policies_data: 政策数据字典列表（来自爬虫）
+            task_id: 关联的任务ID
+            page_size: 每页政策数
+
         Returns:
             {
                 "total": 总数,
@@ -237,23 +285,139 @@ class PolicyService:
         """
         result = {"total": len(policies_data), "saved": 0, "skipped": 0, "failed": 0}
 
+        for page_start in range(0, len(policies_data), page_size):
+            page = policies_data[page_start : page_start + page_size]
+            try:
+                page_result = self._insert_policy_page(db, page, task_id)
+                db.commit()
+                result["saved"] += page_result["saved"]
+                result["skipped"] += page_result["skipped"]
+                result["failed"] += page_result["failed"]
+            except Exception as e:
+                db.rollback()
+                logger.error(f"批量写入政策失败，改为逐条保存: {e}")
+                page_result = self._save_policies_one_by_one(db, page, task_id)
+                result["saved"] += page_result["saved"]
+                result["skipped"] += page_result["skipped"]
+                result["failed"] += page_result["failed"]
+
+        logger.info(
+            f"批量保存政策完成: 总数 {result['total']}, 保存 {result['saved']}, "
+            f"跳过 {result['skipped']}, 失败 {result['failed']}"
+        )
+        return result
+
+    def _insert_policy_page(
+        self,
+        db: Session,
+        page: List[Dict[str, Any]],
+        task_id: Optional[int],
+    ) -> Dict[str, int]:
+        """用一条多行INSERT写入一页政策及其附件（不提交）"""
+        insert = self._dialect_insert(db)
+
+        page_result = {"saved": 0, "skipped": 0, "failed": 0}
+        crawl_time = datetime.now(timezone.utc)
+
+        # 构造字段值，页内重复的政策只写入一次
+        rows: List[Dict[str, Any]] = []
+        rows_by_identity: Dict[tuple, Dict[str, Any]] = {}
+        contents_by_identity: Dict[tuple, str] = {}
+        attachments_by_identity: Dict[tuple, List[Dict[str, Any]]] = {}
+        for policy_data in page:
+            try:
+                fields = self._build_policy_fields(policy_data, task_id, crawl_time)
+            except Exception as e:
+                logger.error(f"构造政策数据失败: {e}")
+                page_result["failed"] += 1
+                continue
+
+            identity = self._policy_identity(fields)
+            if identity in attachments_by_identity:
+                page_result["skipped"] += 1
+                continue
+
+            attachments = policy_data.get("attachments") or []
+            fields["attachment_count"] = len(attachments)
+            # 标记为已索引（PostgreSQL会自动维护GIN索引）
+            fields["is_indexed"] = True
+            attachments_by_identity[identity] = attachments
+            contents_by_identity[identity] = fields.pop("content")
+            rows_by_identity[identity] = fields
+            rows.append(fields)
+
+        if not rows:
+            return page_result
+
+        # 已存在的政策（唯一约束冲突）被跳过，RETURNING只返回新写入的行
+        stmt = (
+            insert(PolicyModel)
+            .values(rows)
+            .on_conflict_do_nothing()
+            .returning(
+                PolicyModel.id,
+                PolicyModel.title,
+                PolicyModel.source_url,
+                PolicyModel.pub_date,
+                PolicyModel.task_id,
+                PolicyModel.updated_at,
+            )
+        )
+        inserted = db.execute(stmt).all()
+
+        page_result["saved"] += len(inserted)
+        page_result["skipped"] += len(rows) - len(inserted)
+
+        attachment_rows = []
+        content_rows = []
+        inserted_policies = []
+        for row in inserted:
+            identity = (row.title, row.source_url, row.pub_date, row.task_id)
+            for att_data in attachments_by_identity.get(identity, []):
+                attachment_rows.append(self._build_attachment_fields(att_data, row.id))
+            if identity in rows_by_identity:
+                content = contents_by_identity[identity]
+                content_rows.append(
+                    {"policy_id": row.id, **PolicyContent.pack(content)}
+                )
+                inserted_policies.append(
+                    SimpleNamespace(
+                        id=row.id,
+                        updated_at=row.updated_at,
+                        content=content,
+                        **rows_by_identity[identity],
+                    )
+                )
+
+        if content_rows:
+            db.execute(PolicyContent.__table__.insert(), content_rows)
+        self.facet_service.record_added(db, inserted_policies)
+        if attachment_rows:
+            db.execute(Attachment.__table__.insert(), attachment_rows)
+
+        # 增量加入二元组搜索索引（未启用时不做任何事）
+        self.search_service.index_policies(inserted_policies)
+
+        return page_result
+
+    def _save_policies_one_by_one(
+        self,
+        db: Session,
+        policies_data: List[Dict[str, Any]],
+        task_id: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """逐条保存政策（批量写入不可用时的回退路径）"""
+        result = {"total": len(policies_data), "saved": 0, "skipped": 0, "failed": 0}
+
         for policy_data in policies_data:
             try:
-                policy = self.save_policy(db, policy_data, task_id)
-                if policy:
-                    # 检查是否是新创建的
-                    if (
-                        policy.crawl_time
-                        and (
-                            datetime.now(timezone.utc) - policy.crawl_time
-                        ).total_seconds()
-                        < 5
-                    ):
-                        result["saved"] += 1
-                    else:
-                        result["skipped"] += 1
-                else:
+                policy, created = self.save_policy_with_status(db, policy_data, task_id)
+                if policy is None:
                     result["failed"] += 1
+                elif created:
+                    result["saved"] += 1
+                else:
+                    result["skipped"] += 1
             except Exception as e:
                 logger.error(f"批量保存政策失败: {e}")
                 result["failed"] += 1
@@ -277,15 +441,23 @@ class PolicyService:
         publisher: Optional[str] = None,
         source_name: Optional[str] = None,
         task_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        columns: Optional[Iterable[str]] = None,
     ) -> tuple[List[PolicyModel], int]:
         """获取政策列表（带筛选）
 
         Args:
             source_name: 数据源名称筛选（如"政府信息公开平台"、"政策法规库"）
             task_id: 任务ID筛选，只返回该任务爬取的政策
+            cursor: 上一页返回的分页游标（优先于skip，按 (pub_date, id) 键集分页）
+            columns: 只加载这些列（列表视图不需要正文等大字段）
 
         Returns:
-            (政策列表, 总数)
+            (政策列表, 总数)，政策列表为 Page，next_cursor 为下一页游标，
+            total_is_estimate 表示总数是否为估算值
+
+        Raises:
+            ValueError: 游标格式无效
         """
         # 如果指定了task_id，直接通过policy.task_id筛选（更高效）
         if task_id:
@@ -307,23 +479,42 @@ class PolicyService:
         if end_date:
             query = query.filter(PolicyModel.pub_date <= end_date)
         if keyword:
-            # 使用全文搜索服务进行关键词搜索（如果有复杂搜索需求）
-            # 对于简单查询，使用LIKE搜索；对于复杂查询，可以调用SearchService
-            keyword_pattern = f"%{keyword}%"
-            query = query.filter(
-                (PolicyModel.title.ilike(keyword_pattern))
-                | (PolicyModel.content.ilike(keyword_pattern))
-                | (PolicyModel.keywords.ilike(keyword_pattern))
-            )
+            # 与搜索接口使用相同的关键词条件（pg_trgm GIN 索引加速）
+            keyword_filter = SearchService.keyword_filter(keyword)
+            if keyword_filter is not None:
+                query = query.filter(keyword_filter)
 
         # 由于policy.task_id直接关联任务，不需要去重
 
-        # 获取总数
-        total = query.count()
+        # 按 (pub_date, id) 倒序分页，有游标时走复合索引定位，不做OFFSET扫描
+        page_query = query
+        if columns:
+            page_query = query.options(load_only_columns(PolicyModel, columns))
+        policies = keyset_paginate(
+            page_query,
+            PolicyModel.pub_date,
+            PolicyModel.id,
+            limit,
+            skip=skip,
+            cursor=cursor,
+        )
 
-        # 分页和排序
-        policies = (
-            query.order_by(PolicyModel.pub_date.desc()).offset(skip).limit(limit).all()
+        # 获取总数（缓存的精确值或规划器估算值，关键词匹配的选择率无法可靠估算）
+        total, policies.total_is_estimate = get_count_service().count(
+            db,
+            query,
+            "policies",
+            {
+                "task_id": task_id,
+                "category": category,
+                "level": level,
+                "publisher": publisher,
+                "source_name": source_name,
+                "start_date": start_date,
+                "end_date": end_date,
+                "keyword": keyword,
+            },
+            allow_estimate=not keyword,
         )
 
         return policies, total
@@ -335,15 +526,28 @@ class PolicyService:
             if not policy:
                 return False
 
-            # 删除关联的附件记录
+            # 删除关联的附件记录，并释放其引用的内容块
+            blob_hashes = [
+                row[0]
+                for row in db.query(Attachment.blob_sha256)
+                .filter(Attachment.policy_id == policy_id)
+                .all()
+            ]
             db.query(Attachment).filter(Attachment.policy_id == policy_id).delete()
+            self.blob_store.release(db, blob_hashes)
 
             # 删除文件（如果需要）
             # TODO: 调用storage_service删除文件
 
             # 删除政策记录
+            self.facet_service.record_removed(db, [policy])
             db.delete(policy)
             db.commit()
+            self.search_service.remove_policies([policy_id])
+            get_count_service().invalidate("policies")
+
+            # 回收不再被引用的内容块
+            self.blob_store.collect_garbage(db, [h for h in blob_hashes if h])
 
             logger.info(f"政策已删除: {policy_id}")
             return True
@@ -356,7 +560,7 @@ class PolicyService:
     def get_categories(
         self, db: Session, source_name: Optional[str] = None
     ) -> List[str]:
-        """获取分类列表
+        """获取分类列表（读取筛选项汇总表，按政策数倒序）
 
         Args:
             db: 数据库会话
@@ -365,38 +569,18 @@ class PolicyService:
         Returns:
             分类列表
         """
-        query = (
-            db.query(PolicyModel.category)
-            .distinct()
-            .filter(PolicyModel.category.isnot(None), PolicyModel.category != "")
-        )
-
-        # 如果指定了数据源，只返回该数据源的分类
-        if source_name:
-            query = query.filter(PolicyModel.source_name == source_name)
-
-        categories = query.all()
-        return [cat[0] for cat in categories if cat[0]]
+        facets = self.facet_service.get_facets(db, source_name=source_name)
+        return [item["value"] for item in facets["categories"]]
 
     def get_levels(self, db: Session) -> List[str]:
         """获取所有效力级别列表"""
-        levels = (
-            db.query(PolicyModel.level)
-            .distinct()
-            .filter(PolicyModel.level.isnot(None), PolicyModel.level != "")
-            .all()
-        )
-        return [level[0] for level in levels]
+        facets = self.facet_service.get_facets(db)
+        return [item["value"] for item in facets["levels"]]
 
     def get_source_names(self, db: Session) -> List[str]:
         """获取所有数据源名称列表"""
-        source_names = (
-            db.query(PolicyModel.source_name)
-            .distinct()
-            .filter(PolicyModel.source_name.isnot(None), PolicyModel.source_name != "")
-            .all()
-        )
-        return [name[0] for name in source_names]
+        facets = self.facet_service.get_facets(db)
+        return [item["value"] for item in facets["source_names"]]
 
     def merge_attachments_to_content(
         self,
@@ -460,6 +644,7 @@ class PolicyService:
 
                 db.commit()
                 db.refresh(policy)
+                self.search_service.index_policies([policy])
 
                 logger.info(
                     f"成功将 {len(attachment_ids)} 个附件内容合并到政策 {policy_id} 的正文"
@@ -539,9 +724,22 @@ class PolicyService:
                         .first()
                     )
 
+                    # 存入内容块存储（相同内容跨任务只保存/上传一次），
+                    # 爬虫下载目录中的文件随之移入内容块存储，不再为每个任务保留一份
+                    blob = self.blob_store.put_file(
+                        db, att_data.get("storage_path"), move=True
+                    )
+
                     if existing:
                         # 更新存储路径
-                        if att_data.get("storage_path"):
+                        if blob:
+                            if existing.blob_sha256 != blob.sha256:
+                                self.blob_store.release(db, [existing.blob_sha256])
+                                self._apply_blob(existing, blob)
+                            else:
+                                # 已引用同一内容块，撤销本次多登记的引用
+                                self.blob_store.release(db, [blob.sha256])
+                        elif att_data.get("storage_path"):
                             existing.file_path = att_data.get("storage_path")
                         saved_attachment_ids.append(existing.id)
                         continue
@@ -555,6 +753,8 @@ class PolicyService:
                         file_size=att_data.get("file_size", 0),
                         file_type=att_data.get("file_type", ""),
                     )
+                    if blob:
+                        self._apply_blob(attachment, blob)
                     db.add(attachment)
                     db.flush()
                     saved_attachment_ids.append(attachment.id)
@@ -616,6 +816,15 @@ class PolicyService:
 
         return result
 
+    @staticmethod
+    def _apply_blob(attachment: Attachment, blob) -> None:
+        """让附件记录指向内容块"""
+        attachment.blob_sha256 = blob.sha256
+        attachment.file_size = blob.file_size
+        attachment.file_s3_key = blob.s3_key
+        if blob.local_path:
+            attachment.file_path = blob.local_path
+
     def _regenerate_policy_files(
         self, policy: PolicyModel, task_id: Optional[int] = None
     ):
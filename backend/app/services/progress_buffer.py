@@ -0,0 +1,163 @@
+"""
+任务进度缓冲 - 进度消息的内存环形缓冲和节流写库
+
+爬取过程中每条政策会产生多条进度消息。消息先追加到内存中的环形缓冲
+（只保留最近 MAX_LINES 行），每隔 flush_interval 秒或积累 flush_lines 行
+才把缓冲内容写入 Task.progress_message 一次，任务结束时再写入一次。
+进度统计（总数、完成数、失败数等）作为计数器单独保存，不从消息文本或
+数据库中统计。
+
+每行消息有递增的序号（Task.progress_seq 是最后一行的序号，任务恢复执行后
+继续编号），计数器记录最后变化时的序号。客户端带上已收到的序号，
+progress_delta 只返回之后的新行和变化过的计数器。
+"""
+
+import time
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+
+class ProgressBuffer:
+    """单个任务的进度消息缓冲"""
+
+    MAX_LINES = 100
+    MAX_LINE_LENGTH = 500
+    MAX_TOTAL_LENGTH = 10000
+
+    def __init__(
+        self,
+        initial_message: Optional[str] = None,
+        flush_interval: float = 2.0,
+        flush_lines: int = 20,
+        initial_seq: int = 0,
+        initial_counters: Optional[Dict[str, Dict[str, int]]] = None,
+    ):
+        """初始化进度缓冲
+
+        Args:
+            initial_message: 任务已有的进度消息（恢复执行的任务保留之前的记录）
+            flush_interval: 两次写库的最短间隔（秒）
+            flush_lines: 积累该行数后不等间隔直接写库
+            initial_seq: 已有进度消息最后一行的序号
+            initial_counters: 已有的计数器状态（counter_state 的格式）
+        """
+        self._lock = threading.Lock()
+        self._lines = deque(
+            initial_message.split("\n") if initial_message else [],
+            maxlen=self.MAX_LINES,
+        )
+        self.flush_interval = flush_interval
+        self.flush_lines = max(1, flush_lines)
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        # 没有序号的旧进度消息按行数编号
+        self.seq = max(initial_seq or 0, len(self._lines))
+        self.counters: Dict[str, int] = {}
+        self._counter_seq: Dict[str, int] = {}
+        for name, state in (initial_counters or {}).items():
+            self.counters[name] = state["value"]
+            self._counter_seq[name] = state["seq"]
+
+    def append(self, message: str) -> Tuple[int, str]:
+        """追加一条进度消息
+
+        Returns:
+            (消息序号, 加上时间戳并截断后的消息行)
+        """
+        if len(message) > self.MAX_LINE_LENGTH:
+            message = message[: self.MAX_LINE_LENGTH] + "..."
+        line = f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] {message}"
+        with self._lock:
+            self._lines.append(line)
+            self._unflushed += 1
+            self.seq += 1
+            seq = self.seq
+        return seq, line
+
+    def set_counters(self, **counters: int):
+        """更新进度计数器"""
+        with self._lock:
+            for name, value in counters.items():
+                if self.counters.get(name) != value:
+                    self.counters[name] = value
+                    # 记为下一行的序号：已收到当前最后一行的客户端也能拿到变化
+                    self._counter_seq[name] = self.seq + 1
+
+    def counter_state(self) -> Dict[str, Dict[str, int]]:
+        """计数器的值和最后变化时的序号（写入 Task.progress_counters）"""
+        with self._lock:
+            return {
+                name: {"value": value, "seq": self._counter_seq[name]}
+                for name, value in self.counters.items()
+            }
+
+    def render(self) -> str:
+        """缓冲中的进度消息（最近 MAX_LINES 行，不超过 MAX_TOTAL_LENGTH 个字符）"""
+        with self._lock:
+            text = "\n".join(self._lines)
+        return text[-self.MAX_TOTAL_LENGTH :]
+
+    def should_flush(self) -> bool:
+        """是否到了写库的时候（有未写入的消息，且达到行数或时间间隔）"""
+        with self._lock:
+            if not self._unflushed:
+                return False
+            return (
+                self._unflushed >= self.flush_lines
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+    def mark_flushed(self):
+        with self._lock:
+            self._unflushed = 0
+            self._last_flush = time.monotonic()
+
+    @property
+    def unflushed(self) -> int:
+        return self._unflushed
+
+
+def progress_delta(
+    progress_message: Optional[str],
+    seq: Optional[int],
+    counter_state: Optional[Dict[str, Dict[str, int]]],
+    since: Optional[int] = None,
+) -> Dict[str, Any]:
+    """计算序号 since 之后的进度增量
+
+    Args:
+        progress_message: 任务的进度消息（最近的若干行）
+        seq: 最后一行的序号
+        counter_state: 计数器状态（counter_state 的格式）
+        since: 客户端已收到的最后序号，为空时返回全部
+
+    Returns:
+        seq: 最新序号
+        reset: 是否返回了全部进度（客户端应丢弃本地的进度消息）。
+            未提供 since、since 超过最新序号（如任务重建），或 since 之后的
+            部分行已经移出缓冲时为真
+        lines: 新的进度行（[{"seq": 序号, "text": 内容}]）
+        counters: 变化过的计数器（reset 时为全部计数器）
+    """
+    lines = progress_message.split("\n") if progress_message else []
+    seq = max(seq or 0, len(lines))
+    first_seq = seq - len(lines) + 1
+    reset = since is None or since > seq or since < first_seq - 1
+    start = 0 if reset else since - first_seq + 1
+
+    counters: Dict[str, int] = {}
+    for name, state in (counter_state or {}).items():
+        if reset or state["seq"] > since:
+            counters[name] = state["value"]
+
+    return {
+        "seq": seq,
+        "reset": reset,
+        "lines": [
+            {"seq": first_seq + index, "text": text}
+            for index, text in enumerate(lines[start:], start)
+        ],
+        "counters": counters,
+    }
@@ -0,0 +1,187 @@
+"""
+任务进度推送总线 - 从爬虫线程把进度推送给SSE连接
+
+爬虫在后台线程中执行，SSE连接的队列属于服务器的事件循环。发布进度时
+只在锁内记下消息，通过 loop.call_soon_threadsafe 交给事件循环，在事件
+循环中按 FLUSH_INTERVAL 合并：一个间隔内的多条消息只生成、序列化一次
+快照，同一帧发送给该任务的所有订阅者。没有订阅者时发布直接返回。
+
+帧只携带新的进度行和它们的序号（SSE的 id 为最后一行的序号），不再发送
+完整的进度消息。每个订阅者的队列有长度上限，客户端读取过慢时丢弃最旧的帧；
+客户端发现序号不连续时，用 Last-Event-ID 重连或通过增量进度接口补齐。
+"""
+
+import json
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Snapshot = Callable[[], Dict[str, Any]]
+
+
+class _Pending:
+    """一个推送间隔内待合并的进度"""
+
+    __slots__ = ("messages", "snapshot")
+
+    def __init__(self, max_messages: int):
+        self.messages: Deque[Tuple[Optional[int], str]] = deque(maxlen=max_messages)
+        self.snapshot: Optional[Snapshot] = None
+
+
+class ProgressBus:
+    """任务进度推送总线"""
+
+    # 合并推送的间隔（秒）
+    FLUSH_INTERVAL = 0.5
+    # 每个订阅者最多缓存的帧数
+    QUEUE_SIZE = 16
+    # 每帧最多携带的新消息行数
+    MAX_MESSAGES = 100
+
+    def __init__(self):
+        """初始化推送总线"""
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[int, List[asyncio.Queue]] = {}
+        self._pending: Dict[int, _Pending] = {}
+        self.dropped_frames = 0
+
+    # ------------------------------------------------------------------
+    # 订阅（在事件循环中调用）
+    # ------------------------------------------------------------------
+
+    def subscribe(self, task_id: int) -> asyncio.Queue:
+        """订阅任务进度，返回接收SSE帧的队列"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.setdefault(task_id, []).append(queue)
+        return queue
+
+    def unsubscribe(self, task_id: int, queue: asyncio.Queue):
+        """取消订阅"""
+        with self._lock:
+            queues = self._subscribers.get(task_id)
+            if not queues:
+                return
+            try:
+                queues.remove(queue)
+            except ValueError:
+                pass
+            if not queues:
+                del self._subscribers[task_id]
+                self._pending.pop(task_id, None)
+
+    def has_subscribers(self, task_id: int) -> bool:
+        with self._lock:
+            return bool(self._subscribers.get(task_id))
+
+    # ------------------------------------------------------------------
+    # 发布（任意线程）
+    # ------------------------------------------------------------------
+
+    def publish(
+        self,
+        task_id: int,
+        message: str,
+        snapshot: Snapshot,
+        seq: Optional[int] = None,
+    ):
+        """发布一条进度消息
+
+        Args:
+            task_id: 任务ID
+            message: 进度消息
+            snapshot: 生成进度快照的函数（在事件循环中、每个推送间隔最多调用一次）
+            seq: 进度消息的序号
+        """
+        with self._lock:
+            loop = self._loop
+            if loop is None or not self._subscribers.get(task_id):
+                return
+            pending = self._pending.get(task_id)
+            schedule = pending is None
+            if schedule:
+                pending = self._pending[task_id] = _Pending(self.MAX_MESSAGES)
+            pending.messages.append((seq, message))
+            pending.snapshot = snapshot
+
+        if schedule:
+            try:
+                loop.call_soon_threadsafe(
+                    loop.call_later, self.FLUSH_INTERVAL, self._flush, task_id
+                )
+            except RuntimeError:
+                # 事件循环已关闭
+                with self._lock:
+                    self._pending.pop(task_id, None)
+
+    def publish_event(self, task_id: int, data: Dict[str, Any]):
+        """立即推送一个事件（不合并，用于任务状态变化等低频事件）"""
+        with self._lock:
+            loop = self._loop
+            if loop is None or not self._subscribers.get(task_id):
+                return
+        frame = sse_frame(data)
+        try:
+            loop.call_soon_threadsafe(self._deliver, task_id, frame)
+        except RuntimeError:
+            pass
+
+    # ------------------------------------------------------------------
+    # 事件循环中执行
+    # ------------------------------------------------------------------
+
+    def _flush(self, task_id: int):
+        with self._lock:
+            pending = self._pending.pop(task_id, None)
+        if pending is None or pending.snapshot is None:
+            return
+        try:
+            data = pending.snapshot()
+        except Exception as e:
+            logger.warning(f"生成任务 {task_id} 的进度快照失败: {e}")
+            return
+        messages = list(pending.messages)
+        data["message"] = messages[-1][1] if messages else ""
+        data["lines"] = [{"seq": seq, "text": text} for seq, text in messages]
+        if messages and messages[-1][0] is not None:
+            data["seq"] = messages[-1][0]
+        self._deliver(task_id, sse_frame(data))
+
+    def _deliver(self, task_id: int, frame: str):
+        with self._lock:
+            queues = list(self._subscribers.get(task_id, ()))
+        for queue in queues:
+            if queue.full():
+                # 客户端读取过慢，丢弃最旧的帧
+                try:
+                    queue.get_nowait()
+                    self.dropped_frames += 1
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(frame)
+
+
+def sse_frame(data: Dict[str, Any]) -> str:
+    """SSE帧，带序号的事件以序号作为事件ID（客户端重连时通过 Last-Event-ID 带回）"""
+    if data.get("seq") is not None:
+        return f"id: {data['seq']}\ndata: {json.dumps(data)}\n\n"
+    return f"data: {json.dumps(data)}\n\n"
+
+
+# 全局进度推送总线（进程内共享）
+_progress_bus: Optional[ProgressBus] = None
+
+
+def get_progress_bus() -> ProgressBus:
+    """获取进度推送总线实例"""
+    global _progress_bus
+    if _progress_bus is None:
+        _progress_bus = ProgressBus()
+    return _progress_bus
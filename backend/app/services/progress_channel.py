@@ -0,0 +1,208 @@
+"""
+跨进程任务进度通知 - PostgreSQL LISTEN/NOTIFY
+
+执行任务的进程每次把进度写入数据库时，在同一事务中 NOTIFY 一条精简的
+通知（task_id、消息序号、计数器），事务提交后送达。每个API进程用一个
+独立的数据库连接 LISTEN，收到通知且本进程有该任务的SSE订阅者时，从数据库
+读取任务上次推送之后的新进度行推送给订阅者。这样任意worker进程都能为任意任务提供
+进度推送，不需要额外部署Redis。
+
+本进程发出的通知会被跳过（本进程的订阅者已经由进度推送总线直接推送）。
+非PostgreSQL数据库（测试使用的SQLite）不启用。
+"""
+
+import os
+import json
+import select
+import socket
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..models.task import Task
+from .progress_buffer import progress_delta
+from .progress_bus import get_progress_bus
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressChannel:
+    """任务进度通知通道"""
+
+    CHANNEL = "task_progress"
+    # 等待通知的超时（秒），超时后检查是否需要退出
+    POLL_TIMEOUT = 5.0
+    # 监听连接断开后重连的间隔（秒）
+    RECONNECT_DELAY = 5.0
+
+    def __init__(self):
+        """初始化进度通知通道"""
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 每个任务已推送的最后序号（只在监听线程中访问）
+        self._last_seq: Dict[int, int] = {}
+
+    # ------------------------------------------------------------------
+    # 发送（执行任务的进程）
+    # ------------------------------------------------------------------
+
+    def notify(self, db: Session, task_id: int, seq: int, counters: Dict[str, int]):
+        """发送进度通知（不提交，随调用方事务提交后送达）"""
+        if db.get_bind().dialect.name != "postgresql":
+            return
+        payload = json.dumps(
+            {
+                "task_id": task_id,
+                "seq": seq,
+                "counters": counters,
+                "origin": self.origin,
+            },
+            separators=(",", ":"),
+        )
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": self.CHANNEL, "payload": payload},
+        )
+
+    # ------------------------------------------------------------------
+    # 监听（提供SSE的进程）
+    # ------------------------------------------------------------------
+
+    def start(self) -> bool:
+        """启动监听线程（仅PostgreSQL）
+
+        Returns:
+            是否启动了监听
+        """
+        from ..database import engine
+
+        if engine.dialect.name != "postgresql":
+            return False
+        if self._thread is not None and self._thread.is_alive():
+            return True
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._listen_loop, name="progress-listener", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """停止监听线程"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.POLL_TIMEOUT + 1)
+            self._thread = None
+
+    def _listen_loop(self):
+        from ..database import engine
+
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                # 独立连接（不占用连接池），自动提交模式下 LISTEN 立即生效
+                cargs, cparams = engine.dialect.create_connect_args(engine.url)
+                connection = engine.dialect.dbapi.connect(*cargs, **cparams)
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.CHANNEL}")
+                logger.info(f"进度通知监听已启动: {self.origin}")
+
+                while not self._stopping.is_set():
+                    readable, _, _ = select.select(
+                        [connection], [], [], self.POLL_TIMEOUT
+                    )
+                    if not readable:
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notification = connection.notifies.pop(0)
+                        self.dispatch(notification.payload)
+            except Exception as e:
+                logger.warning(f"进度通知监听中断，{self.RECONNECT_DELAY}秒后重连: {e}")
+                self._stopping.wait(self.RECONNECT_DELAY)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def dispatch(self, payload: str):
+        """处理一条进度通知：本进程有订阅者时读取最新进度并推送"""
+        try:
+            data = json.loads(payload)
+            task_id = int(data["task_id"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.debug(f"忽略无效的进度通知: {e}")
+            return
+
+        if data.get("origin") == self.origin:
+            return
+        bus = get_progress_bus()
+        if not bus.has_subscribers(task_id):
+            self._last_seq.pop(task_id, None)
+            return
+
+        event = self._load_event(task_id)
+        if event is not None:
+            bus.publish_event(task_id, event)
+
+    def _load_event(self, task_id: int) -> Optional[Dict[str, Any]]:
+        """从数据库读取任务上次推送之后的进度，生成SSE事件"""
+        from ..database import worker_session
+
+        db = worker_session("progress_listener")
+        try:
+            row = (
+                db.query(
+                    Task.status,
+                    Task.progress_message,
+                    Task.progress_seq,
+                    Task.progress_counters,
+                )
+                .filter(Task.id == task_id)
+                .first()
+            )
+        except Exception as e:
+            logger.warning(f"读取任务 {task_id} 的进度失败: {e}")
+            return None
+        finally:
+            db.close()
+        if row is None:
+            return None
+
+        # 首次推送（since 为空）返回全部进度，之后只推送新行和变化的计数器
+        delta = progress_delta(
+            row.progress_message,
+            row.progress_seq,
+            row.progress_counters,
+            since=self._last_seq.get(task_id),
+        )
+        self._last_seq[task_id] = delta["seq"]
+        lines = delta["lines"]
+        return {
+            "type": "progress_update",
+            "task_id": task_id,
+            "status": row.status,
+            "message": lines[-1]["text"] if lines else "",
+            **delta,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+
+# 全局进度通知通道实例
+_progress_channel: Optional[ProgressChannel] = None
+
+
+def get_progress_channel() -> ProgressChannel:
+    """获取进度通知通道实例"""
+    global _progress_channel
+    if _progress_channel is None:
+        _progress_channel = ProgressChannel()
+    return _progress_channel
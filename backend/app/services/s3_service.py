@@ -4,7 +4,7 @@ S3对象存储服务
 
 import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
-from typing import Optional, List, BinaryIO
+from typing import Optional, List, BinaryIO, Iterable, Iterator, Tuple
 import logging
 from ..config import settings
 
@@ -14,6 +14,9 @@ logger = logging.getLogger(__name__)
 class S3Service:
     """S3对象存储服务"""
 
+    # DeleteObjects 单次请求的对象数上限
+    DELETE_BATCH_SIZE = 1000
+
     def __init__(self):
         """初始化S3客户端"""
         if not settings.s3_enabled:
@@ -160,6 +163,58 @@ class S3Service:
             logger.error(f"删除文件时发生错误: {e}")
             return False
 
+    def delete_files(self, s3_keys: Iterable[str]) -> Tuple[int, int]:
+        """批量删除S3文件（每次请求最多 DELETE_BATCH_SIZE 个对象）
+
+        Returns:
+            (删除成功数, 删除失败数)
+        """
+        if not self.is_enabled():
+            logger.warning("S3服务未启用")
+            return 0, 0
+
+        deleted = failed = 0
+        batch: List[str] = []
+        for s3_key in s3_keys:
+            batch.append(s3_key)
+            if len(batch) >= self.DELETE_BATCH_SIZE:
+                ok, bad = self._delete_batch(batch)
+                deleted, failed = deleted + ok, failed + bad
+                batch = []
+        if batch:
+            ok, bad = self._delete_batch(batch)
+            deleted, failed = deleted + ok, failed + bad
+        return deleted, failed
+
+    def _delete_batch(self, s3_keys: List[str]) -> Tuple[int, int]:
+        """用一次 DeleteObjects 请求删除一批对象"""
+        try:
+            response = self.client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in s3_keys], "Quiet": True},
+            )
+        except Exception as e:
+            logger.error(f"S3批量删除失败: {e}")
+            return 0, len(s3_keys)
+
+        errors = response.get("Errors", [])
+        for error in errors[:5]:
+            logger.warning(
+                f"S3删除失败: {error.get('Key')} - {error.get('Code')} {error.get('Message')}"
+            )
+        return len(s3_keys) - len(errors), len(errors)
+
+    def iter_files(self, prefix: str) -> Iterator[str]:
+        """逐页列出前缀下的全部S3文件（不受单次列表1000个的限制）"""
+        if not self.is_enabled():
+            logger.warning("S3服务未启用")
+            return
+
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield obj["Key"]
+
     def list_files(self, prefix: str) -> List[str]:
         """列出S3文件"""
         if not self.is_enabled():
@@ -3,31 +3,78 @@
 """
 
 import logging
+import threading
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.executors.pool import ThreadPoolExecutor
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from ..models.scheduled_task import ScheduledTask, ScheduledTaskRun
-from ..database import SessionLocal
+from ..database import worker_session
 from ..config import settings
-from .task_service import TaskService
+from .task_service import TaskService, add_task_finish_listener
+from .leader_election import LeaderElection
 
 logger = logging.getLogger(__name__)
 
+# 爬虫任务的结束状态
+FINISHED_TASK_STATUSES = ("completed", "failed", "cancelled")
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """数据库中读出的时间统一为UTC时区（SQLite不保存时区）"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _cron_trigger(cron_expression: str) -> CronTrigger:
+    """由5段cron表达式（分 时 日 月 周）创建触发器"""
+    parts = cron_expression.strip().split()
+    return CronTrigger(
+        minute=parts[0],
+        hour=parts[1],
+        day=parts[2],
+        month=parts[3],
+        day_of_week=parts[4],
+    )
+
+
+def execute_scheduled_task(scheduled_task_id: int):
+    """执行定时任务（持久化作业的执行函数，作业中保存的是模块路径引用）"""
+    get_scheduler_service()._execute_scheduled_task(scheduled_task_id)
+
 
 class SchedulerService:
     """定时任务调度服务"""
 
+    # 调度器选主的advisory锁键
+    LEADER_LOCK_KEY = 123458
+    # 持久化作业存储（定时任务作业）和进程内作业存储（调度器自身的周期作业）
+    JOBSTORE_TABLE = "scheduler_jobs"
+    SYSTEM_JOBSTORE = "system"
+
     def __init__(self):
         """初始化调度器"""
         self.scheduler: Optional[BackgroundScheduler] = None
         self.task_service = TaskService()
         self._job_mapping: Dict[str, int] = {}  # job_id -> scheduled_task_id
         self._is_enabled: bool = False  # 动态启用状态
+        # 多个进程启用调度时只有leader进程运行调度器，其他进程待命
+        self._election = LeaderElection(
+            "scheduler",
+            self.LEADER_LOCK_KEY,
+            on_elected=self._start_scheduler,
+            on_demoted=self._stop_scheduler,
+            interval=settings.scheduler_leader_check_seconds,
+        )
+        # 爬虫任务结束时完成对应的执行记录
+        add_task_finish_listener(self._on_task_finished)
 
         # 初始状态：如果环境变量设置为true，则启动调度器
         if settings.scheduler_enabled:
@@ -37,7 +84,14 @@ class SchedulerService:
 
     def _init_scheduler(self):
         """初始化APScheduler"""
-        jobstores = {"default": MemoryJobStore()}
+        from ..database import engine
+
+        jobstores = {
+            # 定时任务作业保存在数据库中：leader切换后新leader沿用作业的下次
+            # 运行时间，切换期间错过的运行在 misfire_grace_time 内补执行
+            "default": SQLAlchemyJobStore(engine=engine, tablename=self.JOBSTORE_TABLE),
+            self.SYSTEM_JOBSTORE: MemoryJobStore(),
+        }
         executors = {"default": ThreadPoolExecutor(max_workers=5)}
         job_defaults = {
             "coalesce": True,  # 合并多次调度
@@ -53,21 +107,13 @@ class SchedulerService:
         )
 
     def enable_scheduler(self):
-        """启用调度器（动态）"""
+        """启用调度器（动态），参与选主，当选后启动调度"""
         if self._is_enabled:
             logger.info("定时任务调度器已启用")
             return
 
-        if self.scheduler is None:
-            self._init_scheduler()
-
-        if not self.scheduler.running:
-            self.scheduler.start()
-            logger.info("定时任务调度器已启动")
-            # 加载所有已启用的定时任务
-            self.load_enabled_tasks()
-
         self._is_enabled = True
+        self._election.start()
         logger.info("定时任务调度服务已动态启用")
 
     def disable_scheduler(self):
@@ -76,13 +122,8 @@ class SchedulerService:
             logger.info("定时任务调度器已禁用")
             return
 
-        if self.scheduler and self.scheduler.running:
-            # 停止所有正在运行的任务
-            self.scheduler.remove_all_jobs()
-            self.scheduler.shutdown(wait=True)
-            logger.info("定时任务调度器已停止")
-
-        self._job_mapping.clear()
+        # 是leader时停止调度器并释放leader锁，由其他启用调度的进程接替
+        self._election.stop()
         self._is_enabled = False
         logger.info("定时任务调度服务已动态禁用")
 
@@ -90,37 +131,102 @@ class SchedulerService:
         """检查调度器是否启用"""
         return self._is_enabled
 
+    def is_leader(self) -> bool:
+        """当前进程是否为调度leader（运行调度器的进程）"""
+        return self._election.is_leader
+
     def start(self):
         """启动调度器（兼容旧接口）"""
         if self._is_enabled:
-            if self.scheduler and not self.scheduler.running:
-                self.scheduler.start()
-                logger.info("定时任务调度器已启动")
-                self.load_enabled_tasks()
-            else:
-                logger.warning("定时任务调度器已在运行")
+            self._election.start()
         else:
             logger.warning("定时任务调度器未启用，请先调用 enable_scheduler()")
 
     def shutdown(self):
         """关闭调度器"""
+        self._election.stop()
+
+    def _start_scheduler(self):
+        """成为leader：启动调度器，从数据库同步定时任务作业"""
+        if self.scheduler is None:
+            self._init_scheduler()
+        if not self.scheduler.running:
+            self.scheduler.start()
+            logger.info("定时任务调度器已启动")
+        self.sync_jobs()
+        self._add_system_jobs()
+
+    def _stop_scheduler(self):
+        """失去leader身份：停止调度器（作业保留在数据库中，由新leader继续调度）"""
         if self.scheduler and self.scheduler.running:
-            self.scheduler.shutdown(wait=True)
-            logger.info("定时任务调度器已关闭")
+            # 在选主线程中执行，不等待执行中的作业结束（作业在执行器线程中继续完成），
+            # 否则长时间运行的作业会阻塞选主线程的续约检查和退出
+            self.scheduler.shutdown(wait=False)
+            logger.info("定时任务调度器已停止")
+        self.scheduler = None
+        self._job_mapping.clear()
 
-    def load_enabled_tasks(self):
-        """从数据库加载所有已启用的定时任务"""
+    def _add_system_jobs(self):
+        """添加调度器自身的周期作业"""
+        from .file_cleanup_service import get_cleanup_service
+
+        self.scheduler.add_job(
+            self.sync_jobs,
+            "interval",
+            seconds=settings.scheduler_sync_seconds,
+            id="sync_scheduled_tasks",
+            jobstore=self.SYSTEM_JOBSTORE,
+            replace_existing=True,
+        )
+        self.scheduler.add_job(
+            self._sweep_crawl_runs,
+            "interval",
+            seconds=settings.scheduler_run_sweep_seconds,
+            id="sweep_crawl_runs",
+            jobstore=self.SYSTEM_JOBSTORE,
+            replace_existing=True,
+        )
+        self.scheduler.add_job(
+            get_cleanup_service().run_daily_cleanup,
+            trigger="cron",
+            hour=2,
+            minute=0,
+            id="file_cleanup",
+            name="清理过期临时文件",
+            jobstore=self.SYSTEM_JOBSTORE,
+            replace_existing=True,
+        )
+        logger.info("文件清理任务已注册（每天凌晨2点执行）")
+
+    def sync_jobs(self):
+        """按数据库中已启用的定时任务同步作业
+
+        其他进程（非leader）创建、修改、启用或禁用定时任务时只更新数据库，
+        由leader定期同步。Cron表达式未变的作业保留原有的下次运行时间。
+        """
         if not self.scheduler or not self.scheduler.running:
-            logger.warning("调度器未运行，无法加载任务")
             return
 
-        db = SessionLocal()
+        db = worker_session("scheduler_sync")
         try:
             enabled_tasks = (
                 db.query(ScheduledTask).filter(ScheduledTask.is_enabled == True).all()
             )
-
-            for task in enabled_tasks:
+            expected = {f"scheduled_task_{task.id}": task for task in enabled_tasks}
+
+            for job in self.scheduler.get_jobs(jobstore="default"):
+                if job.id not in expected:
+                    self.scheduler.remove_job(job.id, jobstore="default")
+                    self._job_mapping.pop(job.id, None)
+                    logger.info(f"已移除定时任务作业: {job.id}")
+
+            for job_id, task in expected.items():
+                job = self.scheduler.get_job(job_id, jobstore="default")
+                if job is not None and str(job.trigger) == str(
+                    _cron_trigger(task.cron_expression)
+                ):
+                    self._job_mapping[job_id] = task.id
+                    continue
                 try:
                     self._add_job(task, db=db)
                     logger.info(f"已加载定时任务: {task.task_name} (ID: {task.id})")
@@ -129,10 +235,14 @@ class SchedulerService:
                         f"加载定时任务失败: {task.task_name} - {e}", exc_info=True
                     )
         except Exception as e:
-            logger.error(f"加载定时任务列表失败: {e}", exc_info=True)
+            logger.error(f"同步定时任务作业失败: {e}", exc_info=True)
         finally:
             db.close()
 
+    def load_enabled_tasks(self):
+        """从数据库加载所有已启用的定时任务（兼容旧接口）"""
+        self.sync_jobs()
+
     def create_scheduled_task(
         self,
         db: Session,
@@ -214,27 +324,11 @@ class SchedulerService:
             raise RuntimeError("调度器未运行")
 
         job_id = f"scheduled_task_{scheduled_task.id}"
+        trigger = _cron_trigger(scheduled_task.cron_expression)
 
-        # 如果任务已存在，先移除
-        if job_id in self._job_mapping.values():
-            try:
-                self.scheduler.remove_job(job_id)
-            except:
-                pass
-
-        # 创建触发器
-        parts = scheduled_task.cron_expression.strip().split()
-        trigger = CronTrigger(
-            minute=parts[0],
-            hour=parts[1],
-            day=parts[2],
-            month=parts[3],
-            day_of_week=parts[4],
-        )
-
-        # 添加任务
+        # 添加任务（已存在时替换；作业保存在数据库中，执行函数按模块路径引用）
         self.scheduler.add_job(
-            func=self._execute_scheduled_task,
+            func=execute_scheduled_task,
             trigger=trigger,
             id=job_id,
             args=(scheduled_task.id,),
@@ -251,7 +345,7 @@ class SchedulerService:
 
     def _execute_scheduled_task(self, scheduled_task_id: int):
         """执行定时任务（内部方法）"""
-        db = SessionLocal()
+        db = worker_session(f"scheduled_task:{scheduled_task_id}")
         try:
             scheduled_task = (
                 db.query(ScheduledTask)
@@ -284,145 +378,147 @@ class SchedulerService:
             try:
                 # 根据任务类型执行不同的逻辑
                 if scheduled_task.task_type == "crawl_task":
-                    result = self._execute_crawl_task(scheduled_task, db)
+                    # 爬虫任务在任务队列中执行，不在调度线程中等待；
+                    # 任务结束后由 _finish_crawl_run 完成执行记录
+                    self._execute_crawl_task(scheduled_task, run_record, db)
+                    scheduled_task.last_run_time = start_time
+                    scheduled_task.next_run_time = self._next_run_time(scheduled_task)
+                    db.commit()
+                    return
                 elif scheduled_task.task_type == "backup_task":
                     result = self._execute_backup_task(scheduled_task, db)
                 else:
                     raise ValueError(f"未知的任务类型: {scheduled_task.task_type}")
 
-                # 更新执行记录
-                end_time = datetime.now(timezone.utc)
-                duration = int((end_time - start_time).total_seconds())
-                run_record.status = "completed"
-                run_record.result_json = result
-                run_record.duration_seconds = duration
-
-                # 更新定时任务状态
-                scheduled_task.last_run_time = start_time
-                scheduled_task.last_run_status = "success"
-                scheduled_task.last_run_result = str(result)
+                self._complete_run(db, scheduled_task, run_record, result, start_time)
 
-                # 更新下次运行时间
-                parts = scheduled_task.cron_expression.strip().split()
-                trigger = CronTrigger(
-                    minute=parts[0],
-                    hour=parts[1],
-                    day=parts[2],
-                    month=parts[3],
-                    day_of_week=parts[4],
-                )
-                scheduled_task.next_run_time = trigger.get_next_fire_time(
-                    None, datetime.now(timezone.utc)
+            except Exception as e:
+                db.rollback()
+                logger.error(
+                    f"定时任务执行失败: {scheduled_task.task_name} - {e}",
+                    exc_info=True,
                 )
+                self._fail_run(db, scheduled_task, run_record, str(e), start_time)
 
-                db.commit()
-                logger.info(
-                    f"定时任务执行成功: {scheduled_task.task_name}, 耗时: {duration}秒"
-                )
+        except Exception as e:
+            logger.error(f"执行定时任务异常: {scheduled_task_id} - {e}", exc_info=True)
+        finally:
+            db.close()
 
-                # 检查是否需要备份（在任务完成后）
-                if scheduled_task.task_type == "crawl_task":
-                    self._check_scheduled_task_backup(
-                        scheduled_task, result, db, start_time, end_time
-                    )
+    def _next_run_time(self, scheduled_task: ScheduledTask) -> datetime:
+        """按cron表达式计算下次运行时间"""
+        trigger = _cron_trigger(scheduled_task.cron_expression)
+        return trigger.get_next_fire_time(None, datetime.now(timezone.utc))
 
-                # 发送邮件通知（如果启用且有收件人）
-                try:
-                    from .email_service import get_email_service
+    def _complete_run(
+        self,
+        db: Session,
+        scheduled_task: ScheduledTask,
+        run_record: ScheduledTaskRun,
+        result: Dict[str, Any],
+        start_time: datetime,
+        end_time: Optional[datetime] = None,
+    ):
+        """记录执行成功，然后检查备份、发送邮件通知"""
+        end_time = end_time or datetime.now(timezone.utc)
+        duration = int((end_time - start_time).total_seconds())
+        run_record.status = "completed"
+        run_record.result_json = result
+        run_record.duration_seconds = duration
+
+        # 更新定时任务状态
+        scheduled_task.last_run_time = start_time
+        scheduled_task.last_run_status = "success"
+        scheduled_task.last_run_result = str(result)
+        scheduled_task.next_run_time = self._next_run_time(scheduled_task)
 
-                    email_service = get_email_service()
-                    # 传入db以实时加载配置
-                    if email_service.is_enabled(db) and email_service.to_addresses:
-                        import asyncio
+        db.commit()
+        logger.info(f"定时任务执行成功: {scheduled_task.task_name}, 耗时: {duration}秒")
 
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        try:
-                            task_info = (
-                                result.get("task", {})
-                                if isinstance(result, dict)
-                                else {}
-                            )
-                            loop.run_until_complete(
-                                email_service.send_task_completion_notification(
-                                    task_name=scheduled_task.task_name,
-                                    task_status="completed",
-                                    policy_count=(
-                                        task_info.get("policy_count", 0)
-                                        if isinstance(task_info, dict)
-                                        else 0
-                                    ),
-                                    success_count=(
-                                        task_info.get("success_count", 0)
-                                        if isinstance(task_info, dict)
-                                        else 0
-                                    ),
-                                    failed_count=(
-                                        task_info.get("failed_count", 0)
-                                        if isinstance(task_info, dict)
-                                        else 0
-                                    ),
-                                    start_time=start_time,
-                                    end_time=end_time,
-                                    db=db,  # 传入db以实时加载配置
-                                )
-                            )
-                        finally:
-                            loop.close()
-                except Exception as email_error:
-                    logger.warning(f"发送定时任务完成通知邮件失败: {email_error}")
+        # 检查是否需要备份（在任务完成后）
+        if scheduled_task.task_type == "crawl_task":
+            self._check_scheduled_task_backup(
+                scheduled_task, result, db, start_time, end_time
+            )
 
-            except Exception as e:
-                # 记录错误
-                end_time = datetime.now(timezone.utc)
-                duration = int((end_time - start_time).total_seconds())
-                error_msg = str(e)
+        self._send_run_notification(
+            db,
+            scheduled_task,
+            "completed",
+            result=result,
+            start_time=start_time,
+            end_time=end_time,
+        )
 
-                run_record.status = "failed"
-                run_record.error_message = error_msg
-                run_record.duration_seconds = duration
+    def _fail_run(
+        self,
+        db: Session,
+        scheduled_task: ScheduledTask,
+        run_record: ScheduledTaskRun,
+        error_msg: str,
+        start_time: datetime,
+        end_time: Optional[datetime] = None,
+        result: Optional[Dict[str, Any]] = None,
+    ):
+        """记录执行失败，然后发送邮件通知"""
+        end_time = end_time or datetime.now(timezone.utc)
+        duration = int((end_time - start_time).total_seconds())
 
-                scheduled_task.last_run_time = start_time
-                scheduled_task.last_run_status = "failed"
-                scheduled_task.last_run_result = error_msg
+        run_record.status = "failed"
+        run_record.error_message = error_msg
+        run_record.duration_seconds = duration
+        if result is not None:
+            run_record.result_json = result
 
-                db.commit()
-                logger.error(
-                    f"定时任务执行失败: {scheduled_task.task_name} - {error_msg}",
-                    exc_info=True,
-                )
+        scheduled_task.last_run_time = start_time
+        scheduled_task.last_run_status = "failed"
+        scheduled_task.last_run_result = error_msg
 
-                # 发送邮件通知（如果启用且有收件人）
-                try:
-                    from .email_service import get_email_service
+        db.commit()
 
-                    email_service = get_email_service()
-                    if email_service.is_enabled(db) and email_service.to_addresses:
-                        import asyncio
+        self._send_run_notification(
+            db,
+            scheduled_task,
+            "failed",
+            result=result,
+            error_message=error_msg,
+            start_time=start_time,
+            end_time=end_time,
+        )
 
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        try:
-                            loop.run_until_complete(
-                                email_service.send_task_completion_notification(
-                                    task_name=scheduled_task.task_name,
-                                    task_status="failed",
-                                    policy_count=0,
-                                    success_count=0,
-                                    failed_count=0,
-                                    error_message=error_msg,
-                                    db=db,  # 传入db以实时加载配置
-                                )
-                            )
-                        finally:
-                            loop.close()
-                except Exception as email_error:
-                    logger.warning(f"发送定时任务失败通知邮件失败: {email_error}")
+    def _send_run_notification(
+        self,
+        db: Session,
+        scheduled_task: ScheduledTask,
+        task_status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error_message: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ):
+        """发送定时任务结束通知邮件（如果启用且有收件人）"""
+        try:
+            from .email_service import get_email_service
 
-        except Exception as e:
-            logger.error(f"执行定时任务异常: {scheduled_task_id} - {e}", exc_info=True)
-        finally:
-            db.close()
+            email_service = get_email_service()
+            # 传入db以实时加载配置
+            if not (email_service.is_enabled(db) and email_service.to_addresses):
+                return
+
+            result = result if isinstance(result, dict) else {}
+            email_service.send_task_completion_notification(
+                task_name=scheduled_task.task_name,
+                task_status=task_status,
+                policy_count=result.get("policy_count", 0),
+                success_count=result.get("success_count", 0),
+                failed_count=result.get("failed_count", 0),
+                error_message=error_message,
+                start_time=start_time,
+                end_time=end_time,
+                db=db,  # 传入db以实时加载配置
+            )
+        except Exception as email_error:
+            logger.warning(f"发送定时任务结束通知邮件失败: {email_error}")
 
     def _check_scheduled_task_backup(
         self,
@@ -597,9 +693,9 @@ class SchedulerService:
             db.commit()
 
     def _execute_crawl_task(
-        self, scheduled_task: ScheduledTask, db: Session
-    ) -> Dict[str, Any]:
-        """执行爬虫任务"""
+        self, scheduled_task: ScheduledTask, run_record: ScheduledTaskRun, db: Session
+    ):
+        """创建并启动爬虫任务（加入任务队列后立即返回，不提交）"""
         config = scheduled_task.config_json
 
         # 创建任务
@@ -610,38 +706,145 @@ class SchedulerService:
             config=config,
             user_id=1,  # 定时任务使用系统用户ID
         )
+        run_record.crawl_task_id = task.id
+        run_record.result_json = {"task_id": task.id, "status": "running"}
 
-        # 启动任务（后台执行）
-        task = self.task_service.start_task(db=db, task_id=task.id, background=True)
+        # 启动任务（后台执行，排队时手动任务优先）
+        from .task_queue_service import TaskQueueService
 
-        # 等待任务完成（最多等待5分钟）
-        import time
+        self.task_service.start_task(
+            db=db,
+            task_id=task.id,
+            background=True,
+            priority=TaskQueueService.PRIORITY_SCHEDULED,
+        )
 
-        max_wait_time = 300  # 5分钟
-        wait_interval = 2  # 每2秒检查一次
-        waited_time = 0
+    def _on_task_finished(self, task_id: int):
+        """任务执行结束回调（在执行任务的线程中调用）
 
-        while waited_time < max_wait_time:
-            db.refresh(task)
-            if task.status in ["completed", "failed", "cancelled"]:
-                break
-            time.sleep(wait_interval)
-            waited_time += wait_interval
+        完成执行记录可能要创建备份、发送邮件，交给调度器的线程池执行，
+        不占用任务worker的执行槽位。
+        """
+        if self.scheduler is not None and self.scheduler.running:
+            self.scheduler.add_job(
+                self._finish_crawl_run,
+                args=[task_id],
+                id=f"finish_crawl_run_{task_id}",
+                jobstore=self.SYSTEM_JOBSTORE,
+                replace_existing=True,
+            )
+        else:
+            threading.Thread(
+                target=self._finish_crawl_run,
+                args=(task_id,),
+                name=f"finish-crawl-run-{task_id}",
+                daemon=True,
+            ).start()
+
+    def _finish_crawl_run(self, task_id: int):
+        """爬虫任务结束后完成对应的定时任务执行记录（检查备份、发送邮件）"""
+        from ..models.task import Task
+
+        db = worker_session(f"scheduled_run:{task_id}")
+        try:
+            # 锁定执行记录，回调和定期检查同时处理时只完成一次
+            run_record = (
+                db.query(ScheduledTaskRun)
+                .filter(
+                    ScheduledTaskRun.crawl_task_id == task_id,
+                    ScheduledTaskRun.status == "running",
+                )
+                .with_for_update()
+                .first()
+            )
+            if run_record is None:
+                db.rollback()
+                return
+
+            task = db.query(Task).filter(Task.id == task_id).first()
+            if task is not None and task.status not in FINISHED_TASK_STATUSES:
+                # 仍在执行或已暂停（恢复后继续执行）
+                db.rollback()
+                return
+
+            scheduled_task = (
+                db.query(ScheduledTask)
+                .filter(ScheduledTask.id == run_record.task_id)
+                .first()
+            )
+            start_time = _as_utc(run_record.run_time)
+            if task is None:
+                self._fail_run(
+                    db, scheduled_task, run_record, "爬虫任务已被删除", start_time
+                )
+                return
+
+            end_time = _as_utc(task.end_time) or datetime.now(timezone.utc)
+            result = {
+                "task_id": task.id,
+                "task_name": task.task_name,
+                "status": task.status,
+                "policy_count": task.policy_count or 0,
+                "success_count": task.success_count or 0,
+                "failed_count": task.failed_count or 0,
+            }
+            if task.status == "completed":
+                self._complete_run(
+                    db, scheduled_task, run_record, result, start_time, end_time
+                )
+            else:
+                error_msg = task.error_message or (
+                    "爬虫任务已取消" if task.status == "cancelled" else "爬虫任务失败"
+                )
+                logger.error(
+                    f"定时任务执行失败: {scheduled_task.task_name} - {error_msg}"
+                )
+                self._fail_run(
+                    db,
+                    scheduled_task,
+                    run_record,
+                    error_msg,
+                    start_time,
+                    end_time,
+                    result=result,
+                )
+        except Exception as e:
+            db.rollback()
+            logger.error(
+                f"完成定时任务执行记录失败: 任务 {task_id} - {e}", exc_info=True
+            )
+        finally:
+            db.close()
 
-        # 获取任务结果
+    def _sweep_crawl_runs(self):
+        """完成爬虫任务已结束但仍在执行中的执行记录
+
+        由其他worker进程执行的任务结束时不会回调本进程，进程重启前未完成的
+        执行记录也在这里补上。
+        """
         from ..models.task import Task
 
-        final_task = db.query(Task).filter(Task.id == task.id).first()
+        db = worker_session("scheduled_run_sweeper")
+        try:
+            task_ids = [
+                row.crawl_task_id
+                for row in db.query(ScheduledTaskRun.crawl_task_id)
+                .outerjoin(Task, Task.id == ScheduledTaskRun.crawl_task_id)
+                .filter(
+                    ScheduledTaskRun.status == "running",
+                    ScheduledTaskRun.crawl_task_id.isnot(None),
+                    or_(Task.id.is_(None), Task.status.in_(FINISHED_TASK_STATUSES)),
+                )
+                .all()
+            ]
+        except Exception as e:
+            logger.error(f"检查已结束的爬虫任务失败: {e}", exc_info=True)
+            return
+        finally:
+            db.close()
 
-        return {
-            "task_id": final_task.id if final_task else task.id,
-            "task_name": final_task.task_name if final_task else task.task_name,
-            "status": final_task.status if final_task else task.status,
-            "success_count": (
-                getattr(final_task, "success_count", 0) if final_task else 0
-            ),
-            "failed_count": getattr(final_task, "failed_count", 0) if final_task else 0,
-        }
+        for task_id in task_ids:
+            self._finish_crawl_run(task_id)
 
     def _execute_backup_task(
         self, scheduled_task: ScheduledTask, db: Session
@@ -869,6 +1072,7 @@ class SchedulerService:
                 raise ValueError(f"定时任务名称已存在: {task_name}")
 
         # 如果更新了Cron表达式，验证并计算下次运行时间
+        cron_changed = False
         if cron_expression and cron_expression != scheduled_task.cron_expression:
             try:
                 parts = cron_expression.strip().split()
@@ -887,6 +1091,7 @@ class SchedulerService:
                 )
                 scheduled_task.cron_expression = cron_expression
                 scheduled_task.next_run_time = next_run_time
+                cron_changed = True
             except Exception as e:
                 raise ValueError(f"无效的Cron表达式: {cron_expression}, 错误: {e}")
 
@@ -963,6 +1168,15 @@ class SchedulerService:
                                 f"从调度器移除任务失败: {scheduled_task.task_name} - {e}"
                             )
 
+        # 已启用任务的Cron表达式变化时替换作业（非leader进程由leader同步）
+        if (
+            cron_changed
+            and scheduled_task.is_enabled
+            and self.scheduler
+            and self.scheduler.running
+        ):
+            self._add_job(scheduled_task)
+
         db.commit()
         db.refresh(scheduled_task)
 
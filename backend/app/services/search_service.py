@@ -1,22 +1,54 @@
 """
-全文搜索服务 - PostgreSQL全文搜索
+全文搜索服务 - PostgreSQL全文搜索 / 进程内二元组倒排索引
 """
 
+import time
 import logging
-from typing import List, Optional, Tuple
-from sqlalchemy import text, func
+import threading
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import text, func, or_, and_, select
 from sqlalchemy.orm import Session
-from ..models.policy import Policy
+from ..config import settings
+from ..models.policy import Policy, PolicyContent
+from .bigram_index import BigramIndex
+from .count_service import get_count_service
+from .utils import load_only_columns
+from .pagination import Page, decode_cursor, encode_offset_cursor, keyset_paginate
 
 logger = logging.getLogger(__name__)
 
 
+def _project(query, columns: Optional[Iterable[str]]):
+    """只加载指定列（未指定时加载全部列）"""
+    if not columns:
+        return query
+    return query.options(load_only_columns(Policy, columns))
+
+
+def _escape_like(term: str) -> str:
+    """转义LIKE通配符，使用户输入的 % 和 _ 按字面匹配"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 class SearchService:
     """全文搜索服务"""
 
+    # 检索前与数据库同步增量的最小间隔（秒）
+    SYNC_INTERVAL = 2.0
+    # 清理已删除政策的最小间隔（秒）
+    PRUNE_INTERVAL = 300.0
+    # 按 updated_at 同步时的回看窗口，覆盖提交晚于时间戳的事务
+    SYNC_OVERLAP = timedelta(seconds=60)
+
     def __init__(self):
         """初始化搜索服务"""
-        pass
+        self.engine = settings.search_engine
+
+    @property
+    def bigram_enabled(self) -> bool:
+        """是否启用二元组倒排索引引擎"""
+        return self.engine == "bigram"
 
     def search(
         self,
@@ -28,6 +60,8 @@ class SearchService:
         level: Optional[str] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
+        cursor: Optional[str] = None,
+        columns: Optional[Iterable[str]] = None,
     ) -> Tuple[List[Policy], int]:
         """全文搜索政策
 
@@ -40,9 +74,11 @@ class SearchService:
             level: 效力级别筛选
             start_date: 开始日期（YYYY-MM-DD）
             end_date: 结束日期（YYYY-MM-DD）
+            cursor: 上一页返回的分页游标（优先于skip）
+            columns: 只加载这些列（列表视图不需要正文等大字段）
 
         Returns:
-            (政策列表, 总数)
+            (政策列表, 总数)，政策列表为 Page，next_cursor 为下一页游标
         """
         # 构建基础查询
         base_query = db.query(Policy)
@@ -59,20 +95,46 @@ class SearchService:
 
         # 如果没有搜索词，返回全量结果（应用筛选条件）
         if not query or not query.strip():
-            total = base_query.count()
-            results = (
-                base_query.order_by(Policy.pub_date.desc())
-                .offset(skip)
-                .limit(limit)
-                .all()
+            results = keyset_paginate(
+                _project(base_query, columns),
+                Policy.pub_date,
+                Policy.id,
+                limit,
+                skip=skip,
+                cursor=cursor,
+            )
+            total, results.total_is_estimate = get_count_service().count(
+                db,
+                base_query,
+                "policies",
+                {
+                    "category": category,
+                    "level": level,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                },
             )
             return results, total
 
         # 清理搜索词
         query = query.strip()
 
-        # 使用简单搜索（LIKE 模式）
-        # 注意：已移除中文分词功能，使用 PostgreSQL 的 ILIKE 进行模糊搜索
+        # 二元组索引就绪时按相关度检索，否则（未启用或正在重建）使用数据库搜索
+        if self.bigram_enabled and get_bigram_index().ready:
+            return self.search_bigram(
+                db=db,
+                query=query,
+                skip=skip,
+                limit=limit,
+                category=category,
+                level=level,
+                start_date=start_date,
+                end_date=end_date,
+                cursor=cursor,
+                columns=columns,
+            )
+
+        # 使用 ILIKE 模糊搜索（由 pg_trgm GIN 三元组索引加速，支持中文子串匹配）
         return self.search_simple(
             db=db,
             query=query,
@@ -82,6 +144,8 @@ class SearchService:
             level=level,
             start_date=start_date,
             end_date=end_date,
+            cursor=cursor,
+            columns=columns,
         )
 
     def search_simple(
@@ -94,10 +158,12 @@ class SearchService:
         level: Optional[str] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
+        cursor: Optional[str] = None,
+        columns: Optional[Iterable[str]] = None,
     ) -> Tuple[List[Policy], int]:
-        """全文搜索（使用 LIKE 模糊匹配）
+        """全文搜索（使用 ILIKE 模糊匹配，走 pg_trgm 三元组索引）
 
-        支持基本的LIKE搜索和筛选条件
+        支持多关键词搜索和筛选条件
         """
         # 构建基础查询
         base_query = db.query(Policy)
@@ -114,61 +180,281 @@ class SearchService:
 
         # 如果没有搜索词，返回全量结果（应用筛选条件）
         if not query or not query.strip():
-            total = base_query.count()
-            results = (
-                base_query.order_by(Policy.pub_date.desc())
-                .offset(skip)
-                .limit(limit)
-                .all()
+            results = keyset_paginate(
+                _project(base_query, columns),
+                Policy.pub_date,
+                Policy.id,
+                limit,
+                skip=skip,
+                cursor=cursor,
+            )
+            total, results.total_is_estimate = get_count_service().count(
+                db,
+                base_query,
+                "policies",
+                {
+                    "category": category,
+                    "level": level,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                },
             )
             return results, total
 
-        query = query.strip()
-        keyword_pattern = f"%{query}%"
-
-        # 使用LIKE搜索（作为全文搜索的降级方案）
-        # 支持多关键词搜索：将查询词分割，每个词都要匹配
-        from sqlalchemy import or_, and_
-
-        search_terms = query.split()
-        if len(search_terms) > 1:
-            # 多关键词：所有词都要在title或content中
-            title_conditions = [
-                Policy.title.ilike(f"%{term}%") for term in search_terms
-            ]
-            content_conditions = [
-                Policy.content.ilike(f"%{term}%") for term in search_terms
-            ]
-            keywords_conditions = [
-                Policy.keywords.ilike(f"%{term}%") for term in search_terms
-            ]
-
-            # 至少一个字段包含所有关键词
-            search_filter = or_(
-                and_(*title_conditions),
-                and_(*content_conditions),
-                and_(*keywords_conditions),
-            )
-        else:
-            # 单关键词：任意字段匹配即可
-            search_filter = (
-                (Policy.title.ilike(keyword_pattern))
-                | (Policy.content.ilike(keyword_pattern))
-                | (Policy.keywords.ilike(keyword_pattern))
-            )
+        search_filter = self.keyword_filter(query)
 
-        results = (
-            base_query.filter(search_filter)
-            .order_by(Policy.pub_date.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+        results = keyset_paginate(
+            _project(base_query.filter(search_filter), columns),
+            Policy.pub_date,
+            Policy.id,
+            limit,
+            skip=skip,
+            cursor=cursor,
         )
 
-        total = base_query.filter(search_filter).count()
+        # 同一组条件的精确总数缓存一段时间，翻页时不再重复执行整套 ILIKE 条件
+        total, _ = get_count_service().count(
+            db,
+            base_query.filter(search_filter),
+            "policies",
+            {
+                "category": category,
+                "level": level,
+                "start_date": start_date,
+                "end_date": end_date,
+                "keyword": query,
+            },
+            allow_estimate=False,
+        )
 
         return results, total
 
+    @staticmethod
+    def keyword_filter(query: str):
+        """构建关键词筛选条件（可使用 pg_trgm GIN 索引）
+
+        查询词按空白分割，至少一个字段（标题/正文/关键词）包含所有词。
+        条件保持 ``列 ILIKE '%词%'`` 的形式，PostgreSQL 会对每个字段走
+        三元组索引的位图扫描再合并（BitmapAnd/BitmapOr），而不是顺序扫描；
+        正文在 policy_contents 表中，通过 ``id IN (子查询)`` 匹配。
+        压缩存放的超长正文不参与匹配（见 PolicyContent）。
+
+        注意：三元组索引要求每个词至少3个字符才能缩小范围，更短的词
+        仍然正确匹配，但需要扫描更多索引项。
+
+        Args:
+            query: 搜索关键词
+
+        Returns:
+            SQLAlchemy筛选条件，查询词为空时返回None
+        """
+        search_terms = (query or "").split()
+        if not search_terms:
+            return None
+
+        patterns = [f"%{_escape_like(term)}%" for term in search_terms]
+
+        def match_all(column):
+            return and_(*(column.ilike(pattern, escape="\\") for pattern in patterns))
+
+        # 正文在独立的正文表中，用 IN 子查询匹配（同样走三元组索引）
+        return or_(
+            match_all(Policy.title),
+            match_all(Policy.keywords),
+            Policy.id.in_(
+                select(PolicyContent.policy_id).where(match_all(PolicyContent.content))
+            ),
+        )
+
+    def search_bigram(
+        self,
+        db: Session,
+        query: str,
+        skip: int = 0,
+        limit: int = 20,
+        category: Optional[str] = None,
+        level: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        cursor: Optional[str] = None,
+        columns: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Policy], int]:
+        """二元组倒排索引检索（按BM25相关度排序）
+
+        支持 AND（空格分隔）、OR（``OR`` 或 ``|``）和引号短语
+        """
+        index = get_bigram_index()
+        self.sync_bigram_index(db)
+
+        # 相关度排序的结果在内存中切片，游标只需携带偏移量；
+        # 引擎切换前签发的键集游标无法换算，从第一页开始
+        if cursor:
+            kind, value = decode_cursor(cursor)
+            skip = value if kind == "offset" else 0
+
+        hits, total = index.search(
+            query,
+            skip=skip,
+            limit=limit,
+            category=category,
+            level=level,
+            start_date=_parse_date(start_date),
+            end_date=_parse_date(end_date),
+        )
+        if not hits:
+            return Page(), total
+
+        policy_ids = [policy_id for policy_id, _ in hits]
+        policies = {
+            policy.id: policy
+            for policy in _project(db.query(Policy), columns)
+            .filter(Policy.id.in_(policy_ids))
+            .all()
+        }
+
+        # 其他进程已删除（或写入后回滚）的政策，顺便从索引中移除
+        missing = [pid for pid in policy_ids if pid not in policies]
+        if missing:
+            index.remove_documents(missing)
+            total -= len(missing)
+
+        next_cursor = None
+        if skip + len(hits) < total:
+            next_cursor = encode_offset_cursor(skip + len(hits))
+        return (
+            Page([policies[pid] for pid in policy_ids if pid in policies], next_cursor),
+            total,
+        )
+
+    # ------------------------------------------------------------------
+    # 二元组索引维护
+    # ------------------------------------------------------------------
+
+    def index_policies(self, policies: Iterable[Policy]):
+        """把新写入或内容变化的政策加入二元组索引（未启用时不做任何事）"""
+        if not self.bigram_enabled:
+            return
+        index = get_bigram_index()
+        for policy in policies:
+            _index_policy_row(index, policy)
+        index.maybe_persist()
+
+    def remove_policies(self, policy_ids: Iterable[int]):
+        """从二元组索引中删除政策（未启用时不做任何事）"""
+        if not self.bigram_enabled:
+            return
+        index = get_bigram_index()
+        if index.remove_documents(policy_ids):
+            index.maybe_persist()
+
+    def sync_bigram_index(self, db: Session, force: bool = False) -> int:
+        """把数据库中的增量同步到二元组索引
+
+        多个worker进程各有一份索引，且写入可能发生在其他进程，因此检索前
+        按 updated_at 拉取增量（节流），并定期清理已删除的政策。
+
+        Returns:
+            写入索引的政策数
+        """
+        index = get_bigram_index()
+        now = time.monotonic()
+        if not force and now - _sync_state["last_sync"] < self.SYNC_INTERVAL:
+            return 0
+        if not _sync_lock.acquire(blocking=force):
+            return 0  # 其他线程正在同步
+
+        try:
+            _sync_state["last_sync"] = now
+            query = db.query(
+                Policy.id,
+                Policy.title,
+                Policy.keywords,
+                PolicyContent.content,
+                PolicyContent.compressed,
+                Policy.category,
+                Policy.level,
+                Policy.pub_date,
+                Policy.updated_at,
+            ).outerjoin(PolicyContent, PolicyContent.policy_id == Policy.id)
+            if index.high_water_mark is not None:
+                query = query.filter(
+                    Policy.updated_at > index.high_water_mark - self.SYNC_OVERLAP
+                )
+
+            indexed = 0
+            for row in query.order_by(Policy.updated_at).yield_per(500):
+                content = PolicyContent.unpack(row.content, row.compressed)
+                if _index_policy_row(index, row, content=content):
+                    indexed += 1
+                if row.updated_at and (
+                    index.high_water_mark is None
+                    or row.updated_at > index.high_water_mark
+                ):
+                    index.high_water_mark = row.updated_at
+
+            if force or now - _sync_state["last_prune"] >= self.PRUNE_INTERVAL:
+                _sync_state["last_prune"] = now
+                existing = {row[0] for row in db.query(Policy.id)}
+                index.remove_documents(index.policy_ids() - existing)
+
+            if indexed:
+                logger.debug(f"二元组索引同步了 {indexed} 条政策")
+            index.maybe_persist()
+            return indexed
+        finally:
+            _sync_lock.release()
+
+    def rebuild_bigram_index(self) -> int:
+        """从数据库全量重建二元组索引（重建期间搜索降级为数据库搜索）
+
+        Returns:
+            索引的政策数
+        """
+        from ..database import SessionLocal
+
+        index = get_bigram_index()
+        index.ready = False
+        index.clear()
+        db = SessionLocal()
+        try:
+            self.sync_bigram_index(db, force=True)
+        finally:
+            db.close()
+        index.ready = True
+        index.save()
+        logger.info(f"二元组索引重建完成: {index.doc_count} 篇文档")
+        return index.doc_count
+
+    def load_bigram_index(self):
+        """启动时加载二元组索引并追平数据库（在后台线程执行）"""
+        if not self.bigram_enabled:
+            return
+
+        def load():
+            from ..database import SessionLocal
+
+            index = get_bigram_index()
+            try:
+                if not index.load():
+                    logger.info("二元组索引不存在或不可用，开始全量构建")
+                    self.rebuild_bigram_index()
+                    return
+                db = SessionLocal()
+                try:
+                    self.sync_bigram_index(db, force=True)
+                finally:
+                    db.close()
+                index.ready = True
+            except Exception as e:
+                logger.error(f"加载二元组索引失败: {e}", exc_info=True)
+
+        threading.Thread(target=load, name="bigram-index-loader", daemon=True).start()
+
+    def save_bigram_index(self):
+        """保存二元组索引（应用关闭时调用）"""
+        if self.bigram_enabled and get_bigram_index().ready:
+            get_bigram_index().save()
+
     def build_search_index(self, db: Session) -> dict:
         """构建全文搜索索引
 
@@ -193,6 +479,20 @@ class SearchService:
 
             total_count = db.query(func.count(Policy.id)).scalar() or 0
 
+            if self.bigram_enabled:
+                # 二元组索引在后台全量重建，期间搜索自动使用数据库搜索
+                threading.Thread(
+                    target=self.rebuild_bigram_index,
+                    name="bigram-index-rebuild",
+                    daemon=True,
+                ).start()
+                return {
+                    "success": True,
+                    "total_policies": total_count,
+                    "indexed_policies": get_bigram_index().doc_count,
+                    "message": "二元组索引正在后台重建",
+                }
+
             return {
                 "success": True,
                 "total_policies": total_count,
@@ -204,3 +504,47 @@ class SearchService:
             db.rollback()
             logger.error(f"构建搜索索引失败: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    """解析 YYYY-MM-DD 日期（无效时忽略）"""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _index_policy_row(
+    index: BigramIndex, policy, content: Optional[str] = None
+) -> bool:
+    """把政策（ORM对象或查询行）写入二元组索引，关键词与正文一起索引
+
+    content 为解压后的正文；未传入时读取 policy.content
+    """
+    if content is None:
+        content = policy.content
+    return index.add_document(
+        policy.id,
+        policy.title,
+        f"{policy.keywords or ''}\n{content or ''}",
+        category=policy.category,
+        level=policy.level,
+        pub_date=policy.pub_date,
+        version=policy.updated_at,
+    )
+
+
+# 全局二元组索引实例（每个进程一份）
+_bigram_index: Optional[BigramIndex] = None
+_bigram_index_lock = threading.Lock()
+_sync_lock = threading.Lock()
+_sync_state = {"last_sync": 0.0, "last_prune": 0.0}
+
+
+def get_bigram_index() -> BigramIndex:
+    """获取二元组索引单例"""
+    global _bigram_index
+    with _bigram_index_lock:
+        if _bigram_index is None:
+            _bigram_index = BigramIndex(settings.search_index_dir)
+        return _bigram_index
@@ -393,6 +393,38 @@ class StorageService:
 
         return None
 
+    def get_attachment_record_path(
+        self, attachment, task_id: Optional[int] = None
+    ) -> Optional[str]:
+        """获取附件记录对应的文件路径（优先内容块存储，兼容按任务目录存放的旧数据）
+
+        内容块从S3下载到临时文件时，用完后需要调用 release_attachment_path。
+        """
+        if getattr(attachment, "blob_sha256", None):
+            from .blob_store_service import get_blob_store_service
+
+            blob_path = get_blob_store_service().get_blob_file_path(
+                attachment.blob_sha256
+            )
+            if blob_path:
+                return blob_path
+
+        if attachment.file_path and Path(attachment.file_path).exists():
+            return attachment.file_path
+
+        if attachment.file_s3_key:
+            return self.get_attachment_file_path(
+                attachment.policy_id, attachment.file_name, task_id=task_id
+            )
+
+        return None
+
+    def release_attachment_path(self, file_path: Optional[str]):
+        """用完 get_attachment_record_path 返回的路径后调用（删除内容块临时文件）"""
+        from .blob_store_service import get_blob_store_service
+
+        get_blob_store_service().release_file_path(file_path)
+
     def list_attachments(
         self, policy_id: int, task_id: Optional[int] = None
     ) -> List[str]:
@@ -0,0 +1,658 @@
+"""
+爬虫任务队列服务 - 数据库任务队列和任务worker
+
+启动任务时在 task_queue 表中写入一行（与任务状态同一事务提交），任意进程
+中的任务worker用 SELECT ... FOR UPDATE SKIP LOCKED 领取并执行，多个worker
+同时领取互不阻塞，也不会领到同一个任务。worker可以运行在API进程内，也可以
+用 python -m app worker 单独启动，增加worker进程即可扩展爬取能力。
+
+执行期间worker定时续租（刷新 heartbeat_at），同时读取任务状态：停止/暂停
+接口只需在数据库中修改任务状态，执行该任务的worker在下次续租时停止爬虫，
+不要求请求落在执行任务的进程上。超过租约时间未续租的任务视为执行进程已
+退出，由其他worker重新领取（政策按唯一索引去重，重新执行不会产生重复数据）。
+
+领取时做准入控制：所有worker合计同时执行的任务数不超过
+CRAWL_MAX_RUNNING_TASKS，同一数据源同时执行的任务数不超过
+CRAWL_MAX_TASKS_PER_SOURCE，按优先级（手动任务优先于定时任务）和入队
+时间选择第一个满足上限的任务。PostgreSQL 上领取过程用事务级咨询锁串行化，
+避免多个worker同时通过上限检查。排队中的任务根据最近完成任务的平均时长
+估算开始时间。
+"""
+
+import os
+import heapq
+import socket
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import and_, or_, text
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.task import Task, TaskQueueItem
+
+logger = logging.getLogger(__name__)
+
+
+class TaskQueueService:
+    """爬虫任务队列（数据库操作）"""
+
+    # 租约过期后被重新领取的次数上限，超过后任务标记为失败
+    MAX_ATTEMPTS = 3
+
+    # 优先级（数值小的优先）
+    PRIORITY_MANUAL = 0
+    PRIORITY_SCHEDULED = 10
+
+    # 每次领取最多检查的候选任务数（前面的任务受数据源上限限制时向后查找）
+    CANDIDATE_LIMIT = 50
+
+    # 领取任务时串行化准入检查的咨询锁
+    ADMISSION_LOCK_KEY = 123460
+
+    # 估算平均任务时长参考的最近完成任务数
+    DURATION_SAMPLE_SIZE = 20
+
+    @property
+    def lease(self) -> timedelta:
+        return timedelta(seconds=settings.task_lease_seconds)
+
+    def enqueue(self, db: Session, task: Task, priority: Optional[int] = None):
+        """任务入队（不提交，随任务状态一起提交）
+
+        Args:
+            db: 数据库会话
+            task: 任务
+            priority: 优先级（默认按手动任务）
+
+        Raises:
+            ValueError: 任务上次执行尚未结束（仍有worker持有未过期的租约）
+        """
+        task_id = task.id
+        if priority is None:
+            priority = self.PRIORITY_MANUAL
+        sources = task_sources(task)
+        now = datetime.now(timezone.utc)
+        item = db.query(TaskQueueItem).filter(TaskQueueItem.task_id == task_id).first()
+        if item is None:
+            db.add(
+                TaskQueueItem(
+                    task_id=task_id,
+                    status="queued",
+                    priority=priority,
+                    sources=sources,
+                    attempts=0,
+                )
+            )
+            return
+
+        held = (
+            db.query(TaskQueueItem.id)
+            .filter(
+                TaskQueueItem.id == item.id,
+                TaskQueueItem.status == "claimed",
+                TaskQueueItem.heartbeat_at >= now - self.lease,
+            )
+            .first()
+        )
+        if held is not None:
+            raise ValueError(f"任务上次执行尚未结束，请稍后再试: {task_id}")
+
+        item.status = "queued"
+        item.priority = priority
+        item.sources = sources
+        item.enqueued_at = now
+        item.claimed_by = None
+        item.claimed_at = None
+        item.heartbeat_at = None
+        item.attempts = 0
+
+    def cancel(self, db: Session, task_id: int) -> bool:
+        """移除尚未被领取的任务（不提交）
+
+        Returns:
+            是否移除了排队中的任务
+        """
+        deleted = (
+            db.query(TaskQueueItem)
+            .filter(
+                TaskQueueItem.task_id == task_id,
+                TaskQueueItem.status == "queued",
+            )
+            .delete(synchronize_session=False)
+        )
+        return deleted > 0
+
+    def claim(self, db: Session, worker_id: str) -> Optional[int]:
+        """领取一个任务（并提交）
+
+        按优先级和入队顺序领取排队中或租约已过期的任务，跳过会超出数据源
+        并发上限的任务；已被其他事务锁定的行直接跳过。
+
+        Returns:
+            领取到的任务ID，没有可领取的任务时返回None（包括已达到全局并发上限）
+        """
+        while True:
+            now = datetime.now(timezone.utc)
+            self._lock_admission(db)
+
+            running = self._running_items(db, now)
+            if len(running) >= settings.crawl_max_running_tasks:
+                db.commit()
+                return None
+            running_by_source = Counter(
+                source for other in running for source in (other.sources or [])
+            )
+
+            candidates = (
+                db.query(TaskQueueItem)
+                .filter(self._claimable(now))
+                .order_by(
+                    TaskQueueItem.priority,
+                    TaskQueueItem.enqueued_at,
+                    TaskQueueItem.id,
+                )
+                .limit(self.CANDIDATE_LIMIT)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            item = next(
+                (
+                    candidate
+                    for candidate in candidates
+                    if all(
+                        running_by_source[source] < settings.crawl_max_tasks_per_source
+                        for source in candidate.sources or []
+                    )
+                ),
+                None,
+            )
+            if item is None:
+                db.commit()
+                return None
+
+            if item.status == "claimed":
+                logger.warning(
+                    f"任务 {item.task_id} 的租约已过期（原worker: {item.claimed_by}），重新领取"
+                )
+                if item.attempts >= self.MAX_ATTEMPTS:
+                    self._give_up(db, item)
+                    continue
+
+            task_id = item.task_id
+            item.status = "claimed"
+            item.claimed_by = worker_id
+            item.claimed_at = now
+            item.heartbeat_at = now
+            item.attempts = (item.attempts or 0) + 1
+            db.commit()
+            return task_id
+
+    def heartbeat(self, db: Session, worker_id: str, task_ids: List[int]) -> Set[int]:
+        """为worker持有的任务续租（不提交）
+
+        Returns:
+            租约仍属于该worker的任务ID
+        """
+        if not task_ids:
+            return set()
+        owned = and_(
+            TaskQueueItem.task_id.in_(task_ids),
+            TaskQueueItem.claimed_by == worker_id,
+            TaskQueueItem.status == "claimed",
+        )
+        db.query(TaskQueueItem).filter(owned).update(
+            {TaskQueueItem.heartbeat_at: datetime.now(timezone.utc)},
+            synchronize_session=False,
+        )
+        return {row[0] for row in db.query(TaskQueueItem.task_id).filter(owned)}
+
+    def complete(self, db: Session, task_id: int, worker_id: str):
+        """任务执行结束，移除队列记录（并提交）"""
+        db.query(TaskQueueItem).filter(
+            TaskQueueItem.task_id == task_id,
+            TaskQueueItem.claimed_by == worker_id,
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    def release(self, db: Session, worker_id: str) -> int:
+        """worker退出时把持有的任务放回队列（并提交），其他worker可立即领取
+
+        Returns:
+            放回的任务数
+        """
+        released = (
+            db.query(TaskQueueItem)
+            .filter(
+                TaskQueueItem.claimed_by == worker_id,
+                TaskQueueItem.status == "claimed",
+            )
+            .update(
+                {
+                    TaskQueueItem.status: "queued",
+                    TaskQueueItem.claimed_by: None,
+                    TaskQueueItem.heartbeat_at: None,
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return released
+
+    def get_queue(self, db: Session) -> List[Dict[str, Any]]:
+        """队列中的任务及排队位置和预计开始时间
+
+        按全局和数据源并发上限模拟排队：执行中的任务按平均时长估算结束时间，
+        排队中的任务依次占用最早空出的全局名额和数据源名额。
+
+        Returns:
+            [{task_id, task_name, status, priority, sources, position,
+              enqueued_at, claimed_by, estimated_start_time}]，执行中的在前
+        """
+        now = datetime.now(timezone.utc)
+        rows = (
+            db.query(TaskQueueItem, Task.task_name)
+            .join(Task, Task.id == TaskQueueItem.task_id)
+            .order_by(
+                TaskQueueItem.priority, TaskQueueItem.enqueued_at, TaskQueueItem.id
+            )
+            .all()
+        )
+        running_ids = {item.id for item in self._running_items(db, now)}
+        duration = self._average_duration(db)
+        per_source = settings.crawl_max_tasks_per_source
+
+        # 全局名额和各数据源名额的空出时间（最小堆）
+        slots: List[datetime] = []
+        source_slots: Dict[str, List[datetime]] = {}
+
+        def source_heap(source: str) -> List[datetime]:
+            if source not in source_slots:
+                source_slots[source] = []
+            return source_slots[source]
+
+        running, queued = [], []
+        for item, task_name in rows:
+            entry = {
+                "task_id": item.task_id,
+                "task_name": task_name,
+                "status": "running" if item.id in running_ids else "queued",
+                "priority": item.priority,
+                "sources": item.sources or [],
+                "position": None,
+                "enqueued_at": item.enqueued_at,
+                "claimed_by": item.claimed_by if item.id in running_ids else None,
+                "estimated_start_time": None,
+            }
+            if item.id in running_ids:
+                entry["estimated_start_time"] = item.claimed_at
+                ends_at = max(now, _as_utc(item.claimed_at) + duration)
+                heapq.heappush(slots, ends_at)
+                for source in entry["sources"]:
+                    heapq.heappush(source_heap(source), ends_at)
+                running.append(entry)
+            else:
+                queued.append(entry)
+
+        # 空闲名额从现在开始可用
+        while len(slots) < settings.crawl_max_running_tasks:
+            heapq.heappush(slots, now)
+        for heap in source_slots.values():
+            while len(heap) < per_source:
+                heapq.heappush(heap, now)
+
+        for position, entry in enumerate(queued, start=1):
+            heaps = [slots] + [source_heap(source) for source in entry["sources"]]
+            for heap in heaps[1:]:
+                while len(heap) < per_source:
+                    heapq.heappush(heap, now)
+            starts_at = max(heap[0] for heap in heaps)
+            for heap in heaps:
+                heapq.heapreplace(heap, starts_at + duration)
+            entry["position"] = position
+            entry["estimated_start_time"] = starts_at
+
+        return running + queued
+
+    def get_queue_entry(self, db: Session, task_id: int) -> Optional[Dict[str, Any]]:
+        """任务在队列中的状态（不在队列中时返回None）"""
+        if (
+            db.query(TaskQueueItem.id).filter(TaskQueueItem.task_id == task_id).first()
+            is None
+        ):
+            return None
+        return next(
+            (entry for entry in self.get_queue(db) if entry["task_id"] == task_id),
+            None,
+        )
+
+    def _lock_admission(self, db: Session):
+        """串行化准入检查（PostgreSQL 事务级咨询锁，提交或回滚时释放）"""
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"),
+                {"key": self.ADMISSION_LOCK_KEY},
+            )
+
+    def _running_items(self, db: Session, now: datetime) -> List[TaskQueueItem]:
+        """正在执行（已领取且租约未过期）的任务"""
+        return (
+            db.query(TaskQueueItem)
+            .filter(
+                TaskQueueItem.status == "claimed",
+                TaskQueueItem.heartbeat_at >= now - self.lease,
+            )
+            .all()
+        )
+
+    def _average_duration(self, db: Session) -> timedelta:
+        """最近完成的任务的平均执行时长"""
+        rows = (
+            db.query(Task.start_time, Task.end_time)
+            .filter(
+                Task.status == "completed",
+                Task.start_time.isnot(None),
+                Task.end_time.isnot(None),
+            )
+            .order_by(Task.end_time.desc())
+            .limit(self.DURATION_SAMPLE_SIZE)
+            .all()
+        )
+        durations = [
+            _as_utc(end) - _as_utc(start) for start, end in rows if end > start
+        ]
+        if not durations:
+            return timedelta(minutes=settings.crawl_default_duration_minutes)
+        return sum(durations, timedelta()) / len(durations)
+
+    def _claimable(self, now: datetime):
+        """可领取的任务：排队中，或已领取但租约过期"""
+        return or_(
+            TaskQueueItem.status == "queued",
+            and_(
+                TaskQueueItem.status == "claimed",
+                or_(
+                    TaskQueueItem.heartbeat_at.is_(None),
+                    TaskQueueItem.heartbeat_at < now - self.lease,
+                ),
+            ),
+        )
+
+    def _give_up(self, db: Session, item: TaskQueueItem):
+        """多次租约过期的任务不再重试，标记为失败并移出队列（并提交）"""
+        task = db.query(Task).filter(Task.id == item.task_id).first()
+        if task is not None and task.status == "running":
+            task.status = "failed"
+            task.error_message = (
+                f"任务执行进程多次异常退出（{item.attempts} 次），已放弃"
+            )
+            task.end_time = datetime.now(timezone.utc)
+        db.delete(item)
+        db.commit()
+        logger.error(f"任务 {item.task_id} 多次租约过期，已标记为失败")
+
+
+def task_sources(task: Task) -> List[str]:
+    """任务配置中的数据源名称"""
+    sources = []
+    for source in (task.config_json or {}).get("data_sources") or []:
+        name = source.get("name") if isinstance(source, dict) else source
+        if name and name not in sources:
+            sources.append(str(name))
+    return sources
+
+
+def _as_utc(value: datetime) -> datetime:
+    """不带时区的时间（SQLite）按UTC处理"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class TaskWorker:
+    """任务worker：领取队列中的任务并在本进程的线程中执行"""
+
+    def __init__(self, concurrency: Optional[int] = None):
+        """初始化任务worker
+
+        Args:
+            concurrency: 同时执行的任务数（默认 CRAWL_MAX_CONCURRENT_TASKS）
+        """
+        from .task_service import TaskService
+
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = max(1, concurrency or settings.crawl_max_concurrent_tasks)
+        self.queue = get_task_queue_service()
+        self.task_service = TaskService()
+        self._running: Dict[int, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads) and not self._stopping.is_set()
+
+    def start(self):
+        """启动领取线程和续租线程"""
+        if self.running:
+            return
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._poll_loop, name="task-worker", daemon=True),
+            threading.Thread(
+                target=self._heartbeat_loop, name="task-worker-heartbeat", daemon=True
+            ),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"任务worker已启动: {self.worker_id}（并发 {self.concurrency}）")
+
+    def stop(self, timeout: float = 30):
+        """停止领取新任务，停止执行中的任务，并把未完成的任务放回队列
+
+        先设置执行中任务的停止标志并等待任务线程退出（最多 timeout 秒），
+        再放回仍持有的任务：已执行完的任务已移出队列，不会被重新执行；
+        未能及时退出的任务同样放回，由其他worker领取。
+
+        Args:
+            timeout: 等待执行中的任务退出的最长时间（秒）
+        """
+        if not self._threads:
+            return
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+        with self._lock:
+            running = dict(self._running)
+        # 中断的任务放回队列后由其他worker重新执行，停止时不修改任务状态
+        for task_id in running:
+            self.task_service.request_stop(task_id, lease_lost=True)
+        deadline = time.monotonic() + timeout
+        for task_id, thread in running.items():
+            if thread is None:
+                continue
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+            if thread.is_alive():
+                logger.warning(f"任务 {task_id} 未在 {timeout} 秒内停止，直接放回队列")
+
+        from ..database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            released = self.queue.release(db, self.worker_id)
+            if released:
+                logger.info(f"任务worker退出，{released} 个执行中的任务已放回队列")
+        except Exception as e:
+            logger.error(f"放回任务失败: {e}", exc_info=True)
+        finally:
+            db.close()
+        logger.info(f"任务worker已停止: {self.worker_id}")
+
+    def run_forever(self):
+        """启动worker并阻塞到 stop() 被调用（独立worker进程使用）"""
+        self.start()
+        self._stopping.wait()
+
+    def wake(self):
+        """有新任务入队时立即领取（同一进程内入队时调用）"""
+        self._wake.set()
+
+    def running_task_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._running)
+
+    # ------------------------------------------------------------------
+    # 领取和执行
+    # ------------------------------------------------------------------
+
+    def _poll_loop(self):
+        while not self._stopping.is_set():
+            task_id = None
+            if len(self.running_task_ids()) < self.concurrency:
+                try:
+                    task_id = self._claim()
+                except Exception as e:
+                    logger.error(f"领取任务失败: {e}")
+            if task_id is not None:
+                self._spawn(task_id)
+                continue
+            self._wake.wait(settings.task_poll_seconds)
+            self._wake.clear()
+
+    def _claim(self) -> Optional[int]:
+        from ..database import worker_session
+
+        db = worker_session("task_worker:claim")
+        try:
+            return self.queue.claim(db, self.worker_id)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _spawn(self, task_id: int):
+        thread = threading.Thread(
+            target=self._run_task, args=(task_id,), name=f"task-{task_id}", daemon=True
+        )
+        with self._lock:
+            self._running[task_id] = thread
+        thread.start()
+
+    def _run_task(self, task_id: int):
+        from ..database import SessionLocal
+
+        try:
+            db = SessionLocal()
+            try:
+                status = db.query(Task.status).filter(Task.id == task_id).scalar()
+            finally:
+                db.close()
+
+            # 领取前已被停止/暂停的任务不再执行
+            if status == "running":
+                logger.info(f"[{self.worker_id}] 开始执行任务: {task_id}")
+                self.task_service._execute_task(task_id)
+            else:
+                logger.info(f"任务 {task_id} 状态为 {status}，跳过执行")
+        except Exception as e:
+            logger.error(f"执行任务 {task_id} 失败: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._running.pop(task_id, None)
+            db = SessionLocal()
+            try:
+                # worker退出时被中断的任务（状态仍为running）保留队列记录，
+                # 由 stop() 放回队列
+                interrupted = (
+                    self._stopping.is_set()
+                    and db.query(Task.status).filter(Task.id == task_id).scalar()
+                    == "running"
+                )
+                if not interrupted:
+                    self.queue.complete(db, task_id, self.worker_id)
+            except Exception as e:
+                logger.error(f"移除任务 {task_id} 的队列记录失败: {e}")
+            finally:
+                db.close()
+            self._wake.set()
+
+    # ------------------------------------------------------------------
+    # 续租和停止信号
+    # ------------------------------------------------------------------
+
+    def _heartbeat_loop(self):
+        while not self._stopping.wait(settings.task_heartbeat_seconds):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.error(f"任务续租失败: {e}")
+
+    def heartbeat(self):
+        """为执行中的任务续租，并停止租约已丢失或已在数据库中被停止/暂停的任务"""
+        task_ids = self.running_task_ids()
+        if not task_ids:
+            return
+
+        from ..database import worker_session
+
+        db = worker_session("task_worker:heartbeat")
+        try:
+            owned = self.queue.heartbeat(db, self.worker_id, task_ids)
+            statuses = dict(
+                db.query(Task.id, Task.status).filter(Task.id.in_(task_ids)).all()
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        for task_id in task_ids:
+            if task_id not in owned:
+                # 租约已被其他worker领取（本进程长时间未能续租），由对方重新执行，
+                # 本进程停止执行，避免两个worker同时执行同一任务
+                logger.warning(
+                    f"任务 {task_id} 的租约已不属于 {self.worker_id}，停止本进程的执行"
+                )
+                self.task_service.request_stop(task_id, lease_lost=True)
+            elif statuses.get(task_id) != "running":
+                self.task_service.request_stop(task_id)
+
+
+# 全局任务队列服务实例
+_task_queue_service: Optional[TaskQueueService] = None
+# 本进程的任务worker（API进程内运行或独立worker进程）
+_task_worker: Optional[TaskWorker] = None
+
+
+def get_task_queue_service() -> TaskQueueService:
+    """获取任务队列服务实例"""
+    global _task_queue_service
+    if _task_queue_service is None:
+        _task_queue_service = TaskQueueService()
+    return _task_queue_service
+
+
+def get_task_worker() -> TaskWorker:
+    """获取本进程的任务worker"""
+    global _task_worker
+    if _task_worker is None:
+        _task_worker = TaskWorker()
+    return _task_worker
+
+
+def wake_task_worker():
+    """通知本进程的任务worker有新任务入队（本进程未运行worker时忽略）"""
+    if _task_worker is not None and _task_worker.running:
+        _task_worker.wake()
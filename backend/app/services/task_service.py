@@ -18,16 +18,38 @@
 import logging
 import threading
 import os
-from typing import Optional, Dict, Any
+from collections import deque
+from functools import partial
+from typing import Optional, Dict, Any, Callable, Iterable, List
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 
-from ..models.task import Task, TaskPolicy
+from ..models.task import Task, TaskPolicy, TaskFilePurge, TaskQueueItem
 from ..models.policy import Policy
+from ..config import settings
 from .policy_service import PolicyService
+from .unit_of_work import BatchedUnitOfWork
+from .progress_buffer import ProgressBuffer
+from .progress_bus import get_progress_bus
+from .progress_channel import get_progress_channel
+from .pagination import keyset_paginate
+from .count_service import get_count_service
+from .utils import load_only_columns
 
 logger = logging.getLogger(__name__)
 
+# 任务执行结束的回调（进程内），参数为任务ID
+_finish_listeners: List[Callable[[int], None]] = []
+
+
+def add_task_finish_listener(listener: Callable[[int], None]):
+    """注册任务执行结束的回调
+
+    回调在执行任务的线程中调用，应尽快返回（耗时操作交给其他线程）。
+    """
+    if listener not in _finish_listeners:
+        _finish_listeners.append(listener)
+
 
 class TaskService:
     """任务服务"""
@@ -35,7 +57,6 @@ class TaskService:
     def __init__(self):
         """初始化任务服务"""
         self.policy_service = PolicyService()
-        self._running_tasks: Dict[int, threading.Thread] = {}
         self._crawler_instances: Dict[int, Any] = {}  # 保存爬虫实例用于停止操作
         self._crawler_lock = threading.Lock()  # 线程安全锁
 
@@ -114,17 +135,29 @@ class TaskService:
             logger.error(f"创建任务失败: {e}", exc_info=True)
             raise
 
-    def start_task(self, db: Session, task_id: int, background: bool = True) -> Task:
+    def start_task(
+        self,
+        db: Session,
+        task_id: int,
+        background: bool = True,
+        priority: Optional[int] = None,
+    ) -> Task:
         """启动任务
 
+        后台执行时任务写入数据库任务队列，由任意进程中的任务worker按优先级
+        和并发上限领取执行。
+
         Args:
             db: 数据库会话
             task_id: 任务ID
             background: 是否在后台执行
+            priority: 排队优先级（默认为手动任务优先级，见 TaskQueueService）
 
         Returns:
             Task对象
         """
+        from .task_queue_service import get_task_queue_service
+
         task = db.query(Task).filter(Task.id == task_id).first()
         if not task:
             raise ValueError(f"任务不存在: {task_id}")
@@ -135,9 +168,15 @@ class TaskService:
         if task.status in ["completed", "cancelled"]:
             raise ValueError(f"任务已完成或已取消: {task_id}")
 
-        # 更新任务状态
+        # 更新任务状态（后台执行时与入队在同一事务中提交）
         task.status = "running"
         task.start_time = datetime.now(timezone.utc)
+        if background:
+            try:
+                get_task_queue_service().enqueue(db, task, priority=priority)
+            except ValueError:
+                db.rollback()
+                raise
         db.commit()
 
         # 发送任务开始邮件通知（如果启用且有收件人）
@@ -147,8 +186,6 @@ class TaskService:
             email_service = get_email_service()
             # 传入db以实时加载配置
             if email_service.is_enabled(db):
-                import asyncio
-
                 # 准备任务配置信息
                 config = task.config_json or {}
                 data_sources = []
@@ -170,48 +207,34 @@ class TaskService:
 
                 max_pages = config.get("max_pages")
 
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    result = loop.run_until_complete(
-                        email_service.send_task_start_notification(
-                            task_name=task.task_name,
-                            task_type=task.task_type,
-                            data_sources=data_sources,
-                            keywords=keywords,
-                            date_range=date_range,
-                            max_pages=max_pages,
-                            start_time=task.start_time,
-                            db=db,  # 传入db以实时加载配置
-                        )
-                    )
-
-                    if result["success"]:
-                        logger.info(f"✅ 任务开始邮件通知发送成功: {task.task_name}")
-                    else:
-                        logger.warning(
-                            f"❌ 任务开始邮件通知发送失败: {result.get('message', '未知错误')}"
-                        )
+                # 只写入发件箱，不等待SMTP服务器
+                result = email_service.send_task_start_notification(
+                    task_name=task.task_name,
+                    task_type=task.task_type,
+                    data_sources=data_sources,
+                    keywords=keywords,
+                    date_range=date_range,
+                    max_pages=max_pages,
+                    start_time=task.start_time,
+                    db=db,  # 传入db以实时加载配置
+                )
 
-                except Exception as email_error:
-                    logger.error(
-                        f"❌ 发送任务开始邮件通知时发生异常: {email_error}",
-                        exc_info=True,
+                if result["success"]:
+                    logger.info(f"✅ 任务开始邮件通知已加入发件箱: {task.task_name}")
+                else:
+                    logger.warning(
+                        f"❌ 任务开始邮件通知发送失败: {result.get('message', '未知错误')}"
                     )
-                finally:
-                    loop.close()
             else:
                 logger.debug(f"邮件服务未启用，跳过任务开始通知: {task.task_name}")
         except Exception as e:
             logger.error(f"❌ 任务开始邮件通知流程异常: {e}", exc_info=True)
 
         if background:
-            # 在后台线程执行
-            thread = threading.Thread(
-                target=self._execute_task, args=(task_id,), daemon=True
-            )
-            thread.start()
-            self._running_tasks[task_id] = thread
+            # 已入队，通知本进程的worker立即领取（其他进程的worker按轮询间隔领取）
+            from .task_queue_service import wake_task_worker
+
+            wake_task_worker()
         else:
             # 同步执行
             self._execute_task(task_id)
@@ -228,6 +251,8 @@ class TaskService:
         Returns:
             是否成功停止
         """
+        from .task_queue_service import get_task_queue_service
+
         task = db.query(Task).filter(Task.id == task_id).first()
         if not task:
             return False
@@ -235,20 +260,14 @@ class TaskService:
         if task.status != "running":
             return False
 
-        # 更新任务状态
+        # 更新任务状态（执行任务的worker续租时读到新状态后停止爬虫），移除尚未领取的排队记录
         task.status = "cancelled"
         task.end_time = datetime.now(timezone.utc)
+        get_task_queue_service().cancel(db, task_id)
         db.commit()
 
-        # 停止爬虫（如果正在运行）- 线程安全
-        with self._crawler_lock:
-            crawler = self._crawler_instances.get(task_id)
-            if crawler and hasattr(crawler, "stop_requested"):
-                crawler.stop_requested = True
-                logger.info(f"已设置爬虫停止标志: {task_id}")
-            # 立即删除弱引用，让爬虫实例可以被垃圾回收
-            if task_id in self._crawler_instances:
-                del self._crawler_instances[task_id]
+        # 任务在本进程执行时立即停止
+        self.request_stop(task_id)
 
         logger.info(f"任务已停止: {task_id}")
         return True
@@ -263,6 +282,8 @@ class TaskService:
         Returns:
             是否成功暂停
         """
+        from .task_queue_service import get_task_queue_service
+
         task = db.query(Task).filter(Task.id == task_id).first()
         if not task:
             return False
@@ -270,21 +291,40 @@ class TaskService:
         if task.status != "running":
             return False
 
-        # 更新任务状态为暂停
+        # 更新任务状态为暂停（执行任务的worker续租时读到新状态后停止爬虫）
         task.status = "paused"
         task.end_time = datetime.now(timezone.utc)
+        get_task_queue_service().cancel(db, task_id)
         db.commit()
 
-        # 停止爬虫（如果正在运行）- 线程安全
-        with self._crawler_lock:
-            crawler = self._crawler_instances.get(task_id)
-            if crawler and hasattr(crawler, "stop_requested"):
-                crawler.stop_requested = True
-                logger.info(f"已设置爬虫停止标志（暂停）: {task_id}")
+        # 任务在本进程执行时立即停止
+        self.request_stop(task_id)
 
         logger.info(f"任务已暂停: {task_id}")
         return True
 
+    def request_stop(self, task_id: int, lease_lost: bool = False) -> bool:
+        """设置本进程中执行该任务的爬虫的停止标志
+
+        Args:
+            task_id: 任务ID
+            lease_lost: 任务的租约已被其他worker领取或即将放回队列（worker退出），
+                停止后不修改任务状态（由重新执行的worker负责）
+
+        Returns:
+            任务是否在本进程中执行
+        """
+        with self._crawler_lock:
+            crawler = self._crawler_instances.get(task_id)
+            if crawler and hasattr(crawler, "stop_requested"):
+                if lease_lost:
+                    crawler.lease_lost = True
+                if not crawler.stop_requested:
+                    crawler.stop_requested = True
+                    logger.info(f"已设置爬虫停止标志: {task_id}")
+                return True
+        return False
+
     def resume_task(self, db: Session, task_id: int) -> bool:
         """恢复暂停的任务
 
@@ -321,19 +361,30 @@ class TaskService:
         """获取任务"""
         return db.query(Task).filter(Task.id == task_id).first()
 
-    def delete_task(self, db: Session, task_id: int) -> bool:
+    def delete_task(self, db: Session, task_id: int) -> TaskFilePurge:
         """删除任务（包括关联的数据和文件）
 
+        数据库记录按任务ID集合删除并在请求内提交；文件清理写入一条清理作业，
+        提交后在后台执行，返回的作业可用于查询清理进度。
+
         Args:
             db: 数据库会话
             task_id: 任务ID
 
         Returns:
-            是否成功删除
+            文件清理作业
 
         Raises:
             ValueError: 如果任务不存在或正在运行
         """
+        from sqlalchemy import func, or_, select
+        from ..models.attachment import Attachment
+        from ..models.policy import PolicyContent
+        from ..models.system_config import BackupRecord
+        from .blob_store_service import get_blob_store_service
+        from .facet_service import facet_key
+        from .file_purge_service import get_file_purge_service
+
         task = db.query(Task).filter(Task.id == task_id).first()
         if not task:
             raise ValueError(f"任务不存在: {task_id}")
@@ -342,95 +393,106 @@ class TaskService:
         if task.status == "running":
             raise ValueError("无法删除正在运行的任务，请先停止任务")
 
-        # 1. 查找任务关联的所有政策（通过task_id直接查找，更高效）
-        policies = db.query(Policy).filter(Policy.task_id == task_id).all()
-
-        deleted_policies_count = 0
-        deleted_files_count = 0
-
-        # 2. 对每个政策进行处理（因为policy.task_id == task_id，这些政策只属于该任务）
-        from .storage_service import StorageService
+        task_name = task.task_name
+        task_policy_ids = select(Policy.id).where(Policy.task_id == task_id)
+        policy_ids = [
+            row[0] for row in db.query(Policy.id).filter(Policy.task_id == task_id)
+        ]
 
-        storage_service = StorageService()
-
-        for policy in policies:
-            policy_id = policy.id
-
-            # 删除政策的所有文件（文件路径包含task_id，确保独立）
-            file_types = ["markdown", "docx"]
-            for file_type in file_types:
-                try:
-                    if storage_service.delete_policy_file(
-                        policy_id, file_type, task_id=task_id
-                    ):
-                        deleted_files_count += 1
-                except Exception as e:
-                    logger.warning(f"删除政策 {policy_id} 的 {file_type} 文件失败: {e}")
-
-            # 删除附件
-            from ..models.attachment import Attachment
-
-            attachments = (
-                db.query(Attachment).filter(Attachment.policy_id == policy_id).all()
+        # 1. 附件：内容块存储的只释放引用，旧附件的文件交给清理作业删除
+        attachments = (
+            db.query(
+                Attachment.blob_sha256, Attachment.file_path, Attachment.file_s3_key
             )
-            for attachment in attachments:
-                # 删除附件文件
-                if attachment.file_path and os.path.exists(attachment.file_path):
-                    try:
-                        os.remove(attachment.file_path)
-                        deleted_files_count += 1
-                    except Exception as e:
-                        logger.warning(
-                            f"删除附件文件失败: {attachment.file_path} - {e}"
-                        )
-                # 删除S3附件（如果有）
-                if attachment.file_s3_key and storage_service.s3_service.is_enabled():
-                    try:
-                        storage_service.s3_service.delete_file(attachment.file_s3_key)
-                    except Exception as e:
-                        logger.warning(
-                            f"删除S3附件失败: {attachment.file_s3_key} - {e}"
-                        )
-                # 删除附件记录
-                db.delete(attachment)
-
-            # 删除政策记录
-            db.delete(policy)
-            deleted_policies_count += 1
-
-        # 3. 删除TaskPolicy关联记录（虽然policy.task_id已经关联，但为了数据一致性，也删除关联记录）
-        task_policies = db.query(TaskPolicy).filter(TaskPolicy.task_id == task_id).all()
-        for task_policy in task_policies:
-            db.delete(task_policy)
-
-        # 4. 更新关联的备份记录（不删除备份）
-        from ..models.system_config import BackupRecord
+            .filter(Attachment.policy_id.in_(task_policy_ids))
+            .all()
+        )
+        released_blob_hashes = [
+            row.blob_sha256 for row in attachments if row.blob_sha256
+        ]
+        legacy_attachments = [row for row in attachments if not row.blob_sha256]
+
+        # 2. 筛选项计数按分组一次扣减
+        facet_groups = (
+            db.query(
+                Policy.source_name, Policy.category, Policy.level, func.count(Policy.id)
+            )
+            .filter(Policy.task_id == task_id)
+            .group_by(Policy.source_name, Policy.category, Policy.level)
+            .all()
+        )
+        facet_deltas: Dict[tuple, int] = {}
+        for row in facet_groups:
+            key = facet_key(row)
+            facet_deltas[key] = facet_deltas.get(key, 0) - row[3]
+        self.policy_service.facet_service.record(db, facet_deltas)
+
+        # 3. 按集合删除子表和政策（PostgreSQL 外键也会级联，显式删除兼容不强制外键的SQLite）
+        db.query(Attachment).filter(Attachment.policy_id.in_(task_policy_ids)).delete(
+            synchronize_session=False
+        )
+        db.query(PolicyContent).filter(
+            PolicyContent.policy_id.in_(task_policy_ids)
+        ).delete(synchronize_session=False)
+        db.query(TaskQueueItem).filter(TaskQueueItem.task_id == task_id).delete(
+            synchronize_session=False
+        )
+        db.query(TaskPolicy).filter(
+            or_(
+                TaskPolicy.task_id == task_id,
+                TaskPolicy.policy_id.in_(task_policy_ids),
+            )
+        ).delete(synchronize_session=False)
+        deleted_policies_count = (
+            db.query(Policy)
+            .filter(Policy.task_id == task_id)
+            .delete(synchronize_session=False)
+        )
 
-        backups = (
+        # 4. 更新关联的备份记录（不删除备份），没有保存任务名称的现在保存
+        updated_backups_count = (
             db.query(BackupRecord)
             .filter(
                 BackupRecord.source_type == "task",
                 BackupRecord.source_id == str(task_id),
             )
-            .all()
+            .update(
+                {
+                    BackupRecord.source_deleted: True,
+                    BackupRecord.source_name: func.coalesce(
+                        func.nullif(BackupRecord.source_name, ""), task_name
+                    ),
+                },
+                synchronize_session=False,
+            )
         )
 
-        for backup in backups:
-            backup.source_deleted = True
-            # 如果还没有保存任务名称，现在保存
-            if not backup.source_name:
-                backup.source_name = task.task_name
+        # 5. 释放附件内容块引用
+        get_blob_store_service().release(db, released_blob_hashes)
 
-        # 5. 删除任务记录
+        # 6. 记录文件清理作业并删除任务记录
+        purge = get_file_purge_service().create_purge(
+            db,
+            task,
+            policy_ids,
+            legacy_attachments=legacy_attachments,
+            blob_hashes=released_blob_hashes,
+        )
         db.delete(task)
         db.commit()
+        self.policy_service.search_service.remove_policies(policy_ids)
+        get_count_service().invalidate("policies")
+
+        # 7. 后台清理文件（任务目录、S3对象、缓存和引用归零的内容块）
+        get_file_purge_service().submit(purge.id)
 
         logger.info(
-            f"已删除任务: {task.task_name} (ID: {task_id}), "
-            f"删除了 {deleted_policies_count} 个政策, {deleted_files_count} 个文件, "
-            f"更新了 {len(backups)} 个备份记录（备份已保留）"
+            f"已删除任务: {task_name} (ID: {task_id}), "
+            f"删除了 {deleted_policies_count} 个政策, "
+            f"更新了 {updated_backups_count} 个备份记录（备份已保留）, "
+            f"文件清理作业: {purge.id}"
         )
-        return True
+        return purge
 
     def get_tasks(
         self,
@@ -440,11 +502,20 @@ class TaskService:
         task_type: Optional[str] = None,
         status: Optional[str] = None,
         completed_only: bool = False,
+        cursor: Optional[str] = None,
+        columns: Optional[Iterable[str]] = None,
     ) -> tuple:
         """获取任务列表
 
+        Args:
+            cursor: 上一页返回的分页游标（优先于skip，按 (created_at, id) 键集分页）
+            columns: 只加载这些列（列表视图不需要配置和进度消息等大字段）
+
         Returns:
-            (任务列表, 总数)
+            (任务列表, 总数)，任务列表为 Page，next_cursor 为下一页游标
+
+        Raises:
+            ValueError: 游标格式无效
         """
         query = db.query(Task)
 
@@ -454,15 +525,84 @@ class TaskService:
             query = query.filter(Task.status == status)
 
         total = query.count()
-        tasks = query.order_by(Task.created_at.desc()).offset(skip).limit(limit).all()
+        if columns:
+            query = query.options(load_only_columns(Task, columns))
+        tasks = keyset_paginate(
+            query, Task.created_at, Task.id, limit, skip=skip, cursor=cursor
+        )
 
         return tasks, total
 
+    @staticmethod
+    def _set_task_fields(session: Session, task_id: int, **fields):
+        """设置任务字段（不提交，用作批量事务的附带写入）"""
+        task = session.get(Task, task_id)
+        if task is None:
+            return
+        for key, value in fields.items():
+            setattr(task, key, value)
+
+    def _store_crawled_policy_file(
+        self,
+        storage_service,
+        db_policy: Policy,
+        file_type: str,
+        file_path: Optional[str],
+        content_type: str,
+        task_id: int,
+    ) -> bool:
+        """将爬虫生成的政策文件保存到存储服务，并更新政策的文件路径（不提交）
+
+        Args:
+            storage_service: 存储服务
+            db_policy: 政策记录
+            file_type: 文件类型（markdown/docx）
+            file_path: 爬虫输出的文件路径
+            content_type: 文件MIME类型
+            task_id: 任务ID
+
+        Returns:
+            是否已保存到其他位置（此时爬虫输出的原始文件可以删除）
+        """
+        if not file_path or not os.path.exists(file_path):
+            return False
+
+        try:
+            storage_result = storage_service.save_policy_file(
+                db_policy.id,
+                file_type,
+                file_path,
+                content_type=content_type,
+                task_id=task_id,
+            )
+            if not storage_result.get("success"):
+                return False
+
+            # 如果之前已有本地路径，删除旧文件
+            old_path = getattr(db_policy, f"{file_type}_local_path")
+            new_path = storage_result.get("local_path")
+            if old_path and old_path != new_path and os.path.exists(old_path):
+                try:
+                    os.remove(old_path)
+                    logger.debug(f"删除旧{file_type}文件: {old_path}")
+                except Exception as e:
+                    logger.warning(f"删除旧{file_type}文件失败: {e}")
+
+            setattr(db_policy, f"{file_type}_local_path", new_path)
+            setattr(db_policy, f"{file_type}_s3_key", storage_result.get("s3_key"))
+            logger.debug(f"政策 {db_policy.id} 的{file_type}文件已保存到存储服务")
+            return file_path != new_path
+
+        except Exception as e:
+            logger.warning(f"保存政策 {db_policy.id} 的{file_type}文件失败: {e}")
+            return False
+
     def _execute_task(self, task_id: int):
         """执行任务（内部方法）"""
-        from ..database import SessionLocal
+        from ..database import release_connection, worker_session
 
-        db = SessionLocal()
+        db = worker_session(f"task:{task_id}")
+        progress: Optional[ProgressBuffer] = None
         try:
             task = db.query(Task).filter(Task.id == task_id).first()
             if not task:
@@ -470,139 +610,113 @@ class TaskService:
                 return
 
             config = task.config_json or {}
+            # 政策批量写入事务（开始保存政策后创建）
+            uow: Optional[BatchedUnitOfWork] = None
+
+            # 进度消息先写入内存缓冲，按时间间隔/行数节流写入数据库
+            progress = ProgressBuffer(
+                task.progress_message,
+                flush_interval=settings.task_progress_flush_seconds,
+                flush_lines=settings.task_progress_flush_lines,
+                initial_seq=task.progress_seq or 0,
+                initial_counters=task.progress_counters,
+            )
 
-            # 创建进度回调，将进度消息保存到数据库
-            def progress_callback(message: str):
-                logger.info(f"[任务 {task_id}] {message}")
-                try:
-                    # 更新任务进度消息（追加模式，保留最近的进度信息）
-                    task = db.query(Task).filter(Task.id == task_id).first()
-                    if task:
-                        # 保留最近的进度消息（最多保留最后100行，约5000字符）
-                        current_msg = task.progress_message or ""
-                        lines = current_msg.split("\n") if current_msg else []
-                        # 限制单行消息长度
-                        max_line_length = 500
-                        if len(message) > max_line_length:
-                            message = message[:max_line_length] + "..."
-                        # 添加新消息
-                        lines.append(
-                            f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] {message}"
-                        )
-                        # 只保留最后100行
-                        if len(lines) > 100:
-                            lines = lines[-100:]
-                        # 限制总长度
-                        max_total_length = 10000
-                        task.progress_message = "\n".join(lines)
-                        if len(task.progress_message) > max_total_length:
-                            task.progress_message = task.progress_message[
-                                -max_total_length:
-                            ]
-                        db.commit()
-
-                        # 触发SSE进度广播
-                        try:
-                            from ..api.tasks import progress_manager
-
-                            # 获取爬虫实例的进度数据
-                            progress_obj = None
-                            with self._crawler_lock:
-                                crawler = self._crawler_instances.get(task_id)
-                                if crawler and hasattr(crawler, "progress"):
-                                    progress_obj = crawler.progress
-
-                            # 准备进度数据 - 即使没有crawler progress也要发送基本数据
-                            progress_data_payload = None
-                            if progress_obj and hasattr(progress_obj, "to_dict"):
-                                try:
-                                    progress_data_payload = progress_obj.to_dict()
-                                    logger.debug(
-                                        f"发送详细进度数据: {progress_data_payload.get('total_count', 'N/A')} 总数, {progress_data_payload.get('completed_count', 0)} 已完成"
-                                    )
-                                except Exception as e:
-                                    logger.warning(f"序列化进度数据失败: {e}")
-                            else:
-                                # 如果没有crawler progress，发送基本的任务统计信息
-                                try:
-                                    # 查询任务相关的政策数量作为预估总数
-                                    task_policies = (
-                                        db.query(TaskPolicy)
-                                        .filter(TaskPolicy.task_id == task_id)
-                                        .all()
-                                    )
-                                    estimated_total = (
-                                        len(task_policies) if task_policies else 0
-                                    )
-
-                                    progress_data_payload = {
-                                        "total_count": estimated_total,
-                                        "completed_count": task.success_count or 0,
-                                        "failed_count": task.failed_count or 0,
-                                        "success_rate": 0.0,
-                                        "progress_percentage": 0.0,
-                                        "current_policy_title": "",
-                                        "current_stage": "unknown",
-                                        "stages": {},
-                                    }
-
-                                    # 计算成功率
-                                    total_processed = (
-                                        progress_data_payload["completed_count"]
-                                        + progress_data_payload["failed_count"]
-                                    )
-                                    if total_processed > 0:
-                                        progress_data_payload["success_rate"] = (
-                                            progress_data_payload["completed_count"]
-                                            / total_processed
-                                        ) * 100
-                                        progress_data_payload["progress_percentage"] = (
-                                            total_processed
-                                            / max(
-                                                progress_data_payload["total_count"], 1
-                                            )
-                                        ) * 100
-
-                                    logger.debug(
-                                        f"发送基本进度数据: {progress_data_payload['total_count']} 总数, {progress_data_payload['completed_count']} 已完成, {progress_data_payload['success_rate']:.1f}% 成功率"
-                                    )
+            def write_progress(session: Session):
+                """把进度缓冲的当前内容写入任务的进度消息（不提交）
+
+                同一事务中发送跨进程进度通知，提交后送达，其他进程的
+                SSE连接读到的进度与数据库一致
+                """
+                session.query(Task).filter(Task.id == task_id).update(
+                    {
+                        Task.progress_message: progress.render(),
+                        Task.progress_seq: progress.seq,
+                        Task.progress_counters: progress.counter_state(),
+                    },
+                    synchronize_session=False,
+                )
+                get_progress_channel().notify(
+                    session, task_id, progress.seq, dict(progress.counters)
+                )
 
-                                except Exception as e:
-                                    logger.warning(f"生成基本进度数据失败: {e}")
-
-                            # 发送详细的进度数据
-                            progress_data = {
-                                "type": "progress_update",
-                                "task_id": task_id,
-                                "message": message,
-                                "progress_message": task.progress_message,
-                                "progress_data": progress_data_payload,
-                                "updated_at": datetime.now(timezone.utc).isoformat(),
-                            }
+            def flush_progress():
+                """把进度缓冲写入数据库（不提交，批量写入期间批量提交失败时会重放）"""
+                if uow is not None:
+                    uow.add_side_write("progress", write_progress)
+                else:
+                    write_progress(db)
+                progress.mark_flushed()
 
-                            logger.info(
-                                f"SSE广播进度更新: task_id={task_id}, message='{message[:50]}...', has_progress_data={progress_obj is not None}"
-                            )
+            def progress_snapshot() -> Dict[str, Any]:
+                """当前进度快照（SSE推送，按推送间隔合并后才生成一次）"""
+                # 获取爬虫实例的进度数据
+                progress_obj = None
+                with self._crawler_lock:
+                    crawler = self._crawler_instances.get(task_id)
+                    if crawler and hasattr(crawler, "progress"):
+                        progress_obj = crawler.progress
 
-                            # 在新的事件循环中广播（因为这里可能在子线程中）
-                            import asyncio
+                # 准备进度数据 - 即使没有crawler progress也要发送基本数据
+                progress_data_payload = None
+                if progress_obj and hasattr(progress_obj, "to_dict"):
+                    try:
+                        progress_data_payload = progress_obj.to_dict()
+                    except Exception as e:
+                        logger.warning(f"序列化进度数据失败: {e}")
+                else:
+                    # 如果没有crawler progress，发送进度缓冲中的计数器
+                    counters = progress.counters
+                    progress_data_payload = {
+                        "total_count": counters.get("total_count", 0),
+                        "completed_count": counters.get("completed_count", 0),
+                        "failed_count": counters.get("failed_count", 0),
+                        "success_rate": 0.0,
+                        "progress_percentage": 0.0,
+                        "current_policy_title": "",
+                        "current_stage": "unknown",
+                        "stages": {},
+                    }
+
+                    # 计算成功率
+                    total_processed = (
+                        progress_data_payload["completed_count"]
+                        + progress_data_payload["failed_count"]
+                    )
+                    if total_processed > 0:
+                        progress_data_payload["success_rate"] = (
+                            progress_data_payload["completed_count"] / total_processed
+                        ) * 100
+                        progress_data_payload["progress_percentage"] = (
+                            total_processed
+                            / max(progress_data_payload["total_count"], 1)
+                        ) * 100
+
+                # 只推送新的进度行（总线合并时附加），不再每次发送完整的进度消息
+                return {
+                    "type": "progress_update",
+                    "task_id": task_id,
+                    "progress_data": progress_data_payload,
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                }
+
+            # 创建进度回调
+            def progress_callback(message: str):
+                logger.info(f"[任务 {task_id}] {message}")
+                try:
+                    seq, line = progress.append(message)
+                    if progress.should_flush():
+                        flush_progress()
+                        # 政策批量写入期间，进度消息随批量事务一起提交
+                        if uow is not None:
+                            uow.checkpoint()
+                            release_connection(db)
+                        else:
+                            db.commit()
 
-                            try:
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-                                loop.run_until_complete(
-                                    progress_manager.broadcast_progress(
-                                        task_id, progress_data
-                                    )
-                                )
-                                loop.close()
-                            except Exception as broadcast_error:
-                                # SSE广播失败不影响主要流程
-                                logger.debug(f"SSE广播失败: {broadcast_error}")
-
-                        except ImportError:
-                            # 如果无法导入，跳过SSE广播
-                            pass
+                    # 推送SSE进度：本进程没有订阅者时直接返回，有订阅者时
+                    # 按推送间隔合并，每个间隔只生成和序列化一次快照
+                    get_progress_bus().publish(task_id, line, progress_snapshot, seq)
                 except Exception as e:
                     logger.warning(f"保存进度消息失败: {e}")
                     db.rollback()
@@ -787,6 +901,8 @@ class TaskService:
 
                 # 执行爬取（使用try-except确保异常能被捕获）
                 policies = []
+                # 列表爬取耗时很长，期间不占用数据库连接
+                release_connection(db)
                 try:
                     policies = crawler.search_all_policies(
                         keywords=keywords if keywords else None,
@@ -850,6 +966,81 @@ class TaskService:
                 # 任务运行中邮件通知检查
                 email_notified = False  # 标记是否已发送运行中邮件通知
 
+                # 附件下载与后续政策的爬取重叠进行：按顺序处理已下载结束的附件，
+                # 积压超过下载线程数时等待最早的一个，任务结束前全部处理完
+                attachment_crawler = crawler
+                pending_attachments = deque()
+                max_pending_attachments = crawler_config.get("download_max_workers", 8)
+                # 附件处理会自行提交，使用独立会话，避免提前提交批量事务中的政策
+                attachment_db = worker_session(f"task:{task_id}:attachments")
+
+                # 政策写入按批提交：每 db_batch_size 条或 db_batch_interval_ms 毫秒一个事务
+                from .storage_service import StorageService
+
+                storage_service = StorageService()
+                # 短会话模式下政策写入推迟到提交时执行，爬取期间不占用连接
+                uow = BatchedUnitOfWork(
+                    db,
+                    max_items=crawler_config.get("db_batch_size", 20),
+                    max_interval_ms=crawler_config.get("db_batch_interval_ms", 2000),
+                    defer_writes=settings.db_worker_short_sessions,
+                )
+                reported_saved_count = 0
+                progress.set_counters(total_count=len(policies))
+
+                def process_pending_attachments(drain: bool = False):
+                    """处理附件已下载结束的政策（drain=True时等待全部完成）"""
+                    while pending_attachments:
+                        pending_policy_id, pending_policy = pending_attachments[0]
+                        if not (
+                            drain
+                            or len(pending_attachments) > max_pending_attachments
+                            or attachment_crawler.attachments_ready(pending_policy)
+                        ):
+                            break
+                        pending_attachments.popleft()
+
+                        release_connection(attachment_db)
+                        attachment_paths = attachment_crawler.wait_for_attachments(
+                            pending_policy, callback=progress_callback
+                        )
+                        if not attachment_paths:
+                            logger.debug(f"政策 {pending_policy_id} 没有附件需要处理")
+                            continue
+
+                        try:
+                            # 使用policy_service的统一附件处理方法
+                            attachment_result = self.policy_service.process_policy_attachments_after_crawl(
+                                db=attachment_db,
+                                policy_id=pending_policy_id,
+                                attachment_data=attachment_paths,
+                                task_id=task_id,
+                                auto_merge=True,  # 自动尝试合并附件内容到正文
+                            )
+
+                            if attachment_result.get("attachments_saved", 0) > 0:
+                                logger.info(
+                                    f"政策 {pending_policy_id} 保存了 {attachment_result['attachments_saved']} 个附件"
+                                )
+
+                                if attachment_result.get("content_merged"):
+                                    logger.info(
+                                        f"政策 {pending_policy_id} 的附件内容已自动合并到正文"
+                                    )
+                                elif attachment_result.get("merge_errors"):
+                                    logger.warning(
+                                        f"政策 {pending_policy_id} 附件内容合并失败: {'; '.join(attachment_result['merge_errors'])}"
+                                    )
+                            else:
+                                logger.debug(
+                                    f"政策 {pending_policy_id} 没有附件需要处理"
+                                )
+
+                        except Exception as e:
+                            logger.warning(
+                                f"处理政策 {pending_policy_id} 的附件失败: {e}"
+                            )
+
                 # 在循环中检查停止标志
                 for i, policy in enumerate(policies):
                     # 检查是否请求停止 - 线程安全
@@ -865,20 +1056,33 @@ class TaskService:
                             )
                             # 重新查询任务状态
                             task = db.query(Task).filter(Task.id == task_id).first()
-                            if task and task.status == "paused":
-                                task.status = "paused"
-                            else:
-                                task.status = "cancelled"
-                            task.end_time = datetime.now(timezone.utc)
-                            db.commit()
+                            stop_status = (
+                                "paused"
+                                if task and task.status == "paused"
+                                else "cancelled"
+                            )
+                            if not getattr(crawler, "lease_lost", False):
+                                uow.add_side_write(
+                                    "task_status",
+                                    partial(
+                                        self._set_task_fields,
+                                        task_id=task_id,
+                                        status=stop_status,
+                                        end_time=datetime.now(timezone.utc),
+                                    ),
+                                )
+                            uow.flush()
                             break
 
                     try:
                         # 对政策进行详细爬取（包括文件生成）
                         logger.info(f"开始详细爬取政策: {policy.title[:50]}...")
                         try:
+                            release_connection(db)
                             detailed_policy = crawler.crawl_single_policy(
-                                policy, callback=progress_callback
+                                policy,
+                                callback=progress_callback,
+                                wait_attachments=False,
                             )
                             if detailed_policy:
                                 policy = detailed_policy  # 使用详细爬取的结果
@@ -914,232 +1118,116 @@ class TaskService:
                                 policy_data["_data_source"] = policy._data_source
 
                         # 保存政策（传入task_id，确保每个任务的数据独立）
-                        db_policy = self.policy_service.save_policy(
-                            db, policy_data, task_id
-                        )
+                        # 在批量事务中执行，批量提交失败时会被逐条重放，因此这里
+                        # 只做可重复的写入；删除爬虫输出文件、登记附件处理放到提交之后
+                        def persist_policy(session: Session, policy_data=policy_data):
+                            db_policy, is_new = (
+                                self.policy_service.save_policy_with_status(
+                                    session, policy_data, task_id, commit=False
+                                )
+                            )
+                            if not db_policy:
+                                return None
 
-                        if db_policy:
                             # 如果爬虫生成了文件，通过storage_service保存文件并更新数据库路径
-                            from .storage_service import StorageService
-
-                            storage_service = StorageService()
-
-                            # 处理markdown文件（确保文件已保存到存储服务）
-                            if (
-                                "markdown_path" in policy_data
-                                and policy_data["markdown_path"]
+                            stored_paths = []
+                            for file_type, content_type in (
+                                ("markdown", "text/markdown"),
+                                (
+                                    "docx",
+                                    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                                ),
                             ):
-                                markdown_path = policy_data["markdown_path"]
-                                if os.path.exists(markdown_path):
-                                    try:
-                                        storage_result = (
-                                            storage_service.save_policy_file(
-                                                db_policy.id,
-                                                "markdown",
-                                                markdown_path,
-                                                content_type="text/markdown",
-                                                task_id=task_id,
-                                            )
-                                        )
-                                        if storage_result.get("success"):
-                                            # 如果之前已有本地路径，删除旧文件
-                                            old_path = db_policy.markdown_local_path
-                                            new_path = storage_result.get("local_path")
-                                            if (
-                                                old_path
-                                                and old_path != new_path
-                                                and os.path.exists(old_path)
-                                            ):
-                                                try:
-                                                    os.remove(old_path)
-                                                    logger.debug(
-                                                        f"删除旧markdown文件: {old_path}"
-                                                    )
-                                                except Exception as e:
-                                                    logger.warning(
-                                                        f"删除旧markdown文件失败: {e}"
-                                                    )
-                                            db_policy.markdown_local_path = new_path
-                                            db_policy.markdown_s3_key = (
-                                                storage_result.get("s3_key")
-                                            )
-                                            # 记录原始文件路径，用于后续清理
-                                            saved_file_paths.add(markdown_path)
-                                            # 删除爬虫输出目录中的原始文件（已保存到存储服务）
-                                            try:
-                                                if (
-                                                    os.path.exists(markdown_path)
-                                                    and markdown_path != new_path
-                                                ):
-                                                    os.remove(markdown_path)
-                                                    logger.debug(
-                                                        f"删除爬虫输出目录中的markdown文件: {markdown_path}"
-                                                    )
-                                            except Exception as e:
-                                                logger.warning(
-                                                    f"删除爬虫输出文件失败: {e}"
-                                                )
-                                            logger.debug(
-                                                f"政策 {db_policy.id} 的markdown文件已保存到存储服务"
-                                            )
-                                    except Exception as e:
-                                        logger.warning(
-                                            f"保存政策 {db_policy.id} 的markdown文件失败: {e}"
-                                        )
+                                file_path = policy_data.get(f"{file_type}_path")
+                                if self._store_crawled_policy_file(
+                                    storage_service,
+                                    db_policy,
+                                    file_type,
+                                    file_path,
+                                    content_type,
+                                    task_id,
+                                ):
+                                    stored_paths.append(file_path)
 
-                            # 处理docx文件（确保文件已保存到存储服务）
-                            if "docx_path" in policy_data and policy_data["docx_path"]:
-                                docx_path = policy_data["docx_path"]
-                                if os.path.exists(docx_path):
-                                    try:
-                                        storage_result = storage_service.save_policy_file(
-                                            db_policy.id,
-                                            "docx",
-                                            docx_path,
-                                            content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                            task_id=task_id,
-                                        )
-                                        if storage_result.get("success"):
-                                            # 如果之前已有本地路径，删除旧文件
-                                            old_path = db_policy.docx_local_path
-                                            new_path = storage_result.get("local_path")
-                                            if (
-                                                old_path
-                                                and old_path != new_path
-                                                and os.path.exists(old_path)
-                                            ):
-                                                try:
-                                                    os.remove(old_path)
-                                                    logger.debug(
-                                                        f"删除旧docx文件: {old_path}"
-                                                    )
-                                                except Exception as e:
-                                                    logger.warning(
-                                                        f"删除旧docx文件失败: {e}"
-                                                    )
-                                            db_policy.docx_local_path = new_path
-                                            db_policy.docx_s3_key = storage_result.get(
-                                                "s3_key"
-                                            )
-                                            # 记录原始文件路径，用于后续清理
-                                            saved_file_paths.add(docx_path)
-                                            # 删除爬虫输出目录中的原始文件（已保存到存储服务）
-                                            try:
-                                                if (
-                                                    os.path.exists(docx_path)
-                                                    and docx_path != new_path
-                                                ):
-                                                    os.remove(docx_path)
-                                                    logger.debug(
-                                                        f"删除爬虫输出目录中的docx文件: {docx_path}"
-                                                    )
-                                            except Exception as e:
-                                                logger.warning(
-                                                    f"删除爬虫输出文件失败: {e}"
-                                                )
-                                            logger.debug(
-                                                f"政策 {db_policy.id} 的docx文件已保存到存储服务"
-                                            )
-                                    except Exception as e:
-                                        logger.warning(
-                                            f"保存政策 {db_policy.id} 的docx文件失败: {e}"
-                                        )
+                            # 创建任务-政策关联（虽然policy.task_id已经关联，但为了数据一致性，也创建TaskPolicy记录）
+                            # 注意：由于policy.task_id已经关联到任务，TaskPolicy主要用于查询和统计
+                            insert = self.policy_service._dialect_insert(session)
+                            session.execute(
+                                insert(TaskPolicy)
+                                .values(task_id=task_id, policy_id=db_policy.id)
+                                .on_conflict_do_nothing()
+                            )
 
-                            # 处理附件（如果爬虫下载了附件）
-                            if (
-                                hasattr(policy, "_attachment_paths")
-                                and policy._attachment_paths
-                            ):
-                                try:
-                                    # 使用policy_service的统一附件处理方法
-                                    attachment_result = self.policy_service.process_policy_attachments_after_crawl(
-                                        db=db,
-                                        policy_id=db_policy.id,
-                                        attachment_data=policy._attachment_paths,
-                                        task_id=task_id,
-                                        auto_merge=True,  # 自动尝试合并附件内容到正文
-                                    )
+                            return db_policy.id, is_new, stored_paths
 
-                                    if (
-                                        attachment_result.get("attachments_saved", 0)
-                                        > 0
-                                    ):
-                                        logger.info(
-                                            f"政策 {db_policy.id} 保存了 {attachment_result['attachments_saved']} 个附件"
-                                        )
+                        def after_policy_committed(result, policy=policy):
+                            nonlocal saved_count, skipped_count
+                            if result is None:
+                                return
+                            policy_id, is_new, stored_paths = result
+                            if is_new:
+                                saved_count += 1
+                            else:
+                                skipped_count += 1
 
-                                        if attachment_result.get("content_merged"):
-                                            logger.info(
-                                                f"政策 {db_policy.id} 的附件内容已自动合并到正文"
-                                            )
-                                        elif attachment_result.get("merge_errors"):
-                                            logger.warning(
-                                                f"政策 {db_policy.id} 附件内容合并失败: {'; '.join(attachment_result['merge_errors'])}"
-                                            )
-                                    else:
+                            # 删除爬虫输出目录中的原始文件（已保存到存储服务）
+                            for file_path in stored_paths:
+                                # 记录原始文件路径，用于后续清理
+                                saved_file_paths.add(file_path)
+                                try:
+                                    if os.path.exists(file_path):
+                                        os.remove(file_path)
                                         logger.debug(
-                                            f"政策 {db_policy.id} 没有附件需要处理"
+                                            f"删除爬虫输出目录中的文件: {file_path}"
                                         )
-
                                 except Exception as e:
-                                    logger.warning(
-                                        f"处理政策 {db_policy.id} 的附件失败: {e}"
-                                    )
+                                    logger.warning(f"删除爬虫输出文件失败: {e}")
 
-                            # 提交文件路径更新
-                            db.commit()
-                            # 创建任务-政策关联（虽然policy.task_id已经关联，但为了数据一致性，也创建TaskPolicy记录）
-                            # 注意：由于policy.task_id已经关联到任务，TaskPolicy主要用于查询和统计
-                            try:
-                                task_policy = TaskPolicy(
-                                    task_id=task_id, policy_id=db_policy.id
-                                )
-                                db.add(task_policy)
-                                db.commit()  # 提交TaskPolicy关联
-                            except Exception as e:
-                                # 如果关联已存在，忽略错误
-                                logger.debug(f"TaskPolicy关联可能已存在: {e}")
-                                db.rollback()
+                            # 附件在后台并发下载：政策提交后登记到待处理队列
+                            if getattr(policy, "_attachment_downloads", None):
+                                pending_attachments.append((policy_id, policy))
 
-                            # 检查是否是新创建的（简单判断：爬取时间很近）
-                            # 确保时区一致：使用 timezone-aware datetime
-                            now_utc = datetime.now(timezone.utc)
+                        def on_policy_failed(error: Exception):
+                            nonlocal failed_count
+                            failed_count += 1
 
-                            # 确保 crawl_time 是 timezone-aware
-                            if db_policy.crawl_time:
-                                if db_policy.crawl_time.tzinfo is None:
-                                    # 假设是UTC时间，添加时区信息
-                                    crawl_time_utc = db_policy.crawl_time.replace(
-                                        tzinfo=timezone.utc
-                                    )
-                                else:
-                                    crawl_time_utc = db_policy.crawl_time
-
-                                if (now_utc - crawl_time_utc).total_seconds() < 10:
-                                    saved_count += 1
-                                    if saved_count % 10 == 0:  # 每保存10条更新一次进度
-                                        progress_callback(
-                                            f"已保存 {saved_count} 条政策..."
-                                        )
-                                else:
-                                    skipped_count += 1
-                            else:
-                                # 如果没有爬取时间，可能是旧数据
-                                skipped_count += 1
-                            # 注意：failed_count只在except块中增加，这里不应该增加
+                        uow.add(
+                            persist_policy,
+                            after_commit=after_policy_committed,
+                            on_failure=on_policy_failed,
+                        )
+
+                        # 处理已下载结束的附件
+                        process_pending_attachments()
 
-                        # 定期更新任务统计信息（每处理20条）
-                        total_processed = saved_count + skipped_count + failed_count
-                        if total_processed > 0 and total_processed % 20 == 0:
+                        progress.set_counters(
+                            completed_count=saved_count, failed_count=failed_count
+                        )
+                        if saved_count - reported_saved_count >= 10:
+                            # 每保存10条更新一次进度
+                            reported_saved_count = saved_count - saved_count % 10
+                            progress_callback(f"已保存 {saved_count} 条政策...")
+                        # 注意：failed_count只在保存失败时增加，这里不应该增加
+
+                        # 定期更新任务统计信息（每处理20条，随下一次批量提交落库）
+                        total_processed = i + 1
+                        if total_processed % 20 == 0:
                             try:
                                 task = db.query(Task).filter(Task.id == task_id).first()
                                 if task:
-                                    task.policy_count = len(
-                                        policies
-                                    )  # 使用实际的政策总数
-                                    task.success_count = saved_count
-                                    task.failed_count = failed_count + skipped_count
-                                    db.commit()
+                                    # 随下一次批量提交落库，批量提交失败时重放
+                                    # （policy_count使用实际的政策总数）
+                                    uow.add_side_write(
+                                        "task_stats",
+                                        partial(
+                                            self._set_task_fields,
+                                            task_id=task_id,
+                                            policy_count=len(policies),
+                                            success_count=saved_count,
+                                            failed_count=failed_count + skipped_count,
+                                        ),
+                                    )
+                                    uow.checkpoint()
 
                                     # 检查是否需要发送任务运行中邮件通知（每处理50条检查一次）
                                     if total_processed % 50 == 0 and not email_notified:
@@ -1149,45 +1237,31 @@ class TaskService:
                                             email_service = get_email_service()
                                             # 传入db以实时加载配置
                                             if email_service.is_enabled(db):
-                                                import asyncio
-
                                                 logger.debug(
                                                     f"发送任务运行中邮件通知: {task.task_name}"
                                                 )
 
-                                                loop = asyncio.new_event_loop()
-                                                asyncio.set_event_loop(loop)
-                                                try:
-                                                    result = loop.run_until_complete(
-                                                        email_service.send_task_completion_notification(
-                                                            task_name=task.task_name,
-                                                            task_status="running",
-                                                            policy_count=len(policies),
-                                                            success_count=saved_count,
-                                                            failed_count=failed_count
-                                                            + skipped_count,
-                                                            start_time=task.start_time,
-                                                            end_time=None,  # 运行中没有结束时间
-                                                            db=db,
-                                                        )
-                                                    )
+                                                result = email_service.send_task_completion_notification(
+                                                    task_name=task.task_name,
+                                                    task_status="running",
+                                                    policy_count=len(policies),
+                                                    success_count=saved_count,
+                                                    failed_count=failed_count
+                                                    + skipped_count,
+                                                    start_time=task.start_time,
+                                                    end_time=None,  # 运行中没有结束时间
+                                                    db=db,
+                                                )
 
-                                                    if result["success"]:
-                                                        email_notified = True  # 标记已发送通知，避免重复发送
-                                                        logger.info(
-                                                            f"✅ 已发送任务运行中邮件通知: {task.task_name}"
-                                                        )
-                                                    else:
-                                                        logger.warning(
-                                                            f"❌ 发送任务运行中邮件通知失败: {result.get('message', '未知错误')}"
-                                                        )
-                                                except Exception as email_error:
-                                                    logger.error(
-                                                        f"❌ 发送任务运行中邮件通知时发生异常: {email_error}",
-                                                        exc_info=True,
+                                                if result["success"]:
+                                                    email_notified = True  # 标记已发送通知，避免重复发送
+                                                    logger.info(
+                                                        f"✅ 已发送任务运行中邮件通知: {task.task_name}"
+                                                    )
+                                                else:
+                                                    logger.warning(
+                                                        f"❌ 发送任务运行中邮件通知失败: {result.get('message', '未知错误')}"
                                                     )
-                                                finally:
-                                                    loop.close()
                                             else:
                                                 logger.debug(
                                                     f"邮件服务未启用，跳过任务运行中通知: {task.task_name}"
@@ -1205,15 +1279,29 @@ class TaskService:
                         logger.error(f"保存政策失败: {e}", exc_info=True)
                         failed_count += 1
 
+                # 提交最后一批政策，再等待并处理剩余的附件下载
+                uow.flush()
+                try:
+                    process_pending_attachments(drain=True)
+                except Exception as e:
+                    logger.warning(f"处理剩余附件失败: {e}")
+                    attachment_db.rollback()
+                finally:
+                    attachment_db.close()
+
                 # 检查是否是因为停止请求而退出
                 task = db.query(Task).filter(Task.id == task_id).first()
                 was_stopped = False
+                lease_lost = False
                 if task_id in self._crawler_instances:
                     crawler = self._crawler_instances[task_id]
                     if hasattr(crawler, "stop_requested") and crawler.stop_requested:
                         was_stopped = True
+                        if getattr(crawler, "lease_lost", False):
+                            # 租约已被其他worker领取，任务状态由重新执行的worker负责
+                            lease_lost = True
                         # 如果任务被停止，检查当前状态决定是暂停还是取消
-                        if task and task.status == "paused":
+                        elif task and task.status == "paused":
                             task.status = "paused"
                             task.error_message = "任务已暂停"
                         else:
@@ -1227,7 +1315,8 @@ class TaskService:
                     task.success_count = saved_count
                     task.failed_count = failed_count + skipped_count
 
-                task.end_time = datetime.now(timezone.utc)
+                if not lease_lost:
+                    task.end_time = datetime.now(timezone.utc)
                 db.commit()
 
                 # 清理爬虫实例引用
@@ -1447,46 +1536,30 @@ class TaskService:
                     email_service = get_email_service()
                     # 传入db以实时加载配置，确保使用最新配置
                     if email_service.is_enabled(db):
-                        import asyncio
-
                         # 记录邮件通知尝试
                         logger.info(
                             f"尝试发送任务完成邮件通知: {task.task_name} (状态: completed)"
                         )
 
-                        # 创建新的时间循环来发送异步邮件
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        try:
-                            result = loop.run_until_complete(
-                                email_service.send_task_completion_notification(
-                                    task_name=task.task_name,
-                                    task_status="completed",
-                                    policy_count=len(policies),
-                                    success_count=saved_count,
-                                    failed_count=failed_count + skipped_count,
-                                    start_time=task.start_time,
-                                    end_time=datetime.now(timezone.utc),
-                                    db=db,  # 传入db以实时加载配置
-                                )
-                            )
-
-                            if result["success"]:
-                                logger.info(
-                                    f"✅ 任务完成邮件通知发送成功: {task.task_name}"
-                                )
-                            else:
-                                logger.error(
-                                    f"❌ 任务完成邮件通知发送失败: {result.get('message', '未知错误')}"
-                                )
+                        result = email_service.send_task_completion_notification(
+                            task_name=task.task_name,
+                            task_status="completed",
+                            policy_count=len(policies),
+                            success_count=saved_count,
+                            failed_count=failed_count + skipped_count,
+                            start_time=task.start_time,
+                            end_time=datetime.now(timezone.utc),
+                            db=db,  # 传入db以实时加载配置
+                        )
 
-                        except Exception as email_error:
+                        if result["success"]:
+                            logger.info(
+                                f"✅ 任务完成邮件通知已加入发件箱: {task.task_name}"
+                            )
+                        else:
                             logger.error(
-                                f"❌ 发送任务完成邮件通知时发生异常: {email_error}",
-                                exc_info=True,
+                                f"❌ 任务完成邮件通知发送失败: {result.get('message', '未知错误')}"
                             )
-                        finally:
-                            loop.close()
                     else:
                         logger.debug(
                             f"邮件服务未启用或未配置，跳过任务完成通知: {task.task_name}"
@@ -1500,6 +1573,7 @@ class TaskService:
                 # 检查是否是因为停止请求而退出 - 线程安全
                 task = db.query(Task).filter(Task.id == task_id).first()
                 was_stopped = False
+                lease_lost = False
                 with self._crawler_lock:
                     crawler = self._crawler_instances.get(task_id)
                     if (
@@ -1508,8 +1582,11 @@ class TaskService:
                         and crawler.stop_requested
                     ):
                         was_stopped = True
+                        if getattr(crawler, "lease_lost", False):
+                            # 租约已被其他worker领取，任务状态由重新执行的worker负责
+                            lease_lost = True
                         # 如果任务被停止，检查当前状态决定是暂停还是取消
-                        if task and task.status == "paused":
+                        elif task and task.status == "paused":
                             task.status = "paused"
                             task.error_message = "任务已暂停"
                         else:
@@ -1527,7 +1604,8 @@ class TaskService:
                         # 如果utils模块不存在，使用简单的错误消息
                         task.error_message = f"任务执行失败: {type(e).__name__}"
 
-                task.end_time = datetime.now(timezone.utc)
+                if not lease_lost:
+                    task.end_time = datetime.now(timezone.utc)
                 db.commit()
 
                 # 清理爬虫实例引用 - 线程安全
@@ -1542,53 +1620,35 @@ class TaskService:
                     email_service = get_email_service()
                     # 传入db以实时加载配置，确保使用最新配置
                     if email_service.is_enabled(db):
-                        import asyncio
-
                         # 记录邮件通知尝试
                         logger.info(f"尝试发送任务失败邮件通知: {task.task_name}")
 
-                        # 创建新的时间循环来发送异步邮件
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        try:
-                            result = loop.run_until_complete(
-                                email_service.send_task_completion_notification(
-                                    task_name=task.task_name,
-                                    task_status="failed",
-                                    policy_count=(
-                                        len(policies) if "policies" in locals() else 0
-                                    ),
-                                    success_count=(
-                                        saved_count if "saved_count" in locals() else 0
-                                    ),
-                                    failed_count=(
-                                        failed_count
-                                        if "failed_count" in locals()
-                                        else 0
-                                    ),
-                                    error_message=str(e),
-                                    start_time=task.start_time,
-                                    end_time=datetime.now(timezone.utc),
-                                    db=db,  # 传入db以实时加载配置
-                                )
-                            )
-
-                            if result["success"]:
-                                logger.info(
-                                    f"✅ 任务失败邮件通知发送成功: {task.task_name}"
-                                )
-                            else:
-                                logger.error(
-                                    f"❌ 任务失败邮件通知发送失败: {result.get('message', '未知错误')}"
-                                )
+                        result = email_service.send_task_completion_notification(
+                            task_name=task.task_name,
+                            task_status="failed",
+                            policy_count=(
+                                len(policies) if "policies" in locals() else 0
+                            ),
+                            success_count=(
+                                saved_count if "saved_count" in locals() else 0
+                            ),
+                            failed_count=(
+                                failed_count if "failed_count" in locals() else 0
+                            ),
+                            error_message=str(e),
+                            start_time=task.start_time,
+                            end_time=datetime.now(timezone.utc),
+                            db=db,  # 传入db以实时加载配置
+                        )
 
-                        except Exception as email_error:
+                        if result["success"]:
+                            logger.info(
+                                f"✅ 任务失败邮件通知已加入发件箱: {task.task_name}"
+                            )
+                        else:
                             logger.error(
-                                f"❌ 发送任务失败邮件通知时发生异常: {email_error}",
-                                exc_info=True,
+                                f"❌ 任务失败邮件通知发送失败: {result.get('message', '未知错误')}"
                             )
-                        finally:
-                            loop.close()
                     else:
                         logger.debug(
                             f"邮件服务未启用或未配置，跳过任务失败通知: {task.task_name}"
@@ -1607,15 +1667,26 @@ class TaskService:
                 if task_id in self._crawler_instances:
                     del self._crawler_instances[task_id]
         finally:
-            # 清理运行中的任务记录
-            if task_id in self._running_tasks:
-                del self._running_tasks[task_id]
             # 确保清理爬虫实例引用 - 线程安全
             with self._crawler_lock:
                 if task_id in self._crawler_instances:
                     del self._crawler_instances[task_id]
+            # 写入缓冲中尚未写库的进度消息，并通知其他进程任务已结束
+            if progress is not None:
+                try:
+                    flush_progress()
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"保存进度消息失败: {e}")
             # 确保总是关闭数据库会话
             try:
                 db.close()
             except Exception as e:
                 logger.error(f"关闭数据库会话失败: {e}")
+            # 通知任务执行结束（定时任务据此完成执行记录）
+            for listener in list(_finish_listeners):
+                try:
+                    listener(task_id)
+                except Exception as e:
+                    logger.error(f"任务 {task_id} 结束回调失败: {e}", exc_info=True)
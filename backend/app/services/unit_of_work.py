@@ -0,0 +1,227 @@
+"""
+批量事务（Unit of Work）- 将多条记录的数据库写入合并到一个事务中提交
+
+每条记录的写入封装为可重放的函数，在保存点中执行：单条失败只回滚该条；
+累计达到条数上限或时间间隔后统一提交一次。提交失败时整体回滚，并逐条
+重放、逐条提交，尽量保住其余记录。提交成功后才执行各条记录的后续动作
+（如登记附件处理、删除临时文件），保证这些动作只针对已落库的数据。
+
+推迟写入模式（defer_writes=True）下写入函数不立即执行，而是在提交时
+依次执行，批次积累期间不占用数据库连接（后台任务爬取下一条政策时
+不会一直占着连接）。
+
+随批量事务一起提交的附带写入（如任务统计、进度消息）通过 add_side_write
+登记：提交失败回滚后先重放附带写入并单独提交，不会随回滚丢失。
+"""
+
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# (写入函数, 提交后回调, 最终失败回调)
+_PendingItem = Tuple[
+    Callable[[Session], Any],
+    Optional[Callable[[Any], None]],
+    Optional[Callable[[Exception], None]],
+]
+
+
+class BatchedUnitOfWork:
+    """按条数/时间间隔批量提交的事务"""
+
+    def __init__(
+        self,
+        db: Session,
+        max_items: int = 20,
+        max_interval_ms: int = 2000,
+        defer_writes: bool = False,
+    ):
+        """初始化批量事务
+
+        Args:
+            db: 数据库会话（批量期间由本对象负责提交）
+            max_items: 每个事务最多包含的记录数（<=1 表示逐条提交）
+            max_interval_ms: 事务最长持续时间（毫秒），超过后在下一个检查点提交
+            defer_writes: 推迟到提交时才执行写入函数
+        """
+        self.db = db
+        self.defer_writes = defer_writes
+        self.max_items = max(1, int(max_items))
+        self.max_interval = max(0, int(max_interval_ms)) / 1000.0
+        self._pending: List[_PendingItem] = []
+        self._pending_results: List[Any] = []
+        self._side_writes: Dict[str, Callable[[Session], None]] = {}
+        self._opened_at: Optional[float] = None
+        self.commit_count = 0
+        self.retried_count = 0
+
+    @property
+    def pending_count(self) -> int:
+        """当前事务中尚未提交的记录数"""
+        return len(self._pending)
+
+    def add(
+        self,
+        work: Callable[[Session], Any],
+        after_commit: Optional[Callable[[Any], None]] = None,
+        on_failure: Optional[Callable[[Exception], None]] = None,
+    ) -> Any:
+        """在当前事务中执行一条记录的写入
+
+        work 不能自行提交，且可能被重放（批量提交失败时逐条重试），因此其中
+        不可重复的副作用应放到 after_commit 中。
+
+        Args:
+            work: 写入函数，接收数据库会话，返回值传给 after_commit
+            after_commit: 该记录提交成功后调用
+            on_failure: 该记录在重试中最终失败时调用（立即失败时直接抛出异常）
+
+        Returns:
+            work 的返回值（推迟写入模式下为None）
+
+        Raises:
+            Exception: work 执行失败（该条记录已回滚，事务中其他记录不受影响；
+                推迟写入模式下改为调用 on_failure）
+        """
+        if self.defer_writes:
+            result = None
+        else:
+            with self.db.begin_nested():
+                result = work(self.db)
+
+        if self._opened_at is None:
+            self._opened_at = time.monotonic()
+        self._pending.append((work, after_commit, on_failure))
+        self._pending_results.append(result)
+
+        self.maybe_flush()
+        return result
+
+    def add_side_write(self, key: str, work: Callable[[Session], None]):
+        """执行一次附带写入，随当前事务一起提交
+
+        批量提交失败回滚后，附带写入先于记录重放并单独提交。同一key只保留
+        最后一次登记的写入，因此 work 应写入完整的当前值（如任务计数器的
+        最新值），而不是增量。
+
+        Args:
+            key: 附带写入的标识（如 "task_stats"、"progress"）
+            work: 写入函数，接收数据库会话，不能自行提交
+        """
+        work(self.db)
+        self._side_writes[key] = work
+
+    def maybe_flush(self) -> bool:
+        """达到条数上限或时间间隔时提交
+
+        Returns:
+            是否执行了提交
+        """
+        if not self._pending:
+            return False
+        if len(self._pending) >= self.max_items or (
+            time.monotonic() - self._opened_at >= self.max_interval
+        ):
+            self.flush()
+            return True
+        return False
+
+    def checkpoint(self):
+        """提交检查点（用于进度消息、统计等附带修改）
+
+        没有待提交的记录时直接提交；否则随批量事务一起提交，到达条数或
+        时间间隔时才真正提交。
+        """
+        if self._pending:
+            self.maybe_flush()
+        else:
+            self.flush()
+
+    def flush(self):
+        """提交当前事务（包括会话中其他未提交的修改，如任务统计）"""
+        pending, results = self._pending, self._pending_results
+        side_writes = list(self._side_writes.values())
+        self._pending, self._pending_results = [], []
+        self._side_writes = {}
+        self._opened_at = None
+
+        if self.defer_writes and pending:
+            pending, results = self._run_deferred(pending)
+
+        try:
+            self.db.commit()
+            self.commit_count += 1
+        except Exception as e:
+            self.db.rollback()
+            if side_writes:
+                self._replay_side_writes(side_writes)
+            if not pending:
+                logger.warning(f"提交事务失败: {e}")
+                return
+            logger.warning(f"批量提交 {len(pending)} 条记录失败，改为逐条重试: {e}")
+            self._retry_one_by_one(pending)
+            return
+
+        for (_, after_commit, _), result in zip(pending, results):
+            self._run_after_commit(after_commit, result)
+
+    def _run_deferred(
+        self, pending: List[_PendingItem]
+    ) -> Tuple[List[_PendingItem], List[Any]]:
+        """依次执行推迟的写入函数（各自在保存点中，失败的记录被剔除）"""
+        kept: List[_PendingItem] = []
+        results: List[Any] = []
+        for item in pending:
+            work, _, on_failure = item
+            try:
+                with self.db.begin_nested():
+                    result = work(self.db)
+            except Exception as e:
+                logger.error(f"写入记录失败: {e}")
+                if on_failure:
+                    on_failure(e)
+                continue
+            kept.append(item)
+            results.append(result)
+        return kept, results
+
+    def _replay_side_writes(self, side_writes: List[Callable[[Session], None]]):
+        """重放附带写入并单独提交（批量提交失败回滚后）"""
+        try:
+            for work in side_writes:
+                work(self.db)
+            self.db.commit()
+            self.commit_count += 1
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"重放附带写入失败: {e}")
+
+    def _retry_one_by_one(self, pending: List[_PendingItem]):
+        """逐条重放并提交（批量提交失败后的降级路径）"""
+        for work, after_commit, on_failure in pending:
+            self.retried_count += 1
+            try:
+                result = work(self.db)
+                self.db.commit()
+                self.commit_count += 1
+            except Exception as e:
+                self.db.rollback()
+                logger.error(f"重试写入记录失败: {e}")
+                if on_failure:
+                    on_failure(e)
+                continue
+            self._run_after_commit(after_commit, result)
+
+    @staticmethod
+    def _run_after_commit(after_commit: Optional[Callable[[Any], None]], result: Any):
+        """执行提交后回调（回调异常不影响其他记录）"""
+        if after_commit is None:
+            return
+        try:
+            after_commit(result)
+        except Exception as e:
+            logger.warning(f"提交后回调执行失败: {e}")
@@ -3,7 +3,9 @@
 """
 
 import re
-from typing import Any
+from typing import Any, Iterable
+
+from sqlalchemy.orm import load_only
 
 
 def sanitize_error_message(error: Exception) -> str:
@@ -36,3 +38,25 @@ def sanitize_error_message(error: Exception) -> str:
     )
 
     return error_str
+
+
+def load_only_columns(model, columns: Iterable[str]):
+    """构建只加载指定列的查询选项（其余列延迟加载，访问时再单独查询）
+
+    Args:
+        model: ORM模型类
+        columns: 需要加载的列名（通常取自列表Schema的字段）
+
+    Returns:
+        SQLAlchemy查询选项
+    """
+    return load_only(*(getattr(model, name) for name in columns))
+
+
+def dialect_insert(db):
+    """获取支持 ON CONFLICT 的 insert 构造函数（PostgreSQL，测试环境为SQLite）"""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
@@ -0,0 +1,78 @@
+"""
+流式ZIP打包 - 边读取文件边输出ZIP数据
+
+zipfile 写入不可 seek 的输出时，每个文件的本地文件头不写大小和CRC，
+而是在文件数据之后写数据描述符（data descriptor），因此可以边读取边输出，
+不需要先写入临时文件。单个文件超过4GB时按文件大小自动使用ZIP64头，
+整个压缩包超过4GB或文件数过多时自动写入ZIP64中央目录。
+
+文件以存储模式（不压缩）写入：导出的Markdown/DOCX压缩收益有限，
+不压缩时输出速度只受磁盘读取限制。
+"""
+
+import zipfile
+import logging
+from typing import Iterable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 每次从文件读取、向客户端输出的块大小
+CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkSink:
+    """收集ZIP输出的不可 seek 的写入目标"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+def stream_zip(
+    files: Iterable[Tuple[str, str]], chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """把文件流式打包为ZIP
+
+    Args:
+        files: (ZIP内路径, 本地文件路径) 的可迭代对象，按需迭代（可以是边生成文件边产出的生成器）
+        chunk_size: 读取和输出的块大小
+
+    Yields:
+        ZIP数据块
+    """
+    sink = _ChunkSink()
+    zip_file = zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED)
+    for arcname, file_path in files:
+        try:
+            # 根据文件大小决定是否使用ZIP64头
+            zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+            source = open(file_path, "rb")
+        except OSError as e:
+            logger.warning(f"读取文件失败 {file_path}: {e}")
+            continue
+        zinfo.compress_type = zipfile.ZIP_STORED
+        with source, zip_file.open(zinfo, "w") as dest:
+            while chunk := source.read(chunk_size):
+                dest.write(chunk)
+                if sink.size >= chunk_size:
+                    yield sink.drain()
+        if sink.size:
+            yield sink.drain()
+
+    # 中央目录
+    zip_file.close()
+    yield sink.drain()
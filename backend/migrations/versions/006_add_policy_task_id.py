@@ -34,9 +34,8 @@ def upgrade():
     # 创建索引以提高查询性能
     op.create_index("idx_policies_task_id", "policies", ["task_id"])
 
-    # 注意：唯一约束需要修改，但由于PostgreSQL不支持部分唯一索引，
-    # 我们使用应用层逻辑来确保唯一性
-    # 原有的唯一约束 (title, source_url, pub_date) 仍然保留，用于兼容旧数据
+    # 注意：原有的唯一约束 (title, source_url, pub_date) 在此暂时保留，
+    # 迁移008将其替换为按task_id区分的部分唯一索引
 
 
 def downgrade():
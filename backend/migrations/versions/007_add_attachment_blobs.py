@@ -0,0 +1,68 @@
+"""添加附件内容块表（内容寻址存储）
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-12-10 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 创建附件内容块表（按SHA-256去重，跨任务共享）
+    op.create_table(
+        "attachment_blobs",
+        sa.Column("sha256", sa.String(64), primary_key=True),
+        sa.Column("file_size", sa.BigInteger(), nullable=True),
+        sa.Column("local_path", sa.String(500), nullable=True),
+        sa.Column("s3_key", sa.String(500), nullable=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "idx_attachment_blobs_ref_count", "attachment_blobs", ["ref_count"]
+    )
+
+    # 附件指向内容块（旧数据为空，仍按任务目录存放）
+    op.add_column(
+        "attachments", sa.Column("blob_sha256", sa.String(64), nullable=True)
+    )
+    op.create_foreign_key(
+        "fk_attachments_blob_sha256",
+        "attachments",
+        "attachment_blobs",
+        ["blob_sha256"],
+        ["sha256"],
+    )
+    op.create_index("idx_attachments_blob_sha256", "attachments", ["blob_sha256"])
+
+
+def downgrade():
+    op.drop_index("idx_attachments_blob_sha256", table_name="attachments")
+    op.drop_constraint(
+        "fk_attachments_blob_sha256", "attachments", type_="foreignkey"
+    )
+    op.drop_column("attachments", "blob_sha256")
+
+    op.drop_index("idx_attachment_blobs_ref_count", table_name="attachment_blobs")
+    op.drop_table("attachment_blobs")
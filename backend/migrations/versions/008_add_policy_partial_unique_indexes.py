@@ -0,0 +1,67 @@
+"""政策唯一性改为部分唯一索引
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-12-10 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+# 唯一索引中发布日期的表达式，与 app/models/policy.py 的 PUB_DATE_KEY 一致
+PUB_DATE_KEY = "COALESCE(pub_date, '1900-01-01')"
+
+
+def upgrade():
+    # 清理应用层检查遗留的重复数据（保留ID最小的一条）
+    op.execute("""
+        DELETE FROM policies p
+        USING policies q
+        WHERE p.id > q.id
+          AND p.title = q.title
+          AND p.source_url = q.source_url
+          AND p.pub_date IS NOT DISTINCT FROM q.pub_date
+          AND p.task_id IS NOT DISTINCT FROM q.task_id
+        """)
+
+    # 原唯一索引不区分任务，导致不同任务无法保存同一政策
+    op.drop_index("idx_policy_unique", table_name="policies")
+
+    # 有任务的数据：(title, source_url, pub_date, task_id)唯一
+    # pub_date可以为NULL（NULL在唯一索引中互不相等），用COALESCE替换为固定日期
+    op.create_index(
+        "uq_policies_identity_task",
+        "policies",
+        ["title", "source_url", sa.text(PUB_DATE_KEY), "task_id"],
+        unique=True,
+        postgresql_where=sa.text("task_id IS NOT NULL"),
+    )
+    # 无任务的旧数据：(title, source_url, pub_date)唯一
+    op.create_index(
+        "uq_policies_identity_legacy",
+        "policies",
+        ["title", "source_url", sa.text(PUB_DATE_KEY)],
+        unique=True,
+        postgresql_where=sa.text("task_id IS NULL"),
+    )
+
+
+def downgrade():
+    op.drop_index("uq_policies_identity_legacy", table_name="policies")
+    op.drop_index("uq_policies_identity_task", table_name="policies")
+
+    # 注意：如果不同任务保存了相同政策，恢复原唯一索引会失败，需要先清理数据
+    op.create_index(
+        "idx_policy_unique",
+        "policies",
+        ["title", "source_url", "pub_date"],
+        unique=True,
+    )
@@ -0,0 +1,66 @@
+"""政策关键词搜索使用pg_trgm三元组GIN索引
+
+Revision ID: 009
+Revises: 008
+Create Date: 2024-12-11 10:00:00.000000
+
+"""
+
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+TRGM_COLUMNS = ("title", "content", "keywords")
+
+
+def upgrade():
+    # 003删除了btree全文索引后，ILIKE '%词%' 只能顺序扫描；
+    # pg_trgm 的GIN索引可以直接支持 LIKE/ILIKE 模糊匹配
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # pg_trgm 按数据库的 LC_CTYPE 判断字符是否属于单词，
+    # C/POSIX 下中文字符会被忽略，索引对中文关键词无效
+    lc_ctype = op.get_bind().execute(sa.text("SHOW lc_ctype")).scalar()
+    if lc_ctype and lc_ctype.upper() in ("C", "POSIX"):
+        logger.warning(
+            f"数据库 LC_CTYPE={lc_ctype}，pg_trgm 无法为中文建立三元组，"
+            "请使用 zh_CN.UTF-8 / en_US.UTF-8 等 UTF-8 区域重建数据库"
+        )
+
+    # 并发建索引，避免长时间锁表（CONCURRENTLY 不能在事务中执行）
+    with op.get_context().autocommit_block():
+        for column in TRGM_COLUMNS:
+            op.create_index(
+                f"idx_policies_{column}_trgm",
+                "policies",
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+    # 更新统计信息，让查询规划器尽快使用新索引
+    op.execute("ANALYZE policies")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for column in TRGM_COLUMNS:
+            op.drop_index(
+                f"idx_policies_{column}_trgm",
+                table_name="policies",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    # 不删除 pg_trgm 扩展，其他对象可能依赖它
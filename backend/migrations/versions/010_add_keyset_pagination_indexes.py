@@ -0,0 +1,48 @@
+"""政策和任务列表键集分页的复合索引
+
+Revision ID: 010
+Revises: 009
+Create Date: 2024-12-12 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+# (索引名, 表名, 排序列)，索引顺序与列表的 ORDER BY 完全一致，
+# 翻页时按 (排序列, id) < (游标值, 游标id) 直接定位，无需OFFSET扫描
+KEYSET_INDEXES = (
+    ("idx_policies_pub_date_id", "policies", "pub_date"),
+    ("idx_tasks_created_at_id", "tasks", "created_at"),
+)
+
+
+def upgrade():
+    # 并发建索引，避免长时间锁表（CONCURRENTLY 不能在事务中执行）
+    with op.get_context().autocommit_block():
+        for index_name, table_name, column in KEYSET_INDEXES:
+            op.create_index(
+                index_name,
+                table_name,
+                [sa.text(f"{column} DESC NULLS LAST"), sa.text("id DESC")],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for index_name, table_name, _ in KEYSET_INDEXES:
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
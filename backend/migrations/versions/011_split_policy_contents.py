@@ -0,0 +1,165 @@
+"""政策全文拆分到独立的 policy_contents 表
+
+Revision ID: 011
+Revises: 010
+Create Date: 2024-12-13 10:00:00.000000
+
+"""
+
+import zlib
+import base64
+import hashlib
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "011"
+down_revision = "010"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# 每批搬移的政策数（每批单独提交，中断后重新执行会从已搬移的最大ID继续）
+BATCH_SIZE = 1000
+# 与 PolicyContent.COMPRESS_THRESHOLD 保持一致
+COMPRESS_THRESHOLD = 1_000_000
+
+
+def _pack(policy_id, content):
+    content = content or ""
+    fields = {
+        "policy_id": policy_id,
+        "content": content,
+        "content_hash": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        "compressed": False,
+    }
+    if len(content) > COMPRESS_THRESHOLD:
+        packed = base64.b64encode(zlib.compress(content.encode("utf-8"), 6))
+        fields["content"] = packed.decode("ascii")
+        fields["compressed"] = True
+    return fields
+
+
+def _unpack(content, compressed):
+    if not content or not compressed:
+        return content or ""
+    return zlib.decompress(base64.b64decode(content)).decode("utf-8")
+
+
+def upgrade():
+    op.create_table(
+        "policy_contents",
+        sa.Column(
+            "policy_id",
+            sa.BigInteger(),
+            sa.ForeignKey("policies.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column(
+            "compressed", sa.Boolean(), nullable=False, server_default=sa.false()
+        ),
+        if_not_exists=True,
+    )
+
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        # 分批搬移正文，避免一个长事务锁住整张表、占满WAL
+        last_id = bind.execute(
+            sa.text("SELECT COALESCE(MAX(policy_id), 0) FROM policy_contents")
+        ).scalar()
+        moved = 0
+        while True:
+            rows = bind.execute(
+                sa.text(
+                    "SELECT id, content FROM policies "
+                    "WHERE id > :last_id ORDER BY id LIMIT :batch_size"
+                ),
+                {"last_id": last_id, "batch_size": BATCH_SIZE},
+            ).all()
+            if not rows:
+                break
+            bind.execute(
+                sa.text(
+                    "INSERT INTO policy_contents "
+                    "(policy_id, content, content_hash, compressed) "
+                    "VALUES (:policy_id, :content, :content_hash, :compressed)"
+                ),
+                [_pack(row.id, row.content) for row in rows],
+            )
+            last_id = rows[-1].id
+            moved += len(rows)
+            logger.info(f"已搬移 {moved} 条政策正文（最大ID {last_id}）")
+
+        # 关键词搜索改为在正文表上使用三元组索引
+        op.create_index(
+            "idx_policy_contents_content_trgm",
+            "policy_contents",
+            ["content"],
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "idx_policies_content_trgm",
+            table_name="policies",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+    op.drop_column("policies", "content")
+
+    # 主表变窄后更新统计信息
+    op.execute("ANALYZE policies")
+    op.execute("ANALYZE policy_contents")
+
+
+def downgrade():
+    op.add_column(
+        "policies",
+        sa.Column("content", sa.Text(), nullable=False, server_default=""),
+    )
+
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.text(
+                    "SELECT policy_id, content, compressed FROM policy_contents "
+                    "WHERE policy_id > :last_id ORDER BY policy_id LIMIT :batch_size"
+                ),
+                {"last_id": last_id, "batch_size": BATCH_SIZE},
+            ).all()
+            if not rows:
+                break
+            bind.execute(
+                sa.text("UPDATE policies SET content = :content WHERE id = :policy_id"),
+                [
+                    {
+                        "policy_id": row.policy_id,
+                        "content": _unpack(row.content, row.compressed),
+                    }
+                    for row in rows
+                ],
+            )
+            last_id = rows[-1].policy_id
+
+        op.create_index(
+            "idx_policies_content_trgm",
+            "policies",
+            ["content"],
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+    op.alter_column("policies", "content", server_default=None)
+    op.drop_table("policy_contents")
@@ -0,0 +1,42 @@
+"""政策筛选项计数汇总表
+
+Revision ID: 012
+Revises: 011
+Create Date: 2024-12-14 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "012"
+down_revision = "011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "policy_facet_counts",
+        sa.Column("source_name", sa.String(length=200), nullable=False),
+        sa.Column("category", sa.String(length=200), nullable=False),
+        sa.Column("level", sa.String(length=100), nullable=False),
+        sa.Column("policy_count", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("source_name", "category", "level"),
+    )
+
+    # 按现有政策初始化计数，之后由保存/删除政策时增量维护
+    op.execute("""
+        INSERT INTO policy_facet_counts (source_name, category, level, policy_count)
+        SELECT COALESCE(source_name, ''), COALESCE(category, ''),
+               COALESCE(level, ''), COUNT(*)
+        FROM policies
+        GROUP BY COALESCE(source_name, ''), COALESCE(category, ''),
+                 COALESCE(level, '')
+        """)
+
+
+def downgrade():
+    op.drop_table("policy_facet_counts")
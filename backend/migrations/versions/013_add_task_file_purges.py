@@ -0,0 +1,62 @@
+"""任务文件清理作业表
+
+Revision ID: 013
+Revises: 012
+Create Date: 2024-12-15 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "013"
+down_revision = "012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "task_file_purges",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("task_id", sa.BigInteger(), nullable=False),
+        sa.Column("task_name", sa.String(length=255), nullable=True),
+        sa.Column("status", sa.String(length=50), nullable=False),
+        sa.Column("local_paths", sa.JSON(), nullable=True),
+        sa.Column("s3_prefixes", sa.JSON(), nullable=True),
+        sa.Column("s3_keys", sa.JSON(), nullable=True),
+        sa.Column("blob_hashes", sa.JSON(), nullable=True),
+        sa.Column("deleted_files", sa.Integer(), nullable=True),
+        sa.Column("deleted_objects", sa.Integer(), nullable=True),
+        sa.Column("failed_count", sa.Integer(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_task_file_purges_id"), "task_file_purges", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_task_file_purges_task_id"),
+        "task_file_purges",
+        ["task_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_task_file_purges_status"), "task_file_purges", ["status"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_task_file_purges_status"), table_name="task_file_purges")
+    op.drop_index(op.f("ix_task_file_purges_task_id"), table_name="task_file_purges")
+    op.drop_index(op.f("ix_task_file_purges_id"), table_name="task_file_purges")
+    op.drop_table("task_file_purges")
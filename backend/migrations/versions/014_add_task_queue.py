@@ -0,0 +1,55 @@
+"""爬虫任务队列表
+
+Revision ID: 014
+Revises: 013
+Create Date: 2024-12-20 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "014"
+down_revision = "013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "task_queue",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column(
+            "task_id",
+            sa.BigInteger(),
+            sa.ForeignKey("tasks.id", ondelete="CASCADE"),
+            nullable=False,
+            unique=True,
+        ),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column(
+            "enqueued_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("claimed_by", sa.String(length=200), nullable=True),
+        sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index(op.f("ix_task_queue_id"), "task_queue", ["id"], unique=False)
+    op.create_index(
+        "idx_task_queue_status_enqueued",
+        "task_queue",
+        ["status", "enqueued_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("idx_task_queue_status_enqueued", table_name="task_queue")
+    op.drop_index(op.f("ix_task_queue_id"), table_name="task_queue")
+    op.drop_table("task_queue")
@@ -0,0 +1,44 @@
+"""任务队列优先级和数据源（准入控制）
+
+Revision ID: 015
+Revises: 014
+Create Date: 2024-12-22 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "015"
+down_revision = "014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "task_queue",
+        sa.Column("priority", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("task_queue", sa.Column("sources", sa.JSON(), nullable=True))
+    op.drop_index("idx_task_queue_status_enqueued", table_name="task_queue")
+    op.create_index(
+        "idx_task_queue_status_priority",
+        "task_queue",
+        ["status", "priority", "enqueued_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("idx_task_queue_status_priority", table_name="task_queue")
+    op.create_index(
+        "idx_task_queue_status_enqueued",
+        "task_queue",
+        ["status", "enqueued_at"],
+        unique=False,
+    )
+    op.drop_column("task_queue", "sources")
+    op.drop_column("task_queue", "priority")
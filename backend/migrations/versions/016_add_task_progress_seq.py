@@ -0,0 +1,30 @@
+"""任务进度消息序号和计数器（增量进度）
+
+Revision ID: 016
+Revises: 015
+Create Date: 2024-12-23 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "016"
+down_revision = "015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "tasks",
+        sa.Column("progress_seq", sa.Integer(), nullable=True, server_default="0"),
+    )
+    op.add_column("tasks", sa.Column("progress_counters", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("tasks", "progress_counters")
+    op.drop_column("tasks", "progress_seq")
@@ -0,0 +1,37 @@
+"""定时任务执行记录关联爬虫任务（任务结束后完成执行记录）
+
+Revision ID: 017
+Revises: 016
+Create Date: 2024-12-24 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "017"
+down_revision = "016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "scheduled_task_runs",
+        sa.Column("crawl_task_id", sa.BigInteger(), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_scheduled_task_runs_crawl_task_id"),
+        "scheduled_task_runs",
+        ["crawl_task_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_scheduled_task_runs_crawl_task_id"), table_name="scheduled_task_runs"
+    )
+    op.drop_column("scheduled_task_runs", "crawl_task_id")
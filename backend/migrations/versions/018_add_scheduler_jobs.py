@@ -0,0 +1,39 @@
+"""定时任务调度器持久化作业存储（APScheduler SQLAlchemyJobStore）
+
+Revision ID: 018
+Revises: 017
+Create Date: 2024-12-25 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "018"
+down_revision = "017"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 表结构与 APScheduler SQLAlchemyJobStore 一致（调度器启动时也会按需创建）
+    op.create_table(
+        "scheduler_jobs",
+        sa.Column("id", sa.Unicode(length=191), nullable=False),
+        sa.Column("next_run_time", sa.Float(precision=25), nullable=True),
+        sa.Column("job_state", sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_scheduler_jobs_next_run_time"),
+        "scheduler_jobs",
+        ["next_run_time"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_scheduler_jobs_next_run_time"), table_name="scheduler_jobs")
+    op.drop_table("scheduler_jobs")
@@ -7,10 +7,11 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 
-from app.database import Base, get_db
+from app.database import Base, ReadSession, get_db, get_read_db
 from app.main import app
 from app.config import settings
-
+from app.services.count_service import get_count_service
+from app.services.facet_service import get_facet_service
 
 # 测试数据库URL（使用内存SQLite或测试PostgreSQL）
 TEST_DATABASE_URL = "sqlite:///./test.db"
@@ -34,6 +35,21 @@ def db_session():
     finally:
         session.close()
         Base.metadata.drop_all(bind=engine)
+        # 每个测试使用新数据库，清空进程内缓存的列表总数和筛选项
+        get_count_service().invalidate("policies")
+        get_facet_service().invalidate()
+
+
+@pytest.fixture
+def worker_sessions(db_session, monkeypatch):
+    """后台任务的会话（worker_session / SessionLocal）和引擎使用测试数据库"""
+    import app.database
+
+    test_engine = db_session.get_bind()
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    monkeypatch.setattr(app.database, "SessionLocal", session_factory)
+    monkeypatch.setattr(app.database, "engine", test_engine)
+    return session_factory
 
 
 @pytest.fixture(scope="function")
@@ -46,7 +62,11 @@ def client(db_session):
         finally:
             pass
 
+    async def override_get_read_db():
+        yield ReadSession(sync_session=db_session)
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -0,0 +1,174 @@
+"""
+二元组倒排索引测试
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.services import search_service as search_module
+from app.services.bigram_index import BigramIndex, tokenize
+from app.services.policy_service import PolicyService
+from app.services.search_service import SearchService
+
+
+def _build_index(tmp_path) -> BigramIndex:
+    index = BigramIndex(str(tmp_path))
+    index.add_document(
+        1,
+        "土地管理办法",
+        "耕地保护 占用审批",
+        category="规章",
+        pub_date=date(2024, 1, 1),
+    )
+    index.add_document(
+        2,
+        "矿产资源规划",
+        "耕地复垦，管理土地",
+        category="规划",
+        pub_date=date(2023, 5, 1),
+    )
+    # 超过一个压缩块，覆盖块内解码与跳块逻辑
+    for policy_id in range(3, 300):
+        index.add_document(policy_id, f"通知{policy_id}", "一般性内容 耕地")
+    return index
+
+
+@pytest.mark.unit
+def test_tokenize_cjk_bigrams_and_words():
+    """测试汉字切分为相邻二字组，字母数字按词切分"""
+    assert tokenize("土地法 GB2024") == [
+        ("土地", 0),
+        ("地法", 1),
+        ("gb2024", 4),
+    ]
+
+
+@pytest.mark.unit
+def test_query_and_or_phrase_and_filters(tmp_path):
+    """测试 AND/OR、短语校验、单字查询和筛选条件"""
+    index = _build_index(tmp_path)
+
+    hits, total = index.search("耕地 审批")
+    assert total == 1 and hits[0][0] == 1
+
+    # “管理土地”不包含连续的“土地管理”，短语校验排除文档2
+    hits, total = index.search('"土地管理"')
+    assert [policy_id for policy_id, _ in hits] == [1]
+
+    hits, total = index.search("审批 OR 复垦")
+    assert {policy_id for policy_id, _ in hits} == {1, 2}
+
+    hits, total = index.search("矿")
+    assert [policy_id for policy_id, _ in hits] == [2]
+
+    hits, total = index.search("耕地", category="规划")
+    assert [policy_id for policy_id, _ in hits] == [2]
+
+    hits, total = index.search("耕地", start_date=date(2023, 12, 1))
+    assert [policy_id for policy_id, _ in hits] == [1]
+
+    # 标题命中的文档排在前面
+    hits, total = index.search("土地", limit=1)
+    assert total == 2 and hits[0][0] == 1
+
+
+@pytest.mark.unit
+def test_update_remove_compact_and_persist(tmp_path):
+    """测试更新、删除、压缩后持久化并重新加载"""
+    index = _build_index(tmp_path)
+    index.add_document(1, "土地管理办法", "内容已更新")
+    index.remove_documents([3, 4])
+    assert index.search("审批")[1] == 0
+
+    index.compact()
+    index.save()
+
+    loaded = BigramIndex(str(tmp_path))
+    assert loaded.load()
+    assert loaded.doc_count == 297
+    assert loaded.search("耕地")[1] == 296
+    assert loaded.search('"内容已更新"')[0][0][0] == 1
+
+
+@pytest.mark.unit
+def test_search_service_bigram_engine(db_session: Session, tmp_path, monkeypatch):
+    """测试二元组引擎从数据库同步并按相关度返回政策"""
+    monkeypatch.setattr(search_module, "_bigram_index", BigramIndex(str(tmp_path)))
+    monkeypatch.setattr(
+        search_module, "_sync_state", {"last_sync": 0.0, "last_prune": 0.0}
+    )
+
+    policy_service = PolicyService()
+    for title, content in (
+        ("矿产资源规划", "提到土地一次"),
+        ("土地管理办法", "土地 土地 土地管理"),
+    ):
+        policy_service.save_policy(
+            db_session,
+            {
+                "title": title,
+                "pub_date": "2024-01-15",
+                "source": f"https://gi.mnr.gov.cn/{title}.html",
+                "content": content,
+            },
+        )
+
+    service = SearchService()
+    service.engine = "bigram"
+    service.sync_bigram_index(db_session, force=True)
+    search_module.get_bigram_index().ready = True
+
+    policies, total = service.search(db_session, "土地")
+    assert total == 2
+    assert policies[0].title == "土地管理办法"
+
+
+@pytest.mark.api
+def test_bigram_search_runs_off_event_loop(client, auth_token, monkeypatch):
+    """测试二元组引擎的搜索通过 run_blocking 在线程池中执行"""
+    from app.api import policies as policies_api
+    from app.database import ReadSession
+
+    original_run = ReadSession.run
+
+    async def checked_run(self, fn, *args, **kwargs):
+        assert fn is not policies_api._search_response, "二元组检索不应在事件循环中执行"
+        return await original_run(self, fn, *args, **kwargs)
+
+    monkeypatch.setattr(ReadSession, "run", checked_run)
+    monkeypatch.setattr(policies_api.search_service, "engine", "bigram")
+
+    response = client.post(
+        "/api/policies/search",
+        json={"keyword": "土地"},
+        headers={"Authorization": f"Bearer {auth_token}"},
+    )
+    assert response.status_code == 200
+    assert response.json()["total"] == 0
+
+
+@pytest.mark.unit
+def test_read_session_run_blocking_uses_sync_session(worker_sessions):
+    """测试异步会话的 run_blocking 在工作线程中使用独立的同步会话执行"""
+    import asyncio
+    import threading
+
+    from app.database import ReadSession
+
+    loop_thread = threading.get_ident()
+    seen = {}
+
+    def fn(db, value):
+        seen["session"] = db
+        seen["thread"] = threading.get_ident()
+        return value * 2
+
+    async def main():
+        seen["loop_thread"] = threading.get_ident()
+        return await ReadSession(async_session=object()).run_blocking(fn, 21)
+
+    assert asyncio.run(main()) == 42
+    assert isinstance(seen["session"], Session)
+    assert seen["thread"] not in (loop_thread, seen["loop_thread"])
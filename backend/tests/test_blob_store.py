@@ -0,0 +1,184 @@
+"""
+附件内容块存储测试
+"""
+
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.attachment import AttachmentBlob
+from app.services.blob_store_service import BlobStoreService
+
+
+@pytest.fixture
+def blob_store(tmp_path):
+    """使用临时目录的内容块存储"""
+    store = BlobStoreService()
+    store.storage_mode = "local"
+    store.local_dir = tmp_path / "storage"
+    return store
+
+
+@pytest.mark.unit
+def test_put_file_deduplicates_by_content(db_session: Session, blob_store, tmp_path):
+    """测试相同内容只存一份，引用计数递增"""
+    first = tmp_path / "task1.pdf"
+    second = tmp_path / "task2.pdf"
+    first.write_bytes(b"same attachment content")
+    second.write_bytes(b"same attachment content")
+
+    blob_a = blob_store.put_file(db_session, str(first))
+    blob_b = blob_store.put_file(db_session, str(second))
+    db_session.commit()
+
+    assert blob_a.sha256 == blob_b.sha256
+    assert db_session.query(AttachmentBlob).count() == 1
+    assert db_session.get(AttachmentBlob, blob_a.sha256).ref_count == 2
+    assert blob_store.get_local_blob_path(blob_a.sha256).read_bytes() == (
+        b"same attachment content"
+    )
+
+
+@pytest.mark.unit
+def test_release_and_collect_garbage(db_session: Session, blob_store, tmp_path):
+    """测试引用归零后内容块被回收"""
+    source = tmp_path / "attachment.docx"
+    source.write_bytes(b"docx bytes")
+
+    sha256 = blob_store.put_file(db_session, str(source)).sha256
+    blob_store.put_file(db_session, str(source))
+    db_session.commit()
+
+    blob_store.release(db_session, [sha256])
+    db_session.commit()
+    assert blob_store.collect_garbage(db_session, [sha256])["deleted_blobs"] == 0
+
+    blob_store.release(db_session, [sha256])
+    db_session.commit()
+    result = blob_store.collect_garbage(db_session, [sha256])
+
+    assert result["deleted_blobs"] == 1
+    assert db_session.get(AttachmentBlob, sha256) is None
+    assert not blob_store.get_local_blob_path(sha256).exists()
+
+
+@pytest.mark.unit
+def test_reconcile_and_full_gc_skip_recently_updated_blobs(
+    db_session: Session, blob_store, tmp_path
+):
+    """测试引用计数重算和全量回收跳过最近更新过的内容块（可能有未提交的引用）"""
+    source = tmp_path / "attachment.pdf"
+    source.write_bytes(b"pdf bytes")
+    sha256 = blob_store.put_file(db_session, str(source)).sha256
+    db_session.commit()
+
+    # 刚登记的引用还没有对应的附件记录：不重算、不回收
+    assert blob_store.reconcile_ref_counts(db_session) == 0
+    assert blob_store.collect_garbage(db_session)["deleted_blobs"] == 0
+    assert db_session.get(AttachmentBlob, sha256).ref_count == 1
+
+    stale = datetime.now(timezone.utc) - BlobStoreService.GC_GRACE * 2
+    db_session.query(AttachmentBlob).update(
+        {AttachmentBlob.updated_at: stale}, synchronize_session=False
+    )
+    db_session.commit()
+    assert blob_store.reconcile_ref_counts(db_session) == 1
+    db_session.expire_all()
+    assert db_session.get(AttachmentBlob, sha256).ref_count == 0
+
+    # 重算刷新了 updated_at，留到下一次回收
+    assert blob_store.collect_garbage(db_session)["deleted_blobs"] == 0
+    db_session.query(AttachmentBlob).update(
+        {AttachmentBlob.updated_at: stale}, synchronize_session=False
+    )
+    db_session.commit()
+    assert blob_store.collect_garbage(db_session)["deleted_blobs"] == 1
+
+
+@pytest.mark.unit
+def test_s3_blob_temp_file_is_released(blob_store, monkeypatch):
+    """测试从S3下载的内容块临时文件在用完后删除"""
+
+    class FakeS3:
+        def is_enabled(self):
+            return True
+
+        def download_file(self, key, path):
+            with open(path, "wb") as f:
+                f.write(b"from s3")
+            return True
+
+    blob_store.s3_service = FakeS3()
+    path = blob_store.get_blob_file_path("ab" * 32)
+    assert open(path, "rb").read() == b"from s3"
+
+    local_path = blob_store.get_local_blob_path("cd" * 32)
+    blob_store.release_file_path(str(local_path))  # 非临时文件忽略
+    blob_store.release_file_path(path)
+    assert not os.path.exists(path)
+
+
+@pytest.mark.unit
+def test_crawled_attachments_are_moved_into_blob_store(
+    db_session: Session, blob_store, tmp_path
+):
+    """测试爬虫下载的附件移入内容块存储，各任务的下载目录不再保留副本"""
+    from app.models.attachment import Attachment
+    from app.services.policy_service import PolicyService
+
+    service = PolicyService()
+    service.blob_store = blob_store
+    downloads = []
+    for task_id in (1, 2):
+        policy = service.save_policy(
+            db_session,
+            {
+                "title": "附件政策",
+                "pub_date": "2024-01-15",
+                "source": "https://gi.mnr.gov.cn/a.html",
+                "content": "正文",
+            },
+            task_id=task_id,
+        )
+        download = tmp_path / f"task{task_id}" / "files" / "1_附件.pdf"
+        download.parent.mkdir(parents=True)
+        download.write_bytes(b"crawled attachment")
+        downloads.append(download)
+
+        result = service.process_policy_attachments_after_crawl(
+            db_session,
+            policy.id,
+            [
+                {
+                    "file_name": "附件.pdf",
+                    "url": "https://gi.mnr.gov.cn/a.pdf",
+                    "storage_path": str(download),
+                    "file_type": "pdf",
+                }
+            ],
+            task_id=task_id,
+            auto_merge=False,
+        )
+        assert result["attachments_saved"] == 1
+
+    # 第一次移动为内容块文件，第二次内容块已存在，删除源文件
+    assert not any(download.exists() for download in downloads)
+    blob = db_session.query(AttachmentBlob).one()
+    blob_path = blob_store.get_local_blob_path(blob.sha256)
+    assert blob.ref_count == 2 and blob_path.read_bytes() == b"crawled attachment"
+    assert {a.file_path for a in db_session.query(Attachment).all()} == {str(blob_path)}
+
+
+@pytest.mark.unit
+def test_put_file_keeps_source_when_blob_not_stored(
+    db_session: Session, blob_store, tmp_path
+):
+    """测试内容块未能保存到本地或S3时保留源文件"""
+    blob_store.storage_mode = "s3"
+    source = tmp_path / "attachment.pdf"
+    source.write_bytes(b"only copy")
+
+    assert blob_store.put_file(db_session, str(source), move=True) is not None
+    assert source.read_bytes() == b"only copy"
@@ -49,3 +49,110 @@ def test_database_tables_exist(db_session: Session):
     required_tables = ["users", "tasks", "policies", "backup_records"]
     for table in required_tables:
         assert table in tables, f"表 {table} 不存在"
+
+
+@pytest.mark.unit
+def test_async_database_url():
+    """测试只读接口的异步连接串只对PostgreSQL启用"""
+    from app.database import _async_database_url
+
+    assert (
+        _async_database_url("postgresql://user:pass@db:5432/mnr")
+        == "postgresql+asyncpg://user:pass@db:5432/mnr"
+    )
+    assert (
+        _async_database_url("postgresql+psycopg2://user:pass@db/mnr")
+        == "postgresql+asyncpg://user:pass@db/mnr"
+    )
+    assert _async_database_url("sqlite:///./test.db") is None
+
+
+@pytest.mark.api
+def test_policy_read_endpoints(client, auth_token, db_session: Session):
+    """测试异步只读接口（列表、详情、筛选项）返回政策数据"""
+    from app.services.policy_service import PolicyService
+
+    policy = PolicyService().save_policy(
+        db_session,
+        {
+            "title": "异步接口政策",
+            "pub_date": "2024-01-15",
+            "source": "https://gi.mnr.gov.cn/async.html",
+            "content": "正文内容",
+            "category": "规章",
+        },
+    )
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    listing = client.get("/api/policies/", headers=headers).json()
+    assert [item["id"] for item in listing["items"]] == [policy.id]
+
+    detail = client.get(f"/api/policies/{policy.id}", headers=headers).json()
+    assert detail["content"] == "正文内容"
+    assert client.get("/api/policies/999999", headers=headers).status_code == 404
+
+    facets = client.get("/api/policies/meta/facets", headers=headers).json()
+    assert facets["categories"] == [{"value": "规章", "count": 1}]
+
+
+@pytest.mark.unit
+def test_pool_metrics_owner_and_timeouts():
+    """测试连接池监控记录连接持有者和获取连接超时"""
+    from sqlalchemy import create_engine, exc
+
+    from app.pool_metrics import (
+        InstrumentedQueuePool,
+        connection_owner,
+        instrument_engine,
+    )
+
+    test_engine = create_engine(
+        "sqlite://",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    metrics = instrument_engine(test_engine, "test")
+    try:
+        with connection_owner("task:1"):
+            conn = test_engine.connect()
+        status = metrics.snapshot(test_engine.pool, long_held_seconds=0)
+        assert status["checked_out"] == 1
+        assert status["checked_out_by_owner"] == {"task:1": 1}
+        assert status["long_held"][0]["owner"] == "task:1"
+
+        with pytest.raises(exc.TimeoutError):
+            test_engine.connect()
+        conn.close()
+
+        status = metrics.snapshot(test_engine.pool, long_held_seconds=0)
+        assert status["timeouts"] == 1
+        assert status["checked_out"] == 0
+        assert status["checked_out_by_owner"] == {}
+    finally:
+        test_engine.dispose()
+        from app import pool_metrics
+
+        pool_metrics._registry.pop("test", None)
+
+
+@pytest.mark.unit
+def test_pool_sizing(monkeypatch):
+    """测试连接池大小按爬虫并发数和数据库连接预算计算"""
+    from app.config import settings
+    from app.database import pool_sizing
+
+    monkeypatch.setattr(settings, "db_pool_size", None)
+    monkeypatch.setattr(settings, "db_max_overflow", None)
+    monkeypatch.setattr(settings, "crawl_max_concurrent_tasks", 3)
+    monkeypatch.setattr(settings, "db_api_connections", 5)
+    monkeypatch.setattr(settings, "async_db_enabled", False)
+    monkeypatch.setattr(settings, "web_concurrency", 4)
+    monkeypatch.setattr(settings, "db_max_connections", 100)
+
+    # 3 x 2 + 5 + 2 = 13 个常驻连接；每个进程 25 个连接，溢出上限 12
+    assert pool_sizing() == (13, 12)
+
+    monkeypatch.setattr(settings, "db_max_connections", 40)
+    assert pool_sizing() == (13, 0)
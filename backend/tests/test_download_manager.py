@@ -0,0 +1,228 @@
+"""
+附件下载管理测试
+"""
+
+import os
+
+import pytest
+
+from app.core.download_manager import (
+    AttachmentDownloadManager,
+    DownloadError,
+    PART_SUFFIX,
+    accept_header_parsing_error,
+    get_download_manager,
+    stream_download,
+)
+
+
+class FakeResponse:
+    """模拟支持Range的流式响应"""
+
+    def __init__(self, payload: bytes, start: int, total: int, fail_after=None):
+        self.payload = payload
+        self.fail_after = fail_after
+        self.status_code = 206 if start else 200
+        self.headers = {"Content-Length": str(len(payload))}
+        if start:
+            self.headers["Content-Range"] = f"bytes {start}-{total - 1}/{total}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.payload), 4):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise ConnectionError("connection reset")
+            yield self.payload[i : i + 4]
+
+
+class FakeSession:
+    """模拟服务器：第一次请求在中途断开，之后支持Range续传"""
+
+    def __init__(self, content: bytes, fail_first_after=None):
+        self.content = content
+        self.fail_first_after = fail_first_after
+        self.range_headers = []
+
+    def get(self, url, stream, timeout, proxies, headers):
+        range_header = headers.get("Range")
+        self.range_headers.append(range_header)
+        start = int(range_header[6:-1]) if range_header else 0
+        fail_after = self.fail_first_after if len(self.range_headers) == 1 else None
+        return FakeResponse(
+            self.content[start:], start, len(self.content), fail_after=fail_after
+        )
+
+
+@pytest.mark.unit
+def test_stream_download_resumes_with_range(tmp_path):
+    """测试断线后通过Range续传，完成后原子重命名"""
+    content = b"0123456789abcdefghijklmnopqrstuvwxyz"
+    session = FakeSession(content, fail_first_after=12)
+    save_path = str(tmp_path / "files" / "attachment.pdf")
+
+    with pytest.raises(ConnectionError):
+        stream_download(session, "https://example.com/a.pdf", save_path)
+    assert (tmp_path / "files" / ("attachment.pdf" + PART_SUFFIX)).exists()
+    assert not (tmp_path / "files" / "attachment.pdf").exists()
+
+    size = stream_download(session, "https://example.com/a.pdf", save_path)
+
+    assert size == len(content)
+    assert session.range_headers == [None, "bytes=12-"]
+    assert (tmp_path / "files" / "attachment.pdf").read_bytes() == content
+    assert not (tmp_path / "files" / ("attachment.pdf" + PART_SUFFIX)).exists()
+
+
+@pytest.mark.unit
+def test_stream_download_rejects_short_body(tmp_path):
+    """测试长度不符时不生成目标文件"""
+
+    class ShortSession(FakeSession):
+        def get(self, url, stream, timeout, proxies, headers):
+            response = FakeResponse(self.content[:10], 0, len(self.content))
+            response.headers["Content-Length"] = str(len(self.content))
+            return response
+
+    save_path = str(tmp_path / "short.pdf")
+    with pytest.raises(DownloadError):
+        stream_download(ShortSession(b"x" * 32), "https://example.com/s.pdf", save_path)
+    assert not (tmp_path / "short.pdf").exists()
+
+
+@pytest.mark.unit
+def test_download_manager_limits_per_host_concurrency():
+    """测试同一主机的并发下载数不超过限制"""
+    import threading
+    import time
+
+    manager = AttachmentDownloadManager(max_workers=6, per_host_limit=2)
+    lock = threading.Lock()
+    active = {"current": 0, "peak": 0}
+
+    def fake_download(_):
+        with lock:
+            active["current"] += 1
+            active["peak"] = max(active["peak"], active["current"])
+        time.sleep(0.05)
+        with lock:
+            active["current"] -= 1
+        return True
+
+    futures = [
+        manager.submit("https://gi.mnr.gov.cn/file.pdf", fake_download, i)
+        for i in range(6)
+    ]
+    assert all(f.result() for f in futures)
+    assert active["peak"] == 2
+    manager.shutdown(wait=True)
+
+
+@pytest.mark.unit
+def test_download_manager_waiting_host_does_not_block_other_hosts():
+    """测试等待主机许可的任务不占用下载线程，其他主机的下载不被饿死"""
+    import threading
+
+    manager = AttachmentDownloadManager(max_workers=2, per_host_limit=1)
+    release_slow = threading.Event()
+
+    def slow_download(_):
+        return release_slow.wait(5)
+
+    slow_futures = [manager.submit("https://slow.example.com/1.pdf", slow_download, 1)]
+    # 同一主机的第二个任务在提交时等待许可（调用线程阻塞），不占用线程池
+    waiter = threading.Thread(
+        target=lambda: slow_futures.append(
+            manager.submit("https://slow.example.com/2.pdf", slow_download, 2)
+        )
+    )
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()
+
+    fast = manager.submit("https://fast.example.com/a.pdf", lambda _: True, 3)
+    assert fast.result(timeout=2) is True
+
+    release_slow.set()
+    waiter.join(5)
+    assert all(f.result(timeout=5) for f in slow_futures)
+    manager.shutdown(wait=True)
+
+
+@pytest.mark.unit
+def test_get_download_manager_keeps_managers_per_config():
+    """测试不同并发参数使用各自的管理器，不会关闭其他调用方的线程池"""
+    first = get_download_manager(max_workers=3, per_host_limit=1)
+    other = get_download_manager(max_workers=5, per_host_limit=2)
+
+    assert other is not first
+    assert get_download_manager(max_workers=3, per_host_limit=1) is first
+    # 获取其他配置的管理器后，原管理器仍可提交任务
+    assert first.submit("https://example.com/a.pdf", lambda: True).result(timeout=2)
+
+
+class HeaderParsingError(Exception):
+    """模拟 urllib3 的响应头解析错误"""
+
+
+class HeaderErrorResponse(FakeResponse):
+    """输出 fail_after 字节后抛出响应头解析错误"""
+
+    def iter_content(self, chunk_size=1):
+        yield self.payload[: self.fail_after]
+        raise HeaderParsingError("[NoBoundaryInMultipartDefect()], unparsed data: ''")
+
+
+class HeaderErrorSession(FakeSession):
+    """第一次请求输出部分或全部数据后抛出响应头解析错误，之后正常续传"""
+
+    def get(self, url, stream, timeout, proxies, headers):
+        if self.range_headers:
+            return super().get(url, stream, timeout, proxies, headers)
+        self.range_headers.append(headers.get("Range"))
+        return HeaderErrorResponse(
+            self.content, 0, len(self.content), fail_after=self.fail_first_after
+        )
+
+
+@pytest.mark.unit
+def test_accept_header_parsing_error_keeps_complete_file(tmp_path):
+    """测试响应头解析错误时，长度与Content-Length一致的临时文件视为下载完成"""
+    content = b"%PDF-1.4 complete attachment"
+    session = HeaderErrorSession(content, fail_first_after=len(content))
+    save_path = str(tmp_path / "attachment.pdf")
+
+    with pytest.raises(HeaderParsingError) as exc_info:
+        stream_download(session, "https://example.com/a.pdf", save_path)
+    assert not accept_header_parsing_error(ConnectionError("reset"), save_path)
+    assert not (tmp_path / "attachment.pdf").exists()
+
+    assert accept_header_parsing_error(exc_info.value, save_path)
+    assert (tmp_path / "attachment.pdf").read_bytes() == content
+    assert os.listdir(tmp_path) == ["attachment.pdf"]
+
+
+@pytest.mark.unit
+def test_header_parsing_error_does_not_accept_truncated_file(tmp_path):
+    """测试响应头解析错误时，不完整的临时文件不被接受，重试时通过Range续传"""
+    content = b"0123456789abcdefghijklmnopqrstuvwxyz"
+    session = HeaderErrorSession(content, fail_first_after=12)
+    save_path = str(tmp_path / "attachment.pdf")
+
+    with pytest.raises(HeaderParsingError) as exc_info:
+        stream_download(session, "https://example.com/a.pdf", save_path)
+    assert not accept_header_parsing_error(exc_info.value, save_path)
+    assert not (tmp_path / "attachment.pdf").exists()
+    assert (tmp_path / ("attachment.pdf" + PART_SUFFIX)).stat().st_size == 12
+
+    stream_download(session, "https://example.com/a.pdf", save_path)
+    assert session.range_headers == [None, "bytes=12-"]
+    assert (tmp_path / "attachment.pdf").read_bytes() == content
+    assert os.listdir(tmp_path) == ["attachment.pdf"]
@@ -0,0 +1,119 @@
+"""
+邮件发件箱测试
+"""
+
+from datetime import datetime, timezone
+
+import aiosmtplib
+import pytest
+
+from app.config import settings
+from app.models.system_config import EmailOutbox
+from app.services import email_outbox
+from app.services.email_outbox import EmailOutboxSender
+from app.services.email_service import EmailService
+
+
+class FakeSMTP:
+    """记录连接、登录和发送的SMTP客户端"""
+
+    instances = []
+
+    def __init__(self, fail_subjects=()):
+        self.fail_subjects = fail_subjects
+        self.is_connected = False
+        self.logins = 0
+        self.sent = []
+        FakeSMTP.instances.append(self)
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def login(self, user, password):
+        self.logins += 1
+
+    async def send_message(self, msg):
+        if msg["Subject"] in self.fail_subjects:
+            raise aiosmtplib.SMTPRecipientsRefused([])
+        self.sent.append(msg["Subject"])
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+@pytest.fixture
+def email_service(db_session, worker_sessions, monkeypatch):
+    """已启用的邮件服务（不读取数据库配置，发件箱使用测试数据库）"""
+
+    def load_config(self, db=None):
+        self.enabled = True
+        self.smtp_host = "smtp.example.com"
+        self.smtp_port = 587
+        self.smtp_user = "crawler@example.com"
+        self.smtp_password = "secret"
+        self.from_address = "crawler@example.com"
+        self.to_addresses = ["admin@example.com"]
+
+    FakeSMTP.instances = []
+    monkeypatch.setattr(EmailService, "_load_config", load_config)
+    service = EmailService()
+    monkeypatch.setattr(email_outbox, "get_email_service", lambda: service)
+    return service
+
+
+@pytest.mark.unit
+def test_outbox_sends_batch_over_one_connection(db_session, email_service, monkeypatch):
+    """测试发送邮件只写入发件箱，发件器在同一个已登录的连接上批量发送"""
+    monkeypatch.setattr(EmailService, "create_smtp", lambda self: FakeSMTP())
+
+    for i in range(3):
+        result = email_service.send_email(f"通知{i}", "正文")
+        assert result["success"] and result["outbox_id"]
+    assert db_session.query(EmailOutbox).filter_by(status="pending").count() == 3
+    assert FakeSMTP.instances == []  # 写入发件箱时不连接SMTP服务器
+
+    sender = EmailOutboxSender()
+    assert sender.send_pending() == 3
+    assert len(FakeSMTP.instances) == 1
+    smtp = FakeSMTP.instances[0]
+    assert smtp.logins == 1 and smtp.sent == ["通知0", "通知1", "通知2"]
+    db_session.expire_all()
+    assert db_session.query(EmailOutbox).filter_by(status="sent").count() == 3
+
+    # 下一批复用已登录的连接
+    email_service.send_email("通知3", "正文")
+    assert sender.send_pending() == 1
+    assert len(FakeSMTP.instances) == 1 and smtp.sent[-1] == "通知3"
+    assert sender.send_pending() == 0
+
+
+@pytest.mark.unit
+def test_outbox_retries_with_backoff_then_fails(db_session, email_service, monkeypatch):
+    """测试发送失败的邮件按退避时间重试，超过最大次数后标记为失败"""
+    monkeypatch.setattr(
+        EmailService, "create_smtp", lambda self: FakeSMTP(fail_subjects=("坏邮件",))
+    )
+    monkeypatch.setattr(settings, "email_max_attempts", 2)
+    email_service.send_email("坏邮件", "正文")
+    email_service.send_email("好邮件", "正文")
+
+    sender = EmailOutboxSender()
+    assert sender.send_pending() == 2
+    db_session.expire_all()
+    bad = db_session.query(EmailOutbox).filter_by(subject="坏邮件").one()
+    assert bad.status == "pending" and bad.attempts == 1 and bad.last_error
+    assert db_session.query(EmailOutbox).filter_by(subject="好邮件").one().status == (
+        "sent"
+    )
+
+    # 未到重试时间不领取
+    assert sender.send_pending() == 0
+    bad.next_attempt_at = datetime.now(timezone.utc)
+    db_session.commit()
+    assert sender.send_pending() == 1
+    db_session.expire_all()
+    bad = db_session.query(EmailOutbox).filter_by(subject="坏邮件").one()
+    assert bad.status == "failed" and bad.attempts == 2
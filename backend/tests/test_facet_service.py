@@ -0,0 +1,67 @@
+"""
+筛选项服务测试
+"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.policy import PolicyFacetCount
+from app.services.facet_service import get_facet_service
+from app.services.policy_service import PolicyService
+
+
+def _policy_data(title: str, source_name: str, category: str, level: str = ""):
+    return {
+        "title": title,
+        "pub_date": "2024-01-15",
+        "source": f"https://gi.mnr.gov.cn/{title}.html",
+        "source_name": source_name,
+        "category": category,
+        "level": level,
+    }
+
+
+@pytest.mark.unit
+def test_facet_counts_follow_saves_and_deletes(db_session: Session):
+    """测试保存和删除政策时增量维护筛选项数量，重建结果一致"""
+    service = PolicyService()
+    service.save_policies_batch(
+        db_session,
+        [
+            _policy_data("政策1", "政策法规库", "规章", "部门规章"),
+            _policy_data("政策2", "政策法规库", "规章", "部门规章"),
+            _policy_data("政策3", "政府信息公开平台", "通知"),
+        ],
+    )
+    policy = service.save_policy(
+        db_session, _policy_data("政策4", "政府信息公开平台", "规章", "部门规章")
+    )
+
+    facets = service.facet_service.get_facets(db_session)
+    assert facets["categories"] == [
+        {"value": "规章", "count": 3},
+        {"value": "通知", "count": 1},
+    ]
+    assert facets["levels"] == [{"value": "部门规章", "count": 3}]
+    assert service.get_categories(db_session, source_name="政府信息公开平台") == [
+        "规章",
+        "通知",
+    ]
+
+    service.delete_policy(db_session, policy.id)
+    assert service.facet_service.get_facets(db_session)["source_names"] == [
+        {"value": "政策法规库", "count": 2},
+        {"value": "政府信息公开平台", "count": 1},
+    ]
+
+    incremental = {
+        (row.source_name, row.category, row.level): row.policy_count
+        for row in db_session.query(PolicyFacetCount)
+        if row.policy_count
+    }
+    get_facet_service().rebuild(db_session)
+    rebuilt = {
+        (row.source_name, row.category, row.level): row.policy_count
+        for row in db_session.query(PolicyFacetCount)
+    }
+    assert incremental == rebuilt
@@ -0,0 +1,191 @@
+"""
+键集分页测试
+"""
+
+import re
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+from app.services.policy_service import PolicyService
+
+
+@pytest.mark.unit
+def test_policy_cursor_pages_cover_all_rows_including_null_dates(db_session: Session):
+    """测试游标翻页按 (pub_date, id) 倒序返回全部政策，无发布日期的排在最后"""
+    policy_service = PolicyService()
+    pub_dates = ["2024-01-15", "2024-01-15", "2023-06-01", None, "2024-03-01", None]
+    for i, pub_date in enumerate(pub_dates):
+        policy_service.save_policy(
+            db_session,
+            {
+                "title": f"政策{i}",
+                "pub_date": pub_date,
+                "source": f"https://gi.mnr.gov.cn/{i}.html",
+            },
+        )
+
+    expected, total = policy_service.get_policies(db_session, limit=100)
+    assert total == 6
+    assert [p.pub_date is None for p in expected] == [False] * 4 + [True] * 2
+
+    seen, cursor = [], None
+    while True:
+        page, _ = policy_service.get_policies(db_session, limit=2, cursor=cursor)
+        seen.extend(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert [p.id for p in seen] == [p.id for p in expected]
+
+    # 旧客户端的 skip 分页结果保持一致
+    page, _ = policy_service.get_policies(db_session, skip=2, limit=2)
+    assert [p.id for p in page] == [p.id for p in expected[2:4]]
+
+
+@pytest.mark.api
+def test_task_list_cursor(client: TestClient, auth_token, db_session: Session):
+    """测试任务列表返回下一页游标，无效游标返回400"""
+    # 两个任务创建时间相同，由id决定先后
+    for i, created_at in enumerate(
+        [datetime(2024, 1, 1), datetime(2024, 1, 2), datetime(2024, 1, 2)]
+    ):
+        db_session.add(
+            Task(
+                task_name=f"任务{i}",
+                task_type="manual",
+                status="pending",
+                created_at=created_at,
+            )
+        )
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    first = client.get("/api/tasks/", params={"limit": 2}, headers=headers).json()
+    assert len(first["items"]) == 2 and first["next_cursor"]
+
+    second = client.get(
+        "/api/tasks/",
+        params={"limit": 2, "cursor": first["next_cursor"]},
+        headers=headers,
+    ).json()
+    assert len(second["items"]) == 1 and second["next_cursor"] is None
+    names = [item["task_name"] for item in first["items"] + second["items"]]
+    assert names == ["任务2", "任务1", "任务0"]
+
+    response = client.get("/api/tasks/", params={"cursor": "不是游标"}, headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.unit
+def test_policy_total_is_cached_per_filter_set(db_session: Session):
+    """测试相同筛选条件的总数在有效期内复用，删除政策后失效"""
+    policy_service = PolicyService()
+    for i in range(3):
+        policy_service.save_policy(
+            db_session,
+            {
+                "title": f"耕地政策{i}",
+                "pub_date": "2024-01-15",
+                "source": f"https://gi.mnr.gov.cn/{i}.html",
+                "category": "规章",
+            },
+        )
+
+    policies, total = policy_service.get_policies(
+        db_session, category="规章", keyword="耕地 政策"
+    )
+    assert total == 3 and policies.total_is_estimate is False
+
+    # 直接插入的行不经过失效逻辑，缓存期内（关键词顺序不同也视为同一条件）总数不变
+    policy_service.save_policy(
+        db_session,
+        {
+            "title": "耕地政策3",
+            "pub_date": "2024-01-15",
+            "source": "https://gi.mnr.gov.cn/3.html",
+            "category": "规章",
+        },
+    )
+    _, total = policy_service.get_policies(
+        db_session, category="规章", keyword="政策  耕地"
+    )
+    assert total == 3
+
+    policy_service.delete_policy(db_session, policies[0].id)
+    policy_service.delete_policy(db_session, policies[1].id)
+    _, total = policy_service.get_policies(
+        db_session, category="规章", keyword="耕地 政策"
+    )
+    assert total == 2
+
+
+@pytest.mark.unit
+def test_list_queries_only_select_list_columns(db_session: Session):
+    """测试列表查询只读取列表项需要的列，不读取正文、任务配置等大字段"""
+    from sqlalchemy import event
+
+    from app.api.policies import POLICY_LIST_COLUMNS
+    from app.api.tasks import TASK_LIST_COLUMNS
+    from app.services.search_service import SearchService
+    from app.services.task_service import TaskService
+
+    policy_service = PolicyService()
+    policy_service.save_policy(
+        db_session,
+        {
+            "title": "土地管理办法",
+            "pub_date": "2024-01-15",
+            "source": "https://gi.mnr.gov.cn/1.html",
+            "content": "耕地保护" * 1000,
+        },
+    )
+    db_session.add(
+        Task(
+            task_name="任务",
+            task_type="manual",
+            status="completed",
+            config_json={"keywords": ["土地"]},
+            progress_message="已保存 1 条",
+        )
+    )
+    db_session.commit()
+    db_session.expunge_all()
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        policies, _ = policy_service.get_policies(
+            db_session, columns=POLICY_LIST_COLUMNS
+        )
+        results, _ = SearchService().search(
+            db_session, "耕地", columns=POLICY_LIST_COLUMNS
+        )
+        tasks, _ = TaskService().get_tasks(db_session, columns=TASK_LIST_COLUMNS)
+        assert policies[0].title == results[0].title == "土地管理办法"
+        assert tasks[0].task_name == "任务"
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    policy_selects = [s for s in selects if "FROM policies" in s and "count(" not in s]
+    task_selects = [s for s in selects if "FROM tasks" in s and "count(" not in s]
+    assert len(policy_selects) == 2 and len(task_selects) == 1
+    # 只检查SELECT列表（关键词搜索的WHERE条件中会出现content）
+    for statement in policy_selects:
+        select_list = re.split(r"\sFROM\s", statement)[0]
+        assert "policies.title" in select_list
+        assert not re.search(r"policies\.content\b(?!_)", select_list)
+        assert "policies.attachments_s3_keys" not in select_list
+    select_list = re.split(r"\sFROM\s", task_selects[0])[0]
+    assert "tasks.task_name" in select_list
+    assert "tasks.config_json" not in select_list
+    assert "tasks.progress_message" not in select_list
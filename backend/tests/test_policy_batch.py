@@ -0,0 +1,123 @@
+"""
+政策批量保存测试
+"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.attachment import Attachment
+from app.models.policy import Policy, PolicyContent
+from app.services.policy_service import PolicyService
+
+
+def _policy_data(title: str, attachments=None):
+    return {
+        "title": title,
+        "pub_date": "2024-01-15",
+        "source": f"https://gi.mnr.gov.cn/{title}.html",
+        "content": f"{title} 正文",
+        "attachments": attachments or [],
+    }
+
+
+@pytest.mark.unit
+def test_save_policies_batch_exact_counts(db_session: Session):
+    """测试批量保存返回精确的保存/跳过数，并写入附件"""
+    service = PolicyService()
+    batch = [
+        _policy_data(
+            "政策A",
+            attachments=[
+                {"file_name": "a.pdf", "file_url": "https://gi.mnr.gov.cn/a.pdf"}
+            ],
+        ),
+        _policy_data("政策B"),
+        _policy_data("政策A"),  # 页内重复
+    ]
+
+    result = service.save_policies_batch(db_session, batch, page_size=2)
+
+    assert result == {"total": 3, "saved": 2, "skipped": 1, "failed": 0}
+    assert db_session.query(Policy).count() == 2
+    policy_a = db_session.query(Policy).filter(Policy.title == "政策A").one()
+    assert policy_a.attachment_count == 1
+    assert db_session.query(Attachment).filter_by(policy_id=policy_a.id).count() == 1
+
+
+@pytest.mark.unit
+def test_save_policy_conflict_returns_existing(db_session: Session):
+    """测试唯一索引冲突时返回现有政策，不同任务可保存同一政策"""
+    service = PolicyService()
+
+    first = service.save_policy(db_session, _policy_data("政策C"), task_id=1)
+    duplicate = service.save_policy(db_session, _policy_data("政策C"), task_id=1)
+    other_task = service.save_policy(db_session, _policy_data("政策C"), task_id=2)
+
+    assert duplicate.id == first.id
+    assert other_task.id != first.id
+    assert db_session.query(Policy).filter(Policy.title == "政策C").count() == 2
+
+
+@pytest.mark.unit
+def test_content_stored_in_content_table(db_session: Session, monkeypatch):
+    """测试正文写入独立的正文表，超长正文压缩存放并透明解压"""
+    monkeypatch.setattr(PolicyContent, "COMPRESS_THRESHOLD", 10)
+    service = PolicyService()
+    service.save_policies_batch(db_session, [_policy_data("政策D")])
+    long_policy_id = service.save_policy(
+        db_session, {**_policy_data("政策E"), "content": "耕地保护" * 100}
+    ).id
+    db_session.expunge_all()
+
+    rows = {row.policy_id: row for row in db_session.query(PolicyContent).all()}
+    policy_d = db_session.query(Policy).filter(Policy.title == "政策D").one()
+    assert rows[policy_d.id].compressed is False
+    assert policy_d.content == "政策D 正文"
+
+    assert rows[long_policy_id].compressed is True
+    assert len(rows[long_policy_id].content) < 400
+    policy_e = service.get_policy_by_id(db_session, long_policy_id)
+    assert policy_e.content == "耕地保护" * 100
+
+    # 未压缩的正文参与关键词搜索
+    policies, total = service.get_policies(db_session, keyword="D 正文")
+    assert total == 1 and policies[0].id == policy_d.id
+
+    # 修改正文只更新正文表中的行
+    policy_d_id = policy_d.id
+    policy_d.content = "新的正文"
+    db_session.commit()
+    db_session.expunge_all()
+    assert service.get_policy_by_id(db_session, policy_d_id).content == "新的正文"
+
+
+@pytest.mark.unit
+def test_save_one_by_one_counts_by_insert_result(db_session: Session):
+    """测试逐条保存按是否实际插入统计，刚保存的重复政策计为跳过"""
+    service = PolicyService()
+
+    created = service.save_policy_with_status(db_session, _policy_data("政策F"), 1)
+    duplicate = service.save_policy_with_status(db_session, _policy_data("政策F"), 1)
+    assert created[1] is True and duplicate == (created[0], False)
+
+    result = service._save_policies_one_by_one(
+        db_session, [_policy_data("政策G"), _policy_data("政策G")], task_id=1
+    )
+    assert result == {"total": 2, "saved": 1, "skipped": 1, "failed": 0}
+
+
+@pytest.mark.unit
+def test_policy_without_pub_date_saved_once(db_session: Session):
+    """测试发布日期为空的同一政策重复保存时只保存一次"""
+    service = PolicyService()
+    data = {**_policy_data("政策H"), "pub_date": None}
+
+    first, created = service.save_policy_with_status(db_session, data, 1)
+    duplicate, duplicate_created = service.save_policy_with_status(db_session, data, 1)
+    assert first.pub_date is None and created is True
+    assert duplicate.id == first.id and duplicate_created is False
+
+    result = service.save_policies_batch(db_session, [data, data], task_id=None)
+    assert result == {"total": 2, "saved": 1, "skipped": 1, "failed": 0}
+    assert service.save_policies_batch(db_session, [data])["skipped"] == 1
+    assert db_session.query(Policy).filter(Policy.title == "政策H").count() == 2
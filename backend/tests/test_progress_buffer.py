@@ -0,0 +1,112 @@
+"""
+任务进度缓冲测试
+"""
+
+import pytest
+
+from app.services.progress_buffer import ProgressBuffer, progress_delta
+
+
+@pytest.mark.unit
+def test_progress_buffer_keeps_recent_lines_and_throttles_flush():
+    """测试进度缓冲只保留最近的行，按行数或时间间隔节流写库"""
+    buffer = ProgressBuffer("[00:00:00] 上次的进度", flush_interval=60, flush_lines=3)
+    assert buffer.render() == "[00:00:00] 上次的进度"
+    assert not buffer.should_flush()
+
+    buffer.append("第1条")
+    buffer.append("第2条")
+    assert not buffer.should_flush()
+    buffer.append("第3条")
+    assert buffer.should_flush()
+    buffer.mark_flushed()
+    assert buffer.unflushed == 0 and not buffer.should_flush()
+
+    for i in range(ProgressBuffer.MAX_LINES + 10):
+        buffer.append(f"消息{i}" + "很长" * 400)
+    lines = buffer.render().split("\n")
+    assert len(buffer.render()) <= ProgressBuffer.MAX_TOTAL_LENGTH
+    assert lines[-1].endswith("...")
+    assert f"消息{ProgressBuffer.MAX_LINES + 9}" in lines[-1]
+    assert buffer.seq == ProgressBuffer.MAX_LINES + 14
+
+    # 间隔为0时有新消息就写库
+    buffer = ProgressBuffer(flush_interval=0, flush_lines=100)
+    assert not buffer.should_flush()
+    buffer.append("开始")
+    assert buffer.should_flush()
+
+
+@pytest.mark.unit
+def test_progress_delta_returns_new_lines_and_changed_counters():
+    """测试增量进度只返回 since 之后的新行和变化的计数器，缺口过大时返回全部"""
+    buffer = ProgressBuffer("旧1\n旧2", initial_seq=0)
+    assert buffer.seq == 2  # 没有序号的旧进度按行数编号
+    buffer.set_counters(total_count=10, completed_count=0)
+    assert buffer.append("第3条")[0] == 3
+    buffer.set_counters(total_count=10, completed_count=1)
+    buffer.append("第4条")
+    state = buffer.counter_state()
+
+    delta = progress_delta(buffer.render(), buffer.seq, state, since=3)
+    assert not delta["reset"] and delta["seq"] == 4
+    assert [line["seq"] for line in delta["lines"]] == [4]
+    assert delta["lines"][0]["text"].endswith("第4条")
+    assert delta["counters"] == {"completed_count": 1}
+
+    # 已是最新：没有新行和计数器
+    latest = progress_delta(buffer.render(), buffer.seq, state, since=4)
+    assert latest["lines"] == [] and latest["counters"] == {}
+
+    # 首次请求或缺失的行已移出缓冲：返回全部
+    full = progress_delta("第9条\n第10条", 10, state, since=2)
+    assert full["reset"] and [line["seq"] for line in full["lines"]] == [9, 10]
+    assert full["counters"] == {"total_count": 10, "completed_count": 1}
+    assert progress_delta(buffer.render(), buffer.seq, state)["reset"]
+
+    # 恢复执行的任务继续编号
+    resumed = ProgressBuffer(buffer.render(), initial_seq=4, initial_counters=state)
+    assert resumed.append("继续")[0] == 5
+    assert resumed.counters["completed_count"] == 1
+
+
+@pytest.mark.api
+def test_task_progress_endpoint_supports_since_and_etag(client, db_session, auth_token):
+    """测试增量进度接口按 since 返回新行，进度未变化时返回304"""
+    from app.models.task import Task
+
+    task = Task(
+        task_name="增量进度",
+        task_type="crawl_task",
+        status="running",
+        progress_message="第1条\n第2条\n第3条",
+        progress_seq=3,
+        progress_counters={"completed_count": {"value": 2, "seq": 3}},
+    )
+    db_session.add(task)
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.get(f"/api/tasks/{task.id}/progress?since=2", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["seq"] == 3 and not data["reset"]
+    assert data["lines"] == [{"seq": 3, "text": "第3条"}]
+    assert data["counters"] == {"completed_count": 2}
+
+    etag = response.headers["etag"]
+    cached = client.get(
+        f"/api/tasks/{task.id}/progress?since=2",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert cached.status_code == 304
+
+    task.progress_message += "\n第4条"
+    task.progress_seq = 4
+    db_session.commit()
+    changed = client.get(
+        f"/api/tasks/{task.id}/progress?since=3",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert changed.status_code == 200
+    assert changed.json()["lines"] == [{"seq": 4, "text": "第4条"}]
@@ -0,0 +1,126 @@
+"""
+任务进度推送总线测试
+"""
+
+import json
+import asyncio
+import threading
+
+import pytest
+
+from app.services.progress_bus import ProgressBus
+
+
+def _decode(frame: str) -> dict:
+    assert frame.startswith("data: ")
+    return json.loads(frame[len("data: ") :])
+
+
+@pytest.mark.unit
+def test_progress_bus_coalesces_thread_messages_and_drops_old_frames():
+    """测试其他线程发布的进度按间隔合并为一帧，慢客户端只保留最新的帧"""
+
+    async def scenario():
+        bus = ProgressBus()
+        bus.FLUSH_INTERVAL = 0.05
+        bus.QUEUE_SIZE = 2
+        queue = bus.subscribe(1)
+        snapshots = []
+
+        def snapshot():
+            snapshots.append(1)
+            return {"type": "progress_update", "task_id": 1}
+
+        def crawl():
+            for i in range(500):
+                bus.publish(1, f"消息{i}", snapshot, i + 1)
+            # 没有订阅者的任务直接忽略
+            bus.publish(2, "无人订阅", snapshot)
+
+        thread = threading.Thread(target=crawl)
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0.2)
+
+        frame = queue.get_nowait()
+        assert frame.startswith("id: 500\n")
+        data = _decode(frame[frame.index("data: ") :])
+        assert len(snapshots) == 1
+        assert data["message"] == "消息499" and data["seq"] == 500
+        assert len(data["lines"]) == ProgressBus.MAX_MESSAGES
+        assert data["lines"][0] == {"seq": 401, "text": "消息400"}
+        assert queue.empty()
+
+        # 客户端不读取时只保留最新的 QUEUE_SIZE 帧
+        for i in range(5):
+            bus.publish_event(1, {"type": "task_update", "n": i})
+        await asyncio.sleep(0.05)
+        assert queue.qsize() == 2 and bus.dropped_frames == 3
+        assert _decode(queue.get_nowait())["n"] == 3
+
+        bus.unsubscribe(1, queue)
+        assert not bus.has_subscribers(1)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.unit
+def test_progress_channel_dispatches_foreign_notifications(db_session, worker_sessions):
+    """测试其他进程的进度通知读取数据库中的进度推送给订阅者，本进程的通知被跳过"""
+    from app.models.task import Task
+    from app.services.progress_bus import get_progress_bus
+    from app.services.progress_channel import ProgressChannel
+
+    task = Task(
+        task_name="跨进程任务",
+        task_type="crawl_task",
+        status="running",
+        progress_message="[10:00:00] 开始\n[10:00:01] 已保存 3 条",
+        progress_seq=2,
+        progress_counters={"completed_count": {"value": 3, "seq": 2}},
+    )
+    db_session.add(task)
+    db_session.commit()
+    channel = ProgressChannel()
+    # SQLite 不发送通知
+    channel.notify(db_session, task.id, 2, {"completed_count": 3})
+
+    def payload(origin: str) -> str:
+        return json.dumps(
+            {
+                "task_id": task.id,
+                "seq": 2,
+                "counters": {"completed_count": 3},
+                "origin": origin,
+            }
+        )
+
+    async def scenario():
+        bus = get_progress_bus()
+        queue = bus.subscribe(task.id)
+        try:
+            channel.dispatch(payload(channel.origin))
+            channel.dispatch("not json")
+            channel.dispatch(payload("other-host:1"))
+            await asyncio.sleep(0.05)
+            first = _decode(queue.get_nowait().split("\n", 1)[1])
+            assert queue.empty()
+
+            # 之后的通知只推送新行
+            task.progress_message += "\n[10:00:02] 完成"
+            task.progress_seq = 3
+            db_session.commit()
+            channel.dispatch(payload("other-host:1"))
+            await asyncio.sleep(0.05)
+            second = _decode(queue.get_nowait().split("\n", 1)[1])
+        finally:
+            bus.unsubscribe(task.id, queue)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["reset"] and first["seq"] == 2 and first["status"] == "running"
+    assert first["message"] == "[10:00:01] 已保存 3 条"
+    assert first["counters"] == {"completed_count": 3}
+    assert not second["reset"] and second["seq"] == 3
+    assert second["lines"] == [{"seq": 3, "text": "[10:00:02] 完成"}]
+    assert second["counters"] == {}
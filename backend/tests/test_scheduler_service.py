@@ -0,0 +1,148 @@
+"""
+定时任务调度服务测试
+"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.scheduled_task import ScheduledTask, ScheduledTaskRun
+from app.models.task import Task, TaskQueueItem
+from app.services import task_service as task_service_module
+from app.services.scheduler_service import SchedulerService
+
+
+@pytest.mark.unit
+def test_crawl_run_completes_when_task_finishes(
+    db_session: Session, worker_sessions, monkeypatch
+):
+    """测试定时爬虫任务启动后立即返回，任务结束后才完成执行记录"""
+    monkeypatch.setattr(task_service_module, "_finish_listeners", [])
+    service = SchedulerService()
+    assert task_service_module._finish_listeners == [service._on_task_finished]
+
+    scheduled = ScheduledTask(
+        task_type="crawl_task",
+        task_name="每日爬取",
+        cron_expression="0 2 * * *",
+        config_json={
+            "data_sources": [
+                {
+                    "name": "自然资源部",
+                    "base_url": "https://gi.mnr.gov.cn/",
+                    "search_api": "https://search.mnr.gov.cn/was5/web/search",
+                    "ajax_api": "https://search.mnr.gov.cn/was/ajaxdata_jsonp.jsp",
+                }
+            ]
+        },
+        is_enabled=True,
+    )
+    db_session.add(scheduled)
+    db_session.commit()
+
+    # 两次执行：不等待任务结束，执行记录保持执行中
+    service._execute_scheduled_task(scheduled.id)
+    service._execute_scheduled_task(scheduled.id)
+    runs = db_session.query(ScheduledTaskRun).order_by(ScheduledTaskRun.id).all()
+    assert [run.status for run in runs] == ["running", "running"]
+    assert db_session.query(TaskQueueItem).count() == 2
+    db_session.refresh(scheduled)
+    assert scheduled.next_run_time is not None
+
+    completed = db_session.get(Task, runs[0].crawl_task_id)
+    completed.status = "completed"
+    completed.policy_count = 5
+    completed.success_count = 4
+    completed.failed_count = 1
+    db_session.commit()
+
+    # 定期检查完成已结束任务的执行记录，仍在执行的不处理
+    service._sweep_crawl_runs()
+    db_session.expire_all()
+    first, second = db_session.query(ScheduledTaskRun).order_by(ScheduledTaskRun.id)
+    assert first.status == "completed"
+    assert first.result_json["success_count"] == 4
+    assert second.status == "running"
+
+    # 任务结束回调：失败的任务记录错误信息，重复完成时忽略
+    failed = db_session.get(Task, second.crawl_task_id)
+    failed.status = "failed"
+    failed.error_message = "网络错误"
+    db_session.commit()
+    service._finish_crawl_run(failed.id)
+    service._finish_crawl_run(failed.id)
+    db_session.expire_all()
+    second = db_session.get(ScheduledTaskRun, second.id)
+    assert second.status == "failed" and second.error_message == "网络错误"
+    assert db_session.get(ScheduledTask, scheduled.id).last_run_status == "failed"
+
+
+@pytest.mark.unit
+def test_leader_runs_persistent_jobs_synced_from_database(
+    db_session: Session, worker_sessions, monkeypatch
+):
+    """测试当选leader后启动调度器，定时任务作业保存在数据库作业存储中并按数据库同步"""
+    monkeypatch.setattr(task_service_module, "_finish_listeners", [])
+    service = SchedulerService()
+    assert not service.is_leader() and service.scheduler is None
+
+    scheduled = ScheduledTask(
+        task_type="backup_task",
+        task_name="每周备份",
+        cron_expression="0 3 * * 1",
+        config_json={},
+        is_enabled=True,
+    )
+    db_session.add(scheduled)
+    db_session.commit()
+    job_id = f"scheduled_task_{scheduled.id}"
+
+    # SQLite 下不选主，启用即成为leader
+    service.enable_scheduler()
+    try:
+        assert service.is_leader() and service.scheduler.running
+        job = service.scheduler.get_job(job_id, jobstore="default")
+        assert job is not None and job.func_ref.endswith(":execute_scheduled_task")
+        assert service.scheduler.get_job("file_cleanup") is not None
+
+        # 其他进程修改了Cron表达式、禁用了任务：leader同步后生效
+        scheduled.cron_expression = "30 4 * * *"
+        db_session.commit()
+        service.sync_jobs()
+        job = service.scheduler.get_job(job_id, jobstore="default")
+        assert "hour='4'" in str(job.trigger)
+
+        scheduled.is_enabled = False
+        db_session.commit()
+        service.sync_jobs()
+        assert service.scheduler.get_job(job_id, jobstore="default") is None
+    finally:
+        service.disable_scheduler()
+    assert not service.is_leader() and service.scheduler is None
+
+
+@pytest.mark.unit
+def test_stop_scheduler_does_not_wait_for_running_jobs(monkeypatch):
+    """测试失去leader身份时停止调度器不等待执行中的作业（不阻塞选主线程）"""
+    import threading
+
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    monkeypatch.setattr(task_service_module, "_finish_listeners", [])
+    service = SchedulerService()
+    started, release = threading.Event(), threading.Event()
+
+    def long_job():
+        started.set()
+        release.wait(5)
+
+    service.scheduler = BackgroundScheduler()
+    service.scheduler.start()
+    service.scheduler.add_job(long_job)
+    try:
+        assert started.wait(2)
+        stopper = threading.Thread(target=service._stop_scheduler)
+        stopper.start()
+        stopper.join(1)
+        assert not stopper.is_alive() and service.scheduler is None
+    finally:
+        release.set()
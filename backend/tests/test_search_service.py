@@ -0,0 +1,40 @@
+"""
+搜索服务测试
+"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.services.policy_service import PolicyService
+from app.services.search_service import SearchService
+
+
+@pytest.mark.unit
+def test_keyword_search_matches_all_terms_and_escapes_wildcards(db_session: Session):
+    """测试多关键词需在同一字段全部匹配，% 和 _ 按字面匹配"""
+    policy_service = PolicyService()
+    for title, content in (
+        ("土地管理办法", "耕地保护 占用审批"),
+        ("矿产资源规划", "耕地 复垦"),
+        ("100%完成率通报", "进度"),
+    ):
+        policy_service.save_policy(
+            db_session,
+            {
+                "title": title,
+                "pub_date": "2024-01-15",
+                "source": f"https://gi.mnr.gov.cn/{title}.html",
+                "content": content,
+            },
+        )
+
+    search_service = SearchService()
+
+    results, total = search_service.search(db_session, "耕地 审批")
+    assert total == 1 and results[0].title == "土地管理办法"
+
+    results, total = search_service.search(db_session, "%")
+    assert total == 1 and results[0].title == "100%完成率通报"
+
+    policies, total = policy_service.get_policies(db_session, keyword="耕地")
+    assert total == 2
@@ -0,0 +1,110 @@
+"""
+任务删除与文件清理作业测试
+"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.attachment import Attachment
+from app.models.policy import Policy, PolicyContent
+from app.models.task import Task, TaskFilePurge, TaskPolicy
+from app.services.file_purge_service import FilePurgeService
+from app.services.s3_service import S3Service
+from app.services.task_service import TaskService
+
+
+def _policy_data(title: str):
+    return {
+        "title": title,
+        "pub_date": "2024-01-15",
+        "source": f"https://gi.mnr.gov.cn/{title}.html",
+        "content": f"{title} 正文",
+        "category": "规章",
+        "attachments": [
+            {
+                "file_name": f"{title}.pdf",
+                "file_url": f"https://gi.mnr.gov.cn/{title}.pdf",
+            }
+        ],
+    }
+
+
+@pytest.mark.unit
+def test_delete_task_is_set_based_and_queues_purge(
+    db_session: Session, tmp_path, monkeypatch
+):
+    """测试删除任务按集合删除记录，文件由清理作业删除任务目录"""
+    monkeypatch.setattr(settings, "storage_local_dir", str(tmp_path / "storage"))
+    monkeypatch.setattr(settings, "cache_enabled", False)
+    submitted = []
+    monkeypatch.setattr(
+        FilePurgeService, "submit", lambda self, pid: submitted.append(pid)
+    )
+
+    task = Task(task_name="待删除任务", task_type="manual", status="completed")
+    other = Task(task_name="保留任务", task_type="manual", status="completed")
+    db_session.add_all([task, other])
+    db_session.commit()
+
+    service = TaskService()
+    service.policy_service.save_policies_batch(
+        db_session, [_policy_data("政策1"), _policy_data("政策2")], task_id=task.id
+    )
+    service.policy_service.save_policies_batch(
+        db_session, [_policy_data("政策3")], task_id=other.id
+    )
+    for policy in db_session.query(Policy).filter(Policy.task_id == task.id):
+        db_session.add(TaskPolicy(task_id=task.id, policy_id=policy.id))
+    db_session.commit()
+
+    task_dir = tmp_path / "storage" / "policies" / str(task.id)
+    (task_dir / "1").mkdir(parents=True)
+    (task_dir / "1" / "1.md").write_text("正文")
+
+    purge = service.delete_task(db_session, task.id)
+
+    assert submitted == [purge.id]
+    assert purge.status == "pending"
+    assert db_session.query(Task).count() == 1
+    assert db_session.query(Policy).count() == 1
+    assert db_session.query(PolicyContent).count() == 1
+    assert db_session.query(Attachment).count() == 1
+    assert db_session.query(TaskPolicy).count() == 0
+    assert service.policy_service.facet_service.get_facets(db_session)[
+        "categories"
+    ] == [{"value": "规章", "count": 1}]
+
+    # 文件在作业执行前保留，执行后任务目录整体删除
+    assert task_dir.exists()
+    result = FilePurgeService().run(db_session, purge.id)
+    assert result.status == "completed"
+    assert result.deleted_files == 1
+    assert not task_dir.exists()
+
+    # 已完成的作业不会被重复执行
+    assert FilePurgeService().run(db_session, purge.id) is None
+    assert db_session.get(TaskFilePurge, purge.id).status == "completed"
+
+
+@pytest.mark.unit
+def test_s3_delete_files_in_batches():
+    """测试S3批量删除每批最多1000个对象，并统计失败的对象"""
+
+    class FakeClient:
+        def __init__(self):
+            self.batches = []
+
+        def delete_objects(self, Bucket, Delete):
+            keys = [obj["Key"] for obj in Delete["Objects"]]
+            self.batches.append(keys)
+            return {"Errors": [{"Key": keys[0], "Code": "AccessDenied"}]}
+
+    s3_service = S3Service.__new__(S3Service)
+    s3_service.client = FakeClient()
+    s3_service.bucket_name = "bucket"
+
+    deleted, failed = s3_service.delete_files(f"key-{i}" for i in range(2500))
+
+    assert [len(batch) for batch in s3_service.client.batches] == [1000, 1000, 500]
+    assert (deleted, failed) == (2497, 3)
@@ -0,0 +1,237 @@
+"""
+爬虫任务队列测试
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.task import Task, TaskQueueItem
+from app.services.task_queue_service import TaskQueueService
+from app.services.task_service import TaskService
+
+
+def _create_task(db: Session, name: str) -> Task:
+    task = Task(task_name=name, task_type="crawl_task", status="pending")
+    db.add(task)
+    db.commit()
+    return task
+
+
+@pytest.mark.unit
+def test_start_task_enqueues_and_workers_claim_once(db_session: Session):
+    """测试启动任务写入队列，任务只能被一个worker领取，租约过期后可重新领取"""
+    service = TaskService()
+    queue = TaskQueueService()
+    first = _create_task(db_session, "任务A")
+    second = _create_task(db_session, "任务B")
+
+    service.start_task(db_session, first.id, background=True)
+    service.start_task(db_session, second.id, background=True)
+    assert db_session.query(TaskQueueItem).count() == 2
+    assert first.status == "running"
+
+    # 按入队顺序领取，已领取的任务不会被再次领取
+    assert queue.claim(db_session, "worker-1") == first.id
+    assert queue.claim(db_session, "worker-2") == second.id
+    assert queue.claim(db_session, "worker-3") is None
+
+    assert queue.heartbeat(db_session, "worker-1", [first.id, second.id]) == {first.id}
+    db_session.commit()
+
+    # worker-1 长时间未续租，租约过期后由其他worker重新领取
+    item = db_session.query(TaskQueueItem).filter_by(task_id=first.id).one()
+    item.heartbeat_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    db_session.commit()
+    assert queue.claim(db_session, "worker-3") == first.id
+    db_session.refresh(item)
+    assert item.claimed_by == "worker-3" and item.attempts == 2
+    assert queue.heartbeat(db_session, "worker-1", [first.id]) == set()
+
+    queue.complete(db_session, first.id, "worker-3")
+    assert db_session.query(TaskQueueItem).filter_by(task_id=first.id).count() == 0
+
+
+@pytest.mark.unit
+def test_stop_before_claim_and_release(db_session: Session):
+    """测试领取前停止的任务移出队列，worker退出时执行中的任务放回队列"""
+    service = TaskService()
+    queue = TaskQueueService()
+    stopped = _create_task(db_session, "任务C")
+    running = _create_task(db_session, "任务D")
+
+    service.start_task(db_session, stopped.id, background=True)
+    assert service.pause_task(db_session, stopped.id)
+    assert db_session.query(TaskQueueItem).filter_by(task_id=stopped.id).count() == 0
+
+    service.start_task(db_session, running.id, background=True)
+    assert queue.claim(db_session, "worker-1") == running.id
+
+    # 租约未过期时不能重复启动
+    running.status = "paused"
+    db_session.commit()
+    with pytest.raises(ValueError):
+        service.start_task(db_session, running.id, background=True)
+    running.status = "running"
+    db_session.commit()
+
+    assert queue.release(db_session, "worker-1") == 1
+    assert queue.claim(db_session, "worker-2") == running.id
+
+
+@pytest.mark.unit
+def test_admission_priority_and_source_caps(db_session: Session, monkeypatch):
+    """测试领取按优先级进行，并受全局和数据源并发上限约束，排队任务有预计开始时间"""
+    monkeypatch.setattr(settings, "crawl_max_running_tasks", 2)
+    monkeypatch.setattr(settings, "crawl_max_tasks_per_source", 1)
+    monkeypatch.setattr(settings, "crawl_default_duration_minutes", 30)
+    service = TaskService()
+    queue = TaskQueueService()
+
+    def create(name: str, source: str) -> Task:
+        task = _create_task(db_session, name)
+        task.config_json = {"data_sources": [{"name": source}]}
+        db_session.commit()
+        return task
+
+    scheduled = create("定时任务", "自然资源部")
+    manual_same_source = create("手动任务A", "自然资源部")
+    manual_other = create("手动任务B", "广东省")
+    manual_third = create("手动任务C", "其他数据源")
+
+    service.start_task(
+        db_session,
+        scheduled.id,
+        background=True,
+        priority=TaskQueueService.PRIORITY_SCHEDULED,
+    )
+    for task in (manual_same_source, manual_other, manual_third):
+        service.start_task(db_session, task.id, background=True)
+
+    # 手动任务优先；同一数据源只能有一个任务在执行；全局最多2个
+    assert queue.claim(db_session, "worker-1") == manual_same_source.id
+    assert queue.claim(db_session, "worker-1") == manual_other.id
+    assert queue.claim(db_session, "worker-2") is None
+
+    entries = {entry["task_id"]: entry for entry in queue.get_queue(db_session)}
+    assert entries[manual_same_source.id]["status"] == "running"
+    assert entries[manual_third.id]["position"] == 1
+    assert entries[scheduled.id]["position"] == 2
+    earliest = datetime.now(timezone.utc) + timedelta(minutes=29)
+    assert entries[manual_third.id]["estimated_start_time"] > earliest
+    assert entries[scheduled.id]["estimated_start_time"] > earliest
+
+    # 手动任务A结束后，同数据源的定时任务仍排在手动任务C之后
+    queue.complete(db_session, manual_same_source.id, "worker-1")
+    assert queue.claim(db_session, "worker-2") == manual_third.id
+
+
+@pytest.mark.unit
+def test_heartbeat_stops_tasks_whose_lease_was_lost(
+    db_session: Session, worker_sessions
+):
+    """测试续租时租约已被其他worker领取的任务在本进程中停止，且不修改任务状态"""
+    from types import SimpleNamespace
+
+    from app.services.task_queue_service import TaskWorker
+
+    service = TaskService()
+    queue = TaskQueueService()
+    lost = _create_task(db_session, "任务E")
+    kept = _create_task(db_session, "任务F")
+    for task in (lost, kept):
+        service.start_task(db_session, task.id, background=True)
+        assert queue.claim(db_session, "worker-1") == task.id
+
+    # worker-1 长时间未续租，任务E 被 worker-2 重新领取
+    item = db_session.query(TaskQueueItem).filter_by(task_id=lost.id).one()
+    item.claimed_by = "worker-2"
+    db_session.commit()
+
+    worker = TaskWorker(concurrency=2)
+    worker.worker_id = "worker-1"
+    crawlers = {}
+    for task in (lost, kept):
+        crawlers[task.id] = SimpleNamespace(stop_requested=False)
+        worker.task_service._crawler_instances[task.id] = crawlers[task.id]
+        worker._running[task.id] = None
+
+    worker.heartbeat()
+
+    assert crawlers[lost.id].stop_requested and crawlers[lost.id].lease_lost
+    assert not crawlers[kept.id].stop_requested
+    db_session.expire_all()
+    assert db_session.get(Task, lost.id).status == "running"
+
+
+@pytest.mark.unit
+def test_worker_stop_stops_running_tasks_before_release(
+    db_session: Session, worker_sessions, monkeypatch
+):
+    """测试worker退出时先停止并等待执行中的任务，再放回未完成的任务"""
+    import threading
+    from types import SimpleNamespace
+
+    from app.services.task_queue_service import TaskWorker
+
+    service = TaskService()
+    queue = TaskQueueService()
+    interrupted = _create_task(db_session, "任务G")
+    finished = _create_task(db_session, "任务H")
+    for task in (interrupted, finished):
+        service.start_task(db_session, task.id, background=True)
+        assert queue.claim(db_session, "worker-1") == task.id
+
+    worker = TaskWorker(concurrency=2)
+    worker.worker_id = "worker-1"
+    crawler = SimpleNamespace(stop_requested=False)
+    started = threading.Event()
+
+    def fake_execute(task_id):
+        if task_id == finished.id:
+            db = worker_sessions()
+            db.get(Task, task_id).status = "completed"
+            db.commit()
+            db.close()
+            return
+        worker.task_service._crawler_instances[task_id] = crawler
+        started.set()
+        while not crawler.stop_requested:
+            threading.Event().wait(0.01)
+        worker.task_service._crawler_instances.pop(task_id, None)
+
+    monkeypatch.setattr(worker.task_service, "_execute_task", fake_execute)
+    release = worker.queue.release
+    alive_at_release = []
+
+    def checked_release(db, worker_id):
+        alive_at_release.extend(
+            thread.is_alive()
+            for thread in threading.enumerate()
+            if thread.name.startswith("task-")
+        )
+        return release(db, worker_id)
+
+    monkeypatch.setattr(worker.queue, "release", checked_release)
+
+    worker._threads = [threading.Thread(target=lambda: None)]
+    worker._threads[0].start()
+    worker._spawn(finished.id)
+    worker._spawn(interrupted.id)
+    assert started.wait(5)
+    while finished.id in worker.running_task_ids():
+        threading.Event().wait(0.01)
+
+    worker.stop(timeout=5)
+
+    assert crawler.stop_requested and crawler.lease_lost
+    assert not any(alive_at_release)
+    db_session.expire_all()
+    items = {item.task_id: item for item in db_session.query(TaskQueueItem).all()}
+    # 已执行完的任务不再放回队列，被中断的任务放回队列且状态不变
+    assert finished.id not in items
+    assert items[interrupted.id].status == "queued"
+    assert items[interrupted.id].claimed_by is None
+    assert db_session.get(Task, interrupted.id).status == "running"
@@ -0,0 +1,153 @@
+"""
+批量事务测试
+"""
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.policy import Policy
+from app.services.policy_service import PolicyService
+from app.services.unit_of_work import BatchedUnitOfWork
+
+
+def _save_work(service: PolicyService, title: str):
+    def work(session: Session):
+        policy = service.save_policy(
+            session,
+            {
+                "title": title,
+                "pub_date": "2024-01-15",
+                "source": f"https://gi.mnr.gov.cn/{title}.html",
+                "content": f"{title} 正文",
+            },
+            commit=False,
+        )
+        return policy.id
+
+    return work
+
+
+@pytest.mark.unit
+def test_batch_commits_by_size_and_isolates_failed_item(db_session: Session):
+    """测试达到条数上限才提交，单条失败只回滚该条"""
+    service = PolicyService()
+    uow = BatchedUnitOfWork(db_session, max_items=3, max_interval_ms=60000)
+    committed = []
+
+    def broken(session: Session):
+        # 缺少必填字段，flush时违反非空约束
+        session.add(Policy(title="无效政策"))
+        session.flush()
+
+    uow.add(_save_work(service, "政策A"), after_commit=committed.append)
+    with pytest.raises(IntegrityError):
+        uow.add(broken)
+    uow.add(_save_work(service, "政策B"), after_commit=committed.append)
+    assert committed == [] and uow.pending_count == 2
+
+    uow.add(_save_work(service, "政策C"), after_commit=committed.append)
+
+    assert len(committed) == 3
+    assert uow.commit_count == 1
+    db_session.rollback()
+    titles = {p.title for p in db_session.query(Policy).all()}
+    assert titles == {"政策A", "政策B", "政策C"}
+
+
+@pytest.mark.unit
+def test_failed_commit_retries_items_one_by_one(db_session: Session, monkeypatch):
+    """测试批量提交失败后回滚并逐条重放提交"""
+    service = PolicyService()
+    uow = BatchedUnitOfWork(db_session, max_items=10, max_interval_ms=60000)
+    original_commit = db_session.commit
+    calls = {"count": 0}
+
+    def flaky_commit():
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise RuntimeError("提交失败")
+        original_commit()
+
+    monkeypatch.setattr(db_session, "commit", flaky_commit)
+
+    committed = []
+    uow.add(_save_work(service, "政策A"), after_commit=committed.append)
+    uow.add(_save_work(service, "政策B"), after_commit=committed.append)
+    uow.flush()
+
+    assert len(committed) == 2
+    assert uow.retried_count == 2
+    assert uow.commit_count == 2
+    assert db_session.query(Policy).count() == 2
+
+
+@pytest.mark.unit
+def test_deferred_writes_run_at_commit(db_session: Session):
+    """测试推迟写入模式下写入函数在提交时才执行，失败的记录调用 on_failure"""
+    service = PolicyService()
+    uow = BatchedUnitOfWork(
+        db_session, max_items=3, max_interval_ms=60000, defer_writes=True
+    )
+    committed, failures = [], []
+
+    def broken(session: Session):
+        session.add(Policy(title="无效政策"))
+        session.flush()
+
+    uow.add(_save_work(service, "政策D"), after_commit=committed.append)
+    uow.add(broken, on_failure=failures.append)
+    assert db_session.query(Policy).count() == 0
+    assert not db_session.in_transaction() or not db_session.new
+
+    uow.add(_save_work(service, "政策E"), after_commit=committed.append)
+
+    assert len(committed) == 2 and len(failures) == 1
+    assert {p.title for p in db_session.query(Policy).all()} == {"政策D", "政策E"}
+
+
+@pytest.mark.unit
+def test_failed_commit_replays_side_writes(db_session: Session, monkeypatch):
+    """测试批量提交失败回滚后，任务统计等附带写入被重放，不随回滚丢失"""
+    from app.models.task import Task
+    from app.services.task_service import TaskService
+
+    task = Task(task_name="统计任务", task_type="manual", status="running")
+    db_session.add(task)
+    db_session.commit()
+    task_id = task.id
+
+    service = PolicyService()
+    uow = BatchedUnitOfWork(db_session, max_items=10, max_interval_ms=60000)
+    original_commit = db_session.commit
+    calls = {"count": 0}
+
+    def flaky_commit():
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise RuntimeError("提交失败")
+        original_commit()
+
+    monkeypatch.setattr(db_session, "commit", flaky_commit)
+
+    uow.add(_save_work(service, "政策A"))
+    uow.add_side_write(
+        "task_stats",
+        lambda session: TaskService._set_task_fields(
+            session, task_id, policy_count=3, success_count=1
+        ),
+    )
+    uow.add_side_write(
+        "task_stats",
+        lambda session: TaskService._set_task_fields(
+            session, task_id, policy_count=3, success_count=2, failed_count=1
+        ),
+    )
+    uow.flush()
+
+    # 附带写入重放一次（只保留最后登记的写入）并单独提交，记录逐条重放
+    assert uow.commit_count == 2 and uow.retried_count == 1
+    db_session.expire_all()
+    task = db_session.get(Task, task_id)
+    assert (task.policy_count, task.success_count, task.failed_count) == (3, 2, 1)
+    assert db_session.query(Policy).count() == 1
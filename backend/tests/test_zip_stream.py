@@ -0,0 +1,136 @@
+"""
+流式ZIP打包测试
+"""
+
+import io
+import zipfile
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.policy import Policy
+from app.models.task import Task, TaskPolicy
+from app.services.policy_service import PolicyService
+from app.services.zip_stream import stream_zip
+
+
+@pytest.mark.unit
+def test_stream_zip_yields_while_reading_files(tmp_path):
+    """测试ZIP边读取文件边输出，文件按需迭代，输出是有效的ZIP"""
+    big = tmp_path / "big.bin"
+    big.write_bytes(bytes(range(256)) * 1024)
+    small = tmp_path / "small.md"
+    small.write_text("政策正文", encoding="utf-8")
+
+    requested = []
+
+    def files():
+        for arcname, path in [
+            ("任务/docx/1_大文件.bin", big),
+            ("任务/markdown/2_政策.md", small),
+            ("任务/markdown/3_缺失.md", tmp_path / "missing.md"),
+        ]:
+            requested.append(arcname)
+            yield arcname, str(path)
+
+    chunks = stream_zip(files(), chunk_size=16 * 1024)
+    first = next(chunks)
+    # 读完第一个文件之前就开始输出，后面的文件尚未被请求
+    assert first and requested == ["任务/docx/1_大文件.bin"]
+
+    rest = list(chunks)
+    assert len(rest) > 4
+    archive = zipfile.ZipFile(io.BytesIO(first + b"".join(rest)))
+    assert archive.testzip() is None
+    assert archive.namelist() == ["任务/docx/1_大文件.bin", "任务/markdown/2_政策.md"]
+    assert archive.read("任务/docx/1_大文件.bin") == big.read_bytes()
+    assert archive.read("任务/markdown/2_政策.md").decode("utf-8") == "政策正文"
+    # 不可 seek 的输出使用数据描述符
+    assert all(info.flag_bits & 0x08 for info in archive.infolist())
+
+
+@pytest.mark.api
+def test_download_task_files_streams_and_generates_missing_files(
+    client, db_session: Session, worker_sessions, auth_token, tmp_path, monkeypatch
+):
+    """测试下载任务文件时已有文件直接打包，缺失的文件在打包时生成"""
+    monkeypatch.setattr(settings, "storage_local_dir", str(tmp_path / "storage"))
+    monkeypatch.setattr(settings, "cache_enabled", False)
+
+    task = Task(task_name="导出任务", task_type="manual", status="completed")
+    db_session.add(task)
+    db_session.commit()
+    PolicyService().save_policies_batch(
+        db_session,
+        [
+            {
+                "title": f"政策{i}",
+                "pub_date": "2024-01-15",
+                "source": f"https://gi.mnr.gov.cn/{i}.html",
+                "content": f"政策{i} 正文",
+            }
+            for i in (1, 2)
+        ],
+        task_id=task.id,
+    )
+    policies = db_session.query(Policy).order_by(Policy.id).all()
+    for policy in policies:
+        db_session.add(TaskPolicy(task_id=task.id, policy_id=policy.id))
+    db_session.commit()
+
+    existing = policies[0]
+    policy_dir = tmp_path / "storage" / "policies" / str(task.id) / str(existing.id)
+    policy_dir.mkdir(parents=True)
+    (policy_dir / f"{existing.id}.md").write_text("已保存的文件", encoding="utf-8")
+
+    response = client.get(
+        f"/api/tasks/{task.id}/download?file_format=markdown",
+        headers={"Authorization": f"Bearer {auth_token}"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    names = archive.namelist()
+    assert names == [
+        f"导出任务/markdown/{policy.id}_{policy.title}.md" for policy in policies
+    ]
+    assert archive.read(names[0]).decode("utf-8") == "已保存的文件"
+    assert "政策2 正文" in archive.read(names[1]).decode("utf-8")
+
+
+@pytest.mark.api
+def test_download_task_files_without_files_returns_404(
+    client, db_session: Session, worker_sessions, auth_token, monkeypatch
+):
+    """测试没有任何可下载的文件时返回404，而不是空ZIP"""
+    from app.api import tasks as tasks_api
+
+    task = Task(task_name="空任务", task_type="manual", status="completed")
+    db_session.add(task)
+    db_session.commit()
+    PolicyService().save_policies_batch(
+        db_session,
+        [
+            {
+                "title": "政策",
+                "pub_date": "2024-01-15",
+                "source": "https://gi.mnr.gov.cn/1.html",
+                "content": "正文",
+            }
+        ],
+        task_id=task.id,
+    )
+    policy = db_session.query(Policy).one()
+    db_session.add(TaskPolicy(task_id=task.id, policy_id=policy.id))
+    db_session.commit()
+    # 文件不存在且无法重新生成
+    monkeypatch.setattr(tasks_api, "_policy_export_file", lambda *args: None)
+
+    response = client.get(
+        f"/api/tasks/{task.id}/download?file_format=docx",
+        headers={"Authorization": f"Bearer {auth_token}"},
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "未找到任何可下载的文件"
@@ -1,5 +1,5 @@
 import apiClient from './client'
-import type { Task, TaskCreateRequest, TaskListResponse } from '../types/task'
+import type { Task, TaskCreateRequest, TaskListResponse, TaskProgressDelta } from '../types/task'
 
 export interface TaskListParams {
   page?: number
@@ -20,6 +20,13 @@ export const tasksApi = {
     return apiClient.get(`/api/tasks/${id}`).then((res) => res.data)
   },
 
+  // 获取增量进度（since 之后的新进度行和变化的计数器，进度未变化时服务端返回304）
+  getTaskProgress(id: number, since?: number): Promise<TaskProgressDelta> {
+    return apiClient
+      .get(`/api/tasks/${id}/progress`, { params: since !== undefined ? { since } : {} })
+      .then((res) => res.data)
+  },
+
   // 创建任务
   createTask(data: TaskCreateRequest, autoStart: boolean = true): Promise<Task> {
     return apiClient.post(`/api/tasks/?auto_start=${autoStart}`, data).then((res) => res.data)
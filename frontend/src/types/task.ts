@@ -10,6 +10,7 @@ export interface Task {
   result_json?: TaskResult
   error_message?: string
   progress_message?: string  // 实时进度消息
+  progress_seq?: number  // 进度消息最后一行的序号
   progress_data?: DetailedCrawlProgress  // 详细进度数据
   started_at?: string
   start_time?: string
@@ -87,8 +88,28 @@ export interface ProgressMessage {
   message?: string
   progress_message?: string
   progress_data?: DetailedCrawlProgress
+  seq?: number  // 最后一行进度消息的序号（SSE事件ID）
+  reset?: boolean  // 为真时 lines 是全部进度，替换本地进度消息
+  lines?: TaskProgressLine[]  // 新的进度行
+  counters?: Record<string, number>  // 变化过的计数器
   start_time?: string
   updated_at?: string
   timestamp?: string
 }
 
+// 带序号的进度消息行
+export interface TaskProgressLine {
+  seq: number
+  text: string
+}
+
+// 增量进度（GET /api/tasks/{id}/progress?since=seq）
+export interface TaskProgressDelta {
+  task_id: number
+  status: string
+  seq: number
+  reset: boolean
+  lines: TaskProgressLine[]
+  counters: Record<string, number>
+}
+